@@ -0,0 +1,47 @@
+"""add llm_calls telemetry table
+
+Revision ID: 004_add_llm_calls
+Revises: 003_add_feedback
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004_add_llm_calls'
+down_revision = '003_add_feedback'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'llm_calls',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('task', sa.String(length=30), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=True),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=True),
+        sa.Column('completion_tokens', sa.Integer(), nullable=True),
+        sa.Column('queue_wait_ms', sa.Float(), nullable=True),
+        sa.Column('ttft_ms', sa.Float(), nullable=True),
+        sa.Column('latency_ms', sa.Float(), nullable=True),
+        sa.Column('retries', sa.Integer(), nullable=True),
+        sa.Column('parse_outcome', sa.String(length=10), nullable=True),
+        sa.Column('cache_hit', sa.Boolean(), nullable=True),
+        sa.Column('status', sa.String(length=10), nullable=False),
+        sa.Column('error_type', sa.String(length=100), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_llm_calls_id', 'llm_calls', ['id'])
+    op.create_index('ix_llm_calls_created_at', 'llm_calls', ['created_at'])
+    op.create_index('ix_llm_calls_task_created_at', 'llm_calls', ['task', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_llm_calls_task_created_at', table_name='llm_calls')
+    op.drop_index('ix_llm_calls_created_at', table_name='llm_calls')
+    op.drop_index('ix_llm_calls_id', table_name='llm_calls')
+    op.drop_table('llm_calls')
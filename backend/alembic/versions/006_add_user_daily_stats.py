@@ -0,0 +1,37 @@
+"""add per-user daily analysis stats rollup
+
+Revision ID: 006_add_user_daily_stats
+Revises: 005_add_jobs
+Create Date: 2026-10-19 12:00:00
+
+Existing analyses are not copied here; backfill with
+`python -m app.database.stats_rollup` after upgrading.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006_add_user_daily_stats'
+down_revision = '005_add_jobs'
+branch_labels = None
+depends_on = None
+
+COUNTERS = ['analyses', 'scored', 'improved', 'score_0_20', 'score_21_40', 'score_41_60', 'score_61_80', 'score_81_100']
+
+
+def upgrade():
+    op.create_table(
+        'user_daily_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('score_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('score_max', sa.Float(), nullable=True),
+        *(sa.Column(name, sa.Integer(), nullable=False, server_default='0') for name in COUNTERS),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+
+
+def downgrade():
+    op.drop_table('user_daily_stats')
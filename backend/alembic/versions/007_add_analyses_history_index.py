@@ -0,0 +1,28 @@
+"""add analyses (user_id, created_at, id) index for history pages
+
+Revision ID: 007_add_analyses_history_index
+Revises: 006_add_user_daily_stats
+Create Date: 2026-10-19 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007_add_analyses_history_index'
+down_revision = '006_add_user_daily_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_analyses_user_id_created_at_id',
+        'analyses',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')]
+    )
+
+
+def downgrade():
+    op.drop_index('ix_analyses_user_id_created_at_id', table_name='analyses')
@@ -0,0 +1,45 @@
+"""store resume versions as snapshots plus deltas
+
+Revision ID: 008_add_version_deltas
+Revises: 007_add_analyses_history_index
+Create Date: 2026-10-19 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008_add_version_deltas'
+down_revision = '007_add_analyses_history_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Numbers used to be count + 1, so a delete could repeat one: renumber those analyses
+    op.execute("""
+        UPDATE resume_versions SET version_number = (
+            SELECT COUNT(*) FROM resume_versions AS other
+            WHERE other.analysis_id = resume_versions.analysis_id
+              AND (other.version_number < resume_versions.version_number
+                   OR (other.version_number = resume_versions.version_number AND other.id <= resume_versions.id))
+        )
+        WHERE analysis_id IN (
+            SELECT analysis_id FROM resume_versions GROUP BY analysis_id, version_number HAVING COUNT(*) > 1
+        )
+    """)
+    with op.batch_alter_table('resume_versions') as batch_op:
+        batch_op.add_column(sa.Column('encoding', sa.String(length=10), server_default='text', nullable=False))
+        batch_op.add_column(sa.Column('payload', sa.LargeBinary(), nullable=True))
+        batch_op.alter_column('latex_content', existing_type=sa.Text(), nullable=True)
+        batch_op.create_unique_constraint('uq_analysis_version', ['analysis_id', 'version_number'])
+
+
+def downgrade():
+    # Snapshot and delta rows have no latex_content: this fails on NOT NULL while any remain
+    with op.batch_alter_table('resume_versions') as batch_op:
+        batch_op.drop_constraint('uq_analysis_version', type_='unique')
+        batch_op.alter_column('latex_content', existing_type=sa.Text(), nullable=False)
+        batch_op.drop_column('payload')
+        batch_op.drop_column('encoding')
@@ -0,0 +1,32 @@
+"""add precomputed size, hash and diff stats to resume versions
+
+Revision ID: 009_add_version_stats
+Revises: 008_add_version_deltas
+Create Date: 2026-10-19 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009_add_version_stats'
+down_revision = '008_add_version_deltas'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('resume_versions') as batch_op:
+        batch_op.add_column(sa.Column('size', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('lines_added', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('lines_removed', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('resume_versions') as batch_op:
+        batch_op.drop_column('lines_removed')
+        batch_op.drop_column('lines_added')
+        batch_op.drop_column('content_hash')
+        batch_op.drop_column('size')
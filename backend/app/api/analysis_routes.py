@@ -1,19 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, UploadFile, File, Form
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, load_only, undefer, undefer_group
+from typing import AsyncIterator, Optional
+import json
 import os
 import tempfile
+import time
 from datetime import datetime
 
-from app.database.database import get_db
+from app.database.database import get_async_db, get_db, set_statement_timeout
+from app.database.queries import get_user_analysis
 from app.database.models import User, Resume, JobDescription, Analysis
 from app.auth.auth import get_current_active_user
 from app.services.resume_parser import ResumeParser
-from app.services.groq_analyzer import GroqAnalyzer
+from app.services.groq_analyzer import GroqAnalyzer, expected_analysis_seconds
+from app.services.job_handlers import JOB_ANALYZE, JOB_IMPROVE, apply_analysis_result
+from app.services.job_queue import enqueue
 from app.services.resume_editor import ResumeEditor
-from app.services.supabase_storage import SupabaseStorage
-from app.services.realtime_service import RealtimeService
+from app.services.supabase_storage import SupabaseStorage, get_storage
+from app.services.realtime_service import RealtimeService, get_realtime_service
+from app.services.progress_broker import ProgressEvent, get_progress_broker
 from app.config import settings
+from app.core import metrics
+from app.core.exceptions import RequestCancelledError, ResumeAnalyzerException
+from app.core.task_graph import TaskGraph
+from app.core.request_context import (
+    cancel_on_disconnect,
+    deadline_scope,
+    raise_if_cancelled,
+    remaining_time,
+    run_cancellable,
+    within_deadline,
+)
 from pydantic import BaseModel
 
 
@@ -23,13 +42,13 @@ router = APIRouter(prefix="/api/analyze", tags=["Analysis"])
 class AnalysisResponse(BaseModel):
     """Analysis response schema"""
     id: int
-    match_score: float
-    matched_skills: list
-    missing_skills: list
-    matched_keywords: list
-    missing_keywords: list
-    improvements: list
-    summary: str
+    match_score: Optional[float] = None
+    matched_skills: Optional[list] = None
+    missing_skills: Optional[list] = None
+    matched_keywords: Optional[list] = None
+    missing_keywords: Optional[list] = None
+    improvements: Optional[list] = None
+    summary: Optional[str] = None
     progress_status: str
     progress_percentage: int
     improved_latex: Optional[str] = None
@@ -46,16 +65,25 @@ class ImproveResumeRequest(BaseModel):
 
 @router.post("", response_model=AnalysisResponse, status_code=status.HTTP_201_CREATED)
 async def analyze_resume(
+    request: Request,
+    response: Response,
     resume_file: UploadFile = File(...),
     jd_text: str = Form(...),
     jd_title: Optional[str] = Form(None),
     jd_company: Optional[str] = Form(None),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    storage: SupabaseStorage = Depends(get_storage),
+    realtime: RealtimeService = Depends(get_realtime_service)
 ):
     """
     Analyze resume against job description
     Upload resume file and provide JD text for comprehensive analysis
+    With JOB_QUEUE_ENABLED the LLM analysis is queued for a worker and the
+    endpoint answers 202 with the job id. Otherwise it runs under
+    ANALYZE_SLO_SECONDS: when too little budget is left for the LLM, the
+    analysis degrades to the local scorer or, with ANALYZE_DEGRADATION="async",
+    is queued as well
     """
     
     # Validate file type
@@ -77,119 +105,197 @@ async def analyze_resume(
     
     await resume_file.seek(0)  # Reset file pointer
     
+    started = time.monotonic()
     try:
-        # Upload to Supabase Storage
-        storage = SupabaseStorage()
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{timestamp}_{resume_file.filename}"
-        
-        # Upload file
-        storage_path = await storage.upload_resume(
-            file_path=filename,
-            file_content=contents,
-            user_id=current_user.id
+        return await _analyze_within_slo(
+            request, response, resume_file, contents, file_ext,
+            jd_text, jd_title, jd_company, current_user, db, storage, realtime
         )
+    finally:
+        elapsed = time.monotonic() - started
+        metrics.histogram("http.analyze.seconds").observe(elapsed)
+        if elapsed > settings.ANALYZE_SLO_SECONDS:
+            metrics.counter("http.analyze.slo_violations").inc()
+
+
+async def _analyze_within_slo(request: Request, response: Response, resume_file: UploadFile,
+                              contents: bytes, file_ext: str, jd_text: str, jd_title: Optional[str],
+                              jd_company: Optional[str], current_user: User, db: Session,
+                              storage: SupabaseStorage, realtime: RealtimeService):
+    """
+    The pipeline as a dependency graph:
+
+        upload --.
+        parse ---+--> rows --.
+              '-----> llm ---+--> finish
+
+    Upload and parse overlap, and the DB writes overlap the LLM analysis;
+    if any stage fails, the rest are cancelled and committed rows and the
+    uploaded file are removed.
+    """
+    async with cancel_on_disconnect(request, "analyze"), deadline_scope(settings.ANALYZE_SLO_SECONDS):
+        async def upload():
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            return await within_deadline(storage.upload_resume(
+                file_path=f"{timestamp}_{resume_file.filename}",
+                file_content=contents,
+                user_id=current_user.id
+            ), "upload")
         
-        # Save to temp file for parsing
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
-            tmp_file.write(contents)
-            tmp_path = tmp_file.name
-        
-        # Parse resume
-        parser = ResumeParser()
-        parsed_data = parser.parse_resume(tmp_path)
-        
-        # Clean up temp file
-        os.unlink(tmp_path)
+        async def remove_upload(storage_path):
+            await storage.delete_file("resumes", storage_path)
         
-        # Create resume record
-        resume = Resume(
-            user_id=current_user.id,
-            filename=resume_file.filename,
-            file_path=f"supabase://{storage_path}",  # Mark as Supabase path
-            storage_path=storage_path,
-            storage_bucket="resumes",
-            file_type=file_ext,
-            extracted_text=parsed_data['raw_text'],
-            parsed_data=parsed_data
-        )
-        db.add(resume)
-        db.flush()
+        async def parse():
+            # Save to temp file for parsing
+            with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
+                tmp_file.write(contents)
+                tmp_path = tmp_file.name
+            try:
+                # Off the event loop; abandoned if the client disconnects
+                return await run_cancellable(ResumeParser().parse_resume, tmp_path, stage="parse")
+            finally:
+                os.unlink(tmp_path)
         
-        # Create job description record
-        job_desc = JobDescription(
-            title=jd_title or "Untitled Position",
-            company=jd_company,
-            description=jd_text
-        )
-        db.add(job_desc)
-        db.flush()
+        async def rows(parsed_data, storage_path):
+            # Inserted and committed without awaiting in between: the session is
+            # synchronous, so an open write transaction must never span a suspension
+            set_statement_timeout(db, remaining_time())
+            resume = Resume(
+                user_id=current_user.id,
+                filename=resume_file.filename,
+                file_path=f"supabase://{storage_path}",  # Mark as Supabase path
+                storage_path=storage_path,
+                storage_bucket="resumes",
+                file_type=file_ext,
+                extracted_text=parsed_data['raw_text'],
+                parsed_data=parsed_data
+            )
+            job_desc = JobDescription(
+                title=jd_title or "Untitled Position",
+                company=jd_company,
+                description=jd_text
+            )
+            db.add_all([resume, job_desc])
+            db.flush()
+            analysis = Analysis(
+                user_id=current_user.id,
+                resume_id=resume.id,
+                job_description_id=job_desc.id,
+                progress_status="analyzing",
+                progress_percentage=10
+            )
+            db.add(analysis)
+            db.flush()
+            job = None
+            if settings.JOB_QUEUE_ENABLED:
+                # Rows and job commit together, so a worker never sees one without the other
+                analysis.progress_status = "queued"
+                job = enqueue(db, JOB_ANALYZE, current_user.id, analysis_id=analysis.id)
+            raise_if_cancelled()
+            db.commit()
+            if job is None:
+                await realtime.update_analysis_progress(analysis.id, "analyzing", 30)
+            return analysis, job
         
-        # Create analysis record with initial status
-        analysis = Analysis(
-            user_id=current_user.id,
-            resume_id=resume.id,
-            job_description_id=job_desc.id,
-            progress_status="analyzing",
-            progress_percentage=10
-        )
-        db.add(analysis)
-        db.commit()
-        db.refresh(analysis)
+        async def remove_rows(committed):
+            analysis, _ = committed
+            _discard_rows(db, [analysis, analysis.job_description, analysis.resume])
         
-        # Update realtime progress
-        realtime = RealtimeService()
-        await realtime.update_analysis_progress(analysis.id, "analyzing", 30)
+        async def llm(parsed_data):
+            if settings.JOB_QUEUE_ENABLED:
+                return None
+            if settings.ANALYZE_DEGRADATION == "async" and remaining_time() < expected_analysis_seconds():
+                # Not enough budget left for the LLM: finish on a worker
+                metrics.counter("deadline.degraded.queued").inc()
+                return None
+            # Off the event loop: the call may queue for rate budget
+            return await run_cancellable(
+                GroqAnalyzer().analyze_resume_jd_match,
+                resume_text=parsed_data['raw_text'],
+                jd_text=jd_text,
+                stage="llm"
+            )
         
-        # Analyze with AI
-        analyzer = GroqAnalyzer()
-        analysis_result = analyzer.analyze_resume_jd_match(
-            resume_text=parsed_data['raw_text'],
-            jd_text=jd_text
-        )
+        async def finish(committed, analysis_result):
+            analysis, job = committed
+            if analysis_result is None:
+                if job is None:
+                    analysis.progress_status = "queued"
+                    job = enqueue(db, JOB_ANALYZE, current_user.id, analysis_id=analysis.id)
+                    db.commit()
+                return _accepted(analysis.id, job.id)
+            
+            await realtime.update_analysis_progress(analysis.id, "analyzing", 80)
+            apply_analysis_result(analysis, analysis_result)
+            raise_if_cancelled()
+            set_statement_timeout(db, remaining_time())
+            db.commit()
+            db.refresh(analysis)
+            
+            # Broadcast completion
+            await realtime.broadcast_completion(analysis.id, {"match_score": analysis.match_score})
+            return analysis
         
-        # Update realtime progress
-        await realtime.update_analysis_progress(analysis.id, "analyzing", 80)
+        graph = TaskGraph("analyze")
+        graph.add("upload", upload, undo=remove_upload)
+        graph.add("parse", parse)
+        graph.add("rows", rows, after=["parse", "upload"], undo=remove_rows)
+        graph.add("llm", llm, after=["parse"])
+        graph.add("finish", finish, after=["rows", "llm"])
         
-        # Update analysis with results
-        analysis.match_score = analysis_result['match_score']
-        analysis.matched_skills = analysis_result['matched_skills']
-        analysis.missing_skills = analysis_result['missing_skills']
-        analysis.matched_keywords = analysis_result['matched_keywords']
-        analysis.missing_keywords = analysis_result['missing_keywords']
-        analysis.improvements = analysis_result['improvements']
-        analysis.summary = analysis_result['summary']
-        analysis.progress_status = "completed"
-        analysis.progress_percentage = 100
+        try:
+            result = (await graph.run())["finish"]
+        except ResumeAnalyzerException:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error analyzing resume: {str(e)}"
+            )
         
+        timing = graph.server_timing()
+        if isinstance(result, JSONResponse):
+            result.headers["Server-Timing"] = timing
+        else:
+            response.headers["Server-Timing"] = timing
+        return result
+
+
+def _accepted(analysis_id: int, job_id: int) -> JSONResponse:
+    """202 for work handed to the job queue; `id` keeps the analysis link working"""
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content={
+        "id": analysis_id,
+        "analysis_id": analysis_id,
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/api/jobs/{job_id}"
+    })
+
+
+def _discard_rows(db: Session, rows: list):
+    """Remove rows an abandoned analysis already committed (best effort)"""
+    try:
+        db.rollback()
+        for row in rows:
+            db.delete(row)
         db.commit()
-        db.refresh(analysis)
-        
-        # Broadcast completion
-        await realtime.broadcast_completion(analysis.id, {"match_score": analysis.match_score})
-        
-        return analysis
-        
-    except Exception as e:
+    except Exception:
         db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error analyzing resume: {str(e)}"
-        )
 
 
 @router.get("/{analysis_id}", response_model=AnalysisResponse)
 async def get_analysis(
     analysis_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get specific analysis by ID"""
     
-    analysis = db.query(Analysis).filter(
-        Analysis.id == analysis_id,
-        Analysis.user_id == current_user.id
-    ).first()
+    analysis = await get_user_analysis(
+        db, analysis_id, current_user.id, undefer_group("results"), undefer(Analysis.improved_latex)
+    )
     
     if not analysis:
         raise HTTPException(
@@ -200,19 +306,80 @@ async def get_analysis(
     return analysis
 
 
+@router.get("/{analysis_id}/events")
+async def analysis_events(
+    analysis_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Server-sent progress events for an analysis
+    Starts with the current state and ends after the completed/failed event;
+    idle streams get a comment every PROGRESS_KEEPALIVE_SECONDS
+    """
+    
+    analysis = await get_user_analysis(
+        db, analysis_id, current_user.id, load_only(Analysis.progress_status, Analysis.progress_percentage)
+    )
+    
+    if not analysis:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis not found"
+        )
+    
+    stored = ProgressEvent(analysis.id, analysis.progress_status or "pending", analysis.progress_percentage or 0)
+    # Nothing below needs the database. FastAPI 0.109 closes yield dependencies before
+    # the body streams; closing here just makes the hand-back explicit. A streaming
+    # body that does need the database must open its own session
+    await db.close()
+    
+    return StreamingResponse(
+        _progress_stream(stored),
+        media_type="text/event-stream",
+        # identity keeps GZipMiddleware from buffering events
+        headers={"Cache-Control": "no-cache", "Content-Encoding": "identity", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _progress_stream(stored: ProgressEvent) -> AsyncIterator[str]:
+    if stored.terminal:
+        yield _sse(stored)
+        return
+    broker = get_progress_broker()
+    if broker.latest(stored.analysis_id) is None:
+        # Nothing published in this process yet (e.g. a queued job): start from the row
+        yield _sse(stored)
+    async for event in broker.subscribe(stored.analysis_id, keepalive=settings.PROGRESS_KEEPALIVE_SECONDS):
+        yield _sse(event) if event is not None else ": keepalive\n\n"
+
+
+def _sse(event: ProgressEvent) -> str:
+    return f"event: progress\ndata: {json.dumps(event.to_dict())}\n\n"
+
+
 @router.post("/improve")
 async def improve_resume(
     request: ImproveResumeRequest,
+    http_request: Request,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    storage: SupabaseStorage = Depends(get_storage),
+    realtime: RealtimeService = Depends(get_realtime_service)
 ):
     """
     Generate improved resume based on analysis
-    Returns LaTeX content and PDF path
+    Returns LaTeX content and PDF path, or 202 with a job id when
+    JOB_QUEUE_ENABLED
     """
     
-    # Get analysis
-    analysis = db.query(Analysis).filter(
+    # Get analysis, with everything the editor prompt reads in one query
+    analysis = db.query(Analysis).options(
+        undefer(Analysis.missing_skills),
+        undefer(Analysis.missing_keywords),
+        joinedload(Analysis.resume).load_only(Resume.extracted_text),
+        joinedload(Analysis.job_description),
+    ).filter(
         Analysis.id == request.analysis_id,
         Analysis.user_id == current_user.id
     ).first()
@@ -223,60 +390,82 @@ async def improve_resume(
             detail="Analysis not found"
         )
     
-    try:
-        # Update progress
-        realtime = RealtimeService()
-        await realtime.update_analysis_progress(analysis.id, "improving", 0)
-        
-        # Generate improved resume LaTeX content (skip PDF compilation for now)
-        editor = ResumeEditor()
-        
-        # Get improved content from AI
-        improved_data = editor.improve_resume_content(
-            resume_text=analysis.resume.extracted_text,
-            jd_text=analysis.job_description.description,
-            missing_skills=analysis.missing_skills or [],
-            missing_keywords=analysis.missing_keywords or []
-        )
-        
-        await realtime.update_analysis_progress(analysis.id, "improving", 50)
-        
-        # Generate LaTeX from improved data
-        from app.services.latex_service import LaTeXService
-        latex_service = LaTeXService()
-        latex_content = latex_service.generate_latex_from_template(improved_data)
-        
-        await realtime.update_analysis_progress(analysis.id, "improving", 70)
-        
-        # Upload LaTeX file to Supabase
-        storage = SupabaseStorage()
-        latex_filename = f"improved_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tex"
-        latex_storage_path = await storage.upload_generated_resume(
-            file_path=latex_filename,
-            file_content=latex_content.encode('utf-8'),
-            analysis_id=analysis.id
-        )
-        
-        # Update analysis with improved resume (LaTeX only, PDF can be generated locally)
-        analysis.improved_latex = latex_content
-        analysis.latex_storage_path = latex_storage_path
-        analysis.progress_status = "completed"
-        analysis.progress_percentage = 100
-        
+    if settings.JOB_QUEUE_ENABLED:
+        analysis.progress_status, analysis.progress_percentage = "queued", 0
+        job = enqueue(db, JOB_IMPROVE, current_user.id, analysis_id=analysis.id)
         db.commit()
-        
-        await realtime.broadcast_completion(analysis.id, {"improved": True})
-        
-        return {
-            "message": "Resume improved successfully",
-            "analysis_id": analysis.id,
-            "latex_available": True,
-            "pdf_available": False,
-            "note": "LaTeX file generated. You can download and compile it locally to create PDF."
-        }
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error improving resume: {str(e)}"
-        )
+        return _accepted(analysis.id, job.id)
+    
+    async with cancel_on_disconnect(http_request, "improve"):
+        previous_progress = (analysis.progress_status, analysis.progress_percentage)
+        latex_storage_path = None
+        try:
+            # Update progress
+            await realtime.update_analysis_progress(analysis.id, "improving", 0)
+            
+            # Generate improved resume LaTeX content (skip PDF compilation for now)
+            editor = ResumeEditor()
+            
+            # Get improved content from AI
+            improved_data = await run_cancellable(
+                editor.improve_resume_content,
+                resume_text=analysis.resume.extracted_text,
+                jd_text=analysis.job_description.description,
+                missing_skills=analysis.missing_skills or [],
+                missing_keywords=analysis.missing_keywords or []
+            )
+            
+            await realtime.update_analysis_progress(analysis.id, "improving", 50)
+            
+            # Generate LaTeX from improved data
+            from app.services.latex_service import LaTeXService
+            latex_service = LaTeXService()
+            latex_content = latex_service.generate_latex_from_template(improved_data)
+            
+            await realtime.update_analysis_progress(analysis.id, "improving", 70)
+            
+            # Upload LaTeX file to Supabase
+            raise_if_cancelled()
+            latex_filename = f"improved_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tex"
+            latex_storage_path = await storage.upload_generated_resume(
+                file_path=latex_filename,
+                file_content=latex_content.encode('utf-8'),
+                analysis_id=analysis.id
+            )
+            
+            # Update analysis with improved resume (LaTeX only, PDF can be generated locally)
+            analysis.improved_latex = latex_content
+            analysis.latex_storage_path = latex_storage_path
+            analysis.progress_status = "completed"
+            analysis.progress_percentage = 100
+            
+            raise_if_cancelled()
+            db.commit()
+            
+            await realtime.broadcast_completion(analysis.id, {"improved": True})
+            
+            return {
+                "message": "Resume improved successfully",
+                "analysis_id": analysis.id,
+                "latex_available": True,
+                "pdf_available": False,
+                "note": "LaTeX file generated. You can download and compile it locally to create PDF."
+            }
+            
+        except RequestCancelledError:
+            # Leave the analysis as it was before the improvement started
+            db.rollback()
+            await realtime.update_analysis_progress(analysis.id, *previous_progress)
+            if latex_storage_path:
+                try:
+                    await storage.delete_file("generated-resumes", latex_storage_path)
+                except Exception:
+                    pass
+            raise
+        except ResumeAnalyzerException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error improving resume: {str(e)}"
+            )
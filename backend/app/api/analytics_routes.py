@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import func, extract
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel
 
-from app.database.database import get_db
-from app.database.models import User, Analysis
+from app.database.database import get_async_db
+from app.database.models import User
+from app.database.queries import user_rollup_stats, user_rollup_trends
 from app.auth.auth import get_current_active_user
+from app.services.history_export import ENCODERS, EXPORT_FORMATS, export_stream
 
 
 router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
@@ -41,7 +44,7 @@ class AnalyticsResponse(BaseModel):
 async def get_user_analytics(
     period: str = Query(default="month", regex="^(week|month|year|all)$"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get comprehensive analytics for the current user
@@ -55,7 +58,7 @@ async def get_user_analytics(
         Full analytics data including stats, trends, and distributions
     """
     # Calculate date range based on period
-    now = datetime.utcnow()
+    now = datetime.now(timezone.utc)
     if period == "week":
         start_date = now - timedelta(days=7)
     elif period == "month":
@@ -63,15 +66,11 @@ async def get_user_analytics(
     elif period == "year":
         start_date = now - timedelta(days=365)
     else:  # all
-        start_date = datetime(2020, 1, 1)  # Beginning of time
+        start_date = datetime(2020, 1, 1, tzinfo=timezone.utc)  # Beginning of time
     
-    # Get all user analyses
-    all_analyses = db.query(Analysis).filter(
-        Analysis.user_id == current_user.id
-    ).all()
-    
-    # Calculate overall statistics
-    total_analyses = len(all_analyses)
+    # Served from the per-day rollup: O(days) rows, never the analyses themselves
+    stats = await user_rollup_stats(db, current_user.id, now.date().replace(day=1))
+    total_analyses = stats["total"]
     
     if total_analyses == 0:
         # Return empty analytics for new users
@@ -85,148 +84,78 @@ async def get_user_analytics(
                 total_improved=0
             ),
             trends=[],
-            score_distribution={"0-20": 0, "21-40": 0, "41-60": 0, "61-80": 0, "81-100": 0}
+            score_distribution=stats["distribution"]
         )
     
-    # Calculate statistics
-    match_scores = [a.match_score for a in all_analyses if a.match_score is not None]
-    avg_match_score = sum(match_scores) / len(match_scores) if match_scores else 0.0
-    best_match_score = max(match_scores) if match_scores else 0
-    
-    # Count this month's analyses
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    this_month = sum(1 for a in all_analyses if a.created_at >= month_start)
-    
-    # Calculate improvement rate
-    total_improved = sum(1 for a in all_analyses if a.improved_latex is not None)
-    improvement_rate = total_improved / total_analyses if total_analyses > 0 else 0.0
-    
-    # Build trends data
-    trends_data = []
-    period_analyses = [a for a in all_analyses if a.created_at >= start_date]
-    
-    # Group by date
-    date_groups = {}
-    for analysis in period_analyses:
-        date_key = analysis.created_at.strftime("%Y-%m-%d")
-        if date_key not in date_groups:
-            date_groups[date_key] = []
-        date_groups[date_key].append(analysis)
-    
-    # Calculate trends for each date
-    for date_key in sorted(date_groups.keys()):
-        analyses = date_groups[date_key]
-        scores = [a.match_score for a in analyses if a.match_score is not None]
-        avg_score = sum(scores) / len(scores) if scores else 0.0
-        
-        trends_data.append(TrendDataPoint(
-            date=date_key,
-            count=len(analyses),
-            avg_score=round(avg_score, 1)
-        ))
-    
-    # Calculate score distribution
-    score_distribution = {
-        "0-20": 0,
-        "21-40": 0,
-        "41-60": 0,
-        "61-80": 0,
-        "81-100": 0
-    }
-    
-    for score in match_scores:
-        if score <= 20:
-            score_distribution["0-20"] += 1
-        elif score <= 40:
-            score_distribution["21-40"] += 1
-        elif score <= 60:
-            score_distribution["41-60"] += 1
-        elif score <= 80:
-            score_distribution["61-80"] += 1
-        else:
-            score_distribution["81-100"] += 1
+    trends_data = [
+        TrendDataPoint(date=day, count=count, avg_score=round(avg_score or 0.0, 1))
+        for day, count, avg_score in await user_rollup_trends(db, current_user.id, start_date.date())
+    ]
     
     return AnalyticsResponse(
         stats=UserStats(
             total_analyses=total_analyses,
-            avg_match_score=round(avg_match_score, 1),
-            best_match_score=best_match_score,
-            this_month=this_month,
-            improvement_rate=round(improvement_rate, 2),
-            total_improved=total_improved
+            avg_match_score=round(stats["avg_score"] or 0.0, 1),
+            # Scores stored by older fallbacks can be fractional
+            best_match_score=round(stats["best_score"] or 0),
+            this_month=stats["this_month"],
+            improvement_rate=round(stats["improved"] / total_analyses, 2),
+            total_improved=stats["improved"]
         ),
         trends=trends_data,
-        score_distribution=score_distribution
+        score_distribution=stats["distribution"]
     )
 
 
 @router.get("/export")
 async def export_analysis_history(
-    format: str = Query(default="csv", regex="^(csv|json)$"),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    format: str = Query(default="csv", regex="^(csv|json|ndjson|parquet)$"),
+    gzip: bool = Query(default=False, description="gzip the file (text formats)"),
+    current_user: User = Depends(get_current_active_user)
 ):
     """
     Export user's analysis history in specified format
     
+    Streamed as rows are read, so memory does not grow with the history.
+    csv and json carry previews for people; ndjson and parquet carry the
+    full job description and summary for bulk consumers
+    
     Args:
-        format: Export format (csv or json)
+        format: Export format (csv, json, ndjson or parquet)
+        gzip: Compress the file; Parquet is already compressed
         current_user: Authenticated user
-        db: Database session
     
     Returns:
-        Analysis history data
+        Analysis history file
     """
-    from fastapi.responses import Response
-    
-    # Get all user analyses
-    analyses = db.query(Analysis).filter(
-        Analysis.user_id == current_user.id
-    ).order_by(Analysis.created_at.desc()).all()
-    
-    if format == "json":
-        # JSON export
-        data = [
-            {
-                "id": a.id,
-                "created_at": a.created_at.isoformat(),
-                "job_description": a.job_description[:100] + "..." if len(a.job_description) > 100 else a.job_description,
-                "match_score": a.match_score,
-                "has_improvement": a.improved_latex is not None,
-                "summary": a.summary[:200] + "..." if a.summary and len(a.summary) > 200 else a.summary
-            }
-            for a in analyses
-        ]
-        
-        import json
-        return Response(
-            content=json.dumps(data, indent=2),
-            media_type="application/json",
-            headers={"Content-Disposition": "attachment; filename=analysis_history.json"}
+    if gzip and format == "parquet":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parquet exports are already compressed"
         )
     
-    else:  # CSV
-        import csv
-        from io import StringIO
-        
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(["ID", "Date", "Match Score", "Improved", "Summary Preview"])
-        
-        # Write data
-        for a in analyses:
-            writer.writerow([
-                a.id,
-                a.created_at.strftime("%Y-%m-%d %H:%M"),
-                a.match_score or "N/A",
-                "Yes" if a.improved_latex else "No",
-                (a.summary[:100] + "...") if a.summary and len(a.summary) > 100 else (a.summary or "")
-            ])
-        
-        return Response(
-            content=output.getvalue(),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=analysis_history.csv"}
+    try:
+        encoder = ENCODERS[format]()
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export is not available on this server (pyarrow is not installed)"
         )
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"analysis_history.{extension}"
+    headers = {}
+    if gzip or format == "parquet":
+        # Already compressed: keep GZipMiddleware from compressing it again
+        headers["Content-Encoding"] = "identity"
+    if gzip:
+        media_type, filename = "application/gzip", filename + ".gz"
+    headers["Content-Disposition"] = f"attachment; filename={filename}"
+    
+    # No request session here: yield dependencies are closed before the body
+    # streams, so export_stream opens its own for as long as it runs
+    return StreamingResponse(
+        export_stream(current_user.id, encoder, gzip=gzip),
+        media_type=media_type,
+        headers=headers
+    )
@@ -3,9 +3,9 @@ from fastapi.responses import RedirectResponse, JSONResponse
 from sqlalchemy.orm import Session
 
 from app.database.database import get_db
-from app.database.models import User, Analysis
+from app.database.models import User, Analysis, Resume
 from app.auth.auth import get_current_active_user
-from app.services.supabase_storage import SupabaseStorage
+from app.services.supabase_storage import SupabaseStorage, get_storage
 
 
 router = APIRouter(prefix="/api/download", tags=["Downloads"])
@@ -15,11 +15,13 @@ router = APIRouter(prefix="/api/download", tags=["Downloads"])
 async def download_latex(
     analysis_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    storage: SupabaseStorage = Depends(get_storage)
 ):
     """Download improved resume LaTeX source"""
     
-    analysis = db.query(Analysis).filter(
+    # Only the storage path: the analysis row itself is never needed here
+    analysis = db.query(Analysis.latex_storage_path).filter(
         Analysis.id == analysis_id,
         Analysis.user_id == current_user.id
     ).first()
@@ -37,7 +39,6 @@ async def download_latex(
         )
     
     # Generate signed URL from Supabase Storage
-    storage = SupabaseStorage()
     signed_url = await storage.get_signed_url(
         bucket="generated-resumes",
         path=analysis.latex_storage_path,
@@ -52,11 +53,13 @@ async def download_latex(
 async def download_pdf(
     analysis_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    storage: SupabaseStorage = Depends(get_storage)
 ):
     """Download improved resume PDF"""
     
-    analysis = db.query(Analysis).filter(
+    # Only the storage path: the analysis row itself is never needed here
+    analysis = db.query(Analysis.pdf_storage_path).filter(
         Analysis.id == analysis_id,
         Analysis.user_id == current_user.id
     ).first()
@@ -74,7 +77,6 @@ async def download_pdf(
         )
     
     # Generate signed URL from Supabase Storage
-    storage = SupabaseStorage()
     signed_url = await storage.get_signed_url(
         bucket="generated-resumes",
         path=analysis.pdf_storage_path,
@@ -89,32 +91,33 @@ async def download_pdf(
 async def download_original_resume(
     analysis_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    storage: SupabaseStorage = Depends(get_storage)
 ):
     """Download original uploaded resume"""
     
-    analysis = db.query(Analysis).filter(
+    # The resume's storage path, joined in one query
+    resume = db.query(Resume.storage_path).join(Analysis, Analysis.resume_id == Resume.id).filter(
         Analysis.id == analysis_id,
         Analysis.user_id == current_user.id
     ).first()
     
-    if not analysis:
+    if not resume:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Analysis not found"
         )
     
-    if not analysis.resume.storage_path:
+    if not resume.storage_path:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Original resume file not found"
         )
     
     # Generate signed URL from Supabase Storage
-    storage = SupabaseStorage()
     signed_url = await storage.get_signed_url(
         bucket="resumes",
-        path=analysis.resume.storage_path,
+        path=resume.storage_path,
         expires_in=3600  # 1 hour
     )
     
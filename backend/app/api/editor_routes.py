@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import Optional
 from pydantic import BaseModel
@@ -8,7 +9,7 @@ from app.database.database import get_db
 from app.database.models import User, Analysis
 from app.auth.auth import get_current_active_user
 from app.services.latex_service import LaTeXService
-from app.services.supabase_storage import SupabaseStorage
+from app.services.supabase_storage import SupabaseStorage, get_storage
 from app.sample_data.latex_templates import LATEX_TEMPLATES
 
 
@@ -42,7 +43,7 @@ async def get_latex_for_editing(
 ):
     """Get LaTeX content for editing in the playground"""
     
-    analysis = db.query(Analysis).filter(
+    analysis = db.query(Analysis.id, Analysis.improved_latex, Analysis.created_at).filter(
         Analysis.id == analysis_id,
         Analysis.user_id == current_user.id
     ).first()
@@ -71,7 +72,8 @@ async def save_latex(
     analysis_id: int,
     request: SaveLaTeXRequest,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    storage: SupabaseStorage = Depends(get_storage)
 ):
     """Save edited LaTeX content"""
     
@@ -90,7 +92,6 @@ async def save_latex(
     analysis.improved_latex = request.latex_content
     
     # Also update in storage
-    storage = SupabaseStorage()
     from datetime import datetime
     latex_filename = f"improved_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tex"
     latex_storage_path = await storage.upload_generated_resume(
@@ -113,7 +114,8 @@ async def compile_latex_to_pdf(
 ):
     """Note: PDF compilation is not available due to unreliable online compilers"""
     
-    analysis = db.query(Analysis).filter(
+    # Whether there is LaTeX, without fetching it (NULL length when there is none)
+    analysis = db.query((func.length(Analysis.improved_latex) > 0).label("has_latex")).filter(
         Analysis.id == analysis_id,
         Analysis.user_id == current_user.id
     ).first()
@@ -124,7 +126,7 @@ async def compile_latex_to_pdf(
             detail="Analysis not found"
         )
     
-    if not analysis.improved_latex:
+    if not analysis.has_latex:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No LaTeX content to compile"
@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import Optional
+from pydantic import BaseModel
+from datetime import datetime
+
+from app.database.database import get_db
+from app.database.models import User, Job
+from app.auth.auth import get_current_active_user
+from app.services.job_queue import JOB_DEAD, retry_dead
+
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+
+
+class JobResponse(BaseModel):
+    """Job status schema"""
+    id: int
+    kind: str
+    status: str
+    analysis_id: Optional[int] = None
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str] = None
+    progress_status: Optional[str] = None
+    progress_percentage: Optional[int] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+def _get_user_job(db: Session, job_id: int, user: User) -> Job:
+    job = db.query(Job).filter(Job.id == job_id, Job.user_id == user.id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+
+def _job_response(job: Job) -> JobResponse:
+    analysis = job.analysis
+    return JobResponse(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        analysis_id=job.analysis_id,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        last_error=job.last_error,
+        progress_status=analysis.progress_status if analysis else None,
+        progress_percentage=analysis.progress_percentage if analysis else None,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+    )
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Job status with the progress of the analysis it works on"""
+    return _job_response(_get_user_job(db, job_id, current_user))
+
+
+@router.post("/{job_id}/retry", response_model=JobResponse)
+async def retry_job(
+    job_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Requeue a dead-lettered job"""
+    job = _get_user_job(db, job_id, current_user)
+    if job.status != JOB_DEAD:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Only failed jobs can be retried"
+        )
+    if job.analysis is not None:
+        job.analysis.progress_status = "queued"
+    retry_dead(db, job)
+    return _job_response(job)
@@ -0,0 +1,105 @@
+import hmac
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database.database import get_db
+from app.core import metrics
+from app.core.admission import admission_stats
+from app.services.job_queue import queue_stats
+from app.services.llm_scheduler import get_scheduler
+from app.services.llm_resilience import get_circuit_breaker
+from app.services.llm_telemetry import daily_token_usage, summarize_calls
+
+
+def require_metrics_token(x_metrics_token: Optional[str] = Header(default=None)):
+    """
+    Ops only: site-wide usage and internal state are served to callers that
+    send METRICS_TOKEN in X-Metrics-Token. With no token configured the
+    endpoints do not exist
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_metrics_token or not hmac.compare_digest(x_metrics_token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid metrics token")
+
+
+router = APIRouter(prefix="/api/metrics", tags=["Metrics"], dependencies=[Depends(require_metrics_token)])
+
+
+@router.get("/llm")
+async def get_llm_metrics():
+    """
+    LLM call metrics: scheduler queue depth and budgets, circuit breaker state,
+    per-task latency/wait histograms and retry/hedge/fallback counters
+    Queue depth and budgets are host-wide; histograms are per worker process
+    """
+    return {
+        "scheduler": get_scheduler().stats(),
+        "circuit_breaker": get_circuit_breaker("groq").stats(),
+        **metrics.snapshot("llm.")
+    }
+
+
+@router.get("/llm/calls")
+async def get_llm_call_summary(
+    hours: int = Query(24, ge=1, le=24 * 90),
+    group_by: Literal["task", "model"] = "task",
+    db: Session = Depends(get_db)
+):
+    """
+    Aggregates over recorded LLM calls in the last `hours`: counts, errors,
+    parse failures, cache hits, retries, tokens, queue wait, time to first
+    token and latency percentiles, grouped by task or model
+    """
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    return {
+        "since": since.isoformat(),
+        "group_by": group_by,
+        "groups": summarize_calls(db, since, group_by)
+    }
+
+
+@router.get("/llm/calls/daily")
+async def get_llm_daily_usage(
+    days: int = Query(7, ge=1, le=90),
+    db: Session = Depends(get_db)
+):
+    """Calls and prompt/completion tokens per day and task"""
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    return {
+        "since": since.isoformat(),
+        "days": daily_token_usage(db, since)
+    }
+
+
+@router.get("/jobs")
+async def get_job_metrics(
+    db: Session = Depends(get_db)
+):
+    """Job counts per status (queue-wide) and this process's job counters"""
+    return {
+        "queue": queue_stats(db),
+        **metrics.snapshot("jobs.")
+    }
+
+
+@router.get("/supabase")
+async def get_supabase_metrics():
+    """Per-operation latency and error counts for Supabase storage/realtime calls (per worker process)"""
+    return metrics.snapshot("supabase.")
+
+
+@router.get("/admission")
+async def get_admission_metrics():
+    """
+    Admission control per limited route: current limit, in-flight and queued
+    requests, latency estimate and shed count, plus queue-wait histograms
+    """
+    return {
+        "routes": admission_stats(),
+        **metrics.snapshot("admission.")
+    }
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+import base64
+import binascii
 
-from app.database.database import get_db
-from app.database.models import User, Analysis
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+
+from app.database.database import get_async_db
+from app.database.models import User
+from app.database.queries import list_analysis_history
 from app.auth.auth import get_current_active_user
 from app.auth.schemas import UserUpdate, UserResponse
 from pydantic import BaseModel
@@ -35,7 +39,7 @@ async def get_profile(current_user: User = Depends(get_current_active_user)):
 async def update_profile(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update user profile"""
     
@@ -46,31 +50,59 @@ async def update_profile(
     if user_update.phone is not None:
         current_user.phone = user_update.phone
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
     
     return current_user
 
 
 @router.get("/history")
 async def get_analysis_history(
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get user's analysis history"""
+    """
+    Get user's analysis history, newest first, a page at a time
+    Pass the returned next_cursor to get the following page; it is null on the last one
+    """
+    
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_history_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid history cursor"
+            )
     
-    analyses = db.query(Analysis).filter(
-        Analysis.user_id == current_user.id
-    ).order_by(Analysis.created_at.desc()).all()
+    rows = await list_analysis_history(db, current_user.id, limit, after)
     
-    history = []
-    for analysis in analyses:
-        history.append({
-            "id": analysis.id,
-            "match_score": analysis.match_score,
-            "created_at": analysis.created_at,
-            "resume_filename": analysis.resume.filename if analysis.resume else "Unknown",
-            "job_title": analysis.job_description.title if analysis.job_description.title else "Untitled Position"
-        })
+    history = [
+        {
+            "id": row.id,
+            "match_score": row.match_score,
+            "created_at": row.created_at,
+            "resume_filename": row.resume_filename or "Unknown",
+            "job_title": row.job_title or "Untitled Position"
+        }
+        for row in rows
+    ]
+    next_cursor = encode_history_cursor(rows[-1].created_at, rows[-1].id) if len(rows) == limit else None
     
-    return {"history": history}
+    return {"history": history, "next_cursor": next_cursor}
+
+
+def encode_history_cursor(created_at: datetime, analysis_id: int) -> str:
+    """Opaque keyset cursor: the (created_at, id) of the last row served"""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{analysis_id}".encode()).decode()
+
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, analysis_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(analysis_id)
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(str(e)) from e
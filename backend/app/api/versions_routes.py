@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import hashlib
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
-from app.database.database import get_db
-from app.database.models import User, Analysis, ResumeVersion
+from app.database.database import get_async_db
+from app.database.models import User, ResumeVersion
+from app.database.queries import get_analysis_version, list_version_summaries, owns_analysis
+from app.services.version_store import content_hash, delete_version as remove_version, read_version, save_version, unified_diff
 from app.auth.auth import get_current_active_user
 
 
@@ -30,17 +34,76 @@ class VersionResponse(BaseModel):
         from_attributes = True
 
 
+class VersionSummary(BaseModel):
+    """Listing entry for a version: metadata and stats, no content"""
+    id: int
+    version_number: int
+    description: Optional[str]
+    created_at: datetime
+    # Against the previous version; NULL on rows not yet re-encoded by the version store
+    size: Optional[int]
+    lines_added: Optional[int]
+    lines_removed: Optional[int]
+    content_hash: Optional[str]
+    
+    class Config:
+        from_attributes = True
+
+
 class VersionUpdate(BaseModel):
     """Request model for updating a version"""
     description: Optional[str] = None
 
 
+class VersionDiffResponse(BaseModel):
+    """Response model for the diff between two versions"""
+    from_version: int
+    to_version: int
+    lines_added: int
+    lines_removed: int
+    diff: str
+
+
+def _version_response(version: ResumeVersion, latex_content: str) -> VersionResponse:
+    # Content lives in the version store, not on the row
+    return VersionResponse(
+        id=version.id,
+        version_number=version.version_number,
+        latex_content=latex_content,
+        description=version.description,
+        created_at=version.created_at
+    )
+
+
+async def _etag(db: AsyncSession, *versions: ResumeVersion) -> str:
+    """Strong ETag from the content hashes; rows without a stored hash are hashed on the fly"""
+    hashes = [version.content_hash or content_hash(await read_version(db, version)) for version in versions]
+    if len(hashes) > 1:
+        return f'"{hashlib.sha256(":".join(hashes).encode()).hexdigest()}"'
+    return f'"{hashes[0]}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _cached_response(request: Request, etag: str) -> Optional[Response]:
+    # Clients revalidate every time; a match costs no decoding
+    if _not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    return None
+
+
 @router.post("/{analysis_id}", response_model=VersionResponse, status_code=status.HTTP_201_CREATED)
 async def create_version(
     analysis_id: int,
     version_data: VersionCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new resume version for an analysis
@@ -55,44 +118,25 @@ async def create_version(
         Created version with auto-incremented version number
     """
     # Verify analysis exists and belongs to user
-    analysis = db.query(Analysis).filter(
-        Analysis.id == analysis_id,
-        Analysis.user_id == current_user.id
-    ).first()
-    
-    if not analysis:
+    if not await owns_analysis(db, analysis_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Analysis not found"
         )
     
-    # Get next version number
-    max_version = db.query(ResumeVersion).filter(
-        ResumeVersion.analysis_id == analysis_id
-    ).count()
-    
-    next_version_number = max_version + 1
-    
-    # Create new version
-    new_version = ResumeVersion(
-        analysis_id=analysis_id,
-        version_number=next_version_number,
-        latex_content=version_data.latex_content,
-        description=version_data.description
+    # Stored as a diff from the previous version where that is smaller
+    new_version, latex_content = await save_version(
+        db, analysis_id, version_data.latex_content, version_data.description
     )
     
-    db.add(new_version)
-    db.commit()
-    db.refresh(new_version)
-    
-    return new_version
+    return _version_response(new_version, latex_content)
 
 
-@router.get("/{analysis_id}", response_model=List[VersionResponse])
+@router.get("/{analysis_id}", response_model=List[VersionSummary])
 async def get_versions(
     analysis_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all versions for an analysis
@@ -103,26 +147,77 @@ async def get_versions(
         db: Database session
     
     Returns:
-        List of all versions ordered by version number
+        Summaries of all versions ordered by version number; content
+        is served by the content endpoint
     """
     # Verify analysis belongs to user
-    analysis = db.query(Analysis).filter(
-        Analysis.id == analysis_id,
-        Analysis.user_id == current_user.id
-    ).first()
+    if not await owns_analysis(db, analysis_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis not found"
+        )
+    
+    # Stats were computed on save: no content is read
+    return await list_version_summaries(db, analysis_id)
+
+
+@router.get("/{analysis_id}/diff", response_model=VersionDiffResponse)
+async def diff_versions(
+    analysis_id: int,
+    from_version_id: int,
+    to_version_id: int,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Unified diff between two versions of an analysis
+    
+    Args:
+        analysis_id: ID of the analysis
+        from_version_id: ID of the older side of the diff
+        to_version_id: ID of the newer side of the diff
+        current_user: Authenticated user
+        db: Database session
     
-    if not analysis:
+    Returns:
+        The diff and its added/removed line counts, with an ETag derived
+        from both versions' content (304 on If-None-Match)
+    """
+    if not await owns_analysis(db, analysis_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Analysis not found"
         )
     
-    # Get all versions
-    versions = db.query(ResumeVersion).filter(
-        ResumeVersion.analysis_id == analysis_id
-    ).order_by(ResumeVersion.version_number.asc()).all()
+    old = await get_analysis_version(db, analysis_id, from_version_id)
+    new = await get_analysis_version(db, analysis_id, to_version_id)
+    if not old or not new:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Version not found"
+        )
+    
+    etag = await _etag(db, old, new)
+    cached = _cached_response(request, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
     
-    return versions
+    diff = unified_diff(
+        await read_version(db, old), await read_version(db, new),
+        f"version {old.version_number}", f"version {new.version_number}"
+    )
+    lines = diff.splitlines()[2:]  # past the ---/+++ header
+    return VersionDiffResponse(
+        from_version=old.version_number,
+        to_version=new.version_number,
+        lines_added=sum(1 for line in lines if line.startswith("+")),
+        lines_removed=sum(1 for line in lines if line.startswith("-")),
+        diff=diff
+    )
 
 
 @router.get("/{analysis_id}/{version_id}", response_model=VersionResponse)
@@ -130,7 +225,7 @@ async def get_version(
     analysis_id: int,
     version_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific version
@@ -145,22 +240,14 @@ async def get_version(
         Specific version details
     """
     # Verify analysis belongs to user
-    analysis = db.query(Analysis).filter(
-        Analysis.id == analysis_id,
-        Analysis.user_id == current_user.id
-    ).first()
-    
-    if not analysis:
+    if not await owns_analysis(db, analysis_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Analysis not found"
         )
     
     # Get specific version
-    version = db.query(ResumeVersion).filter(
-        ResumeVersion.id == version_id,
-        ResumeVersion.analysis_id == analysis_id
-    ).first()
+    version = await get_analysis_version(db, analysis_id, version_id)
     
     if not version:
         raise HTTPException(
@@ -168,7 +255,52 @@ async def get_version(
             detail="Version not found"
         )
     
-    return version
+    return _version_response(version, await read_version(db, version))
+
+
+@router.get("/{analysis_id}/{version_id}/content")
+async def get_version_content(
+    analysis_id: int,
+    version_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    LaTeX of a specific version
+    
+    Args:
+        analysis_id: ID of the analysis
+        version_id: ID of the version
+        request: Incoming request, for If-None-Match
+        current_user: Authenticated user
+        db: Database session
+    
+    Returns:
+        The LaTeX as text, with the content hash as ETag (304 on If-None-Match)
+    """
+    if not await owns_analysis(db, analysis_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis not found"
+        )
+    
+    version = await get_analysis_version(db, analysis_id, version_id)
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Version not found"
+        )
+    
+    etag = await _etag(db, version)
+    cached = _cached_response(request, etag)
+    if cached:
+        return cached
+    return Response(
+        content=await read_version(db, version),
+        media_type="application/x-tex; charset=utf-8",
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
 
 
 @router.patch("/{analysis_id}/{version_id}", response_model=VersionResponse)
@@ -177,7 +309,7 @@ async def update_version(
     version_id: int,
     version_update: VersionUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update version description
@@ -193,22 +325,14 @@ async def update_version(
         Updated version
     """
     # Verify analysis belongs to user
-    analysis = db.query(Analysis).filter(
-        Analysis.id == analysis_id,
-        Analysis.user_id == current_user.id
-    ).first()
-    
-    if not analysis:
+    if not await owns_analysis(db, analysis_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Analysis not found"
         )
     
     # Get and update version
-    version = db.query(ResumeVersion).filter(
-        ResumeVersion.id == version_id,
-        ResumeVersion.analysis_id == analysis_id
-    ).first()
+    version = await get_analysis_version(db, analysis_id, version_id)
     
     if not version:
         raise HTTPException(
@@ -219,10 +343,10 @@ async def update_version(
     if version_update.description is not None:
         version.description = version_update.description
     
-    db.commit()
-    db.refresh(version)
+    await db.commit()
+    await db.refresh(version)
     
-    return version
+    return _version_response(version, await read_version(db, version))
 
 
 @router.delete("/{analysis_id}/{version_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -230,7 +354,7 @@ async def delete_version(
     analysis_id: int,
     version_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a version
@@ -242,22 +366,14 @@ async def delete_version(
         db: Database session
     """
     # Verify analysis belongs to user
-    analysis = db.query(Analysis).filter(
-        Analysis.id == analysis_id,
-        Analysis.user_id == current_user.id
-    ).first()
-    
-    if not analysis:
+    if not await owns_analysis(db, analysis_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Analysis not found"
         )
     
     # Get and delete version
-    version = db.query(ResumeVersion).filter(
-        ResumeVersion.id == version_id,
-        ResumeVersion.analysis_id == analysis_id
-    ).first()
+    version = await get_analysis_version(db, analysis_id, version_id)
     
     if not version:
         raise HTTPException(
@@ -265,7 +381,7 @@ async def delete_version(
             detail="Version not found"
         )
     
-    db.delete(version)
-    db.commit()
+    # The next version may be stored as a diff from this one: the store re-encodes it
+    await remove_version(db, version)
     
     return None
@@ -4,11 +4,13 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Header
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.database.database import get_db
+from app.database.database import get_async_db
 from app.database.models import User
+from app.database.queries import get_user_by_id
 from app.auth.schemas import TokenData
 
 # Password hashing context
@@ -85,7 +87,7 @@ def create_user(db: Session, email: str, username: str, password: str,
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """
     Get current authenticated user from JWT token
@@ -105,7 +107,7 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = await get_user_by_id(db, int(user_id))
     if user is None:
         raise credentials_exception
     
@@ -113,7 +115,7 @@ async def get_current_user(
 
 
 async def get_optional_user(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: str = Header(None)
 ) -> User | None:
     """
@@ -131,8 +133,7 @@ async def get_optional_user(
         if user_id is None:
             return None
         
-        user = db.query(User).filter(User.id == int(user_id)).first()
-        return user
+        return await get_user_by_id(db, int(user_id))
     except JWTError:
         return None
 
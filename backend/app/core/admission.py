@@ -0,0 +1,170 @@
+"""
+Adaptive concurrency limits for expensive endpoints.
+
+Each limited route has a concurrency limit and a bounded FIFO wait queue.
+A request is shed at once (ServerOverloadedError, 503 with Retry-After)
+when the queue is full or its expected wait, estimated from its queue
+position and the route's observed latency, is longer than the route's
+max queue wait. It is also shed if it actually waits that long. Shed
+requests never take a worker slot, a DB connection or LLM budget.
+
+The limit adapts AIMD-style. After each window of `limit` completions it
+grows by one if the route was saturated and requests finished within
+target latency. It shrinks by `backoff` when more than a tenth of them
+were slow or failed with a 5xx. It always stays within
+[min_limit, max_limit].
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from app.core import metrics
+from app.core.exceptions import ServerOverloadedError
+
+
+EWMA_ALPHA = 0.2
+SLOW_FRACTION = 0.1
+
+
+class AdaptiveLimiter:
+    """Concurrency limit with a bounded wait queue for one route"""
+
+    def __init__(self, name: str, target_latency: float, initial_limit: int = 8, min_limit: int = 1,
+                 max_limit: int = 64, max_queue: int = 32, max_queue_wait: float = 5.0, backoff: float = 0.75):
+        self.name = name
+        self.target_latency = target_latency
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self.backoff = backoff
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.in_flight = 0
+        self.latency: Optional[float] = None  # EWMA of service time
+        self._lock = threading.Lock()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._window = 0
+        self._window_slow = 0
+        self._window_saturated = False
+
+    def expected_wait(self, position: int) -> float:
+        """Seconds until the request at `position` in the queue gets a slot (0 until latency is known)"""
+        if self.latency is None:
+            return 0.0
+        return position * self.latency / max(int(self.limit), 1)
+
+    def _shed(self, wait: float) -> ServerOverloadedError:
+        metrics.counter(f"admission.{self.name}.shed").inc()
+        return ServerOverloadedError(retry_after=max(1, math.ceil(wait)))
+
+    async def acquire(self) -> float:
+        """Take a slot, waiting in the queue if needed; returns the time waited"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                self._window_saturated = True
+            if self.in_flight < int(self.limit) and not self._waiters:
+                self.in_flight += 1
+                metrics.counter(f"admission.{self.name}.admitted").inc()
+                return 0.0
+            wait = self.expected_wait(len(self._waiters) + 1)
+            if len(self._waiters) >= self.max_queue or wait > self.max_queue_wait:
+                raise self._shed(wait)
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter[1], self.max_queue_wait)
+        except asyncio.TimeoutError:
+            with self._lock:
+                # A slot may have been handed over just as the wait ran out
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise self._shed(self.expected_wait(len(self._waiters) + 1))
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                else:
+                    self._release_slot()
+            raise
+        waited = time.monotonic() - started
+        metrics.counter(f"admission.{self.name}.admitted").inc()
+        metrics.histogram(f"admission.{self.name}.queue_seconds").observe(waited)
+        return waited
+
+    def release(self, latency: float, ok: bool = True):
+        """Give the slot back and feed the request's outcome into the limit"""
+        with self._lock:
+            self.latency = latency if self.latency is None else (
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.latency
+            )
+            self._window += 1
+            if not ok or latency > self.target_latency:
+                self._window_slow += 1
+            if self._window >= int(self.limit):
+                if self._window_slow > SLOW_FRACTION * self._window:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                elif self._window_saturated:
+                    self.limit = min(self.max_limit, self.limit + 1)
+                self._window, self._window_slow, self._window_saturated = 0, 0, False
+            self._release_slot()
+        metrics.histogram(f"admission.{self.name}.service_seconds").observe(latency)
+
+    def _release_slot(self):
+        # Called with the lock held: hand freed slots to waiters in FIFO order
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            loop, future = self._waiters.popleft()
+            self.in_flight += 1
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                self.in_flight -= 1  # the waiter's loop is gone
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "queued": len(self._waiters),
+                "latency_seconds": round(self.latency, 4) if self.latency is not None else None,
+                "target_latency_seconds": self.target_latency,
+                "shed": metrics.counter(f"admission.{self.name}.shed").value,
+            }
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str, target_latency: float) -> AdaptiveLimiter:
+    """Process-wide limiter per route, sized from settings"""
+    with _limiters_lock:
+        if name not in _limiters:
+            from app.config import settings
+            _limiters[name] = AdaptiveLimiter(
+                name,
+                target_latency=target_latency,
+                initial_limit=settings.ADMISSION_INITIAL_LIMIT,
+                min_limit=settings.ADMISSION_MIN_LIMIT,
+                max_limit=settings.ADMISSION_MAX_LIMIT,
+                max_queue=settings.ADMISSION_QUEUE_SIZE,
+                max_queue_wait=settings.ADMISSION_MAX_QUEUE_WAIT_SECONDS,
+            )
+        return _limiters[name]
+
+
+def admission_stats() -> Dict[str, Dict]:
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.stats() for name, limiter in sorted(limiters.items())}
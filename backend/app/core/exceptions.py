@@ -68,3 +68,36 @@ class LatexCompilationError(ResumeAnalyzerException):
     """Raised when LaTeX compilation fails"""
     def __init__(self, message: str = "LaTeX compilation failed"):
         super().__init__(message, status_code=422)
+
+
+class CircuitOpenError(AIServiceError):
+    """Raised when the AI provider circuit breaker is open"""
+    def __init__(self, message: str = "AI service temporarily unavailable. Please try again shortly."):
+        super().__init__(message)
+
+
+class DeadlineExceededError(AIServiceError):
+    """Raised when a stage cannot finish within the request's time budget"""
+    def __init__(self, message: str = "Request took too long. Please try again."):
+        super().__init__(message)
+        self.status_code = 504
+
+
+class RequestCancelledError(ResumeAnalyzerException):
+    """Raised when the client disconnected before the request finished"""
+    def __init__(self, message: str = "Request cancelled by client"):
+        super().__init__(message, status_code=499)
+
+
+class ServerOverloadedError(ResumeAnalyzerException):
+    """Raised when an endpoint sheds a request instead of queueing it"""
+    def __init__(self, retry_after: int, message: str = "Server is busy. Please try again shortly."):
+        super().__init__(message, status_code=503)
+        self.retry_after = retry_after
+
+
+class RateLimitExceededError(ResumeAnalyzerException):
+    """Raised when a caller has used up its request budget"""
+    def __init__(self, retry_after: int, message: str = "Too many requests. Please try again later."):
+        super().__init__(message, status_code=429)
+        self.retry_after = retry_after
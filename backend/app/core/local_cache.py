@@ -0,0 +1,71 @@
+"""
+Small SQLite-backed key/value cache shared by all workers on one host
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+class LocalCache:
+    """String cache with TTL and approximate LRU eviction"""
+
+    EVICT_EVERY = 100
+
+    def __init__(self, path: str, max_entries: int = 5000, ttl_seconds: float = 7 * 86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value FROM cache WHERE key = ? AND stored_at >= ?", (key, now - self.ttl_seconds)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE cache SET used_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, stored_at, used_at) VALUES (?, ?, ?, ?)",
+            (key, value, now, now),
+        )
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self.evict()
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def evict(self):
+        """Drop expired entries and the least recently used beyond max_entries"""
+        conn = self._conn()
+        conn.execute("DELETE FROM cache WHERE stored_at < ?", (time.time() - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
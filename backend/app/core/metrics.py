@@ -0,0 +1,120 @@
+"""
+Lightweight in-process metrics (counters and latency histograms)
+"""
+import threading
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+
+# Upper bounds (seconds) of the cumulative histogram buckets
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+class Counter:
+    """Monotonic thread-safe counter"""
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Histogram:
+    """
+    Bucketed histogram that also keeps a bounded window of recent samples
+    so percentiles reflect current behaviour rather than all-time totals
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS, window: int = 1024):
+        self.buckets = tuple(sorted(buckets))
+        self._bucket_counts = [0] * (len(self.buckets) + 1)
+        self._recent = deque(maxlen=window)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._count += 1
+            self._sum += value
+            self._max = max(self._max, value)
+            self._recent.append(value)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._bucket_counts[i] += 1
+                    break
+            else:
+                self._bucket_counts[-1] += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Percentile (0-100) over the recent window, None when empty"""
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(pct / 100 * (len(samples) - 1)))))
+        return samples[index]
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            count, total, maximum = self._count, self._sum, self._max
+            bucket_counts = list(self._bucket_counts)
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(list(self.buckets) + ["+Inf"], bucket_counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": count,
+            "sum": round(total, 4),
+            "mean": round(total / count, 4) if count else 0.0,
+            "max": round(maximum, 4),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": buckets,
+        }
+
+
+_lock = threading.Lock()
+_counters: Dict[str, Counter] = {}
+_histograms: Dict[str, Histogram] = {}
+
+
+def counter(name: str) -> Counter:
+    """Get or create a named counter"""
+    with _lock:
+        if name not in _counters:
+            _counters[name] = Counter()
+        return _counters[name]
+
+
+def histogram(name: str, buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+    """Get or create a named histogram"""
+    with _lock:
+        if name not in _histograms:
+            _histograms[name] = Histogram(buckets)
+        return _histograms[name]
+
+
+def snapshot(prefix: str = "") -> Dict:
+    """Snapshot of all metrics whose name starts with prefix"""
+    with _lock:
+        counters = dict(_counters)
+        histograms = dict(_histograms)
+    return {
+        "counters": {name: c.value for name, c in sorted(counters.items()) if name.startswith(prefix)},
+        "histograms": {name: h.snapshot() for name, h in sorted(histograms.items()) if name.startswith(prefix)},
+    }
@@ -0,0 +1,154 @@
+"""
+Sliding-window rate limits shared by all workers on one host
+
+Counts live in one SQLite file (WAL), so every uvicorn or gunicorn worker
+draws from the same budget. Each (rule, key) pair keeps two fixed-window
+counters and a request is checked against the sliding estimate
+previous * (1 - elapsed fraction of the current window) + current, so
+storage stays at two rows per key. Expired rows are evicted periodically
+and the table is capped at max_rows.
+"""
+import math
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+from app.core.exceptions import RateLimitExceededError
+
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """`limit` units of cost per `period` seconds"""
+    limit: float
+    period: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        """Parse specs such as "10/hour" or "5/15minutes" """
+        match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*", spec)
+        if match is None:
+            raise ValueError(f"Invalid rate limit: {spec!r}")
+        count, multiplier, unit = match.groups()
+        return cls(limit=float(count), period=float(int(multiplier or 1) * PERIODS[unit]))
+
+
+class SlidingWindowLimiter:
+    """Weighted sliding-window counters in a SQLite file"""
+
+    EVICT_EVERY = 500
+
+    def __init__(self, path: str, max_rows: int = 100_000):
+        self.path = path
+        self.max_rows = max_rows
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS hits "
+            "(key TEXT NOT NULL, window INTEGER NOT NULL, cost REAL NOT NULL, expires_at REAL NOT NULL, "
+            "PRIMARY KEY (key, window))"
+        )
+        self._conn().execute("CREATE INDEX IF NOT EXISTS ix_hits_expires_at ON hits (expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, checks: Sequence[Tuple[str, RateLimit, float]], now: Optional[float] = None):
+        """
+        Charge `cost` against every (key, limit) in `checks`, or none of them.
+        Raises RateLimitExceededError if any would go over its limit.
+        """
+        now = time.time() if now is None else now
+        conn = self._conn()
+        # IMMEDIATE takes the write lock up front: the read-check-write is atomic across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            waits = []
+            for key, rate, cost in checks:
+                window = int(now // rate.period)
+                previous, current = self._counts(conn, key, window)
+                elapsed = now / rate.period - window
+                if previous * (1 - elapsed) + current + cost > rate.limit:
+                    waits.append(_wait(rate, previous, current, cost, elapsed))
+            if waits:
+                conn.execute("ROLLBACK")
+                raise RateLimitExceededError(retry_after=max(1, math.ceil(max(waits))))
+            for key, rate, cost in checks:
+                window = int(now // rate.period)
+                conn.execute(
+                    "INSERT INTO hits (key, window, cost, expires_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (key, window) DO UPDATE SET cost = cost + excluded.cost",
+                    (key, window, cost, (window + 2) * rate.period),
+                )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self.evict(now)
+
+    @staticmethod
+    def _counts(conn: sqlite3.Connection, key: str, window: int) -> Tuple[float, float]:
+        rows = dict(conn.execute(
+            "SELECT window, cost FROM hits WHERE key = ? AND window IN (?, ?)", (key, window - 1, window)
+        ).fetchall())
+        return rows.get(window - 1, 0.0), rows.get(window, 0.0)
+
+    def evict(self, now: Optional[float] = None):
+        """Drop windows that no longer count and the oldest rows beyond max_rows"""
+        now = time.time() if now is None else now
+        conn = self._conn()
+        conn.execute("DELETE FROM hits WHERE expires_at < ?", (now,))
+        conn.execute(
+            "DELETE FROM hits WHERE rowid IN (SELECT rowid FROM hits ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,),
+        )
+
+    def row_count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM hits").fetchone()[0]
+
+
+def _wait(rate: RateLimit, previous: float, current: float, cost: float, elapsed: float) -> float:
+    """Seconds until `cost` fits, as the previous window's share decays"""
+    if cost > rate.limit:
+        return rate.period
+    room = rate.limit - current - cost
+    if room >= 0:
+        # Fits once previous * (1 - e) <= room
+        return (1 - room / previous - elapsed) * rate.period
+    # Wait for the next window, where this window's count becomes the decaying one
+    return (1 - elapsed + max(0.0, 1 - (rate.limit - cost) / current)) * rate.period
+
+
+_limiter: Optional[SlidingWindowLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> SlidingWindowLimiter:
+    """Process-wide handle on the host-wide rate limit store"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            from app.config import settings
+            _limiter = SlidingWindowLimiter(
+                settings.RATE_LIMIT_DB or os.path.join(tempfile.gettempdir(), "resumecraft_rate_limits.sqlite3"),
+                max_rows=settings.RATE_LIMIT_MAX_ROWS,
+            )
+        return _limiter
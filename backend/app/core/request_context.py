@@ -0,0 +1,252 @@
+"""
+Per-request cancellation and deadlines shared by every stage of a
+long-running request.
+
+A route opens `cancel_on_disconnect(request)`; a watcher task cancels the
+request's CancelToken as soon as the client goes away. A route may also open
+`deadline_scope(seconds)`, after which every stage can ask how much of the
+budget is left. Both travel in context variables, so blocking work running
+in the threadpool (LLM calls, parsing, LaTeX compilation) checks them
+without being passed through every signature. Work handed to our own
+thread pools must go through `submit_in_context` to keep the variables.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import Executor, Future
+from contextlib import asynccontextmanager, contextmanager
+from typing import Awaitable, Callable, List, Optional
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.core import metrics
+from app.core.exceptions import DeadlineExceededError, RequestCancelledError
+
+
+class CancelToken:
+    """Thread-safe, one-way cancellation flag with cancel callbacks"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run callback when cancelled (immediately if already); returns an unregister function"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._discard(callback)
+        callback()
+        return lambda: None
+
+    def _discard(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to timeout; returns True if cancelled meanwhile"""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise RequestCancelledError()
+
+
+class Deadline:
+    """Absolute time budget for a request"""
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, stage: str):
+        if self.expired:
+            metrics.counter(f"deadline.exceeded.{stage}").inc()
+            raise DeadlineExceededError(f"Request deadline exceeded during {stage}")
+
+
+_current_token: contextvars.ContextVar[Optional[CancelToken]] = contextvars.ContextVar("cancel_token", default=None)
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("deadline", default=None)
+
+
+def current_token() -> Optional[CancelToken]:
+    return _current_token.get()
+
+
+def raise_if_cancelled():
+    """Checkpoint for blocking work: raise if the current request was cancelled"""
+    token = _current_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left in the current request's budget, or None without a deadline"""
+    deadline = _current_deadline.get()
+    return deadline.remaining() if deadline is not None else None
+
+
+def clamp_timeout(seconds: float) -> float:
+    """Shorten a stage timeout so it ends no later than the request deadline"""
+    remaining = remaining_time()
+    return seconds if remaining is None else min(seconds, remaining)
+
+
+def check_deadline(stage: str):
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+class deadline_scope:
+    """
+    Give the enclosed work (and threads it starts) a time budget
+    Usable with `with` and `async with`, so it can share a line with
+    cancel_on_disconnect
+    """
+
+    def __init__(self, seconds: float):
+        self.deadline = Deadline(seconds)
+        self._reset = None
+
+    def __enter__(self) -> Deadline:
+        self._reset = _current_deadline.set(self.deadline)
+        return self.deadline
+
+    def __exit__(self, *exc_info):
+        _current_deadline.reset(self._reset)
+
+    async def __aenter__(self) -> Deadline:
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info):
+        self.__exit__(*exc_info)
+
+
+@contextmanager
+def reserve_time(seconds: float):
+    """Run the enclosed work under a deadline ending `seconds` early, keeping time for later stages"""
+    parent = _current_deadline.get()
+    if parent is None:
+        yield None
+        return
+    child = Deadline(0)
+    child.budget = max(0.0, parent.budget - seconds)
+    child.expires_at = parent.expires_at - seconds
+    reset = _current_deadline.set(child)
+    try:
+        yield child
+    finally:
+        _current_deadline.reset(reset)
+
+
+def interruptible_sleep(seconds: float):
+    """time.sleep that wakes up and raises when the current request is cancelled"""
+    token = _current_token.get()
+    if token is None:
+        threading.Event().wait(seconds)
+        return
+    if token.wait(seconds):
+        raise RequestCancelledError()
+
+
+def submit_in_context(pool: Executor, fn: Callable, *args, **kwargs) -> Future:
+    """Executor.submit that carries the caller's context (cancel token) into the worker thread"""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+async def _watch_disconnect(request: Request, token: CancelToken, name: str, interval: float):
+    while not token.cancelled:
+        if await request.is_disconnected():
+            metrics.counter(f"http.disconnects.{name}").inc()
+            token.cancel()
+            return
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def cancel_on_disconnect(request: Request, name: str):
+    """Bind a CancelToken to the request that fires when the client disconnects"""
+    token = CancelToken()
+    reset = _current_token.set(token)
+    watcher = asyncio.create_task(_watch_disconnect(request, token, name, settings.DISCONNECT_POLL_SECONDS))
+    try:
+        yield token
+    finally:
+        watcher.cancel()
+        _current_token.reset(reset)
+
+
+async def run_cancellable(fn: Callable, *args, stage: str = "work", **kwargs):
+    """
+    Run blocking fn in the threadpool, raising RequestCancelledError as soon
+    as the current request is cancelled, or DeadlineExceededError once its
+    deadline passes. The thread stops at its next checkpoint instead of
+    being awaited.
+    """
+    token = _current_token.get()
+    deadline = _current_deadline.get()
+    work = asyncio.ensure_future(run_in_threadpool(fn, *args, **kwargs))
+    if token is None and deadline is None:
+        return await work
+    while True:
+        timeout = settings.DISCONNECT_POLL_SECONDS
+        if deadline is not None:
+            timeout = min(timeout, deadline.remaining())
+        done, _ = await asyncio.wait({work}, timeout=timeout)
+        if done:
+            return work.result()
+        if (token is not None and token.cancelled) or (deadline is not None and deadline.expired):
+            work.add_done_callback(lambda future: future.cancelled() or future.exception())
+            if token is not None and token.cancelled:
+                raise RequestCancelledError()
+            deadline.check(stage)
+
+
+async def within_deadline(awaitable: Awaitable, stage: str, optional: bool = False):
+    """
+    Await a stage bounded by the remaining budget. Optional stages are
+    skipped (returning None) instead of failing the request.
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=remaining)
+    except asyncio.TimeoutError:
+        metrics.counter(f"deadline.{'skipped' if optional else 'exceeded'}.{stage}").inc()
+        if optional:
+            return None
+        raise DeadlineExceededError(f"Request deadline exceeded during {stage}")
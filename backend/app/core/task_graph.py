@@ -0,0 +1,135 @@
+"""
+Small dependency graph of async stages for a single request.
+
+Each stage starts as soon as the stages it depends on have finished and
+receives their results as positional arguments, so independent work
+(storage upload, parsing, DB writes, the LLM call) overlaps. If any stage
+fails, the others are cancelled, the current request's CancelToken is
+cancelled so work already running in threads stops at its next checkpoint,
+and the `undo` of every completed stage runs in reverse order before the
+original error is re-raised.
+
+Stage timings give the critical path: the chain of dependencies that
+determined when the last stage finished.
+"""
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from app.core import metrics
+from app.core.request_context import current_token
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Stage:
+    def __init__(self, name: str, fn: Callable[..., Awaitable], after: List[str],
+                 undo: Optional[Callable[[Any], Any]]):
+        self.name = name
+        self.fn = fn
+        self.after = after
+        self.undo = undo
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.done = False
+        self.result: Any = None
+
+
+class TaskGraph:
+    """Async stages with dependencies, compensation on failure and stage timings"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._stages: Dict[str, _Stage] = {}
+        self._order: List[str] = []  # completion order, for undo
+        self._started = 0.0
+
+    def add(self, name: str, fn: Callable[..., Awaitable], after: Iterable[str] = (),
+            undo: Optional[Callable[[Any], Any]] = None):
+        """Add a stage; dependencies must already be in the graph, which keeps it acyclic"""
+        after = list(after)
+        for dependency in after:
+            if dependency not in self._stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dependency}")
+        self._stages[name] = _Stage(name, fn, after, undo)
+        return self
+
+    async def _run_stage(self, stage: _Stage, tasks: Dict[str, asyncio.Task]):
+        inputs = [await tasks[dependency] for dependency in stage.after]
+        stage.started = time.monotonic() - self._started
+        stage.result = await stage.fn(*inputs)
+        stage.finished = time.monotonic() - self._started
+        stage.done = True
+        self._order.append(stage.name)
+        metrics.histogram(f"{self.name}.stage_seconds.{stage.name}").observe(stage.finished - stage.started)
+        return stage.result
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every stage; returns results by stage name"""
+        self._started = time.monotonic()
+        tasks: Dict[str, asyncio.Task] = {}
+        for name, stage in self._stages.items():
+            tasks[name] = asyncio.ensure_future(self._run_stage(stage, tasks))
+
+        done, pending = await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+        failed = next((task for task in done if not task.cancelled() and task.exception()), None)
+        if failed is None:
+            metrics.histogram(f"{self.name}.critical_path_seconds").observe(self.elapsed)
+            return {name: stage.result for name, stage in self._stages.items()}
+
+        token = current_token()
+        if token is not None:
+            token.cancel()
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        await self._undo()
+        raise failed.exception()
+
+    async def _undo(self):
+        for name in reversed(self._order):
+            stage = self._stages[name]
+            if stage.undo is None:
+                continue
+            try:
+                outcome = stage.undo(stage.result)
+                if inspect.isawaitable(outcome):
+                    await outcome
+            except Exception as e:
+                metrics.counter(f"{self.name}.undo_failures").inc()
+                logger.warning(f"Undo of {self.name}.{name} failed: {e}")
+
+    @property
+    def elapsed(self) -> float:
+        return max((stage.finished or 0.0) for stage in self._stages.values()) if self._stages else 0.0
+
+    def critical_path(self) -> List[str]:
+        """Stages on the longest dependency chain, first to last"""
+        finished = [stage for stage in self._stages.values() if stage.done]
+        if not finished:
+            return []
+        stage = max(finished, key=lambda s: s.finished)
+        path = [stage.name]
+        while stage.after:
+            stage = max((self._stages[name] for name in stage.after), key=lambda s: s.finished or 0.0)
+            path.append(stage.name)
+        return list(reversed(path))
+
+    def timings(self) -> Dict[str, Dict[str, float]]:
+        """Start/finish offsets in seconds from the start of the graph"""
+        return {
+            name: {"start": round(stage.started, 4), "end": round(stage.finished, 4)}
+            for name, stage in self._stages.items() if stage.done
+        }
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: stage durations plus the critical path"""
+        entries = [
+            f"{name};dur={(stage.finished - stage.started) * 1000:.1f}"
+            for name, stage in self._stages.items() if stage.done
+        ]
+        entries.append(f'critical;dur={self.elapsed * 1000:.1f};desc="{">".join(self.critical_path())}"')
+        return ", ".join(entries)
@@ -1,18 +1,67 @@
-from sqlalchemy import create_engine
+from uuid import uuid4
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
+def _pool_options(url: str, pool_size: int, max_overflow: int) -> dict:
+    # SQLite's pools take no sizes
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {"pool_size": pool_size, "max_overflow": max_overflow}
+
+
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    pool_recycle=3600
+    pool_recycle=3600,
+    **_pool_options(settings.DATABASE_URL, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def async_database_url(url: str) -> str:
+    """The async-driver form of a sync database URL (asyncpg / aiosqlite)"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        query = dict(parsed.query)
+        # asyncpg spells libpq's sslmode as ssl
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+    if parsed.get_backend_name() == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+
+def async_connect_args(url: str) -> dict:
+    """Driver arguments for the async engine: PgBouncer-safe prepared statements when configured"""
+    if make_url(url).get_backend_name() == "postgresql" and settings.DB_TRANSACTION_POOLER:
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {}
+
+
+# Async engine for routes: DB waits yield the event loop to other requests
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    connect_args=async_connect_args(settings.DATABASE_URL),
+    **_pool_options(settings.DATABASE_URL, settings.ASYNC_DB_POOL_SIZE, settings.ASYNC_DB_MAX_OVERFLOW)
+)
+
+# expire_on_commit=False: attributes stay readable after commit without an implicit (awaitable) reload
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -26,7 +75,25 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
-    """Initialize database tables"""
-    from app.database import models
-    Base.metadata.create_all(bind=engine)
+    """Create missing tables; one catalog query when the schema is already in place"""
+    from app.database import models, stats_rollup
+    existing = set(inspect(engine).get_table_names())
+    if not set(Base.metadata.tables) <= existing:
+        Base.metadata.create_all(bind=engine)
+        if "analyses" in existing and models.UserDailyStats.__tablename__ not in existing:
+            # The rollup table is new next to existing analyses: backfill it
+            with SessionLocal() as db:
+                stats_rollup.rebuild(db)
+
+
+def set_statement_timeout(db, seconds: float):
+    """Bound the statements of the current transaction (PostgreSQL only)"""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"SET LOCAL statement_timeout = {max(1, int(seconds * 1000))}"))
@@ -1,5 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Boolean, JSON, Index
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column, Integer, String, Text, Float, Date, DateTime, ForeignKey, Boolean, JSON, Index, LargeBinary,
+    UniqueConstraint, text,
+)
+from sqlalchemy.orm import column_property, deferred, relationship
 from sqlalchemy.sql import func
 from app.database.database import Base
 
@@ -32,8 +35,9 @@ class Resume(Base):
     filename = Column(String(255), nullable=False)
     file_path = Column(String(500), nullable=False)
     file_type = Column(String(50))  # pdf, docx
-    extracted_text = Column(Text)
-    parsed_data = Column(JSON)  # Store structured data
+    # Deferred: loaded together on first access, or up front with undefer_group("content")
+    extracted_text = deferred(Column(Text), group="content")
+    parsed_data = deferred(Column(JSON), group="content")  # Store structured data
     
     # Supabase Storage fields
     storage_path = Column(String(500))  # Supabase storage path
@@ -69,17 +73,19 @@ class Analysis(Base):
     resume_id = Column(Integer, ForeignKey("resumes.id", ondelete="CASCADE"), nullable=False)
     job_description_id = Column(Integer, ForeignKey("job_descriptions.id", ondelete="CASCADE"), nullable=False)
     
-    # Analysis results
-    match_score = Column(Float)
-    matched_skills = Column(JSON)  # List of matched skills
-    missing_skills = Column(JSON)  # List of missing skills
-    matched_keywords = Column(JSON)  # List of matched keywords
-    missing_keywords = Column(JSON)  # List of missing keywords
-    improvements = Column(JSON)  # List of improvement suggestions
-    summary = Column(Text)
-    
-    # AI-generated improved resume
-    improved_latex = Column(Text)
+    # Analysis results (active_history: the stats rollup needs the value being replaced).
+    # The large ones are deferred and load together on first access, or up front
+    # with undefer_group("results"); ownership checks and listings never fetch them
+    match_score = column_property(Column(Float), active_history=True)
+    matched_skills = deferred(Column(JSON), group="results")  # List of matched skills
+    missing_skills = deferred(Column(JSON), group="results")  # List of missing skills
+    matched_keywords = deferred(Column(JSON), group="results")  # List of matched keywords
+    missing_keywords = deferred(Column(JSON), group="results")  # List of missing keywords
+    improvements = deferred(Column(JSON), group="results")  # List of improvement suggestions
+    summary = deferred(Column(Text), group="results")
+    
+    # AI-generated improved resume (deferred on its own: only the editor and downloads want it)
+    improved_latex = deferred(Column(Text))
     improved_pdf_path = Column(String(500))
     
     # Supabase Storage fields
@@ -97,6 +103,11 @@ class Analysis(Base):
     resume = relationship("Resume", back_populates="analyses")
     job_description = relationship("JobDescription", back_populates="analyses")
     versions = relationship("ResumeVersion", back_populates="analysis", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # History pages: WHERE user_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC
+        Index("ix_analyses_user_id_created_at_id", "user_id", text("created_at DESC"), text("id DESC")),
+    )
 
 
 class ResumeVersion(Base):
@@ -106,12 +117,27 @@ class ResumeVersion(Base):
     id = Column(Integer, primary_key=True, index=True)
     analysis_id = Column(Integer, ForeignKey("analyses.id", ondelete="CASCADE"), nullable=False, index=True)
     version_number = Column(Integer, nullable=False)
-    latex_content = Column(Text, nullable=False)
+    # Content is written by app.services.version_store: "snapshot" payloads hold the
+    # compressed LaTeX, "delta" payloads the compressed line diff from the previous
+    # version. Rows from before the store are "text", with the LaTeX in latex_content
+    encoding = Column(String(10), nullable=False, default="text", server_default="text")
+    payload = deferred(Column(LargeBinary))
+    latex_content = deferred(Column(Text))
+    # Precomputed on save so listings need no content: size in bytes, sha256 of the
+    # LaTeX, and lines added/removed against the previous version (NULL on "text" rows)
+    size = Column(Integer)
+    content_hash = Column(String(64))
+    lines_added = Column(Integer)
+    lines_removed = Column(Integer)
     description = Column(String(500))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     analysis = relationship("Analysis", back_populates="versions")
+    
+    __table_args__ = (
+        UniqueConstraint("analysis_id", "version_number", name="uq_analysis_version"),
+    )
 
 
 class Feedback(Base):
@@ -126,3 +152,77 @@ class Feedback(Base):
     email = Column(String(255))  # For anonymous feedback
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
+
+
+class LLMCall(Base):
+    """Telemetry for a single LLM call (written in batches by llm_telemetry)"""
+    __tablename__ = "llm_calls"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    task = Column(String(30), nullable=False)  # scoring, summary, improvement, suggestions
+    model = Column(String(100))
+    prompt_tokens = Column(Integer)
+    completion_tokens = Column(Integer)
+    queue_wait_ms = Column(Float)
+    ttft_ms = Column(Float)  # time to first token; null when not streamed
+    latency_ms = Column(Float)
+    retries = Column(Integer, default=0)
+    parse_outcome = Column(String(10))  # ok, failed; null when the output is not parsed
+    cache_hit = Column(Boolean, default=False)
+    status = Column(String(10), nullable=False)  # ok, error
+    error_type = Column(String(100))
+    
+    __table_args__ = (
+        Index("ix_llm_calls_task_created_at", "task", "created_at"),
+    )
+
+
+class Job(Base):
+    """Durable background job (claimed by workers with FOR UPDATE SKIP LOCKED)"""
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(30), nullable=False)  # analyze, improve
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    analysis_id = Column(Integer, ForeignKey("analyses.id", ondelete="CASCADE"), index=True)
+    payload = Column(JSON)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_at = Column(DateTime(timezone=True), nullable=False)  # not claimable before this (retry backoff)
+    locked_by = Column(String(100))
+    locked_until = Column(DateTime(timezone=True))  # visibility timeout, extended by heartbeats
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
+    
+    # Relationships
+    analysis = relationship("Analysis")
+    
+    __table_args__ = (
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+
+class UserDailyStats(Base):
+    """Per-user, per-UTC-day analysis totals, kept in step by app.database.stats_rollup"""
+    __tablename__ = "user_daily_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    analyses = Column(Integer, nullable=False, default=0)
+    scored = Column(Integer, nullable=False, default=0)  # analyses with a match score
+    score_sum = Column(Float, nullable=False, default=0)
+    score_max = Column(Float)
+    improved = Column(Integer, nullable=False, default=0)  # analyses with an improved resume
+    # Match score histogram; upper bounds inclusive
+    score_0_20 = Column(Integer, nullable=False, default=0)
+    score_21_40 = Column(Integer, nullable=False, default=0)
+    score_41_60 = Column(Integer, nullable=False, default=0)
+    score_61_80 = Column(Integer, nullable=False, default=0)
+    score_81_100 = Column(Integer, nullable=False, default=0)
+
+
+# Registers the flush listeners that maintain UserDailyStats
+from app.database import stats_rollup  # noqa: E402,F401
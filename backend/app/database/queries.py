@@ -0,0 +1,171 @@
+"""
+Async versions of the hot read paths used by the routes.
+
+Relationships a caller needs are loaded eagerly here: lazy loading is not
+available on an AsyncSession.
+"""
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, literal_column, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import Analysis, JobDescription, Resume, ResumeVersion, User, UserDailyStats
+from app.database.stats_rollup import SCORE_BUCKETS, in_bucket
+
+
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
+    return await db.get(User, user_id)
+
+
+async def get_user_analysis(db: AsyncSession, analysis_id: int, user_id: int, *options) -> Optional[Analysis]:
+    """
+    An analysis, only if it belongs to the user. Deferred columns are not
+    loaded (and cannot be lazily on an AsyncSession): pass undefer_group(...)
+    or load_only(...) options for what the caller reads
+    """
+    result = await db.execute(
+        select(Analysis).where(Analysis.id == analysis_id, Analysis.user_id == user_id).options(*options)
+    )
+    return result.scalars().first()
+
+
+async def owns_analysis(db: AsyncSession, analysis_id: int, user_id: int) -> bool:
+    """Whether the analysis exists and belongs to the user, without loading it"""
+    result = await db.execute(
+        select(Analysis.id).where(Analysis.id == analysis_id, Analysis.user_id == user_id)
+    )
+    return result.first() is not None
+
+
+async def user_analysis_stats(db: AsyncSession, user_id: int, month_start: datetime) -> Dict:
+    """Totals and the score histogram for a user's analyses, in one aggregate query"""
+    row = (await db.execute(
+        select(
+            func.count().label("total"),
+            func.avg(Analysis.match_score).label("avg_score"),
+            func.max(Analysis.match_score).label("best_score"),
+            func.count().filter(Analysis.created_at >= month_start).label("this_month"),
+            func.count().filter(Analysis.improved_latex.is_not(None)).label("improved"),
+            *(func.count().filter(in_bucket(low, high)).label(f"bucket_{i}")
+              for i, (_, low, high, _) in enumerate(SCORE_BUCKETS)),
+        ).where(Analysis.user_id == user_id)
+    )).one()
+    return {
+        "total": row.total,
+        "avg_score": row.avg_score,
+        "best_score": row.best_score,
+        "this_month": row.this_month,
+        "improved": row.improved,
+        "distribution": {label: getattr(row, f"bucket_{i}") for i, (label, *_) in enumerate(SCORE_BUCKETS)},
+    }
+
+
+async def user_daily_trends(db: AsyncSession, user_id: int, since: datetime) -> List[Tuple[str, int, Optional[float]]]:
+    """(YYYY-MM-DD, analyses, average score) per UTC day since `since`, oldest first"""
+    if db.get_bind().dialect.name == "postgresql":
+        # Literal arguments: bound ones would make the GROUP BY expression differ from the selected one
+        day = func.date_trunc(literal_column("'day'"), func.timezone(literal_column("'UTC'"), Analysis.created_at))
+    else:
+        day = func.date(Analysis.created_at)
+    day = day.label("day")
+    result = await db.execute(
+        select(day, func.count(), func.avg(Analysis.match_score))
+        .where(Analysis.user_id == user_id, Analysis.created_at >= since)
+        .group_by(day)
+        .order_by(day)
+    )
+    return [
+        (value if isinstance(value, str) else value.strftime("%Y-%m-%d"), count, avg_score)
+        for value, count, avg_score in result.all()
+    ]
+
+
+async def user_rollup_stats(db: AsyncSession, user_id: int, month_start: date) -> Dict:
+    """The same figures as user_analysis_stats, summed over the user's daily rollup rows"""
+    stats = UserDailyStats
+    row = (await db.execute(
+        select(
+            func.coalesce(func.sum(stats.analyses), 0).label("total"),
+            func.sum(stats.scored).label("scored"),
+            func.sum(stats.score_sum).label("score_sum"),
+            func.max(stats.score_max).label("best_score"),
+            func.coalesce(func.sum(stats.analyses).filter(stats.day >= month_start), 0).label("this_month"),
+            func.coalesce(func.sum(stats.improved), 0).label("improved"),
+            *(func.coalesce(func.sum(getattr(stats, column)), 0).label(column) for *_, column in SCORE_BUCKETS),
+        ).where(stats.user_id == user_id)
+    )).one()
+    return {
+        "total": row.total,
+        "avg_score": row.score_sum / row.scored if row.scored else None,
+        "best_score": row.best_score,
+        "this_month": row.this_month,
+        "improved": row.improved,
+        "distribution": {label: getattr(row, column) for label, _, _, column in SCORE_BUCKETS},
+    }
+
+
+async def user_rollup_trends(db: AsyncSession, user_id: int, since: date) -> List[Tuple[str, int, Optional[float]]]:
+    """(YYYY-MM-DD, analyses, average score) per UTC day from `since`, oldest first"""
+    result = await db.execute(
+        select(UserDailyStats.day, UserDailyStats.analyses, UserDailyStats.scored, UserDailyStats.score_sum)
+        .where(UserDailyStats.user_id == user_id, UserDailyStats.day >= since, UserDailyStats.analyses > 0)
+        .order_by(UserDailyStats.day)
+    )
+    return [
+        (day.strftime("%Y-%m-%d"), analyses, score_sum / scored if scored else None)
+        for day, analyses, scored, score_sum in result.all()
+    ]
+
+
+async def list_analysis_history(db: AsyncSession, user_id: int, limit: int,
+                                after: Optional[Tuple[datetime, int]] = None) -> List:
+    """
+    One page of the user's analyses, newest first, as (id, match_score,
+    created_at, resume_filename, job_title) rows from a single joined query.
+    `after` is the (created_at, id) of the last row of the previous page;
+    ix_analyses_user_id_created_at_id serves both the filter and the order
+    """
+    query = (
+        select(
+            Analysis.id,
+            Analysis.match_score,
+            Analysis.created_at,
+            Resume.filename.label("resume_filename"),
+            JobDescription.title.label("job_title"),
+        )
+        .outerjoin(Resume, Analysis.resume_id == Resume.id)
+        .outerjoin(JobDescription, Analysis.job_description_id == JobDescription.id)
+        .where(Analysis.user_id == user_id)
+        .order_by(Analysis.created_at.desc(), Analysis.id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(tuple_(Analysis.created_at, Analysis.id) < tuple_(*after))
+    return list((await db.execute(query)).all())
+
+
+async def get_analysis_version(db: AsyncSession, analysis_id: int, version_id: int) -> Optional[ResumeVersion]:
+    result = await db.execute(
+        select(ResumeVersion).where(ResumeVersion.id == version_id, ResumeVersion.analysis_id == analysis_id)
+    )
+    return result.scalars().first()
+
+
+async def list_version_summaries(db: AsyncSession, analysis_id: int) -> List:
+    """Version metadata and precomputed stats, oldest first: one scan of uq_analysis_version, no content"""
+    result = await db.execute(
+        select(
+            ResumeVersion.id,
+            ResumeVersion.version_number,
+            ResumeVersion.description,
+            ResumeVersion.created_at,
+            ResumeVersion.size,
+            ResumeVersion.lines_added,
+            ResumeVersion.lines_removed,
+            ResumeVersion.content_hash,
+        )
+        .where(ResumeVersion.analysis_id == analysis_id)
+        .order_by(ResumeVersion.version_number)
+    )
+    return list(result.all())
@@ -0,0 +1,241 @@
+"""
+Per-user, per-day analysis stats rollup (UserDailyStats).
+
+Every ORM flush that inserts or deletes an Analysis, or changes its
+match_score or improved_latex, applies the matching increments to the
+rollup rows in the same transaction, so GET /api/analytics/stats reads
+O(days) rows instead of aggregating analyses. Days are UTC dates of
+Analysis.created_at; user_id and created_at are treated as immutable.
+
+Writes that bypass the ORM (bulk UPDATEs, manual SQL) are not seen; run
+the rebuild after backfills or imports:
+
+    python -m app.database.stats_rollup [--user-id N]
+"""
+import argparse
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Date, and_, case, cast, delete, event, func, insert, inspect, literal_column, select, update
+from sqlalchemy.orm import Session
+
+from app.database.models import Analysis, UserDailyStats
+
+
+# Score histogram buckets as (label, lower bound exclusive, upper bound inclusive, rollup column)
+SCORE_BUCKETS = [
+    ("0-20", None, 20, "score_0_20"),
+    ("21-40", 20, 40, "score_21_40"),
+    ("41-60", 40, 60, "score_41_60"),
+    ("61-80", 60, 80, "score_61_80"),
+    ("81-100", 80, None, "score_81_100"),
+]
+COUNTERS = ["analyses", "scored", "score_sum", "improved"] + [column for *_, column in SCORE_BUCKETS]
+
+
+def in_bucket(low: Optional[float], high: Optional[float]):
+    """SQL condition for a scored analysis falling in the bucket (low, high]"""
+    conditions = [Analysis.match_score.is_not(None)]
+    if low is not None:
+        conditions.append(Analysis.match_score > low)
+    if high is not None:
+        conditions.append(Analysis.match_score <= high)
+    return and_(*conditions)
+
+
+def bucket_column(score: float) -> str:
+    for _, low, high, column in SCORE_BUCKETS:
+        if (low is None or score > low) and (high is None or score <= high):
+            return column
+
+
+def utc_day(value: datetime) -> date:
+    # SQLite hands back naive datetimes; they are stored in UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+class _Delta:
+    """Pending changes to one (user, day) rollup row"""
+
+    def __init__(self):
+        self.counts: Dict[str, float] = defaultdict(float)
+        self.new_max: Optional[float] = None
+        self.removed_score = False
+
+    def add(self, score: Optional[float], improved: bool, sign: int):
+        self.counts["analyses"] += sign
+        self.counts["improved"] += sign if improved else 0
+        if score is None:
+            return
+        self.counts["scored"] += sign
+        self.counts["score_sum"] += sign * score
+        self.counts[bucket_column(score)] += sign
+        if sign > 0:
+            self.new_max = score if self.new_max is None else max(self.new_max, score)
+        else:
+            self.removed_score = True
+
+    def is_empty(self) -> bool:
+        return not any(self.counts.values()) and self.new_max is None and not self.removed_score
+
+
+def _old_value(analysis: Analysis, key: str):
+    history = inspect(analysis).attrs[key].load_history()
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else None
+
+
+def _had_improvement(session: Session, analysis: Analysis) -> bool:
+    # improved_latex is deferred, so its old value is usually not loaded: ask the
+    # database whether there was one rather than fetching the LaTeX
+    history = inspect(analysis).attrs.improved_latex.history
+    if history.deleted or history.unchanged:
+        return (history.deleted or history.unchanged)[0] is not None
+    if analysis.id is None:
+        return False
+    return bool(session.connection().scalar(
+        select(Analysis.improved_latex.is_not(None)).where(Analysis.id == analysis.id)
+    ))
+
+
+PENDING_KEY = "stats_rollup.pending"
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_changes(session: Session, flush_context, instances):
+    # Old values of changed and deleted analyses, read while their rows still exist
+    deltas: Dict[Tuple[int, date], _Delta] = defaultdict(_Delta)
+    for obj in session.deleted:
+        if isinstance(obj, Analysis) and obj.created_at is not None:
+            deltas[(obj.user_id, utc_day(obj.created_at))].add(
+                _old_value(obj, "match_score"), _had_improvement(session, obj), -1
+            )
+    for obj in session.dirty:
+        if not isinstance(obj, Analysis) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if not (state.attrs.match_score.history.has_changes() or state.attrs.improved_latex.history.has_changes()):
+            continue
+        delta = deltas[(obj.user_id, utc_day(obj.created_at))]
+        old_score = _old_value(obj, "match_score")
+        # Unchanged LaTeX cancels out of the improved count; don't load it
+        if state.attrs.improved_latex.history.has_changes():
+            old_improved, new_improved = _had_improvement(session, obj), obj.improved_latex is not None
+        else:
+            old_improved = new_improved = False
+        if old_score == obj.match_score:
+            # Editor saves only touch the LaTeX; leave the score (and the day's max) alone
+            delta.counts["improved"] += int(new_improved) - int(old_improved)
+        else:
+            delta.add(old_score, old_improved, -1)
+            delta.add(obj.match_score, new_improved, 1)
+    for obj in session.new:
+        # created_at decides the rollup day, so set it here instead of leaving it to the server default
+        if isinstance(obj, Analysis) and obj.created_at is None:
+            obj.created_at = datetime.now(timezone.utc)
+    # Replaces whatever a failed earlier flush left behind
+    session.info[PENDING_KEY] = deltas
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_changes(session: Session, flush_context):
+    # Runs inside the flush's transaction; new analyses have their user_id by now
+    deltas = session.info.pop(PENDING_KEY, None) or defaultdict(_Delta)
+    for obj in session.new:
+        if isinstance(obj, Analysis):
+            deltas[(obj.user_id, utc_day(obj.created_at))].add(obj.match_score, obj.improved_latex is not None, 1)
+    for (user_id, day), delta in deltas.items():
+        if not delta.is_empty():
+            _write(session, user_id, day, delta)
+
+
+def _write(session: Session, user_id: int, day: date, delta: _Delta):
+    conn = session.connection()
+    table = UserDailyStats.__table__
+    key = (table.c.user_id == user_id) & (table.c.day == day)
+    increments = {name: table.c[name] + delta.counts.get(name, 0) for name in COUNTERS}
+    if delta.new_max is not None:
+        increments["score_max"] = case(
+            (table.c.score_max.is_(None) | (table.c.score_max < delta.new_max), delta.new_max),
+            else_=table.c.score_max,
+        )
+
+    if delta.counts.get("analyses", 0) > 0:
+        # New analyses: the row may not exist yet
+        values = {"user_id": user_id, "day": day, "score_max": delta.new_max,
+                  **{name: delta.counts.get(name, 0) for name in COUNTERS}}
+        if conn.dialect.name in ("postgresql", "sqlite"):
+            if conn.dialect.name == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            conn.execute(upsert(table).values(**values).on_conflict_do_update(
+                index_elements=["user_id", "day"], set_=increments,
+            ))
+        elif conn.execute(update(table).where(key).values(**increments)).rowcount == 0:
+            conn.execute(insert(table).values(**values))
+    else:
+        conn.execute(update(table).where(key).values(**increments))
+
+    if delta.removed_score:
+        # A removed score may have been the day's maximum: take it from the analyses again
+        start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+        day_max = select(func.max(Analysis.match_score)).where(
+            Analysis.user_id == user_id, Analysis.created_at >= start, Analysis.created_at < start + timedelta(days=1)
+        ).scalar_subquery()
+        conn.execute(update(table).where(key).values(score_max=day_max))
+
+
+def _day_column(dialect: str):
+    if dialect == "postgresql":
+        return cast(func.timezone(literal_column("'UTC'"), Analysis.created_at), Date)
+    return func.date(Analysis.created_at)
+
+
+def rebuild(db: Session, user_id: Optional[int] = None) -> int:
+    """Recompute rollup rows from the analyses table (every user, or one); returns rows written"""
+    day = _day_column(db.get_bind().dialect.name).label("day")
+    score = Analysis.match_score
+    aggregates = select(
+        Analysis.user_id,
+        day,
+        func.count(),
+        func.count(score),
+        func.coalesce(func.sum(score), 0.0),
+        func.max(score),
+        func.count(Analysis.improved_latex),
+        *(func.count().filter(in_bucket(low, high)) for _, low, high, _ in SCORE_BUCKETS),
+    ).where(Analysis.created_at.is_not(None)).group_by(Analysis.user_id, day)
+    stale = delete(UserDailyStats)
+    if user_id is not None:
+        aggregates = aggregates.where(Analysis.user_id == user_id)
+        stale = stale.where(UserDailyStats.user_id == user_id)
+
+    db.execute(stale)
+    columns = ["user_id", "day", "analyses", "scored", "score_sum", "score_max", "improved"] + \
+        [column for *_, column in SCORE_BUCKETS]
+    result = db.execute(insert(UserDailyStats).from_select(columns, aggregates))
+    db.commit()
+    return result.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the per-user daily analysis stats rollup")
+    parser.add_argument("--user-id", type=int, help="rebuild one user only (default: everyone)")
+    args = parser.parse_args()
+
+    from app.database.database import SessionLocal
+    db = SessionLocal()
+    try:
+        rows = rebuild(db, args.user_id)
+    finally:
+        db.close()
+    print(f"Rebuilt {rows} user-day row(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,23 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.config import settings
-from app.database.database import init_db
-from app.middleware.rate_limit import limiter, rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
-import sentry_sdk
+from app.config import ensure_upload_dirs, settings
+from app.database.database import async_engine, init_db
+from app.middleware.admission import AdmissionMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
 import os
 
 # Import routers
-from app.api import auth_routes, profile_routes, analysis_routes, download_routes, editor_routes, examples_routes, analytics_routes, versions_routes, feedback_routes
+from app.api import auth_routes, profile_routes, analysis_routes, download_routes, editor_routes, examples_routes, analytics_routes, versions_routes, feedback_routes, metrics_routes, job_routes
 
 # Import error handlers
+from app.core.admission import get_limiter
 from app.core.exceptions import ResumeAnalyzerException
+from app.services.llm_client import close_http_client
+from app.services.llm_telemetry import get_telemetry_writer
+from app.services.progress_broker import configure_progress_relay, get_progress_broker
+from app.services.supabase_client import close_supabase_client
 from app.core.error_handlers import (
     resume_analyzer_exception_handler,
     http_exception_handler,
@@ -24,22 +29,62 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 
 # Initialize Sentry for error monitoring
 if os.getenv("SENTRY_DSN"):
+    import sentry_sdk
+
     sentry_sdk.init(
         dsn=os.getenv("SENTRY_DSN"),
         traces_sample_rate=0.1,
         environment=os.getenv("ENVIRONMENT", "development")
     )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources once at startup and release them on shutdown"""
+    ensure_upload_dirs()
+    if settings.DB_CREATE_TABLES_ON_STARTUP:
+        await run_in_threadpool(init_db)
+    # Subscribe to other processes' progress events
+    relay = configure_progress_relay()
+    if relay is not None:
+        await relay.listen()
+    if settings.STARTUP_WARMUP:
+        from app.startup import warm_up
+        await warm_up()
+
+    yield
+
+    # Write out buffered LLM call telemetry and close shared connections
+    get_telemetry_writer().flush()
+    await async_engine.dispose()
+    close_http_client()
+    close_supabase_client()
+    if get_progress_broker().relay is not None:
+        await get_progress_broker().relay.close()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="ResumeCraft API",
     description="Craft the Perfect Resume - AI-powered resume optimization and job matching",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# Add rate limiter state
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+# Admission control for expensive endpoints; added before CORS so it runs
+# inside it and shed responses still carry CORS headers
+app.add_middleware(
+    AdmissionMiddleware,
+    enabled=settings.ADMISSION_ENABLED,
+    routes=[
+        ("POST", "/api/analyze", get_limiter("analyze", target_latency=settings.ANALYZE_SLO_SECONDS)),
+        ("POST", "/api/analyze/improve", get_limiter("improve", target_latency=30.0)),
+        ("POST", r"/api/editor/\d+/compile", get_limiter("compile", target_latency=15.0)),
+    ],
+)
+
+# Per-user rate limits; outside admission control so over-budget callers never take a slot
+app.add_middleware(RateLimitMiddleware, enabled=settings.RATE_LIMIT_ENABLED)
 
 # Configure CORS
 print(f"CORS Configuration:")
@@ -80,6 +125,8 @@ app.include_router(examples_routes.router)
 app.include_router(analytics_routes.router)
 app.include_router(versions_routes.router)
 app.include_router(feedback_routes.router)
+app.include_router(metrics_routes.router)
+app.include_router(job_routes.router)
 
 # Register error handlers
 app.add_exception_handler(ResumeAnalyzerException, resume_analyzer_exception_handler)
@@ -88,12 +135,6 @@ app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(Exception, general_exception_handler)
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup"""
-    init_db()
-
-
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -0,0 +1,61 @@
+"""
+Admission control middleware
+
+Runs before the request body is read, so a shed upload costs almost
+nothing. Requests to routes without a limiter pass straight through.
+"""
+import re
+import time
+from typing import List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.admission import AdaptiveLimiter
+from app.core.exceptions import ServerOverloadedError
+
+
+class AdmissionMiddleware:
+    """Per-route adaptive concurrency limits for (method, path pattern) pairs"""
+
+    def __init__(self, app: ASGIApp, routes: List[Tuple[str, str, AdaptiveLimiter]], enabled: bool = True):
+        self.app = app
+        self.enabled = enabled
+        self.routes = [(method, re.compile(f"^{pattern}/?$"), limiter) for method, pattern, limiter in routes]
+
+    def _limiter_for(self, scope: Scope) -> Optional[AdaptiveLimiter]:
+        for method, pattern, limiter in self.routes:
+            if scope["method"] == method and pattern.match(scope["path"]):
+                return limiter
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limiter = self._limiter_for(scope) if self.enabled and scope["type"] == "http" else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await limiter.acquire()
+        except ServerOverloadedError as exc:
+            response = JSONResponse(
+                status_code=exc.status_code,
+                content={"error": exc.message, "type": exc.__class__.__name__, "path": scope["path"]},
+                headers={"Retry-After": str(exc.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            limiter.release(time.monotonic() - started, ok=status_code < 500)
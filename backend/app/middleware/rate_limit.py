@@ -1,31 +1,30 @@
 """
-Rate limiting middleware using slowapi
-"""
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from fastapi import Request, HTTPException
-from starlette.status import HTTP_429_TOO_MANY_REQUESTS
+Rate limiting middleware
 
+Limits are keyed by the authenticated user id (from the bearer token, so
+no DB lookup) and fall back to the client IP for anonymous requests such
+as login and register. Every /api request is charged against the
+general_api budget by its cost weight; routes with a named limit are
+charged against that too. Counts are shared by all workers on the host
+(see app.core.rate_limiter).
+"""
+import logging
+import re
+import sqlite3
+from typing import List, Optional, Tuple
 
-# Create limiter instance
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=["100/minute"],  # Global rate limit
-    storage_uri="memory://",  # Use in-memory storage (free tier)
-)
+from jose import JWTError, jwt
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
+from app.config import settings
+from app.core import metrics
+from app.core.exceptions import RateLimitExceededError
+from app.core.rate_limiter import RateLimit, SlidingWindowLimiter, get_rate_limiter
 
-async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
-    """Custom rate limit exceeded handler"""
-    return HTTPException(
-        status_code=HTTP_429_TOO_MANY_REQUESTS,
-        detail={
-            "error": "Rate limit exceeded",
-            "message": "Too many requests. Please try again later.",
-            "retry_after": str(exc.detail)
-        }
-    )
+logger = logging.getLogger(__name__)
 
 
 # Rate limit configurations for different endpoints
@@ -36,3 +35,89 @@ RATE_LIMITS = {
     "download": "50/hour",  # 50 downloads per hour
     "general_api": "100/minute",  # General API limit
 }
+
+# (method, path pattern, named limit) for routes with their own budget
+LIMITED_ROUTES = [
+    ("POST", "/api/auth/login", "auth_login"),
+    ("POST", "/api/auth/register", "auth_register"),
+    ("POST", "/api/analyze", "analysis"),
+    ("POST", "/api/analyze/improve", "analysis"),
+    ("GET", r"/api/download/.+", "download"),
+]
+
+# (method, path pattern, cost) against general_api; anything unlisted costs 1
+REQUEST_COSTS = [
+    ("POST", "/api/analyze", 10),
+    ("POST", "/api/analyze/improve", 10),
+    ("POST", r"/api/editor/\d+/compile", 5),
+    ("GET", r"/api/download/.+", 2),
+]
+
+
+def _compile(routes):
+    return [(method, re.compile(f"^{pattern}/?$"), value) for method, pattern, value in routes]
+
+
+class RateLimitMiddleware:
+    """Charges each /api request against its caller's budgets before it runs"""
+
+    def __init__(self, app: ASGIApp, enabled: bool = True, limiter: Optional[SlidingWindowLimiter] = None):
+        self.app = app
+        self.enabled = enabled
+        self._limiter = limiter
+        self.limits = {name: RateLimit.parse(spec) for name, spec in RATE_LIMITS.items()}
+        self.routes = _compile(LIMITED_ROUTES)
+        self.costs = _compile(REQUEST_COSTS)
+
+    @property
+    def limiter(self) -> SlidingWindowLimiter:
+        return self._limiter or get_rate_limiter()
+
+    def checks(self, scope: Scope) -> List[Tuple[str, RateLimit, float]]:
+        """(key, limit, cost) for every budget this request is charged against"""
+        method, path = scope["method"], scope["path"]
+        caller = caller_key(scope)
+        cost = next((c for m, pattern, c in self.costs if m == method and pattern.match(path)), 1)
+        checks = [(f"general_api:{caller}", self.limits["general_api"], cost)]
+        for m, pattern, name in self.routes:
+            if m == method and pattern.match(path):
+                checks.append((f"{name}:{caller}", self.limits[name], 1))
+                break
+        return checks
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if not self.enabled or scope["type"] != "http" or not scope["path"].startswith("/api/") \
+                or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await run_in_threadpool(self.limiter.hit, self.checks(scope))
+        except RateLimitExceededError as exc:
+            metrics.counter("rate_limit.rejected").inc()
+            response = JSONResponse(
+                status_code=exc.status_code,
+                content={"error": exc.message, "type": exc.__class__.__name__, "path": scope["path"]},
+                headers={"Retry-After": str(exc.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        except sqlite3.Error as e:
+            # Fail open: a locked or broken store must not take the API down
+            metrics.counter("rate_limit.store_errors").inc()
+            logger.warning(f"Rate limit store unavailable, allowing request: {e}")
+        await self.app(scope, receive, send)
+
+
+def caller_key(scope: Scope) -> str:
+    """user:<id> for a valid bearer token, otherwise ip:<client address>"""
+    authorization = Headers(scope=scope).get("authorization", "")
+    if authorization.startswith("Bearer "):
+        try:
+            payload = jwt.decode(authorization[len("Bearer "):], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            if payload.get("sub"):
+                return f"user:{payload['sub']}"
+        except JWTError:
+            pass
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
@@ -0,0 +1,144 @@
+"""
+Map-reduce analysis for long resumes: split by parser sections, analyze
+chunks concurrently, then merge the chunk results deterministically.
+"""
+from typing import Dict, List
+from app.services.resume_parser import ResumeParser
+
+
+PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+MAX_IMPROVEMENTS = 10
+
+
+def _split_long_span(text: str, max_chars: int) -> List[str]:
+    """Split an oversized section on line boundaries"""
+    pieces, current = [], ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if len(current) + len(line) > max_chars:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current.strip():
+        pieces.append(current)
+    return pieces
+
+
+def split_resume_chunks(resume_text: str, max_chars: int, parser: ResumeParser = None) -> List[str]:
+    """Pack the resume's sections, in order, into chunks of at most max_chars"""
+    parser = parser or ResumeParser()
+    chunks, current = [], ""
+    for _, span in parser.split_sections(resume_text):
+        for piece in _split_long_span(span, max_chars):
+            if current and len(current) + len(piece) > max_chars:
+                chunks.append(current)
+                current = ""
+            current += piece
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def condense_resume(chunks: List[str], max_chars: int) -> str:
+    """Head of every chunk, for prompts that need an overview of the whole document"""
+    if not chunks:
+        return ""
+    per_chunk = max(200, max_chars // len(chunks))
+    return "\n...\n".join(chunk[:per_chunk].strip() for chunk in chunks)[:max_chars]
+
+
+def build_chunk_messages(chunk: str, jd_text: str, index: int, total: int) -> List[Dict]:
+    prompt = f"""You are an expert resume analyzer. The resume is long, so you are seeing part {index + 1} of {total}. Judge ONLY what this part shows against the job description.
+
+RESUME PART:
+{chunk}
+
+JOB DESCRIPTION:
+{jd_text}
+
+Provide your analysis in the following JSON format:
+{{
+    "match_score": <number between 0-100 for how well this part supports the JD>,
+    "matched_skills": [<skills in the JD that this part demonstrates>],
+    "missing_skills": [<skills in the JD that this part does not show>],
+    "matched_keywords": [<important JD keywords found in this part>],
+    "missing_keywords": [<important JD keywords not found in this part>],
+    "improvements": [
+        {{
+            "category": "<category name>",
+            "suggestion": "<specific actionable suggestion for this part>",
+            "priority": "<high/medium/low>"
+        }}
+    ]
+}}
+
+Return ONLY the JSON object, no additional text."""
+    return [
+        {"role": "system", "content": "You are an expert resume analyzer. Always respond with valid JSON only."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _merge_terms(results: List[Dict], matched_field: str, missing_field: str):
+    """Union of matched terms; missing terms minus anything matched in another chunk"""
+    matched, matched_keys = [], set()
+    for result in results:
+        for term in result.get(matched_field) or []:
+            key = str(term).strip().lower()
+            if key and key not in matched_keys:
+                matched_keys.add(key)
+                matched.append(str(term).strip())
+
+    missing, missing_keys = [], set()
+    for result in results:
+        for term in result.get(missing_field) or []:
+            key = str(term).strip().lower()
+            if key and key not in matched_keys and key not in missing_keys:
+                missing_keys.add(key)
+                missing.append(str(term).strip())
+    return matched, missing
+
+
+def reduce_chunk_results(results: List[Dict], extra_improvements: List[Dict] = None) -> Dict:
+    """
+    Deterministically merge chunk analyses. The score blends the best chunk
+    score with overall skill/keyword coverage across the whole document.
+    """
+    matched_skills, missing_skills = _merge_terms(results, "matched_skills", "missing_skills")
+    matched_keywords, missing_keywords = _merge_terms(results, "matched_keywords", "missing_keywords")
+
+    requirements = len(matched_skills) + len(missing_skills) + len(matched_keywords) + len(missing_keywords)
+    coverage = (len(matched_skills) + len(matched_keywords)) / requirements if requirements else 0.0
+    scores = []
+    for result in results:
+        try:
+            scores.append(float(result.get("match_score", 0)))
+        except (TypeError, ValueError):
+            continue
+    best_score = max(scores) if scores else 0.0
+    # A whole number, like single-pass scores: best_match_score is an int
+    match_score = int(round(0.5 * best_score + 0.5 * 100 * coverage))
+
+    improvements, seen = [], set()
+    for item in (extra_improvements or []) + [i for r in results for i in (r.get("improvements") or [])]:
+        if not isinstance(item, dict):
+            continue
+        key = str(item.get("suggestion", "")).strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            improvements.append(item)
+    improvements.sort(key=lambda i: PRIORITY_ORDER.get(str(i.get("priority", "")).lower(), len(PRIORITY_ORDER)))
+
+    return {
+        "match_score": max(0, min(100, match_score)),
+        "matched_skills": matched_skills,
+        "missing_skills": missing_skills,
+        "matched_keywords": matched_keywords,
+        "missing_keywords": missing_keywords,
+        "improvements": improvements[:MAX_IMPROVEMENTS],
+    }
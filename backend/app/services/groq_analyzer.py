@@ -1,23 +1,58 @@
-import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import partial
 from typing import Dict, List
-from groq import Groq
 from app.config import settings
+from app.core import metrics
+from app.core.exceptions import AIServiceError, DeadlineExceededError, RequestCancelledError
+from app.core.request_context import remaining_time, reserve_time, submit_in_context
+from app.services.json_repair import (
+    CHUNK_SCHEMA,
+    SCORING_SCHEMA,
+    SUMMARY_SCHEMA,
+    LLMOutputError,
+    parse_llm_json,
+)
+from app.services.local_scorer import LocalScorer
+from app.services.chunked_analysis import (
+    build_chunk_messages,
+    condense_resume,
+    reduce_chunk_results,
+    split_resume_chunks,
+)
+from app.services.model_router import ModelRouter, TASK_SCORING, TASK_SUMMARY, TASK_SUGGESTIONS
+from app.services.llm_scheduler import PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
 
 
-class GroqAnalyzer:
-    """AI-powered resume and job description analyzer using Groq"""
-    
-    def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
-        self.model = settings.GROQ_MODEL
-    
-    def analyze_resume_jd_match(self, resume_text: str, jd_text: str) -> Dict:
-        """
-        Analyze resume against job description and provide detailed insights
-        Returns: match score, skills analysis, keywords, improvements, and summary
-        """
-        
-        prompt = f"""You are an expert resume analyzer and career consultant. Analyze the following resume against the job description and provide a comprehensive analysis.
+_task_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="analysis")
+
+# Budget kept back from the LLM stage for persisting the result
+DEADLINE_RESERVE_SECONDS = 1.0
+# Observed analyses needed before their p90 replaces the configured estimate
+MIN_LATENCY_SAMPLES = 20
+
+
+def expected_analysis_seconds() -> float:
+    """How long an LLM analysis is expected to take (p90 of recent runs)"""
+    observed = metrics.histogram("llm.analysis_seconds")
+    if observed.count >= MIN_LATENCY_SAMPLES:
+        return observed.percentile(90)
+    return settings.ANALYZE_LLM_ESTIMATE_SECONDS
+
+
+def _await_result(future: Future):
+    """Wait for a task future no longer than the request's remaining budget"""
+    try:
+        return future.result(timeout=remaining_time())
+    except FutureTimeout:
+        future.cancel()
+        metrics.counter("deadline.exceeded.llm").inc()
+        raise DeadlineExceededError("Request deadline exceeded waiting for the AI service")
+
+
+def build_scoring_messages(resume_text: str, jd_text: str) -> List[Dict]:
+    """Structured score/skills/keywords extraction prompt"""
+    prompt = f"""You are an expert resume analyzer. Compare the following resume against the job description.
 
 RESUME:
 {resume_text}
@@ -31,7 +66,29 @@ Provide your analysis in the following JSON format:
     "matched_skills": [<list of skills found in both resume and JD>],
     "missing_skills": [<list of skills in JD but not in resume>],
     "matched_keywords": [<list of important keywords found in both>],
-    "missing_keywords": [<list of important keywords in JD but not in resume>],
+    "missing_keywords": [<list of important keywords in JD but not in resume>]
+}}
+
+Focus on technical skills, years of experience, education requirements, and key qualifications.
+Return ONLY the JSON object, no additional text."""
+    return [
+        {"role": "system", "content": "You are an expert resume analyzer. Always respond with valid JSON only."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def build_summary_messages(resume_text: str, jd_text: str) -> List[Dict]:
+    """Narrative summary and improvement suggestions prompt"""
+    prompt = f"""You are an expert resume analyzer and career consultant. Review the following resume against the job description.
+
+RESUME:
+{resume_text}
+
+JOB DESCRIPTION:
+{jd_text}
+
+Provide your review in the following JSON format:
+{{
     "improvements": [
         {{
             "category": "<category name>",
@@ -44,62 +101,138 @@ Provide your analysis in the following JSON format:
 
 Be specific and actionable. Focus on technical skills, years of experience, education requirements, and key qualifications.
 Return ONLY the JSON object, no additional text."""
+    return [
+        {"role": "system", "content": "You are an expert resume analyzer. Always respond with valid JSON only."},
+        {"role": "user", "content": prompt}
+    ]
+
 
+class GroqAnalyzer:
+    """AI-powered resume and job description analyzer using Groq"""
+    
+    def __init__(self):
+        self.router = ModelRouter()
+    
+    def analyze_resume_jd_match(self, resume_text: str, jd_text: str) -> Dict:
+        """
+        Analyze resume against job description and provide detailed insights
+        Scoring and summary run concurrently, each on its own model tier;
+        resumes over the size threshold are analyzed chunk by chunk
+        Under a request deadline, falls back to the local scorer when the
+        remaining budget is shorter than a typical LLM analysis
+        Returns: match score, skills analysis, keywords, improvements, and summary
+        """
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert resume analyzer. Always respond with valid JSON only."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=4000
-            )
-            
-            result_text = response.choices[0].message.content.strip()
-            
-            # Extract JSON from response (in case there's extra text)
-            json_start = result_text.find('{')
-            json_end = result_text.rfind('}') + 1
-            
-            if json_start != -1 and json_end > json_start:
-                result_text = result_text[json_start:json_end]
-            
-            result = json.loads(result_text)
-            
-            # Validate and ensure all fields exist
-            required_fields = ['match_score', 'matched_skills', 'missing_skills', 
-                             'matched_keywords', 'missing_keywords', 'improvements', 'summary']
-            
-            for field in required_fields:
-                if field not in result:
-                    result[field] = [] if field != 'summary' and field != 'match_score' else ('' if field == 'summary' else 0)
+            with reserve_time(DEADLINE_RESERVE_SECONDS):
+                remaining = remaining_time()
+                if remaining is not None and remaining < expected_analysis_seconds():
+                    metrics.counter("deadline.degraded.local_scorer").inc()
+                    return LocalScorer().analyze(resume_text, jd_text)
+                
+                started = time.monotonic()
+                if len(resume_text) > settings.LLM_CHUNKED_ANALYSIS_THRESHOLD_CHARS:
+                    result = self._analyze_chunked(resume_text, jd_text)
+                else:
+                    result = self._analyze_single(resume_text, jd_text)
+                metrics.histogram("llm.analysis_seconds").observe(time.monotonic() - started)
             
             # Ensure match_score is within 0-100
             result['match_score'] = max(0, min(100, float(result['match_score'])))
             
             return result
             
-        except json.JSONDecodeError as e:
-            # Fallback in case JSON parsing fails
-            return {
-                'match_score': 50,
-                'matched_skills': [],
-                'missing_skills': [],
-                'matched_keywords': [],
-                'missing_keywords': [],
-                'improvements': [
-                    {
-                        'category': 'Error',
-                        'suggestion': 'Unable to parse AI response. Please try again.',
-                        'priority': 'high'
-                    }
-                ],
-                'summary': 'An error occurred while analyzing the resume. Please try again.'
-            }
+        except RequestCancelledError:
+            raise
+        except LLMOutputError as e:
+            # Never invent a score: use the local estimate or report the failure
+            if settings.LLM_LOCAL_FALLBACK:
+                metrics.counter("llm.fallbacks.analysis").inc()
+                return LocalScorer().analyze(resume_text, jd_text)
+            raise AIServiceError(f"AI service returned an unreadable response: {str(e)}")
+        except AIServiceError:
+            if settings.LLM_LOCAL_FALLBACK:
+                metrics.counter("llm.fallbacks.analysis").inc()
+                return LocalScorer().analyze(resume_text, jd_text)
+            raise
         except Exception as e:
             raise Exception(f"Error analyzing resume: {str(e)}")
     
+    def _analyze_single(self, resume_text: str, jd_text: str) -> Dict:
+        """Scoring and summary over the whole resume"""
+        scoring = submit_in_context(
+            _task_pool,
+            self.router.complete_json,
+            TASK_SCORING,
+            build_scoring_messages(resume_text, jd_text),
+            temperature=0.3,
+            max_tokens=1500,
+            priority=PRIORITY_INTERACTIVE,
+            parse=partial(parse_llm_json, schema=SCORING_SCHEMA)
+        )
+        summary = submit_in_context(
+            _task_pool,
+            self.router.complete_json,
+            TASK_SUMMARY,
+            build_summary_messages(resume_text, jd_text),
+            temperature=0.3,
+            max_tokens=2500,
+            priority=PRIORITY_INTERACTIVE,
+            parse=partial(parse_llm_json, schema=SUMMARY_SCHEMA)
+        )
+        scores = _await_result(scoring)
+        return {**scores, **self._summary_or_local(summary, resume_text, jd_text)}
+    
+    def _summary_or_local(self, summary: Future, resume_text: str, jd_text: str) -> Dict:
+        """
+        The summary is the optional half of an analysis: if it misses the
+        deadline, the local scorer's improvements and summary stand in
+        """
+        try:
+            return _await_result(summary)
+        except DeadlineExceededError:
+            metrics.counter("deadline.degraded.summary").inc()
+            local = LocalScorer().analyze(resume_text, jd_text)
+            return {'improvements': local['improvements'], 'summary': local['summary']}
+    
+    def _analyze_chunked(self, resume_text: str, jd_text: str) -> Dict:
+        """
+        Map-reduce over section chunks for long resumes/CVs: chunks are scored
+        concurrently while the summary runs on a condensed overview, so latency
+        follows the longest chunk rather than the document length
+        """
+        chunks = split_resume_chunks(resume_text, settings.LLM_ANALYSIS_CHUNK_CHARS)
+        metrics.counter("llm.chunked_analyses").inc()
+        
+        chunk_futures = [
+            submit_in_context(
+                _task_pool,
+                self.router.complete_json,
+                TASK_SCORING,
+                build_chunk_messages(chunk, jd_text, index, len(chunks)),
+                temperature=0.3,
+                max_tokens=1500,
+                priority=PRIORITY_INTERACTIVE,
+                parse=partial(parse_llm_json, schema=CHUNK_SCHEMA)
+            )
+            for index, chunk in enumerate(chunks)
+        ]
+        summary_future = submit_in_context(
+            _task_pool,
+            self.router.complete_json,
+            TASK_SUMMARY,
+            build_summary_messages(condense_resume(chunks, settings.LLM_ANALYSIS_CHUNK_CHARS), jd_text),
+            temperature=0.3,
+            max_tokens=2500,
+            priority=PRIORITY_INTERACTIVE,
+            parse=partial(parse_llm_json, schema=SUMMARY_SCHEMA)
+        )
+        
+        chunk_results = [_await_result(future) for future in chunk_futures]
+        summary = self._summary_or_local(summary_future, resume_text, jd_text)
+        result = reduce_chunk_results(chunk_results, extra_improvements=summary.get('improvements') or [])
+        result['summary'] = summary.get('summary', '')
+        return result
+    
     def generate_improvement_suggestions(self, resume_text: str, jd_text: str, 
                                         missing_skills: List[str], missing_keywords: List[str]) -> str:
         """Generate specific improvement suggestions based on gaps"""
@@ -126,17 +259,23 @@ Provide specific suggestions on:
 Format each suggestion as a brief, actionable point (2-3 sentences)."""
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return self.router.complete(
+                TASK_SUGGESTIONS,
                 messages=[
                     {"role": "system", "content": "You are an expert resume consultant."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.5,
-                max_tokens=1500
+                max_tokens=1500,
+                priority=PRIORITY_BACKGROUND
             )
             
-            return response.choices[0].message.content.strip()
-            
+        except RequestCancelledError:
+            raise
+        except AIServiceError:
+            if settings.LLM_LOCAL_FALLBACK:
+                metrics.counter("llm.fallbacks.suggestions").inc()
+                return LocalScorer().suggestions(missing_skills, missing_keywords)
+            raise
         except Exception as e:
-            return f"Error generating suggestions: {str(e)}"
+            raise Exception(f"Error generating suggestions: {str(e)}")
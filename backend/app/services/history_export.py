@@ -0,0 +1,237 @@
+"""
+Streaming export of a user's analysis history.
+
+Rows come from a narrow projection read through a server-side cursor
+(AsyncSession.stream with yield_per), and each batch is encoded and sent
+before the next is fetched, so memory stays flat however long the history
+is. The stream opens its own session: the request's is closed before a
+StreamingResponse body runs. Encoders turn batches into bytes for one
+format; gzip wraps any of the text formats. Parquet needs pyarrow,
+imported when that format is asked for.
+"""
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator, Callable, List, Optional
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.database import AsyncSessionLocal
+from app.database.models import Analysis, JobDescription
+
+
+EXPORT_BATCH_SIZE = 500
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "json": ("application/json", "json"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def export_query(user_id: int) -> Select:
+    """The exported fields only, newest first (served by ix_analyses_user_id_created_at_id)"""
+    return (
+        select(
+            Analysis.id,
+            Analysis.created_at,
+            Analysis.match_score,
+            Analysis.improved_latex.is_not(None).label("has_improvement"),
+            Analysis.summary,
+            JobDescription.title.label("job_title"),
+            JobDescription.description.label("job_description"),
+        )
+        .outerjoin(JobDescription, Analysis.job_description_id == JobDescription.id)
+        .where(Analysis.user_id == user_id)
+        .order_by(Analysis.created_at.desc(), Analysis.id.desc())
+    )
+
+
+def _preview(text: Optional[str], length: int) -> Optional[str]:
+    return text[:length] + "..." if text and len(text) > length else text
+
+
+def _isoformat(value) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+class CsvEncoder:
+    """The spreadsheet-friendly summary: previews, Yes/No, N/A for unscored"""
+
+    def begin(self) -> bytes:
+        return self._rows([["ID", "Date", "Match Score", "Improved", "Summary Preview", "Job Title"]])
+
+    def encode(self, rows: List) -> bytes:
+        return self._rows([
+            [
+                a.id,
+                a.created_at.strftime("%Y-%m-%d %H:%M") if a.created_at else "",
+                a.match_score or "N/A",
+                "Yes" if a.has_improvement else "No",
+                _preview(a.summary, 100) or "",
+                a.job_title or "",
+            ]
+            for a in rows
+        ])
+
+    def end(self) -> bytes:
+        return b""
+
+    @staticmethod
+    def _rows(rows: List[list]) -> bytes:
+        output = io.StringIO()
+        csv.writer(output).writerows(rows)
+        return output.getvalue().encode("utf-8")
+
+
+def _record(a, preview: bool) -> dict:
+    return {
+        "id": a.id,
+        "created_at": _isoformat(a.created_at),
+        "job_title": a.job_title,
+        "job_description": _preview(a.job_description, 100) if preview else a.job_description,
+        "match_score": a.match_score,
+        "has_improvement": bool(a.has_improvement),
+        "summary": _preview(a.summary, 200) if preview else a.summary,
+    }
+
+
+class JsonEncoder:
+    """One JSON array of records with text previews, written element by element"""
+
+    def __init__(self):
+        self._first = True
+
+    def begin(self) -> bytes:
+        return b"["
+
+    def encode(self, rows: List) -> bytes:
+        parts = []
+        for a in rows:
+            parts.append(("\n  " if self._first else ",\n  ") + json.dumps(_record(a, preview=True)))
+            self._first = False
+        return "".join(parts).encode("utf-8")
+
+    def end(self) -> bytes:
+        return b"]\n" if self._first else b"\n]\n"
+
+
+class NdjsonEncoder:
+    """One full record per line, for bulk consumers"""
+
+    def begin(self) -> bytes:
+        return b""
+
+    def encode(self, rows: List) -> bytes:
+        return "".join(json.dumps(_record(a, preview=False)) + "\n" for a in rows).encode("utf-8")
+
+    def end(self) -> bytes:
+        return b""
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last take()"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # Parquet records absolute offsets in its footer
+        return self._position
+
+    def take(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+class ParquetEncoder:
+    """Full records, one row group per batch; the footer goes out last"""
+
+    def __init__(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ("id", pa.int64()),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+            ("job_title", pa.string()),
+            ("job_description", pa.string()),
+            ("match_score", pa.float64()),
+            ("has_improvement", pa.bool_()),
+            ("summary", pa.string()),
+        ])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="zstd")
+
+    def begin(self) -> bytes:
+        return self._sink.take()
+
+    def encode(self, rows: List) -> bytes:
+        columns = {
+            "id": [a.id for a in rows],
+            # SQLite returns naive datetimes; they are stored in UTC
+            "created_at": [a.created_at for a in rows],
+            "job_title": [a.job_title for a in rows],
+            "job_description": [a.job_description for a in rows],
+            "match_score": [a.match_score for a in rows],
+            "has_improvement": [bool(a.has_improvement) for a in rows],
+            "summary": [a.summary for a in rows],
+        }
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+        return self._sink.take()
+
+    def end(self) -> bytes:
+        self._writer.close()
+        return self._sink.take()
+
+
+ENCODERS = {
+    "csv": CsvEncoder,
+    "json": JsonEncoder,
+    "ndjson": NdjsonEncoder,
+    "parquet": ParquetEncoder,
+}
+
+
+async def export_stream(user_id: int, encoder, gzip: bool = False, batch_size: Optional[int] = None,
+                        session_factory: Optional[Callable[[], AsyncSession]] = None) -> AsyncIterator[bytes]:
+    """
+    Encoded export, one chunk per fetched batch of batch_size (default
+    EXPORT_BATCH_SIZE) rows, read in a session from session_factory
+    (default AsyncSessionLocal) that lives as long as the stream
+    """
+    compressor = zlib.compressobj(wbits=31) if gzip else None  # 31: gzip container
+
+    def out(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor else data
+
+    head = out(encoder.begin())
+    if head:
+        yield head
+    async with (session_factory or AsyncSessionLocal)() as db:
+        result = await db.stream(export_query(user_id).execution_options(yield_per=batch_size or EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            chunk = out(encoder.encode(rows))
+            if chunk:
+                yield chunk
+    tail = out(encoder.end())
+    if compressor:
+        tail += compressor.flush()
+    if tail:
+        yield tail
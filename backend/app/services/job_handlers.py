@@ -0,0 +1,108 @@
+"""
+Work performed for queued jobs.
+
+Each handler takes a database session and the claimed job, does the same
+work as the inline endpoint, and publishes progress steps to the progress
+broker. Only final states (completed, failed) are committed to the
+analysis row.
+"""
+import asyncio
+from datetime import datetime
+from typing import Callable, Dict
+
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import ResourceNotFoundError
+from app.database.models import Analysis, Job
+from app.services.groq_analyzer import GroqAnalyzer
+from app.services.latex_service import LaTeXService
+from app.services.progress_broker import get_progress_broker
+from app.services.resume_editor import ResumeEditor
+from app.services.supabase_storage import SupabaseStorage
+
+
+JOB_ANALYZE = "analyze"
+JOB_IMPROVE = "improve"
+
+
+def set_progress(db: Session, analysis: Analysis, status: str, percentage: int, persist: bool = False):
+    """Publish a progress step; committed to the row only with `persist`"""
+    analysis.progress_status = status
+    analysis.progress_percentage = percentage
+    if persist:
+        db.commit()
+    get_progress_broker().publish(analysis.id, status, percentage)
+
+
+def apply_analysis_result(analysis: Analysis, analysis_result: Dict):
+    analysis.match_score = analysis_result['match_score']
+    analysis.matched_skills = analysis_result['matched_skills']
+    analysis.missing_skills = analysis_result['missing_skills']
+    analysis.matched_keywords = analysis_result['matched_keywords']
+    analysis.missing_keywords = analysis_result['missing_keywords']
+    analysis.improvements = analysis_result['improvements']
+    analysis.summary = analysis_result['summary']
+    analysis.progress_status = "completed"
+    analysis.progress_percentage = 100
+
+
+def _job_analysis(db: Session, job: Job) -> Analysis:
+    analysis = db.get(Analysis, job.analysis_id)
+    if analysis is None:
+        raise ResourceNotFoundError(f"Analysis {job.analysis_id} no longer exists")
+    return analysis
+
+
+def run_analysis(db: Session, job: Job):
+    """LLM analysis of an uploaded resume whose rows the endpoint already created"""
+    analysis = _job_analysis(db, job)
+    set_progress(db, analysis, "analyzing", 30)
+    result = GroqAnalyzer().analyze_resume_jd_match(
+        resume_text=analysis.resume.extracted_text,
+        jd_text=analysis.job_description.description
+    )
+    apply_analysis_result(analysis, result)
+    db.commit()
+    get_progress_broker().publish(analysis.id, "completed", 100, {"match_score": analysis.match_score})
+
+
+def run_improvement(db: Session, job: Job):
+    """Improved LaTeX for an analysis, uploaded to generated-resumes storage"""
+    analysis = _job_analysis(db, job)
+    set_progress(db, analysis, "improving", 10)
+    improved_data = ResumeEditor().improve_resume_content(
+        resume_text=analysis.resume.extracted_text,
+        jd_text=analysis.job_description.description,
+        missing_skills=analysis.missing_skills or [],
+        missing_keywords=analysis.missing_keywords or []
+    )
+    set_progress(db, analysis, "improving", 50)
+    latex_content = LaTeXService().generate_latex_from_template(improved_data)
+    set_progress(db, analysis, "improving", 70)
+
+    latex_filename = f"improved_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tex"
+    analysis.latex_storage_path = asyncio.run(SupabaseStorage().upload_generated_resume(
+        file_path=latex_filename,
+        file_content=latex_content.encode('utf-8'),
+        analysis_id=analysis.id
+    ))
+    analysis.improved_latex = latex_content
+    analysis.progress_status = "completed"
+    analysis.progress_percentage = 100
+    db.commit()
+    get_progress_broker().publish(analysis.id, "completed", 100, {"improved": True})
+
+
+HANDLERS: Dict[str, Callable[[Session, Job], None]] = {
+    JOB_ANALYZE: run_analysis,
+    JOB_IMPROVE: run_improvement,
+}
+
+
+def mark_failed(db: Session, job: Job):
+    """Surface a dead-lettered job on its analysis"""
+    if job.analysis_id is None:
+        return
+    analysis = db.get(Analysis, job.analysis_id)
+    if analysis is not None:
+        set_progress(db, analysis, "failed", analysis.progress_percentage or 0, persist=True)
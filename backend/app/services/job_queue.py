@@ -0,0 +1,170 @@
+"""
+Durable job queue on the application database.
+
+Jobs are rows in the jobs table. Workers claim the oldest runnable job with
+SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL), so concurrent workers never
+block on or double-claim the same row; the claim is also a guarded UPDATE,
+which keeps SQLite (tests, local runs) correct with a single writer.
+
+A claimed job is invisible to other workers until `locked_until`; the
+worker extends it with heartbeats while the job runs. If the worker dies,
+the lock expires and the job is claimed again. Failures are retried with
+backoff until `max_attempts`, after which the job is dead-lettered
+(status "dead") for inspection and manual retry.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core import metrics
+from app.database.models import Job
+from app.services.llm_resilience import backoff_delay
+
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_DEAD = "dead"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue(db: Session, kind: str, user_id: int, analysis_id: Optional[int] = None,
+            payload: Optional[Dict] = None, max_attempts: Optional[int] = None) -> Job:
+    """
+    Add a job to the caller's transaction; it becomes visible to workers
+    when the caller commits, together with the rows it refers to
+    """
+    job = Job(
+        kind=kind,
+        user_id=user_id,
+        analysis_id=analysis_id,
+        payload=payload or {},
+        status=JOB_QUEUED,
+        attempts=0,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_at=_now(),
+    )
+    db.add(job)
+    db.flush()
+    metrics.counter(f"jobs.enqueued.{kind}").inc()
+    return job
+
+
+def _runnable(now: datetime):
+    """Queued jobs that are due, and running jobs whose worker stopped heartbeating"""
+    return or_(
+        and_(Job.status == JOB_QUEUED, Job.run_at <= now),
+        and_(Job.status == JOB_RUNNING, Job.locked_until < now),
+    )
+
+
+def _reap_expired(db: Session, now: datetime):
+    """Dead-letter abandoned jobs that have no attempts left"""
+    reaped = db.execute(
+        update(Job)
+        .where(Job.status == JOB_RUNNING, Job.locked_until < now, Job.attempts >= Job.max_attempts)
+        .values(status=JOB_DEAD, finished_at=now, locked_by=None, locked_until=None,
+                last_error="Visibility timeout expired on the final attempt")
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if reaped:
+        metrics.counter("jobs.dead_lettered").inc(reaped)
+
+
+def claim(db: Session, worker_id: str, kinds: Optional[Iterable[str]] = None) -> Optional[Job]:
+    """Lock the next runnable job for this worker, or return None when the queue is empty"""
+    now = _now()
+    _reap_expired(db, now)
+    query = db.query(Job.id).filter(_runnable(now))
+    if kinds:
+        query = query.filter(Job.kind.in_(list(kinds)))
+    job_id = query.order_by(Job.run_at, Job.id).limit(1).with_for_update(skip_locked=True).scalar()
+    if job_id is None:
+        db.commit()
+        return None
+
+    claimed = db.execute(
+        update(Job)
+        .where(Job.id == job_id, _runnable(now))
+        .values(
+            status=JOB_RUNNING,
+            attempts=Job.attempts + 1,
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT_SECONDS),
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    if not claimed:
+        return None
+    job = db.get(Job, job_id)
+    metrics.counter(f"jobs.claimed.{job.kind}").inc()
+    return job
+
+
+def heartbeat(db: Session, job_id: int, worker_id: str) -> bool:
+    """Extend the visibility timeout; False if the job was reclaimed by another worker"""
+    extended = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JOB_RUNNING, Job.locked_by == worker_id)
+        .values(locked_until=_now() + timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT_SECONDS))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return bool(extended)
+
+
+def complete(db: Session, job: Job):
+    job.status = JOB_SUCCEEDED
+    job.finished_at = _now()
+    job.locked_by = None
+    job.locked_until = None
+    job.last_error = None
+    db.commit()
+    metrics.counter(f"jobs.succeeded.{job.kind}").inc()
+
+
+def fail(db: Session, job: Job, error: str, retryable: bool = True) -> bool:
+    """
+    Record a failed attempt: schedule a retry with backoff, or dead-letter the
+    job when it is not retryable or out of attempts. Returns True if it will retry.
+    """
+    job.last_error = error[:2000]
+    job.locked_by = None
+    job.locked_until = None
+    if retryable and job.attempts < job.max_attempts:
+        delay = backoff_delay(job.attempts - 1, settings.JOB_RETRY_BASE_DELAY, settings.JOB_RETRY_MAX_DELAY)
+        job.status = JOB_QUEUED
+        job.run_at = _now() + timedelta(seconds=delay)
+        db.commit()
+        metrics.counter(f"jobs.retried.{job.kind}").inc()
+        return True
+    job.status = JOB_DEAD
+    job.finished_at = _now()
+    db.commit()
+    metrics.counter("jobs.dead_lettered").inc()
+    logger.warning(f"Job {job.id} ({job.kind}) dead-lettered after {job.attempts} attempts: {error}")
+    return False
+
+
+def retry_dead(db: Session, job: Job):
+    """Put a dead-lettered job back on the queue with a fresh set of attempts"""
+    job.status = JOB_QUEUED
+    job.attempts = 0
+    job.run_at = _now()
+    job.finished_at = None
+    db.commit()
+
+
+def queue_stats(db: Session) -> Dict[str, int]:
+    """Job counts per status"""
+    return dict(db.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
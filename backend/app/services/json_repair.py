@@ -0,0 +1,263 @@
+"""
+Single-pass, error-tolerant JSON extraction for LLM output.
+
+One scan over the response repairs the faults LLMs commonly produce:
+prose or code fences around the object, unescaped LaTeX backslashes
+(\\textbf, \\item, \\hfill), raw newlines and unescaped quotes inside
+strings, trailing commas, and responses truncated mid-string or
+mid-member. The repaired text is parsed once and checked against an
+optional schema.
+"""
+import json
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from app.core import metrics
+
+
+class LLMOutputError(ValueError):
+    """LLM response could not be turned into the expected JSON object"""
+
+
+# \n, \t, \b, \f or \r followed by letters is a JSON escape unless the word
+# is one of these LaTeX commands: "Name\tSkills" keeps its tab
+LATEX_COMMANDS = frozenset({
+    "newline", "noindent", "normalsize", "newpage", "nobreak", "nolinebreak", "nopagebreak", "nobreakspace",
+    "textbf", "textit", "textsc", "texttt", "textrm", "textsf", "textsl", "textup", "textnormal", "textcolor",
+    "textwidth", "textheight", "textsuperscript", "textsubscript", "textbullet", "textendash", "textemdash",
+    "textbar", "textasciitilde", "tiny", "today", "tabularnewline", "tableofcontents", "thispagestyle",
+    "titleformat", "titlespacing", "titlerule", "topmargin",
+    "begin", "bf", "bfseries", "bigskip", "baselineskip", "bullet", "break", "bibitem", "boldmath",
+    "fill", "footnote", "footnotesize", "frac", "fbox", "fontsize", "framebox", "fancyhead", "fancyfoot",
+    "rule", "raggedright", "raggedleft", "ref", "renewcommand", "rm", "rmfamily", "raisebox", "right",
+})
+CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+HEX4 = re.compile(r"[0-9a-fA-F]{4}")
+LETTERS = re.compile(r"[A-Za-z]+")
+BARE_TOKEN = re.compile(r"[A-Za-z0-9_.+\-]+")
+VALID_LITERAL = re.compile(r"(true|false|null|-?\d+(\.\d+)?([eE][+-]?\d+)?)")
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+# Container parse states
+KEY, COLON, VALUE, AFTER = "key", "colon", "value", "after"
+
+
+def _is_latex_command(text: str, index: int) -> bool:
+    """Whether the escape letter at index starts a LaTeX command rather than a JSON escape"""
+    match = LETTERS.match(text, index)
+    return match is not None and match.group(0) in LATEX_COMMANDS
+
+
+def _next_significant(text: str, index: int) -> str:
+    while index < len(text) and text[index] in " \t\r\n":
+        index += 1
+    return text[index] if index < len(text) else ""
+
+
+def repair_json(text: str) -> str:
+    """Return a repaired JSON object string extracted from an LLM response"""
+    start = text.find("{")
+    if start == -1:
+        raise LLMOutputError("No JSON object found in response")
+
+    out = []
+    # Each frame: [closer, member_start, state, literal_start]
+    stack = []
+    in_string = False
+    string_is_key = False
+    i, n = start, len(text)
+
+    def value_done():
+        if stack:
+            stack[-1][2] = AFTER
+
+    while i < n:
+        ch = text[i]
+
+        if in_string:
+            if ch == "\\":
+                nxt = text[i + 1] if i + 1 < n else ""
+                if not nxt:
+                    i += 1
+                    continue
+                if nxt in '"\\/':
+                    out.append(ch + nxt)
+                    i += 2
+                    continue
+                if nxt == "u" and HEX4.fullmatch(text[i + 2:i + 6]):
+                    out.append(text[i:i + 6])
+                    i += 6
+                    continue
+                if nxt in "bfnrt" and not _is_latex_command(text, i + 1):
+                    out.append(ch + nxt)
+                    i += 2
+                    continue
+                out.append("\\\\")  # LaTeX command or invalid escape: keep the backslash
+                i += 1
+                continue
+            if ch == '"':
+                follower = _next_significant(text, i + 1)
+                if follower and follower not in (":" if string_is_key else ",}]"):
+                    out.append('\\"')  # quote inside the string
+                    i += 1
+                    continue
+                out.append(ch)
+                in_string = False
+                if string_is_key:
+                    stack[-1][2] = COLON
+                else:
+                    value_done()
+                i += 1
+                continue
+            if ord(ch) < 0x20:
+                out.append(CONTROL_ESCAPES.get(ch, "\\u%04x" % ord(ch)))
+                i += 1
+                continue
+            out.append(ch)
+            i += 1
+            continue
+
+        if ch in " \t\r\n":
+            i += 1
+            continue
+
+        frame = stack[-1] if stack else None
+        if ch == '"':
+            in_string = True
+            string_is_key = frame is not None and frame[0] == "}" and frame[2] == KEY
+            out.append(ch)
+        elif ch in "{[":
+            out.append(ch)
+            stack.append(["}" if ch == "{" else "]", len(out), KEY if ch == "{" else VALUE, None])
+        elif ch in "}]":
+            if frame is None:
+                break
+            if frame[2] != AFTER:
+                del out[frame[1]:]  # trailing comma or dangling key
+            out.append(frame[0])
+            stack.pop()
+            if not stack:
+                break
+            value_done()
+        elif ch == ",":
+            if frame is not None and frame[2] == AFTER:
+                frame[1] = len(out)
+                frame[2] = KEY if frame[0] == "}" else VALUE
+                frame[3] = None
+                out.append(ch)
+        elif ch == ":":
+            if frame is not None and frame[2] == COLON:
+                frame[2] = VALUE
+                out.append(ch)
+        else:
+            match = BARE_TOKEN.match(text, i)
+            token = match.group(0) if match else ch
+            if frame is not None and frame[2] == VALUE:
+                frame[3] = len(out)
+                frame[2] = AFTER
+            out.append(PYTHON_LITERALS.get(token, token))
+            i += len(token)
+            continue
+        i += 1
+
+    # Truncated response: close the open string and containers
+    if stack:
+        if in_string:
+            out.append('"')
+            if string_is_key:
+                stack[-1][2] = KEY  # a key without a value is dropped below
+            else:
+                value_done()
+        while stack:
+            closer, member_start, state, literal_start = stack.pop()
+            literal_ok = literal_start is None or VALID_LITERAL.fullmatch("".join(out[literal_start:]))
+            if state != AFTER or not literal_ok:
+                del out[member_start:]
+            out.append(closer)
+            value_done()
+
+    return "".join(out)
+
+
+def _coerce(field: str, value: Any, expected: type) -> Any:
+    if expected is float:
+        if isinstance(value, bool):
+            raise LLMOutputError(f"Field '{field}' must be a number")
+        try:
+            return float(str(value).strip().rstrip("%")) if isinstance(value, str) else float(value)
+        except (TypeError, ValueError):
+            raise LLMOutputError(f"Field '{field}' must be a number")
+    if expected is list:
+        if isinstance(value, list):
+            return value
+        if isinstance(value, str):
+            return [item.strip() for item in value.split(",") if item.strip()]
+        raise LLMOutputError(f"Field '{field}' must be a list")
+    if expected is str:
+        if isinstance(value, str):
+            return value
+        if isinstance(value, list):
+            return "\n".join(str(item) for item in value)
+        if value is None:
+            return ""
+        return str(value)
+    return value
+
+
+def validate_schema(data: Dict, schema: Dict[str, Tuple[type, bool]]) -> Dict:
+    """
+    Coerce fields to their expected types and fill optional ones with empty
+    defaults. schema maps field -> (type, required); required fields that are
+    missing raise LLMOutputError
+    """
+    for field, (expected, required) in schema.items():
+        if field not in data or data[field] is None:
+            if required:
+                raise LLMOutputError(f"Missing required field '{field}'")
+            data[field] = expected()
+        else:
+            data[field] = _coerce(field, data[field], expected)
+    return data
+
+
+def parse_llm_json(text: str, schema: Optional[Dict[str, Tuple[type, bool]]] = None) -> Dict:
+    """Repair, parse and (optionally) validate the JSON object in an LLM response"""
+    try:
+        data = json.loads(repair_json(text))
+    except (json.JSONDecodeError, RecursionError) as e:
+        metrics.counter("llm.json.parse_failures").inc()
+        raise LLMOutputError(f"Unparseable AI response: {e}")
+    except LLMOutputError:
+        metrics.counter("llm.json.parse_failures").inc()
+        raise
+    if not isinstance(data, dict):
+        raise LLMOutputError("Expected a JSON object")
+    return validate_schema(data, schema) if schema else data
+
+
+SCORING_SCHEMA = {
+    "match_score": (float, True),
+    "matched_skills": (list, False),
+    "missing_skills": (list, False),
+    "matched_keywords": (list, False),
+    "missing_keywords": (list, False),
+}
+
+SUMMARY_SCHEMA = {
+    "improvements": (list, False),
+    "summary": (str, True),
+}
+
+CHUNK_SCHEMA = {**SCORING_SCHEMA, "improvements": (list, False)}
+
+IMPROVEMENT_SCHEMA = {
+    "name": (str, False),
+    "contact_info": (str, False),
+    "objective": (str, False),
+    "experience": (str, True),
+    "technical_skills": (str, False),
+    "soft_skills": (str, False),
+    "projects": (str, False),
+    "education": (str, False),
+    "certifications": (str, False),
+}
@@ -4,6 +4,8 @@ import requests
 from typing import Dict, Optional
 from datetime import datetime
 from app.config import settings
+from app.core.exceptions import RequestCancelledError
+from app.core.request_context import current_token, raise_if_cancelled
 
 
 class LaTeXService:
@@ -96,11 +98,9 @@ class LaTeXService:
             with open(tex_file, 'w', encoding='utf-8') as f:
                 f.write(latex_content)
             
-            # Compile with pdflatex
-            result = subprocess.run(
+            # Compile with pdflatex (killed if the request is cancelled)
+            result = self._run_cancellable(
                 ['pdflatex', '-interaction=nonstopmode', '-output-directory', self.pdf_dir, tex_file],
-                capture_output=True,
-                text=True,
                 timeout=30
             )
             
@@ -117,6 +117,9 @@ class LaTeXService:
             else:
                 raise Exception(f"PDF compilation failed: {result.stderr}")
                 
+        except RequestCancelledError:
+            self._remove_outputs(output_name)
+            raise
         except FileNotFoundError:
             raise Exception("pdflatex not found. Please install LaTeX or switch to online mode.")
         except subprocess.TimeoutExpired:
@@ -124,10 +127,36 @@ class LaTeXService:
         except Exception as e:
             raise Exception(f"Error compiling LaTeX: {str(e)}")
     
+    def _run_cancellable(self, command: list, timeout: float) -> subprocess.CompletedProcess:
+        """subprocess.run that kills the process when the current request is cancelled"""
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        token = current_token()
+        unregister = token.on_cancel(process.kill) if token is not None else None
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise
+        finally:
+            if unregister is not None:
+                unregister()
+        raise_if_cancelled()
+        return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+    
+    def _remove_outputs(self, output_name: str):
+        """Delete the .tex, .pdf and auxiliary files of an abandoned compilation"""
+        paths = [os.path.join(self.output_dir, f"{output_name}.tex")]
+        paths += [os.path.join(self.pdf_dir, f"{output_name}{ext}") for ext in ('.pdf', '.aux', '.log', '.out')]
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+    
     def compile_latex_online(self, latex_content: str, output_name: str) -> Optional[str]:
         """
         Compile LaTeX to PDF using online service (LaTeX.Online)
         """
+        raise_if_cancelled()
         try:
             # Prepare the request
             url = f"{self.online_url}?target=resume.pdf"
@@ -135,6 +164,7 @@ class LaTeXService:
             
             # Send compilation request
             response = requests.post(url, files=files, timeout=60)
+            raise_if_cancelled()
             
             if response.status_code == 200:
                 # Save PDF
@@ -151,6 +181,8 @@ class LaTeXService:
             else:
                 raise Exception(f"Online compilation failed with status {response.status_code}")
                 
+        except RequestCancelledError:
+            raise
         except requests.exceptions.Timeout:
             raise Exception("Online LaTeX compilation timed out")
         except Exception as e:
@@ -168,6 +200,8 @@ class LaTeXService:
         if self.latex_mode == 'local':
             try:
                 return self.compile_latex_local(latex_content, output_name)
+            except RequestCancelledError:
+                raise
             except Exception as e:
                 # Fallback to online if local fails
                 print(f"Local compilation failed: {str(e)}. Trying online...")
@@ -0,0 +1,244 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import httpx
+from app.config import settings
+from app.core import metrics
+from app.core.exceptions import AIServiceError, DeadlineExceededError
+from app.core.request_context import (
+    check_deadline,
+    clamp_timeout,
+    current_token,
+    interruptible_sleep,
+    raise_if_cancelled,
+    remaining_time,
+    submit_in_context,
+)
+from app.services.llm_scheduler import get_scheduler, PRIORITY_INTERACTIVE
+from app.services.llm_telemetry import LLMCallRecord, STATUS_ERROR
+from app.services.llm_resilience import (
+    backoff_delay,
+    get_circuit_breaker,
+    hedge_delay,
+    is_rate_limited,
+    is_retryable,
+)
+
+
+# Shared pool for hedged duplicate requests
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+# One connection pool for every LLMClient in the process: building one per
+# client costs ~30ms of TLS setup and drops keep-alive connections
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = httpx.Client(
+                    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                    follow_redirects=True,
+                )
+    return _http_client
+
+
+def close_http_client():
+    global _http_client
+    with _http_client_lock:
+        client, _http_client = _http_client, None
+    if client is not None:
+        client.close()
+
+
+def estimate_tokens(messages: List[Dict]) -> int:
+    """Rough prompt token count (~4 characters per token)"""
+    return sum(len(m.get("content", "")) for m in messages) // 4 + 4 * len(messages)
+
+
+@dataclass
+class Completion:
+    """Result of one successful attempt"""
+    text: str
+    wait_seconds: float = 0.0
+    ttft_seconds: Optional[float] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    total_tokens: Optional[int] = None
+
+
+class LLMClient:
+    """Groq chat-completions client shared by the AI services"""
+
+    def __init__(self):
+        from groq import Groq
+
+        # Retries are handled here (with jitter and the circuit breaker), not by the SDK
+        self.client = Groq(
+            api_key=settings.GROQ_API_KEY,
+            base_url=settings.GROQ_BASE_URL or None,
+            timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+            max_retries=0,
+            http_client=get_http_client()
+        )
+        self.model = settings.GROQ_MODEL
+        self.scheduler = get_scheduler()
+        self.breaker = get_circuit_breaker("groq")
+
+    def complete(self, messages: List[Dict], temperature: float, max_tokens: int,
+                 task: str = "default", priority: int = PRIORITY_INTERACTIVE,
+                 model: Optional[str] = None, call: Optional[LLMCallRecord] = None) -> str:
+        """
+        Send a chat completion through the scheduler, retrying retryable
+        failures with jittered backoff and hedging slow calls when enabled
+        Returns the stripped message content; call, if given, receives the
+        call's telemetry
+        """
+        call = call if call is not None else LLMCallRecord(task=task)
+        call.model = model or self.model
+        started = time.monotonic()
+        try:
+            completion = self._complete_with_retries(messages, temperature, max_tokens, task, priority, model, call)
+        except Exception as e:
+            call.status = STATUS_ERROR
+            call.error_type = type(e).__name__
+            raise
+        finally:
+            call.latency_ms = (time.monotonic() - started) * 1000
+
+        call.queue_wait_ms += completion.wait_seconds * 1000
+        call.ttft_ms = completion.ttft_seconds * 1000 if completion.ttft_seconds is not None else None
+        call.prompt_tokens = completion.prompt_tokens
+        call.completion_tokens = completion.completion_tokens
+        return completion.text
+
+    def _complete_with_retries(self, messages, temperature, max_tokens, task, priority, model,
+                               call: LLMCallRecord) -> Completion:
+        metrics.counter(f"llm.calls.{task}").inc()
+        last_error = None
+
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            if attempt:
+                delay = backoff_delay(attempt - 1, settings.LLM_RETRY_BASE_DELAY, settings.LLM_RETRY_MAX_DELAY)
+                remaining = remaining_time()
+                if remaining is not None and delay >= remaining:
+                    metrics.counter("deadline.exceeded.llm").inc()
+                    raise DeadlineExceededError(f"No time left to retry after: {last_error}")
+                call.retries = attempt
+                metrics.counter(f"llm.retries.{task}").inc()
+                interruptible_sleep(delay)
+            raise_if_cancelled()
+            check_deadline("llm")
+
+            self.breaker.before_call()
+            try:
+                completion = self._hedged_attempt(messages, temperature, max_tokens, task, priority, model)
+            except Exception as e:
+                if not is_retryable(e):
+                    if getattr(e, "status_code", None) is not None:
+                        self.breaker.record_success()  # provider answered; request was bad
+                    else:
+                        self.breaker.cancel()
+                    metrics.counter(f"llm.failures.{task}").inc()
+                    raise
+                self.breaker.record_failure()
+                last_error = e
+                continue
+
+            self.breaker.record_success()
+            return completion
+
+        metrics.counter(f"llm.failures.{task}").inc()
+        if is_rate_limited(last_error):
+            raise AIServiceError("AI service rate limit reached. Please try again shortly.")
+        raise AIServiceError(f"AI service temporarily unavailable: {last_error}")
+
+    def _hedged_attempt(self, messages, temperature, max_tokens, task, priority, model) -> Completion:
+        """Single attempt; if it outlives the task's p95, race a duplicate request"""
+        delay = hedge_delay(task, settings.LLM_HEDGE_MIN_SAMPLES) if settings.LLM_HEDGING_ENABLED else None
+        if delay is None:
+            return self._attempt(messages, temperature, max_tokens, task, priority, model)
+
+        primary = submit_in_context(_hedge_pool, self._attempt, messages, temperature, max_tokens, task, priority, model)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeout:
+            pass
+
+        metrics.counter(f"llm.hedges.{task}").inc()
+        hedge = submit_in_context(_hedge_pool, self._attempt, messages, temperature, max_tokens, task, priority, model)
+        last_error = None
+        for future in as_completed([primary, hedge]):
+            try:
+                return future.result()
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    def _attempt(self, messages, temperature, max_tokens, task, priority, model) -> Completion:
+        estimated = estimate_tokens(messages) + max_tokens
+        request = dict(model=model or self.model, messages=messages, temperature=temperature, max_tokens=max_tokens)
+
+        with self.scheduler.slot(priority, estimated) as lease:
+            # The provider call may not outlive the request's deadline
+            request["timeout"] = clamp_timeout(settings.LLM_REQUEST_TIMEOUT_SECONDS)
+            started = time.monotonic()
+            if settings.LLM_STREAM_RESPONSES:
+                completion = self._read_stream(self.client.chat.completions.create(stream=True, **request), started)
+            else:
+                response = self.client.chat.completions.create(**request)
+                completion = Completion(text=response.choices[0].message.content)
+                self._apply_usage(completion, response.usage)
+            metrics.histogram(f"llm.latency_seconds.{task}").observe(time.monotonic() - started)
+            if completion.ttft_seconds is not None:
+                metrics.histogram(f"llm.ttft_seconds.{task}").observe(completion.ttft_seconds)
+            if completion.total_tokens is not None:
+                lease.used_tokens = completion.total_tokens
+
+        completion.text = completion.text.strip()
+        completion.wait_seconds = lease.wait_seconds
+        return completion
+
+    def _read_stream(self, stream, started: float) -> Completion:
+        """
+        Collect a streamed completion, noting when the first content arrives
+        Cancelling the request closes the response, so a blocked read ends too
+        """
+        completion = Completion(text="")
+        parts = []
+        token = current_token()
+        response = getattr(stream, "response", None)
+        unregister = token.on_cancel(response.close) if token is not None and response is not None else None
+        try:
+            for chunk in stream:
+                raise_if_cancelled()
+                x_groq = getattr(chunk, "x_groq", None)
+                if x_groq is not None:
+                    self._apply_usage(completion, getattr(x_groq, "usage", None))
+                for choice in getattr(chunk, "choices", None) or []:
+                    content = getattr(choice.delta, "content", None)
+                    if content:
+                        if completion.ttft_seconds is None:
+                            completion.ttft_seconds = time.monotonic() - started
+                        parts.append(content)
+        except Exception:
+            raise_if_cancelled()  # a read failing because we closed it is a cancellation
+            raise
+        finally:
+            if unregister is not None:
+                unregister()
+        completion.text = "".join(parts)
+        return completion
+
+    @staticmethod
+    def _apply_usage(completion: Completion, usage):
+        if usage is None:
+            return
+        completion.prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion.completion_tokens = getattr(usage, "completion_tokens", None)
+        completion.total_tokens = getattr(usage, "total_tokens", None)
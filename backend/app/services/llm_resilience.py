@@ -0,0 +1,122 @@
+"""
+Resilience primitives for LLM calls: retry classification, jittered
+exponential backoff, hedging delay and a circuit breaker.
+"""
+import random
+import threading
+import time
+from typing import Optional
+
+from app.core import metrics
+from app.core.exceptions import CircuitOpenError
+
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Connection errors, timeouts, 429s and 5xx responses are worth retrying"""
+    from groq import APIConnectionError, APIStatusError
+
+    if isinstance(exc, APIConnectionError):
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+def is_rate_limited(exc: Optional[Exception]) -> bool:
+    return getattr(exc, "status_code", None) == 429
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff for the given (0-based) attempt"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def hedge_delay(task: str, min_samples: int) -> Optional[float]:
+    """p95 provider latency for the task, or None until enough samples exist"""
+    latency = metrics.histogram(f"llm.latency_seconds.{task}")
+    if latency.count < min_samples:
+        return None
+    return latency.percentile(95)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive provider failures.
+    While open every call fails fast; after `reset_timeout` a single trial
+    call is let through (half-open) and its outcome closes or re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call must not be sent"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError()
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    raise CircuitOpenError()
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    metrics.counter(f"llm.circuit.{self.name}.opened").inc()
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def cancel(self):
+        """The call never reached the provider; release a half-open trial"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str = "groq") -> CircuitBreaker:
+    """Process-wide breaker per provider"""
+    with _breakers_lock:
+        if name not in _breakers:
+            from app.config import settings
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.LLM_CIRCUIT_RESET_SECONDS,
+            )
+        return _breakers[name]
@@ -0,0 +1,310 @@
+"""
+Provider-wide scheduler for outgoing LLM calls.
+
+Budgets (requests/minute, tokens/minute), the in-flight concurrency limit and
+the wait queue live in a small SQLite file so every uvicorn/gunicorn worker
+on the host shares them. Calls are admitted strictly by priority, then FIFO,
+and the concurrency limit adapts AIMD-style: it grows by roughly one slot per
+window of successful calls and halves whenever the provider answers 429.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from app.core import metrics
+from app.core.exceptions import AIServiceError, DeadlineExceededError
+from app.core.request_context import clamp_timeout, interruptible_sleep
+
+
+PRIORITY_INTERACTIVE = 0  # user is waiting on the response (analysis)
+PRIORITY_BACKGROUND = 10  # improvement generation, suggestions
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BACKGROUND: "background",
+}
+
+POLL_INTERVAL = 0.05
+MAX_SLEEP = 0.25
+STALE_WAITER_SECONDS = 5.0
+DEFAULT_RATE_LIMIT_BACKOFF = 2.0
+DECREASE_FACTOR = 0.5
+
+
+def priority_name(priority: int) -> str:
+    return PRIORITY_NAMES.get(priority, str(priority))
+
+
+@dataclass
+class Lease:
+    """Admission granted by the scheduler for a single LLM call"""
+    id: str
+    priority: int
+    reserved_tokens: float
+    wait_seconds: float
+    used_tokens: Optional[int] = None
+
+
+class LLMScheduler:
+    """Token-bucket + AIMD admission control shared across worker processes"""
+
+    def __init__(
+        self,
+        db_path: str,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        queue_timeout: float = 60.0,
+        lease_seconds: float = 180.0,
+    ):
+        self.db_path = db_path
+        self.rpm = float(requests_per_minute)
+        self.tpm = float(tokens_per_minute)
+        self.max_concurrency = float(max_concurrency)
+        self.min_concurrency = float(min_concurrency)
+        self.queue_timeout = queue_timeout
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+        self._init_schema()
+
+    # ------------------------------------------------------------------ store
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _init_schema(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(name TEXT PRIMARY KEY, level REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value REAL NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases "
+                "(id TEXT PRIMARY KEY, expires_at REAL NOT NULL, reserved_tokens REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS waiters (id TEXT PRIMARY KEY, priority INTEGER NOT NULL, "
+                "enqueued_at REAL NOT NULL, heartbeat_at REAL NOT NULL)"
+            )
+
+    def _get_state(self, conn, key: str, default: float) -> float:
+        row = conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_state(self, conn, key: str, value: float):
+        conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, value))
+
+    def _refill(self, conn, name: str, capacity: float, now: float) -> float:
+        row = conn.execute("SELECT level, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return capacity
+        level, updated_at = row
+        return min(capacity, level + max(0.0, now - updated_at) * capacity / 60.0)
+
+    def _store_level(self, conn, name: str, level: float, now: float):
+        conn.execute(
+            "INSERT OR REPLACE INTO buckets (name, level, updated_at) VALUES (?, ?, ?)",
+            (name, level, now),
+        )
+
+    # -------------------------------------------------------------- admission
+
+    def _try_admit(self, conn, waiter_id: str, priority: int, enqueued_at: float,
+                   tokens: float, now: float) -> Optional[float]:
+        """Admit the waiter if it is at the head of the queue and budget allows.
+        Returns None on admission, otherwise the suggested seconds to wait."""
+        conn.execute("UPDATE waiters SET heartbeat_at = ? WHERE id = ?", (now, waiter_id))
+        conn.execute("DELETE FROM waiters WHERE heartbeat_at < ?", (now - STALE_WAITER_SECONDS,))
+        conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+
+        ahead = conn.execute(
+            "SELECT COUNT(*) FROM waiters WHERE priority < ? "
+            "OR (priority = ? AND (enqueued_at < ? OR (enqueued_at = ? AND id < ?)))",
+            (priority, priority, enqueued_at, enqueued_at, waiter_id),
+        ).fetchone()[0]
+        if ahead:
+            return POLL_INTERVAL
+
+        blocked_until = self._get_state(conn, "blocked_until", 0.0)
+        if blocked_until > now:
+            return blocked_until - now
+
+        limit = self._get_state(conn, "concurrency_limit", self.max_concurrency)
+        inflight = conn.execute("SELECT COUNT(*) FROM leases").fetchone()[0]
+        if inflight >= int(limit):
+            return POLL_INTERVAL
+
+        rpm_level = self._refill(conn, "rpm", self.rpm, now)
+        tpm_level = self._refill(conn, "tpm", self.tpm, now)
+        if rpm_level < 1:
+            return (1 - rpm_level) * 60.0 / self.rpm
+        if tpm_level < tokens:
+            return (tokens - tpm_level) * 60.0 / self.tpm
+
+        self._store_level(conn, "rpm", rpm_level - 1, now)
+        self._store_level(conn, "tpm", tpm_level - tokens, now)
+        conn.execute(
+            "INSERT INTO leases (id, expires_at, reserved_tokens) VALUES (?, ?, ?)",
+            (waiter_id, now + self.lease_seconds, tokens),
+        )
+        conn.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+        return None
+
+    def acquire(self, priority: int = PRIORITY_INTERACTIVE, estimated_tokens: int = 0) -> Lease:
+        """Block until the call may be sent. Raises AIServiceError on queue timeout."""
+        waiter_id = uuid.uuid4().hex
+        # A single call can never need more than a full bucket
+        tokens = min(float(estimated_tokens), self.tpm)
+        enqueued_at = time.time()
+        # Never queue past the request's own deadline
+        queue_timeout = clamp_timeout(self.queue_timeout)
+        deadline = enqueued_at + queue_timeout
+
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO waiters (id, priority, enqueued_at, heartbeat_at) VALUES (?, ?, ?, ?)",
+                (waiter_id, priority, enqueued_at, enqueued_at),
+            )
+
+        admitted = False
+        try:
+            while True:
+                now = time.time()
+                with self._transaction() as conn:
+                    wait = self._try_admit(conn, waiter_id, priority, enqueued_at, tokens, now)
+                if wait is None:
+                    admitted = True
+                    break
+                if now + wait > deadline:
+                    metrics.counter("llm.scheduler.queue_timeouts").inc()
+                    if queue_timeout < self.queue_timeout:
+                        raise DeadlineExceededError("Request deadline reached while queued for the AI service")
+                    raise AIServiceError("AI service is busy. Please try again shortly.")
+                interruptible_sleep(min(max(wait, POLL_INTERVAL / 5), MAX_SLEEP))
+        finally:
+            if not admitted:
+                with self._transaction() as conn:
+                    conn.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+
+        wait_seconds = time.time() - enqueued_at
+        metrics.histogram(f"llm.scheduler.wait_seconds.{priority_name(priority)}").observe(wait_seconds)
+        metrics.counter("llm.scheduler.admitted").inc()
+        return Lease(id=waiter_id, priority=priority, reserved_tokens=tokens, wait_seconds=wait_seconds)
+
+    def release(self, lease: Lease, rate_limited: bool = False, retry_after: Optional[float] = None):
+        """Return the lease, reconcile token usage and adapt the concurrency limit"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM leases WHERE id = ?", (lease.id,))
+
+            if lease.used_tokens is not None:
+                # Refund over-estimates; under-estimates leave the bucket in debt
+                tpm_level = self._refill(conn, "tpm", self.tpm, now)
+                adjusted = tpm_level + lease.reserved_tokens - lease.used_tokens
+                self._store_level(conn, "tpm", min(self.tpm, adjusted), now)
+
+            limit = self._get_state(conn, "concurrency_limit", self.max_concurrency)
+            if rate_limited:
+                limit = max(self.min_concurrency, limit * DECREASE_FACTOR)
+                backoff = retry_after if retry_after is not None else DEFAULT_RATE_LIMIT_BACKOFF
+                blocked_until = max(self._get_state(conn, "blocked_until", 0.0), now + backoff)
+                self._set_state(conn, "blocked_until", blocked_until)
+                metrics.counter("llm.scheduler.rate_limited").inc()
+            else:
+                limit = min(self.max_concurrency, limit + 1.0 / limit)
+            self._set_state(conn, "concurrency_limit", limit)
+
+    @contextmanager
+    def slot(self, priority: int = PRIORITY_INTERACTIVE, estimated_tokens: int = 0):
+        """Acquire/release around a provider call; set lease.used_tokens inside"""
+        lease = self.acquire(priority, estimated_tokens)
+        try:
+            yield lease
+        except Exception as e:
+            rate_limited, retry_after = _rate_limit_info(e)
+            self.release(lease, rate_limited=rate_limited, retry_after=retry_after)
+            raise
+        self.release(lease)
+
+    # ---------------------------------------------------------------- metrics
+
+    def stats(self) -> Dict:
+        """Queue depth per priority, in-flight calls, limits and bucket levels"""
+        now = time.time()
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT priority, COUNT(*) FROM waiters WHERE heartbeat_at >= ? GROUP BY priority",
+            (now - STALE_WAITER_SECONDS,),
+        ).fetchall()
+        inflight = conn.execute("SELECT COUNT(*) FROM leases WHERE expires_at >= ?", (now,)).fetchone()[0]
+        return {
+            "queue_depth": {priority_name(priority): count for priority, count in rows},
+            "in_flight": inflight,
+            "concurrency_limit": round(self._get_state(conn, "concurrency_limit", self.max_concurrency), 2),
+            "blocked_for_seconds": round(max(0.0, self._get_state(conn, "blocked_until", 0.0) - now), 2),
+            "requests_available": round(self._refill(conn, "rpm", self.rpm, now), 2),
+            "tokens_available": round(self._refill(conn, "tpm", self.tpm, now), 2),
+        }
+
+
+def _rate_limit_info(exc: Exception):
+    """(is_429, retry_after_seconds) for provider SDK errors"""
+    if getattr(exc, "status_code", None) != 429:
+        return False, None
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return True, float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return True, None
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """Process-wide scheduler configured from settings"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                from app.config import settings
+                _scheduler = LLMScheduler(
+                    db_path=settings.LLM_SCHEDULER_DB or os.path.join(
+                        tempfile.gettempdir(), "resumecraft_llm_scheduler.sqlite3"
+                    ),
+                    requests_per_minute=settings.GROQ_RPM_LIMIT,
+                    tokens_per_minute=settings.GROQ_TPM_LIMIT,
+                    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+                    queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+                )
+    return _scheduler
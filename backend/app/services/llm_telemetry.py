@@ -0,0 +1,222 @@
+"""
+Per-call LLM telemetry.
+
+Every call made through ModelRouter produces an LLMCallRecord. Records are
+buffered in memory and written to the llm_calls table in batches by a
+background thread, so telemetry never adds a database round trip to the
+request that made the call. Aggregates over the table back the
+/api/metrics/llm/calls endpoints.
+"""
+import logging
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import Integer, case, func, insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core import metrics
+from app.database.models import LLMCall
+
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+PARSE_OK = "ok"
+PARSE_FAILED = "failed"
+
+GROUP_COLUMNS = {"task": LLMCall.task, "model": LLMCall.model}
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class LLMCallRecord:
+    """One LLM call; filled in by ModelRouter and LLMClient as the call progresses"""
+    task: str
+    model: str = ""
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    queue_wait_ms: float = 0.0
+    ttft_ms: Optional[float] = None
+    latency_ms: float = 0.0
+    retries: int = 0
+    parse_outcome: Optional[str] = None
+    cache_hit: bool = False
+    status: str = STATUS_OK
+    error_type: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class TelemetryWriter:
+    """Buffers call records and inserts them in batches from a background thread"""
+
+    def __init__(self, session_factory: Callable[[], Session], batch_size: int = 200,
+                 flush_interval: float = 5.0, max_buffer: int = 10000, enabled: bool = True):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.enabled = enabled
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, call: LLMCallRecord):
+        if not self.enabled:
+            return
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self._buffer.popleft()
+                metrics.counter("llm.telemetry.dropped").inc()
+            self._buffer.append(call)
+            full = len(self._buffer) >= self.batch_size
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="llm-telemetry", daemon=True)
+                self._thread.start()
+        if full:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of rows written"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                if not batch:
+                    return written
+                try:
+                    with self.session_factory() as db:
+                        db.execute(insert(LLMCall), [asdict(call) for call in batch])
+                        db.commit()
+                    written += len(batch)
+                    metrics.counter("llm.telemetry.written").inc(len(batch))
+                except Exception as e:
+                    # Telemetry is best effort: drop the batch rather than retry forever
+                    metrics.counter("llm.telemetry.write_failures").inc()
+                    logger.warning(f"Dropping {len(batch)} LLM telemetry records: {e}")
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+_writer: Optional[TelemetryWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_telemetry_writer() -> TelemetryWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            from app.database.database import SessionLocal
+            _writer = TelemetryWriter(
+                SessionLocal,
+                batch_size=settings.LLM_TELEMETRY_BATCH_SIZE,
+                flush_interval=settings.LLM_TELEMETRY_FLUSH_SECONDS,
+                max_buffer=settings.LLM_TELEMETRY_MAX_BUFFER,
+                enabled=settings.LLM_TELEMETRY_ENABLED,
+            )
+        return _writer
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def _latency_percentiles(db: Session, since: datetime, group_column) -> Dict[str, Dict[str, float]]:
+    """Latency percentiles per group: in SQL on PostgreSQL, in Python elsewhere"""
+    if db.get_bind().dialect.name == "postgresql":
+        columns = [func.percentile_cont(p / 100).within_group(LLMCall.latency_ms) for p in PERCENTILES]
+        rows = db.query(group_column, *columns).filter(
+            LLMCall.created_at >= since, LLMCall.cache_hit.is_(False)
+        ).group_by(group_column).all()
+        return {row[0]: {f"p{p}": value for p, value in zip(PERCENTILES, row[1:])} for row in rows}
+
+    samples: Dict[str, List[float]] = {}
+    rows = db.query(group_column, LLMCall.latency_ms).filter(
+        LLMCall.created_at >= since, LLMCall.cache_hit.is_(False)
+    )
+    for group, latency in rows:
+        samples.setdefault(group, []).append(latency or 0.0)
+    return {group: {f"p{p}": _percentile(values, p) for p in PERCENTILES} for group, values in samples.items()}
+
+
+def summarize_calls(db: Session, since: datetime, group_by: str = "task") -> List[Dict]:
+    """
+    Per-group call counts, error/parse-failure/cache-hit counts, token totals
+    and latency averages/percentiles; cache hits are excluded from latency
+    """
+    group_column = GROUP_COLUMNS[group_by]
+    is_error = case((LLMCall.status != STATUS_OK, 1), else_=0)
+    is_parse_failure = case((LLMCall.parse_outcome == PARSE_FAILED, 1), else_=0)
+    is_cache_hit = LLMCall.cache_hit.cast(Integer)
+
+    rows = db.query(
+        group_column,
+        func.count(LLMCall.id),
+        func.sum(is_error),
+        func.sum(is_parse_failure),
+        func.sum(is_cache_hit),
+        func.sum(LLMCall.retries),
+        func.sum(LLMCall.prompt_tokens),
+        func.sum(LLMCall.completion_tokens),
+        func.avg(LLMCall.queue_wait_ms),
+        func.avg(LLMCall.ttft_ms),
+        func.avg(LLMCall.latency_ms),
+    ).filter(LLMCall.created_at >= since).group_by(group_column).order_by(group_column).all()
+
+    percentiles = _latency_percentiles(db, since, group_column)
+    summary = []
+    for (group, calls, errors, parse_failures, cache_hits, retries, prompt_tokens, completion_tokens,
+         avg_wait, avg_ttft, avg_latency) in rows:
+        summary.append({
+            group_by: group,
+            "calls": calls,
+            "errors": int(errors or 0),
+            "parse_failures": int(parse_failures or 0),
+            "cache_hits": int(cache_hits or 0),
+            "retries": int(retries or 0),
+            "prompt_tokens": int(prompt_tokens or 0),
+            "completion_tokens": int(completion_tokens or 0),
+            "avg_queue_wait_ms": round(avg_wait or 0.0, 1),
+            "avg_ttft_ms": round(avg_ttft, 1) if avg_ttft is not None else None,
+            "avg_latency_ms": round(avg_latency or 0.0, 1),
+            **{name: round(value, 1) if value is not None else None
+               for name, value in percentiles.get(group, {}).items()},
+        })
+    return summary
+
+
+def daily_token_usage(db: Session, since: datetime) -> List[Dict]:
+    """Calls and tokens per day and task"""
+    day = func.date(LLMCall.created_at)
+    rows = db.query(
+        day, LLMCall.task, func.count(LLMCall.id),
+        func.sum(LLMCall.prompt_tokens), func.sum(LLMCall.completion_tokens)
+    ).filter(LLMCall.created_at >= since).group_by(day, LLMCall.task).order_by(day, LLMCall.task).all()
+    return [
+        {
+            "day": str(row_day),
+            "task": task,
+            "calls": calls,
+            "prompt_tokens": int(prompt_tokens or 0),
+            "completion_tokens": int(completion_tokens or 0),
+        }
+        for row_day, task, calls, prompt_tokens, completion_tokens in rows
+    ]
@@ -0,0 +1,89 @@
+import re
+from collections import Counter
+from typing import Dict, List
+from app.services.resume_parser import COMMON_SKILLS
+
+
+STOPWORDS = {
+    'about', 'above', 'across', 'after', 'also', 'and', 'are', 'based', 'been', 'being', 'both',
+    'can', 'candidate', 'company', 'could', 'each', 'etc', 'experience', 'for', 'from', 'have',
+    'including', 'into', 'job', 'looking', 'more', 'must', 'nice', 'our', 'plus', 'preferred',
+    'required', 'requirements', 'responsibilities', 'role', 'should', 'strong', 'team', 'that',
+    'the', 'their', 'them', 'this', 'will', 'with', 'within', 'work', 'working', 'would',
+    'years', 'you', 'your'
+}
+
+MAX_KEYWORDS = 20
+
+
+class LocalScorer:
+    """
+    Deterministic keyword/skill matcher used when the AI provider is unavailable
+    Produces the same result shape as GroqAnalyzer.analyze_resume_jd_match
+    """
+
+    def extract_keywords(self, text: str, limit: int = MAX_KEYWORDS) -> List[str]:
+        """Most frequent meaningful words in the text"""
+        words = re.findall(r"[a-zA-Z][a-zA-Z+#.\-]{3,}", text.lower())
+        counts = Counter(w.strip('.-') for w in words if w.strip('.-') not in STOPWORDS)
+        return [word for word, _ in counts.most_common(limit)]
+
+    def analyze(self, resume_text: str, jd_text: str) -> Dict:
+        """Score resume against JD using skill and keyword overlap"""
+        resume_lower = resume_text.lower()
+        jd_lower = jd_text.lower()
+
+        jd_skills = [skill for skill in COMMON_SKILLS if skill in jd_lower]
+        matched_skills = [skill.title() for skill in jd_skills if skill in resume_lower]
+        missing_skills = [skill.title() for skill in jd_skills if skill not in resume_lower]
+
+        keywords = self.extract_keywords(jd_text)
+        matched_keywords = [k for k in keywords if k in resume_lower]
+        missing_keywords = [k for k in keywords if k not in resume_lower]
+
+        skill_ratio = len(matched_skills) / len(jd_skills) if jd_skills else 0.0
+        keyword_ratio = len(matched_keywords) / len(keywords) if keywords else 0.0
+        # Whole numbers, like the LLM's scores: best_match_score is an int
+        match_score = int(round(100 * (0.6 * skill_ratio + 0.4 * keyword_ratio)))
+
+        improvements = [
+            {
+                'category': 'Skills',
+                'suggestion': f'Add evidence of {skill} experience if you have it.',
+                'priority': 'high'
+            }
+            for skill in missing_skills[:5]
+        ]
+        if missing_keywords:
+            improvements.append({
+                'category': 'Keywords',
+                'suggestion': f"Work these job description terms into your bullets: {', '.join(missing_keywords[:8])}.",
+                'priority': 'medium'
+            })
+
+        return {
+            'match_score': max(0, min(100, match_score)),
+            'matched_skills': matched_skills,
+            'missing_skills': missing_skills,
+            'matched_keywords': matched_keywords,
+            'missing_keywords': missing_keywords,
+            'improvements': improvements,
+            'summary': (
+                f'This is a quick keyword-based estimate generated while the AI analyzer is unavailable. '
+                f'Your resume covers {len(matched_skills)} of {len(jd_skills)} recognised skills and '
+                f'{len(matched_keywords)} of {len(keywords)} key terms from the job description. '
+                f'Run the analysis again later for a detailed review.'
+            ),
+            'is_fallback': True
+        }
+
+    def suggestions(self, missing_skills: List[str], missing_keywords: List[str]) -> str:
+        """Plain-text improvement suggestions derived from the known gaps"""
+        lines = []
+        if missing_skills:
+            lines.append(f"- Highlight any hands-on experience with: {', '.join(missing_skills[:8])}.")
+        if missing_keywords:
+            lines.append(f"- Use the job description's wording where accurate: {', '.join(missing_keywords[:8])}.")
+        lines.append("- Rewrite experience bullets as action + measurable result.")
+        lines.append("- Move the most relevant projects and skills to the top of the resume.")
+        return "\n".join(lines)
@@ -0,0 +1,152 @@
+import time
+from typing import Callable, Dict, List, Optional
+from app.config import settings
+from app.core import metrics
+from app.services.json_repair import SCORING_SCHEMA, parse_llm_json
+from app.services.llm_client import LLMClient
+from app.services.llm_scheduler import PRIORITY_INTERACTIVE
+from app.services.llm_telemetry import (
+    LLMCallRecord,
+    PARSE_FAILED,
+    PARSE_OK,
+    TelemetryWriter,
+    get_telemetry_writer,
+)
+
+
+TASK_SCORING = "scoring"
+TASK_SUMMARY = "summary"
+TASK_IMPROVEMENT = "improvement"
+TASK_SUGGESTIONS = "suggestions"
+
+
+class ModelRouter:
+    """
+    Routes each task to its configured model tier, escalates to the large
+    model when a small model's response cannot be parsed, and records
+    telemetry for every call
+    """
+
+    def __init__(self, llm: Optional[LLMClient] = None, telemetry: Optional[TelemetryWriter] = None):
+        self.llm = llm or LLMClient()
+        self.telemetry = telemetry or get_telemetry_writer()
+        self.escalation_model = settings.LLM_ESCALATION_MODEL or settings.GROQ_MODEL
+        self.task_models = {
+            TASK_SCORING: settings.LLM_MODEL_SCORING,
+            TASK_SUMMARY: settings.LLM_MODEL_SUMMARY,
+            TASK_IMPROVEMENT: settings.LLM_MODEL_IMPROVEMENT,
+            TASK_SUGGESTIONS: settings.LLM_MODEL_SUGGESTIONS,
+        }
+
+    def model_for(self, task: str) -> str:
+        return self.task_models.get(task) or settings.GROQ_MODEL
+
+    def complete(self, task: str, messages: List[Dict], temperature: float, max_tokens: int,
+                 priority: int = PRIORITY_INTERACTIVE, model: Optional[str] = None) -> str:
+        """Plain-text completion on the task's model"""
+        return self._call(task, messages, temperature, max_tokens, priority, model or self.model_for(task))
+
+    def complete_json(self, task: str, messages: List[Dict], temperature: float, max_tokens: int,
+                      priority: int = PRIORITY_INTERACTIVE,
+                      parse: Callable[[str], Dict] = parse_llm_json) -> Dict:
+        """
+        JSON completion on the task's model; if the response does not parse,
+        retry once on the escalation model before giving up
+        """
+        model = self.model_for(task)
+        try:
+            return self._call(task, messages, temperature, max_tokens, priority, model, parse)
+        except ValueError:  # LLMOutputError
+            if model == self.escalation_model:
+                raise
+        metrics.counter(f"llm.escalations.{task}").inc()
+        return self._call(task, messages, temperature, max_tokens, priority, self.escalation_model, parse)
+
+    def record_cache_hit(self, task: str, latency_ms: float):
+        """Telemetry for a response served from cache instead of the provider"""
+        self.telemetry.record(LLMCallRecord(task=task, model=self.model_for(task),
+                                            latency_ms=latency_ms, cache_hit=True))
+
+    def _call(self, task: str, messages: List[Dict], temperature: float, max_tokens: int, priority: int,
+              model: str, parse: Optional[Callable[[str], Dict]] = None):
+        call = LLMCallRecord(task=task, model=model)
+        try:
+            text = self.llm.complete(
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                task=task,
+                priority=priority,
+                model=model,
+                call=call
+            )
+            if parse is None:
+                return text
+            try:
+                result = parse(text)
+            except ValueError:
+                call.parse_outcome = PARSE_FAILED
+                raise
+            call.parse_outcome = PARSE_OK
+            return result
+        finally:
+            self.telemetry.record(call)
+
+
+def _jaccard(a: List[str], b: List[str]) -> float:
+    left = {item.lower() for item in a or []}
+    right = {item.lower() for item in b or []}
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+
+def compare_tiers(examples: Dict[str, Dict], build_messages: Callable[[str, str], List[Dict]],
+                  small_model: str, large_model: str, router: Optional[ModelRouter] = None) -> Dict:
+    """
+    Run the scoring task on both tiers for every example and report latency
+    and agreement (score difference, skill/keyword set overlap)
+    """
+    router = router or ModelRouter()
+    rows = []
+    for example_id, example in examples.items():
+        messages = build_messages(example["resume_text"], example["job_description"])
+        results = {}
+        for tier, model in (("small", small_model), ("large", large_model)):
+            started = time.monotonic()
+            try:
+                text = router.complete(TASK_SCORING, messages, temperature=0.0, max_tokens=1000, model=model)
+                parsed, valid = parse_llm_json(text, SCORING_SCHEMA), True
+            except ValueError:
+                parsed, valid = {}, False
+            results[tier] = {"latency": time.monotonic() - started, "valid": valid, "result": parsed}
+
+        small, large = results["small"]["result"], results["large"]["result"]
+        rows.append({
+            "example": example_id,
+            "small_latency": round(results["small"]["latency"], 3),
+            "large_latency": round(results["large"]["latency"], 3),
+            "small_valid_json": results["small"]["valid"],
+            "large_valid_json": results["large"]["valid"],
+            "score_diff": abs(float(small.get("match_score", 0)) - float(large.get("match_score", 0))),
+            "skills_agreement": round(_jaccard(
+                (small.get("matched_skills") or []) + (small.get("missing_skills") or []),
+                (large.get("matched_skills") or []) + (large.get("missing_skills") or [])
+            ), 3),
+            "keywords_agreement": round(_jaccard(
+                (small.get("matched_keywords") or []) + (small.get("missing_keywords") or []),
+                (large.get("matched_keywords") or []) + (large.get("missing_keywords") or [])
+            ), 3),
+        })
+
+    count = len(rows) or 1
+    return {
+        "small_model": small_model,
+        "large_model": large_model,
+        "examples": rows,
+        "mean_small_latency": round(sum(r["small_latency"] for r in rows) / count, 3),
+        "mean_large_latency": round(sum(r["large_latency"] for r in rows) / count, 3),
+        "mean_score_diff": round(sum(r["score_diff"] for r in rows) / count, 2),
+        "mean_skills_agreement": round(sum(r["skills_agreement"] for r in rows) / count, 3),
+        "small_valid_json_rate": round(sum(r["small_valid_json"] for r in rows) / count, 3),
+    }
@@ -0,0 +1,240 @@
+"""
+In-process pub/sub for analysis progress.
+
+Progress steps are published here and delivered to subscribers (the SSE
+endpoint) without touching the database; only the final state is
+persisted, by the code that owns the analysis row.
+
+Subscribers get the latest state rather than every step: a slow consumer
+skips intermediate percentages but always receives the terminal event.
+Publishing is thread-safe, so job handlers running in worker threads can
+publish too.
+
+With PROGRESS_NOTIFY_ENABLED on PostgreSQL, events are also sent with
+NOTIFY and every web process LISTENs, so a subscriber connected to one
+process sees progress published by another (including job workers).
+"""
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Dict, Optional, Set
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.core import metrics
+
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_CHANNEL = "analysis_progress"
+TERMINAL_STATUSES = frozenset({"completed", "failed"})
+
+
+@dataclass
+class ProgressEvent:
+    analysis_id: int
+    status: str
+    percentage: int
+    data: Dict = field(default_factory=dict)
+    published_at: float = field(default_factory=time.time)
+
+    @property
+    def terminal(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class _Subscription:
+    """One subscriber's mailbox: holds only the newest undelivered event"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.pending: Optional[ProgressEvent] = None
+        self.ready = asyncio.Event()
+
+    def put(self, event: ProgressEvent):
+        # Runs on the subscriber's loop (via call_soon_threadsafe)
+        self.pending = event
+        self.ready.set()
+
+    async def get(self, timeout: Optional[float]) -> Optional[ProgressEvent]:
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.ready.clear()
+        event, self.pending = self.pending, None
+        return event
+
+
+class ProgressBroker:
+    """Latest progress per analysis, fanned out to subscribers on any event loop"""
+
+    def __init__(self, max_tracked: int = 10000):
+        self.origin = uuid.uuid4().hex  # tells this process's NOTIFYs apart from other processes'
+        self.max_tracked = max_tracked
+        self.relay: Optional["PostgresProgressRelay"] = None
+        self._lock = threading.Lock()
+        self._latest: "OrderedDict[int, ProgressEvent]" = OrderedDict()
+        self._subscribers: Dict[int, Set[_Subscription]] = {}
+
+    def publish(self, analysis_id: int, status: str, percentage: int, data: Optional[Dict] = None) -> ProgressEvent:
+        """Deliver a progress step locally and, with the relay attached, to other processes"""
+        event = ProgressEvent(analysis_id, status, percentage, data or {})
+        metrics.counter("progress.published").inc()
+        self.deliver(event)
+        if self.relay is not None:
+            self.relay.notify(event)
+        return event
+
+    def deliver(self, event: ProgressEvent):
+        """Deliver to this process's subscribers only"""
+        with self._lock:
+            self._latest[event.analysis_id] = event
+            self._latest.move_to_end(event.analysis_id)
+            while len(self._latest) > self.max_tracked:
+                self._latest.popitem(last=False)
+            subscriptions = list(self._subscribers.get(event.analysis_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                pass  # subscriber's loop already closed
+
+    def latest(self, analysis_id: int) -> Optional[ProgressEvent]:
+        with self._lock:
+            return self._latest.get(analysis_id)
+
+    def subscriber_count(self, analysis_id: int) -> int:
+        with self._lock:
+            return len(self._subscribers.get(analysis_id, ()))
+
+    async def subscribe(self, analysis_id: int, keepalive: Optional[float] = None
+                        ) -> AsyncIterator[Optional[ProgressEvent]]:
+        """
+        Events for one analysis, starting with the latest known one and
+        ending after a terminal event; yields None when `keepalive` seconds
+        pass without an event
+        """
+        subscription = _Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(analysis_id, set()).add(subscription)
+            current = self._latest.get(analysis_id)
+        if current is not None:
+            subscription.put(current)
+        try:
+            while True:
+                event = await subscription.get(keepalive)
+                yield event
+                if event is not None and event.terminal:
+                    return
+        finally:
+            with self._lock:
+                subscriptions = self._subscribers.get(analysis_id)
+                if subscriptions is not None:
+                    subscriptions.discard(subscription)
+                    if not subscriptions:
+                        del self._subscribers[analysis_id]
+
+
+class PostgresProgressRelay:
+    """Cross-process fan-out of progress events through LISTEN/NOTIFY"""
+
+    def __init__(self, broker: ProgressBroker, database_url: str, max_pending: int = 10000):
+        self.broker = broker
+        self.database_url = database_url
+        self._outbox: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=max_pending)
+        self._sender: Optional[threading.Thread] = None
+        self._sender_lock = threading.Lock()
+        self._listener = None
+
+    def notify(self, event: ProgressEvent):
+        """Queue a NOTIFY; never blocks the publisher"""
+        payload = json.dumps({"origin": self.broker.origin, **event.to_dict()})
+        try:
+            self._outbox.put_nowait(payload)
+        except queue.Full:
+            metrics.counter("progress.notify_dropped").inc()
+            return
+        if self._sender is None:
+            with self._sender_lock:
+                if self._sender is None:
+                    self._sender = threading.Thread(target=self._send_loop, name="progress-notify", daemon=True)
+                    self._sender.start()
+
+    def _send_loop(self):
+        from app.database.database import engine
+        while True:
+            payload = self._outbox.get()
+            if payload is None:
+                return
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                                 {"channel": PROGRESS_CHANNEL, "payload": payload})
+            except Exception as e:
+                # Progress is best effort: the final state is persisted with the row
+                metrics.counter("progress.notify_failures").inc()
+                logger.warning(f"Progress NOTIFY failed: {e}")
+
+    def handle(self, payload: str):
+        """Deliver an event NOTIFYed by another process"""
+        try:
+            fields = json.loads(payload)
+        except ValueError:
+            return
+        if fields.pop("origin", None) == self.broker.origin:
+            return
+        self.broker.deliver(ProgressEvent(**fields))
+
+    async def listen(self):
+        import asyncpg
+        self._listener = await asyncpg.connect(self.database_url)
+        await self._listener.add_listener(
+            PROGRESS_CHANNEL, lambda connection, pid, channel, payload: self.handle(payload)
+        )
+
+    def stop(self, timeout: float = 5.0):
+        """Send what is queued, then stop the sender thread"""
+        if self._sender is not None:
+            self._outbox.put(None)
+            self._sender.join(timeout)
+            self._sender = None
+
+    async def close(self):
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
+        self.stop()
+
+
+_broker: Optional[ProgressBroker] = None
+_broker_lock = threading.Lock()
+
+
+def get_progress_broker() -> ProgressBroker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = ProgressBroker()
+    return _broker
+
+
+def configure_progress_relay() -> Optional[PostgresProgressRelay]:
+    """Attach the NOTIFY relay to the broker when PROGRESS_NOTIFY_ENABLED on PostgreSQL"""
+    if not settings.PROGRESS_NOTIFY_ENABLED or not settings.DATABASE_URL.startswith("postgresql"):
+        return None
+    broker = get_progress_broker()
+    if broker.relay is None:
+        broker.relay = PostgresProgressRelay(broker, settings.DATABASE_URL)
+    return broker.relay
@@ -1,34 +1,30 @@
-from supabase import create_client, Client
-from app.config import settings
-from typing import Dict
+from app.services.progress_broker import ProgressBroker, get_progress_broker
+from typing import Dict, Optional
 
 
 class RealtimeService:
-    """Service for broadcasting real-time updates via Supabase"""
-    
-    def __init__(self):
-        self.client: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_SERVICE_ROLE_KEY
-        )
-    
+    """Service for broadcasting real-time progress updates to subscribers"""
+
+    def __init__(self, broker: Optional[ProgressBroker] = None):
+        self.broker = broker or get_progress_broker()
+
     async def update_analysis_progress(
-        self, 
-        analysis_id: int, 
-        status: str, 
+        self,
+        analysis_id: int,
+        status: str,
         percentage: int
     ):
-        """Update analysis progress in database to trigger realtime updates"""
-        try:
-            result = self.client.table('analyses').update({
-                'progress_status': status,
-                'progress_percentage': percentage
-            }).eq('id', analysis_id).execute()
-            return result.data
-        except Exception as e:
-            print(f"Error updating progress: {e}")
-            return None
-    
+        """
+        Publish analysis progress to subscribers of GET /api/analyze/{id}/events
+        Nothing is written to the database: the row only stores the final state
+        """
+        return self.broker.publish(analysis_id, status, percentage)
+
     async def broadcast_completion(self, analysis_id: int, data: Dict):
         """Broadcast analysis completion"""
-        await self.update_analysis_progress(analysis_id, "completed", 100)
+        return self.broker.publish(analysis_id, "completed", 100, data)
+
+
+def get_realtime_service() -> RealtimeService:
+    """Dependency: progress updates through the process-wide broker"""
+    return RealtimeService()
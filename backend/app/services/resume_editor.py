@@ -1,16 +1,18 @@
-import json
 from typing import Dict
-from groq import Groq
 from app.config import settings
+from app.core.exceptions import AIServiceError, RequestCancelledError
+from app.services.json_repair import IMPROVEMENT_SCHEMA, LLMOutputError, parse_llm_json
 from app.services.latex_service import LaTeXService
+from app.services.model_router import ModelRouter, TASK_IMPROVEMENT
+from app.services.section_improver import SectionImprover
+from app.services.llm_scheduler import PRIORITY_BACKGROUND
 
 
 class ResumeEditor:
     """AI-powered resume editor that improves resume based on job description"""
     
     def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
-        self.model = settings.GROQ_MODEL
+        self.router = ModelRouter()
         self.latex_service = LaTeXService()
     
     def improve_resume_content(self, resume_text: str, jd_text: str, 
@@ -19,6 +21,15 @@ class ResumeEditor:
         Use AI to improve resume content based on JD and identified gaps
         Returns structured data for LaTeX generation
         """
+        if settings.LLM_IMPROVEMENT_MODE == "sections":
+            try:
+                return SectionImprover(router=self.router).improve(
+                    resume_text, jd_text, missing_skills, missing_keywords
+                )
+            except (AIServiceError, RequestCancelledError):
+                raise
+            except Exception as e:
+                raise Exception(f"Error improving resume: {str(e)}")
         
         prompt = f"""You are an expert resume writer. Improve the following resume to better match the job description.
 
@@ -56,69 +67,29 @@ Use proper LaTeX formatting for bullets (\\item), bold (\\textbf{{}}), dates (\\
 Return ONLY the JSON object."""
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return self.router.complete_json(
+                TASK_IMPROVEMENT,
                 messages=[
                     {"role": "system", "content": "You are an expert resume writer. Always respond with valid JSON only."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.5,
-                max_tokens=4000
+                max_tokens=4000,
+                priority=PRIORITY_BACKGROUND,
+                parse=self.parse_improved_data
             )
             
-            result_text = response.choices[0].message.content.strip()
-            
-            # Extract JSON - find the outermost braces
-            json_start = result_text.find('{')
-            json_end = result_text.rfind('}') + 1
-            
-            if json_start != -1 and json_end > json_start:
-                result_text = result_text[json_start:json_end]
-            
-            # Try multiple parsing strategies
-            improved_data = None
-            
-            # Strategy 1: Try direct parsing with strict=False
-            try:
-                improved_data = json.loads(result_text, strict=False)
-            except json.JSONDecodeError:
-                pass
-            
-            # Strategy 2: Try with regex to extract field values directly
-            if improved_data is None:
-                try:
-                    import re
-                    # Extract each field manually using regex
-                    improved_data = {}
-                    
-                    # Pattern to match JSON field: "field": "value" or "field": "value with \"quotes\""
-                    # This handles LaTeX backslashes
-                    field_pattern = r'"(\w+)"\s*:\s*"((?:[^"\\]|\\.)*)\"'
-                    matches = re.findall(field_pattern, result_text, re.DOTALL)
-                    
-                    for field, value in matches:
-                        improved_data[field] = value
-                    
-                    if not improved_data:
-                        raise ValueError("No fields extracted")
-                        
-                except Exception:
-                    pass
-            
-            # Strategy 3: Clean and retry
-            if improved_data is None:
-                import re
-                # Remove control characters and try again
-                cleaned_text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', result_text)
-                improved_data = json.loads(cleaned_text, strict=False)
-            
-            return improved_data
-            
-        except json.JSONDecodeError as e:
+        except LLMOutputError as e:
             raise Exception(f"Error parsing AI response: {str(e)}")
+        except (AIServiceError, RequestCancelledError):
+            raise
         except Exception as e:
             raise Exception(f"Error improving resume: {str(e)}")
     
+    def parse_improved_data(self, result_text: str) -> Dict:
+        """Parse the improvement JSON, repairing LaTeX escaping and truncation"""
+        return parse_llm_json(result_text, IMPROVEMENT_SCHEMA)
+    
     def generate_improved_resume(self, resume_text: str, jd_text: str,
                                  missing_skills: list, missing_keywords: list) -> tuple:
         """
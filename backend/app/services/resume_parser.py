@@ -1,8 +1,20 @@
 import os
 import re
-from typing import Dict, Optional, Tuple
-from PyPDF2 import PdfReader
-from docx import Document
+from typing import Dict, List, Optional, Tuple
+from app.core.exceptions import RequestCancelledError
+from app.core.request_context import raise_if_cancelled
+
+
+# Common programming languages and technologies
+COMMON_SKILLS = [
+    'python', 'java', 'javascript', 'c++', 'c#', 'ruby', 'php', 'swift', 'kotlin',
+    'react', 'angular', 'vue', 'node.js', 'express', 'django', 'flask', 'fastapi',
+    'sql', 'postgresql', 'mysql', 'mongodb', 'redis', 'elasticsearch',
+    'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'ci/cd', 'git',
+    'machine learning', 'deep learning', 'nlp', 'computer vision', 'data science',
+    'tensorflow', 'pytorch', 'scikit-learn', 'pandas', 'numpy',
+    'rest api', 'graphql', 'microservices', 'agile', 'scrum'
+]
 
 
 class ResumeParser:
@@ -19,17 +31,24 @@ class ResumeParser:
     
     def extract_text_from_pdf(self, file_path: str) -> str:
         """Extract text from PDF file"""
+        from PyPDF2 import PdfReader
+
         try:
             reader = PdfReader(file_path)
             text = ""
             for page in reader.pages:
+                raise_if_cancelled()
                 text += page.extract_text() + "\n"
             return text.strip()
+        except RequestCancelledError:
+            raise
         except Exception as e:
             raise Exception(f"Error reading PDF: {str(e)}")
     
     def extract_text_from_docx(self, file_path: str) -> str:
         """Extract text from DOCX file"""
+        from docx import Document
+
         try:
             doc = Document(file_path)
             text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
@@ -87,23 +106,40 @@ class ResumeParser:
         
         return sections
     
+    def split_sections(self, text: str) -> List[Tuple[str, str]]:
+        """
+        Split text into ordered (section_name, text) spans, headers included
+        Text before the first recognised section is returned as 'header'
+        """
+        text_lower = text.lower()
+        starts = sorted(
+            (match.start(), section_name)
+            for section_name, pattern in self.section_patterns.items()
+            for match in re.finditer(pattern, text_lower, re.IGNORECASE)
+        )
+        
+        # Start each span at the beginning of the line holding the header
+        boundaries = []
+        for start_pos, section_name in starts:
+            line_start = text.rfind('\n', 0, start_pos) + 1
+            if not boundaries or line_start > boundaries[-1][0]:
+                boundaries.append((line_start, section_name))
+        
+        spans = []
+        if not boundaries or boundaries[0][0] > 0:
+            spans.append(('header', text[:boundaries[0][0] if boundaries else len(text)]))
+        for i, (start_pos, section_name) in enumerate(boundaries):
+            end_pos = boundaries[i + 1][0] if i + 1 < len(boundaries) else len(text)
+            spans.append((section_name, text[start_pos:end_pos]))
+        
+        return [(name, content) for name, content in spans if content.strip()]
+    
     def extract_skills(self, text: str) -> list:
         """Extract skills from text"""
-        # Common programming languages and technologies
-        common_skills = [
-            'python', 'java', 'javascript', 'c++', 'c#', 'ruby', 'php', 'swift', 'kotlin',
-            'react', 'angular', 'vue', 'node.js', 'express', 'django', 'flask', 'fastapi',
-            'sql', 'postgresql', 'mysql', 'mongodb', 'redis', 'elasticsearch',
-            'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'ci/cd', 'git',
-            'machine learning', 'deep learning', 'nlp', 'computer vision', 'data science',
-            'tensorflow', 'pytorch', 'scikit-learn', 'pandas', 'numpy',
-            'rest api', 'graphql', 'microservices', 'agile', 'scrum'
-        ]
-        
         text_lower = text.lower()
         found_skills = []
         
-        for skill in common_skills:
+        for skill in COMMON_SKILLS:
             if skill in text_lower:
                 found_skills.append(skill.title())
         
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from app.config import settings
+from app.core import metrics
+from app.core.exceptions import RequestCancelledError
+from app.core.local_cache import LocalCache
+from app.core.request_context import submit_in_context
+from app.services.llm_scheduler import PRIORITY_BACKGROUND
+from app.services.model_router import ModelRouter, TASK_IMPROVEMENT
+from app.services.resume_parser import ResumeParser
+
+
+_section_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="improve-section")
+
+_cache: Optional[LocalCache] = None
+
+EDUCATION_TERMS = re.compile(r"degree|bachelor|master|phd|ph\.d|mba|university|college|gpa|diploma", re.I)
+CERTIFICATION_TERMS = re.compile(r"certif|licen|aws|azure|gcp|pmp|scrum|cissp|comptia", re.I)
+
+LATEX_SPECIAL = {
+    '\\': r'\textbackslash{}', '&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#',
+    '_': r'\_', '{': r'\{', '}': r'\}', '~': r'\textasciitilde{}', '^': r'\textasciicircum{}',
+}
+
+# How each section is prompted and which gaps can change its output
+SECTIONS = {
+    "header": {
+        "title": "header",
+        "source": None,
+        "gaps": "none",
+        "instructions": (
+            "Return exactly two lines:\n"
+            "NAME: <full name>\n"
+            "CONTACT: <phone | email | location | LinkedIn | GitHub | portfolio, LaTeX-escaped, separated by \\quad>"
+        ),
+    },
+    "objective": {
+        "title": "career objective",
+        "source": None,
+        "gaps": "all",
+        "instructions": "Write a 2-3 sentence career objective aligned with the job description.",
+    },
+    "experience": {
+        "title": "experience",
+        "source": "experience",
+        "gaps": "all",
+        "instructions": (
+            "For each role use \\textbf{<Job Title>, <Company>} \\hfill <Dates> followed by an itemize "
+            "list of impactful, quantified bullets (\\item). Do not invent employers or dates."
+        ),
+    },
+    "skills": {
+        "title": "skills",
+        "source": "skills",
+        "gaps": "skills",
+        "instructions": (
+            "Return exactly two lines:\n"
+            "TECHNICAL: <comma-separated technical skills>\n"
+            "SOFT: <comma-separated soft skills>"
+        ),
+    },
+    "projects": {
+        "title": "projects",
+        "source": "projects",
+        "gaps": "skills",
+        "instructions": "For each project use \\textbf{<Project Name>} followed by an itemize list of bullets (\\item).",
+    },
+    "education": {
+        "title": "education",
+        "source": "education",
+        "gaps": "education",
+        "instructions": "For each entry use \\textbf{<Degree>} \\hfill <Dates> \\\\ <Institution>.",
+    },
+    "certifications": {
+        "title": "certifications",
+        "source": "certifications",
+        "gaps": "certifications",
+        "instructions": "Use an itemize list (\\item). If there are no certifications, return nothing.",
+    },
+}
+
+
+def latex_escape(text: str) -> str:
+    return "".join(LATEX_SPECIAL.get(ch, ch) for ch in text)
+
+
+def get_section_cache() -> LocalCache:
+    global _cache
+    if _cache is None:
+        _cache = LocalCache(
+            settings.SECTION_CACHE_DB or os.path.join(tempfile.gettempdir(), "resumecraft_section_cache.sqlite3")
+        )
+    return _cache
+
+
+class SectionImprover:
+    """
+    Improves each resume section with its own small, concurrent LLM call.
+    Sections are cached on their source text and the gaps relevant to them,
+    so a JD tweak only regenerates the sections whose gaps changed.
+    A section that fails keeps its original text instead of failing the resume.
+    """
+
+    def __init__(self, router: Optional[ModelRouter] = None, cache: Optional[LocalCache] = None):
+        self.router = router or ModelRouter()
+        self.cache = cache if cache is not None else get_section_cache()
+        self.parser = ResumeParser()
+
+    def relevant_gaps(self, section: str, missing_skills: List[str], missing_keywords: List[str]) -> Dict:
+        scope = SECTIONS[section]["gaps"]
+        if scope == "none":
+            return {"skills": [], "keywords": []}
+        if scope == "all":
+            return {"skills": sorted(missing_skills), "keywords": sorted(missing_keywords)}
+        if scope == "skills":
+            return {"skills": sorted(missing_skills), "keywords": []}
+        pattern = EDUCATION_TERMS if scope == "education" else CERTIFICATION_TERMS
+        return {
+            "skills": sorted(s for s in missing_skills if pattern.search(s)),
+            "keywords": sorted(k for k in missing_keywords if pattern.search(k)),
+        }
+
+    def section_source(self, section: str, resume_text: str, parsed_sections: Dict[str, str]) -> str:
+        source_key = SECTIONS[section]["source"]
+        if source_key is None:
+            return resume_text[:1500]
+        return parsed_sections.get(source_key, "")
+
+    def build_messages(self, section: str, source: str, gaps: Dict, jd_text: str) -> List[Dict]:
+        spec = SECTIONS[section]
+        parts = [
+            f"You are an expert resume writer. Rewrite the {spec['title']} section of a resume "
+            f"so it better matches the target job.",
+            f"CURRENT {spec['title'].upper()}:\n{source or '(not present in the resume)'}",
+        ]
+        if gaps["skills"] or gaps["keywords"]:
+            parts.append(
+                "GAPS TO ADDRESS (only where truthful):\n"
+                f"- Missing Skills: {', '.join(gaps['skills'])}\n"
+                f"- Missing Keywords: {', '.join(gaps['keywords'])}"
+            )
+        if section == "objective":
+            parts.append(f"JOB DESCRIPTION:\n{jd_text[:1500]}")
+        parts.append(spec["instructions"])
+        parts.append("Return ONLY the LaTeX content, with no section heading, no JSON and no code fences.")
+        return [
+            {"role": "system", "content": "You are an expert resume writer. Output LaTeX only."},
+            {"role": "user", "content": "\n\n".join(parts)}
+        ]
+
+    def cache_key(self, section: str, source: str, gaps: Dict, jd_text: str) -> str:
+        payload = [section, self.router.model_for(TASK_IMPROVEMENT), source, gaps]
+        if section == "objective":
+            payload.append(jd_text)
+        return "section:" + hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+    def parse_section(self, section: str, text: str) -> Dict[str, str]:
+        text = re.sub(r"^```[a-zA-Z]*\s*|\s*```$", "", text.strip())
+        if section == "header":
+            return self._parse_lines(text, {"NAME": "name", "CONTACT": "contact_info"})
+        if section == "skills":
+            return self._parse_lines(text, {"TECHNICAL": "technical_skills", "SOFT": "soft_skills"})
+        return {section: text}
+
+    def _parse_lines(self, text: str, labels: Dict[str, str]) -> Dict[str, str]:
+        result = {}
+        for line in text.splitlines():
+            label, _, value = line.partition(":")
+            field = labels.get(label.strip().upper())
+            if field and value.strip():
+                result[field] = value.strip()
+        if len(result) != len(labels):
+            raise ValueError(f"Expected lines: {', '.join(labels)}")
+        return result
+
+    def fallback_section(self, section: str, source: str, resume_text: str) -> Dict[str, str]:
+        """Original content, escaped for LaTeX"""
+        if section == "header":
+            first_line = next((line.strip() for line in resume_text.splitlines() if line.strip()), "")
+            contact = [c for c in (self.parser.extract_phone(resume_text), self.parser.extract_email(resume_text)) if c]
+            return {"name": latex_escape(first_line), "contact_info": latex_escape(" | ".join(contact))}
+        if section == "skills":
+            return {"technical_skills": latex_escape(", ".join(self.parser.extract_skills(resume_text))),
+                    "soft_skills": ""}
+        return {section: latex_escape(source)}
+
+    def improve_section(self, section: str, resume_text: str, jd_text: str, parsed_sections: Dict[str, str],
+                        missing_skills: List[str], missing_keywords: List[str]) -> Dict[str, str]:
+        source = self.section_source(section, resume_text, parsed_sections)
+        gaps = self.relevant_gaps(section, missing_skills, missing_keywords)
+        key = self.cache_key(section, source, gaps, jd_text)
+
+        started = time.monotonic()
+        cached = self.cache.get(key)
+        if cached is not None:
+            metrics.counter("llm.section_cache.hits").inc()
+            self.router.record_cache_hit(TASK_IMPROVEMENT, (time.monotonic() - started) * 1000)
+            return json.loads(cached)
+        metrics.counter("llm.section_cache.misses").inc()
+
+        text = self.router.complete(
+            TASK_IMPROVEMENT,
+            self.build_messages(section, source, gaps, jd_text),
+            temperature=0.5,
+            max_tokens=1200,
+            priority=PRIORITY_BACKGROUND
+        )
+        result = self.parse_section(section, text)
+        self.cache.set(key, json.dumps(result))
+        return result
+
+    def improve(self, resume_text: str, jd_text: str,
+                missing_skills: List[str], missing_keywords: List[str]) -> Dict[str, str]:
+        """Improve all sections concurrently and assemble the template fields"""
+        parsed_sections = self.parser.extract_sections(resume_text)
+        futures = {
+            section: submit_in_context(
+                _section_pool,
+                self.improve_section, section, resume_text, jd_text, parsed_sections,
+                missing_skills, missing_keywords
+            )
+            for section in SECTIONS
+        }
+
+        improved_data, errors = {}, []
+        for section, future in futures.items():
+            try:
+                improved_data.update(future.result())
+            except RequestCancelledError:
+                raise
+            except Exception as e:
+                errors.append(e)
+                metrics.counter("llm.section_failures").inc()
+                source = self.section_source(section, resume_text, parsed_sections)
+                improved_data.update(self.fallback_section(section, source, resume_text))
+
+        if len(errors) == len(SECTIONS):
+            raise errors[0]
+        return improved_data
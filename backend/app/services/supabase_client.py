@@ -0,0 +1,67 @@
+"""
+Process-wide Supabase client.
+
+supabase-py opens its PostgREST and Storage HTTP sessions when a client is
+created, so one shared client keeps connections alive across requests
+instead of paying client setup and a fresh TLS handshake on every call.
+The client is created on first use and closed on shutdown.
+"""
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Optional, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.core import metrics
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+
+T = TypeVar("T")
+
+_client: Optional["Client"] = None
+_client_lock = threading.Lock()
+
+
+def get_supabase_client() -> "Client":
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # supabase-py (and gotrue's models) take ~100ms to import; only pay that on first use
+                from supabase import create_client
+                from supabase.lib.client_options import ClientOptions
+
+                _client = create_client(
+                    settings.SUPABASE_URL,
+                    settings.SUPABASE_SERVICE_ROLE_KEY,
+                    options=ClientOptions(
+                        postgrest_client_timeout=settings.SUPABASE_TIMEOUT_SECONDS,
+                        storage_client_timeout=settings.SUPABASE_TIMEOUT_SECONDS,
+                    ),
+                )
+    return _client
+
+
+def close_supabase_client():
+    """Close the shared client's HTTP sessions"""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.postgrest.session.close()
+        client.storage.session.close()
+
+
+async def timed_call(operation: str, fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking client call off the event loop, timing it as supabase.{operation}"""
+    started = time.monotonic()
+    try:
+        return await run_in_threadpool(fn, *args, **kwargs)
+    except Exception:
+        metrics.counter(f"supabase.{operation}.errors").inc()
+        raise
+    finally:
+        metrics.histogram(f"supabase.{operation}.seconds").observe(time.monotonic() - started)
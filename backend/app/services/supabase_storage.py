@@ -1,21 +1,30 @@
-from supabase import create_client, Client
-from app.config import settings
+from app.services.supabase_client import get_supabase_client, timed_call
+from typing import TYPE_CHECKING, Optional
 import mimetypes
 from datetime import timedelta
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+
 class SupabaseStorage:
-    def __init__(self):
-        self.client: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_SERVICE_ROLE_KEY
-        )
+    def __init__(self, client: Optional["Client"] = None):
+        self._client = client
+    
+    @property
+    def client(self) -> "Client":
+        # The process-wide client, resolved on first call: its HTTP connections are reused across requests
+        return self._client or get_supabase_client()
     
     async def upload_resume(self, file_path: str, file_content: bytes, user_id: int):
         """Upload resume to Supabase Storage"""
         bucket = "resumes"
         path = f"{user_id}/{file_path}"
         
-        # Upload file
-        result = self.client.storage.from_(bucket).upload(
+        # Upload file; runs off the event loop so callers can bound it
+        result = await timed_call(
+            "storage.upload",
+            self.client.storage.from_(bucket).upload,
             path=path,
             file=file_content,
             file_options={"content-type": mimetypes.guess_type(file_path)[0]}
@@ -27,7 +36,9 @@ class SupabaseStorage:
         bucket = "generated-resumes"
         path = f"{analysis_id}/{file_path}"
         
-        result = self.client.storage.from_(bucket).upload(
+        result = await timed_call(
+            "storage.upload",
+            self.client.storage.from_(bucket).upload,
             path=path,
             file=file_content,
             file_options={"content-type": mimetypes.guess_type(file_path)[0]}
@@ -36,7 +47,9 @@ class SupabaseStorage:
     
     async def get_signed_url(self, bucket: str, path: str, expires_in: int = 3600):
         """Generate signed URL for secure file access"""
-        result = self.client.storage.from_(bucket).create_signed_url(
+        result = await timed_call(
+            "storage.signed_url",
+            self.client.storage.from_(bucket).create_signed_url,
             path=path,
             expires_in=expires_in
         )
@@ -44,4 +57,9 @@ class SupabaseStorage:
     
     async def delete_file(self, bucket: str, path: str):
         """Delete file from storage"""
-        self.client.storage.from_(bucket).remove([path])
+        await timed_call("storage.delete", self.client.storage.from_(bucket).remove, [path])
+
+
+def get_storage() -> SupabaseStorage:
+    """Dependency: storage backed by the shared Supabase client"""
+    return SupabaseStorage()
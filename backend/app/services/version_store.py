@@ -0,0 +1,322 @@
+"""
+Delta-compressed storage for resume versions.
+
+Consecutive versions usually differ by a few lines, so a version is only
+stored whole (zlib-compressed) every VERSION_SNAPSHOT_INTERVAL versions, or
+when a diff would save little; the others store the compressed line diff
+from the version before. Reading a version decodes the chain from the
+nearest snapshot, and the result goes into a host-wide LocalCache, so
+repeated reads skip both the payload query and the decoding. Each row also
+records its size, content hash and the lines added and removed against the
+version before, so listings never touch the content at all.
+
+Rows written before the store (encoding "text") keep their plain
+latex_content and count as snapshots. To re-encode them and see the space
+saved, run:
+
+    python -m app.services.version_store [--analysis-id N]
+"""
+import argparse
+import asyncio
+import difflib
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+from difflib import SequenceMatcher
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+
+from app.config import settings
+from app.core.exceptions import DatabaseError
+from app.core.local_cache import LocalCache
+from app.database.models import ResumeVersion
+
+
+ENCODING_TEXT = "text"
+ENCODING_SNAPSHOT = "snapshot"
+ENCODING_DELTA = "delta"
+
+# Tries at numbering a new version when concurrent saves take the number first
+SAVE_ATTEMPTS = 5
+
+_cache: Optional[LocalCache] = None
+
+
+def get_version_cache() -> LocalCache:
+    global _cache
+    if _cache is None:
+        _cache = LocalCache(
+            settings.VERSION_CACHE_DB or os.path.join(tempfile.gettempdir(), "resumecraft_version_cache.sqlite3"),
+            max_entries=settings.VERSION_CACHE_MAX_ENTRIES,
+        )
+    return _cache
+
+
+def _cache_key(version_id: int) -> str:
+    return f"resume_version:{version_id}"
+
+
+def make_delta(old: str, new: str) -> list:
+    """Line ops turning old into new: n copies n lines, -n skips n, a list inserts its lines"""
+    a, b = old.splitlines(keepends=True), new.splitlines(keepends=True)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(b[j1:j2])
+    return ops
+
+
+def apply_delta(old: str, ops: list) -> str:
+    lines = old.splitlines(keepends=True)
+    out, position = [], 0
+    for op in ops:
+        if isinstance(op, list):
+            out.extend(op)
+        elif op > 0:
+            out.extend(lines[position:position + op])
+            position += op
+        else:
+            position -= op
+    return "".join(out)
+
+
+def encode(text: str, previous: Optional[str], chain_length: int, ops: Optional[list] = None) -> Tuple[str, bytes]:
+    """
+    (encoding, payload) for a version following `previous`, whose chain
+    already holds `chain_length` deltas after its snapshot; `ops` is
+    make_delta(previous, text) when the caller has it already
+    """
+    snapshot = zlib.compress(text.encode("utf-8"), 9)
+    if previous is None or chain_length + 1 >= settings.VERSION_SNAPSHOT_INTERVAL:
+        return ENCODING_SNAPSHOT, snapshot
+    if ops is None:
+        ops = make_delta(previous, text)
+    delta = zlib.compress(json.dumps(ops, separators=(",", ":")).encode("utf-8"), 9)
+    if len(delta) * 2 > len(snapshot):
+        # A rewrite: a snapshot costs little more and starts a fresh chain
+        return ENCODING_SNAPSHOT, snapshot
+    return ENCODING_DELTA, delta
+
+
+def line_stats(ops: list) -> Tuple[int, int]:
+    """(lines added, lines removed) by a delta"""
+    return sum(len(op) for op in ops if isinstance(op, list)), -sum(op for op in ops if not isinstance(op, list) and op < 0)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _store(version: ResumeVersion, text: str, previous: Optional[str], chain_length: int):
+    """Encode text onto the row, with its size, hash and line stats against previous"""
+    ops = make_delta(previous, text) if previous is not None else [text.splitlines(keepends=True)]
+    version.encoding, version.payload = encode(text, previous, chain_length, ops)
+    version.latex_content = None
+    version.size = len(text.encode("utf-8"))
+    version.content_hash = content_hash(text)
+    version.lines_added, version.lines_removed = line_stats(ops)
+
+
+def _apply_payload(text: str, payload: bytes) -> str:
+    return apply_delta(text, json.loads(zlib.decompress(payload)))
+
+
+def decode_chain(rows) -> str:
+    """The text of the last row, given rows from a snapshot onwards, oldest first"""
+    text = None
+    for row in rows:
+        if row.encoding == ENCODING_DELTA:
+            text = _apply_payload(text, row.payload)
+        elif row.encoding == ENCODING_SNAPSHOT:
+            text = zlib.decompress(row.payload).decode("utf-8")
+        else:
+            text = row.latex_content
+    return text
+
+
+def unified_diff(old: str, new: str, old_label: str, new_label: str) -> str:
+    return "".join(difflib.unified_diff(
+        old.splitlines(keepends=True), new.splitlines(keepends=True), fromfile=old_label, tofile=new_label
+    ))
+
+
+def _snapshot_number(analysis_id: int, version_number: int):
+    """The number of the nearest version at or before version_number that is stored whole"""
+    return select(func.max(ResumeVersion.version_number)).where(
+        ResumeVersion.analysis_id == analysis_id,
+        ResumeVersion.version_number <= version_number,
+        ResumeVersion.encoding != ENCODING_DELTA,
+    ).scalar_subquery()
+
+
+async def _chain_length(db: AsyncSession, analysis_id: int, version_number: int) -> int:
+    result = await db.execute(select(func.count()).where(
+        ResumeVersion.analysis_id == analysis_id,
+        ResumeVersion.version_number > _snapshot_number(analysis_id, version_number),
+        ResumeVersion.version_number <= version_number,
+    ))
+    return result.scalar_one()
+
+
+async def read_version(db: AsyncSession, version: ResumeVersion) -> str:
+    """The LaTeX of a version, from the cache or decoded from its chain"""
+    cache = get_version_cache()
+    text = cache.get(_cache_key(version.id))
+    if text is not None:
+        return text
+    result = await db.execute(
+        select(ResumeVersion.encoding, ResumeVersion.payload, ResumeVersion.latex_content)
+        .where(
+            ResumeVersion.analysis_id == version.analysis_id,
+            ResumeVersion.version_number >= _snapshot_number(version.analysis_id, version.version_number),
+            ResumeVersion.version_number <= version.version_number,
+        )
+        .order_by(ResumeVersion.version_number)
+    )
+    text = decode_chain(result.all())
+    cache.set(_cache_key(version.id), text)
+    return text
+
+
+async def read_versions(db: AsyncSession, analysis_id: int) -> List[Tuple[ResumeVersion, str]]:
+    """Every version of an analysis with its LaTeX, oldest first, decoded in one pass"""
+    result = await db.execute(
+        select(ResumeVersion)
+        .where(ResumeVersion.analysis_id == analysis_id)
+        .options(undefer(ResumeVersion.payload), undefer(ResumeVersion.latex_content))
+        .order_by(ResumeVersion.version_number)
+    )
+    versions, texts = list(result.scalars().all()), []
+    for version in versions:
+        # Each delta applies to the text just decoded
+        texts.append(decode_chain([version]) if version.encoding != ENCODING_DELTA or not texts
+                     else _apply_payload(texts[-1], version.payload))
+    return list(zip(versions, texts))
+
+
+async def save_version(db: AsyncSession, analysis_id: int, latex_content: str,
+                       description: Optional[str] = None) -> Tuple[ResumeVersion, str]:
+    """
+    Store a new version after the newest one and commit; returns it with its
+    LaTeX. A concurrent save can take the same number first: then the unique
+    constraint rejects this one, and it is encoded again after the new newest
+    """
+    for attempt in range(SAVE_ATTEMPTS):
+        latest = (await db.execute(
+            select(ResumeVersion)
+            .where(ResumeVersion.analysis_id == analysis_id)
+            .order_by(ResumeVersion.version_number.desc())
+            .limit(1)
+        )).scalars().first()
+        previous, chain_length = None, 0
+        if latest is not None:
+            previous = await read_version(db, latest)
+            chain_length = await _chain_length(db, analysis_id, latest.version_number)
+
+        version = ResumeVersion(
+            analysis_id=analysis_id,
+            # After the newest rather than count + 1: numbers stay unique after deletes
+            version_number=latest.version_number + 1 if latest is not None else 1,
+            description=description,
+        )
+        _store(version, latex_content, previous, chain_length)
+        db.add(version)
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            continue
+        await db.refresh(version)
+        get_version_cache().set(_cache_key(version.id), latex_content)
+        return version, latex_content
+    raise DatabaseError(f"Could not save a version of analysis {analysis_id}: too many concurrent saves")
+
+
+async def delete_version(db: AsyncSession, version: ResumeVersion):
+    """
+    Delete a version and commit, re-encoding the next one: it may be a diff
+    from this one, and its line stats now compare against the version before
+    """
+    following = (await db.execute(
+        select(ResumeVersion)
+        .where(ResumeVersion.analysis_id == version.analysis_id, ResumeVersion.version_number > version.version_number)
+        .order_by(ResumeVersion.version_number)
+        .limit(1)
+    )).scalars().first()
+    if following is not None:
+        text = await read_version(db, following)
+        previous = (await db.execute(
+            select(ResumeVersion)
+            .where(ResumeVersion.analysis_id == version.analysis_id,
+                   ResumeVersion.version_number < version.version_number)
+            .order_by(ResumeVersion.version_number.desc())
+            .limit(1)
+        )).scalars().first()
+        if previous is None:
+            _store(following, text, None, 0)
+        elif following.encoding == ENCODING_DELTA:
+            _store(following, text, await read_version(db, previous),
+                   await _chain_length(db, version.analysis_id, previous.version_number))
+        else:
+            # Keep the snapshot (or legacy text) as it is; only the stats change
+            ops = make_delta(await read_version(db, previous), text)
+            following.lines_added, following.lines_removed = line_stats(ops)
+
+    await db.delete(version)
+    await db.commit()
+    get_version_cache().delete(_cache_key(version.id))
+
+
+async def recompress(db: AsyncSession, analysis_id: Optional[int] = None) -> Tuple[int, int, int]:
+    """
+    Re-encode stored versions (every analysis, or one) through the store.
+    Returns (versions, bytes as plain LaTeX, bytes stored)
+    """
+    query = select(ResumeVersion.analysis_id).distinct()
+    if analysis_id is not None:
+        query = query.where(ResumeVersion.analysis_id == analysis_id)
+    count = plain = stored = 0
+    for current in (await db.execute(query)).scalars().all():
+        previous, chain_length = None, 0
+        for version, text in await read_versions(db, current):
+            _store(version, text, previous, chain_length)
+            chain_length = chain_length + 1 if version.encoding == ENCODING_DELTA else 0
+            previous = text
+            count += 1
+            plain += len(text.encode("utf-8"))
+            stored += len(version.payload)
+        await db.commit()
+    return count, plain, stored
+
+
+async def _main(analysis_id: Optional[int]):
+    from app.database.database import AsyncSessionLocal, async_engine
+    try:
+        async with AsyncSessionLocal() as db:
+            count, plain, stored = await recompress(db, analysis_id)
+    finally:
+        await async_engine.dispose()
+    saved = 1 - stored / plain if plain else 0.0
+    print(f"Re-encoded {count} version(s): {plain} bytes of LaTeX stored in {stored} bytes ({saved:.0%} smaller)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-encode resume versions as snapshots and deltas")
+    parser.add_argument("--analysis-id", type=int, help="one analysis only (default: all)")
+    args = parser.parse_args()
+    asyncio.run(_main(args.analysis_id))
+
+
+if __name__ == "__main__":
+    main()
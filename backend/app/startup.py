@@ -0,0 +1,83 @@
+"""
+Optional warm-up run by the app's lifespan before it serves requests
+(STARTUP_WARMUP=true). Heavy SDKs are otherwise imported on first use,
+so without it the first analysis pays for them.
+"""
+import asyncio
+import importlib
+import logging
+import time
+from typing import Callable, Dict
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from app.config import settings
+from app.core import metrics
+from app.database.database import async_engine, engine
+
+logger = logging.getLogger(__name__)
+
+
+def _import_parser_backends():
+    for module in ("PyPDF2", "docx"):
+        importlib.import_module(module)
+
+
+def _warm_llm_client():
+    from app.services.llm_client import LLMClient
+    LLMClient()
+
+
+def _warm_supabase():
+    if settings.SUPABASE_URL:
+        from app.services.supabase_client import get_supabase_client
+        get_supabase_client()
+
+
+def _open_sync_pool():
+    # Hold pool_size connections at once so the pool keeps that many open
+    connections = [engine.connect() for _ in range(engine.pool.size())]
+    try:
+        for conn in connections:
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            conn.close()
+
+
+async def _open_async_pool():
+    async def ping():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(engine.pool.size())))
+
+
+async def _timed(name: str, step: Callable) -> float:
+    started = time.monotonic()
+    try:
+        if asyncio.iscoroutinefunction(step):
+            await step()
+        else:
+            await run_in_threadpool(step)
+    except Exception as e:
+        # Best effort: a step that fails here fails again, visibly, on first use
+        logger.warning(f"Warm-up step {name} failed: {e}")
+    elapsed = time.monotonic() - started
+    metrics.histogram(f"startup.warmup_seconds.{name}").observe(elapsed)
+    return elapsed
+
+
+async def warm_up() -> Dict[str, float]:
+    """Run the warm-up steps concurrently; returns seconds per step"""
+    steps = {
+        "parser": _import_parser_backends,
+        "llm_client": _warm_llm_client,
+        "supabase": _warm_supabase,
+        "db_pool": _open_sync_pool,
+        "async_db_pool": _open_async_pool,
+    }
+    timings = dict(zip(steps, await asyncio.gather(*(_timed(name, step) for name, step in steps.items()))))
+    logger.info("Warm-up finished: " + ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in timings.items()))
+    return timings
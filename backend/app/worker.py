@@ -0,0 +1,143 @@
+"""
+Job worker: consumes the jobs table.
+
+    python -m app.worker --concurrency 4 --kinds analyze,improve
+
+Each worker thread claims one job at a time, heartbeats its visibility
+timeout while the handler runs, and records success, retry or
+dead-lettering. SIGTERM/SIGINT stop claiming new jobs and let running jobs
+finish, so deploys do not lose work; a hard kill only delays the job until
+its visibility timeout expires and another worker picks it up.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core import metrics
+from app.core.exceptions import ResumeAnalyzerException
+from app.database.database import SessionLocal
+from app.database.models import Job
+from app.services import job_queue
+from app.services.job_handlers import HANDLERS, mark_failed
+from app.services.progress_broker import configure_progress_relay
+from app.services.llm_client import close_http_client
+from app.services.supabase_client import close_supabase_client
+
+
+logger = logging.getLogger(__name__)
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Client errors (bad input, missing rows) will fail again; everything else is retried"""
+    if isinstance(exc, ResumeAnalyzerException):
+        return exc.status_code >= 500
+    return True
+
+
+class Worker:
+    """Pool of threads polling the queue"""
+
+    def __init__(self, concurrency: int = 1, kinds: Optional[Iterable[str]] = None,
+                 session_factory: Callable[[], Session] = SessionLocal,
+                 poll_interval: Optional[float] = None):
+        self.concurrency = concurrency
+        self.kinds = list(kinds) if kinds else None
+        self.session_factory = session_factory
+        self.poll_interval = settings.JOB_POLL_SECONDS if poll_interval is None else poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = threading.Event()
+        self._threads = []
+
+    def run_once(self, slot: int = 0) -> bool:
+        """Claim and run a single job; False when nothing was runnable"""
+        worker_id = f"{self.worker_id}:{slot}"
+        with self.session_factory() as db:
+            job = job_queue.claim(db, worker_id, self.kinds)
+            if job is None:
+                return False
+            self._run(db, job, worker_id)
+            return True
+
+    def _run(self, db: Session, job: Job, worker_id: str):
+        done = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(job.id, worker_id, done), daemon=True)
+        beat.start()
+        started = time.monotonic()
+        try:
+            HANDLERS[job.kind](db, job)
+            job_queue.complete(db, job)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Job {job.id} ({job.kind}) attempt {job.attempts} failed: {e}")
+            if not job_queue.fail(db, job, f"{type(e).__name__}: {e}", retryable=is_retryable(e)):
+                mark_failed(db, job)
+        finally:
+            done.set()
+            metrics.histogram(f"jobs.run_seconds.{job.kind}").observe(time.monotonic() - started)
+
+    def _heartbeat(self, job_id: int, worker_id: str, done: threading.Event):
+        interval = max(1.0, settings.JOB_VISIBILITY_TIMEOUT_SECONDS / 3)
+        while not done.wait(interval):
+            try:
+                with self.session_factory() as db:
+                    if not job_queue.heartbeat(db, job_id, worker_id):
+                        logger.warning(f"Lost the lock on job {job_id}")
+                        return
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+
+    def _loop(self, slot: int):
+        while not self.stopping.is_set():
+            try:
+                ran = self.run_once(slot)
+            except Exception as e:
+                logger.error(f"Worker slot {slot} error: {e}")
+                ran = False
+            if not ran:
+                self.stopping.wait(self.poll_interval)
+
+    def start(self):
+        for slot in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, args=(slot,), name=f"job-worker-{slot}")
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, *_):
+        self.stopping.set()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--concurrency", type=int, default=settings.JOB_WORKER_CONCURRENCY)
+    parser.add_argument("--kinds", default="", help="comma-separated job kinds (default: all)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Progress from this process reaches web processes' subscribers only through NOTIFY
+    relay = configure_progress_relay()
+    worker = Worker(concurrency=args.concurrency, kinds=[k for k in args.kinds.split(",") if k])
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.start()
+    logger.info(f"Worker {worker.worker_id} running {args.concurrency} slot(s)")
+    worker.join()
+    close_http_client()
+    close_supabase_client()
+    if relay is not None:
+        relay.stop()
+
+
+if __name__ == "__main__":
+    main()
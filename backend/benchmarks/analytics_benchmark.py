@@ -0,0 +1,154 @@
+"""
+Analytics stats: loading every analysis row vs SQL aggregates.
+
+Seeds a SQLite database with users holding many analyses (multi-kilobyte
+improved_latex and summary, JSON skill lists) and times the two ways of
+computing GET /api/analytics/stats for the heaviest user: the old path,
+which selects every Analysis row and loops over them in Python, aggregate
+queries over the analyses, and the per-day rollup the route now reads.
+Reports time and peak Python memory.
+
+Usage (from backend/):
+    python -m benchmarks.analytics_benchmark [--analyses 10000] [--users 3] [--runs 5]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database.database import Base
+from app.database.models import Analysis, JobDescription, Resume, User
+from app.database.queries import user_analysis_stats, user_daily_trends, user_rollup_stats, user_rollup_trends
+from app.database.stats_rollup import rebuild
+
+
+LATEX = "\\section{Experience}\n" + "\\item Built and operated Python services on AWS. " * 120  # ~6 KB
+SUMMARY = "Strong backend fit with gaps in Kubernetes and frontend experience. " * 12  # ~800 B
+SKILLS = ["Python", "FastAPI", "PostgreSQL", "Docker", "AWS", "React", "Kubernetes", "Redis"]
+
+
+def seed(url: str, users: int, analyses: int):
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    rng = random.Random(7)
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        for n in range(users):
+            user_id = conn.execute(insert(User).values(
+                email=f"user{n}@example.com", username=f"user{n}", hashed_password="x"
+            )).inserted_primary_key[0]
+            resume_id = conn.execute(insert(Resume).values(
+                user_id=user_id, filename="cv.pdf", file_path="cv.pdf", extracted_text="Python"
+            )).inserted_primary_key[0]
+            job_id = conn.execute(insert(JobDescription).values(
+                title="Engineer", description="Python"
+            )).inserted_primary_key[0]
+            # The first user is the heavy one; the others add rows the query must skip
+            count = analyses if n == 0 else analyses // 10
+            conn.execute(insert(Analysis), [
+                {
+                    "user_id": user_id, "resume_id": resume_id, "job_description_id": job_id,
+                    "match_score": round(rng.uniform(10, 98), 1),
+                    "matched_skills": rng.sample(SKILLS, 4), "missing_skills": rng.sample(SKILLS, 3),
+                    "matched_keywords": rng.sample(SKILLS, 5), "missing_keywords": rng.sample(SKILLS, 2),
+                    "improvements": [{"priority": "high", "suggestion": SUMMARY[:200]}] * 3,
+                    "summary": SUMMARY, "improved_latex": LATEX if rng.random() < 0.6 else None,
+                    "progress_status": "completed", "progress_percentage": 100,
+                    "created_at": now - timedelta(minutes=rng.randrange(0, 60 * 24 * 365)),
+                }
+                for _ in range(count)
+            ])
+    # Core inserts bypass the ORM listeners, so fill the rollup the way a backfill would
+    with Session(engine) as db:
+        rebuild(db)
+    engine.dispose()
+
+
+async def python_stats(db, user_id: int, month_start: datetime, since: datetime):
+    """The previous implementation: every row and column into Python, then loops"""
+    rows = list((await db.execute(select(Analysis).where(Analysis.user_id == user_id))).scalars().all())
+    scores = [a.match_score for a in rows if a.match_score is not None]
+    stats = {
+        "total": len(rows),
+        "avg": sum(scores) / len(scores),
+        "best": max(scores),
+        "this_month": sum(1 for a in rows if a.created_at >= month_start),
+        "improved": sum(1 for a in rows if a.improved_latex is not None),
+    }
+    days = {}
+    for a in rows:
+        if a.created_at >= since:
+            days.setdefault(a.created_at.strftime("%Y-%m-%d"), []).append(a)
+    trends = [(day, len(group)) for day, group in sorted(days.items())]
+    buckets = [0] * 5
+    for score in scores:
+        buckets[min(4, max(0, int((score - 1e-9) // 20)))] += 1
+    return stats, trends, buckets
+
+
+async def sql_stats(db, user_id: int, month_start: datetime, since: datetime):
+    return await user_analysis_stats(db, user_id, month_start), await user_daily_trends(db, user_id, since)
+
+
+async def rollup_stats(db, user_id: int, month_start: datetime, since: datetime):
+    return await user_rollup_stats(db, user_id, month_start.date()), await user_rollup_trends(db, user_id, since.date())
+
+
+async def measure(sessionmaker, fn, runs: int):
+    now = datetime.now(timezone.utc)
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    since = now - timedelta(days=365)
+    timings, peaks = [], []
+    for _ in range(runs):
+        async with sessionmaker() as db:
+            tracemalloc.start()
+            started = time.perf_counter()
+            await fn(db, 1, month_start.replace(tzinfo=None), since.replace(tzinfo=None))
+            timings.append(time.perf_counter() - started)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    return statistics.median(timings), max(peaks)
+
+
+async def run(url: str, runs: int):
+    engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    results = {name: await measure(sessionmaker, fn, runs) for name, fn in (
+        ("python", python_stats), ("sql", sql_stats), ("rollup", rollup_stats),
+    )}
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--analyses", type=int, default=10000, help="analyses held by the measured user")
+    parser.add_argument("--users", type=int, default=3, help="other users hold a tenth as many each")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='analytics-bench-'), 'bench.db')}"
+    started = time.perf_counter()
+    seed(url, args.users, args.analyses)
+    print(f"seeded {args.analyses} analyses for the measured user (+{(args.users - 1) * (args.analyses // 10)} "
+          f"for others) in {time.perf_counter() - started:.1f}s")
+    results = asyncio.run(run(url, args.runs))
+    for name, (seconds, peak) in results.items():
+        print(f"{name:>7}: median {seconds * 1000:8.1f}ms  peak Python memory {peak / 1024 / 1024:7.1f} MiB")
+    python_seconds, python_peak = results["python"]
+    for name in ("sql", "rollup"):
+        seconds, peak = results[name]
+        print(f"{name:>7} vs python: speedup {python_seconds / seconds:.0f}x, memory {python_peak / max(peak, 1):.0f}x less")
+
+
+if __name__ == "__main__":
+    main()
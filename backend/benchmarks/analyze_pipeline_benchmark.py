@@ -0,0 +1,227 @@
+"""
+Load-test the full POST /api/analyze pipeline offline.
+
+Starts the local Groq stand-in (benchmarks.fake_groq_server) on a free
+port, points the backend at it through GROQ_BASE_URL, and drives the app
+in-process with concurrent uploads. The database is a throwaway SQLite
+file; Supabase storage uploads are replaced with a no-op because they
+need the network.
+
+Usage (from backend/):
+    python -m benchmarks.analyze_pipeline_benchmark [--requests 50] [--concurrency 10]
+        [--latency lognormal:0.4,0.5] [--tokens-per-second 250] [--rate-limit-rate 0.05]
+        [--queue --workers 4] [--no-admission]
+
+With --queue the endpoint only enqueues (202) and in-process job workers
+drain the queue; the time until every job finishes is reported as well.
+"""
+import argparse
+import asyncio
+import io
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+from docx import Document
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.fake_groq_server import FakeGroqConfig, create_app
+from app.config import settings
+from app.core import metrics
+from app.core.admission import admission_stats
+from app.sample_data.example_resumes import EXAMPLE_RESUMES
+from app.worker import Worker
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_groq(config: FakeGroqConfig) -> str:
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def _docx_bytes(text: str) -> bytes:
+    document = Document()
+    for line in text.strip().splitlines():
+        document.add_paragraph(line.strip())
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def _disable_network_services():
+    from app.services.supabase_storage import SupabaseStorage
+
+    async def upload_resume(self, file_path, file_content, user_id):
+        return f"{user_id}/{file_path}"
+
+    SupabaseStorage.upload_resume = upload_resume
+
+
+def _setup_app(workdir: str):
+    from app.auth.auth import create_access_token, create_user
+    from app.database.database import AsyncSessionLocal, Base, SessionLocal
+    from app.main import app
+    from app.services.llm_telemetry import get_telemetry_writer
+
+    db_path = os.path.join(workdir, 'bench.db')
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    # Rebind the app's own session factories so queued background analyses share the database
+    SessionLocal.configure(bind=engine)
+    AsyncSessionLocal.configure(bind=create_async_engine(f"sqlite+aiosqlite:///{db_path}"))
+    get_telemetry_writer().session_factory = SessionLocal
+    with SessionLocal() as db:
+        user = create_user(db, email="bench@example.com", username="bench", password="BenchPassword123!")
+    token = create_access_token(data={"sub": str(user.id)})
+    return app, {"Authorization": f"Bearer {token}"}
+
+
+def _wait_for_queue(started: float, timeout: float = 600):
+    """Seconds from `started` until no job is queued or running; None if nothing was queued"""
+    from app.database.database import SessionLocal
+    from app.services.job_queue import JOB_QUEUED, JOB_RUNNING, queue_stats
+
+    with SessionLocal() as db:
+        if not queue_stats(db):
+            return None
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            stats = queue_stats(db)
+            db.commit()
+            if not stats.get(JOB_QUEUED) and not stats.get(JOB_RUNNING):
+                break
+            time.sleep(0.1)
+    return time.perf_counter() - started
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] if ordered else 0.0
+
+
+async def run_load(app, headers, total: int, concurrency: int):
+    examples = list(EXAMPLE_RESUMES.values())
+    files = [_docx_bytes(example["resume_text"]) for example in examples]
+    latencies, statuses, probes = [], {}, []
+    semaphore = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=600) as client:
+        async def probe():
+            # A cheap endpoint hit throughout the run: admission control must not starve it
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/health")
+                probes.append(time.perf_counter() - started)
+                await asyncio.sleep(0.05)
+
+        async def one(i):
+            example = examples[i % len(examples)]
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/analyze",
+                    headers=headers,
+                    files={"resume_file": ("resume.docx", files[i % len(files)],
+                                           "application/vnd.openxmlformats-officedocument.wordprocessingml.document")},
+                    data={"jd_text": example["job_description"], "jd_title": "Benchmark"},
+                )
+                latencies.append((time.perf_counter() - started, response.status_code))
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+    return latencies, statuses, probes, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline POST /api/analyze load test")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", default=FakeGroqConfig.latency)
+    parser.add_argument("--tokens-per-second", type=float, default=FakeGroqConfig.tokens_per_second)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--rpm", type=int, default=100000, help="scheduler request budget")
+    parser.add_argument("--tpm", type=int, default=100000000, help="scheduler token budget")
+    parser.add_argument("--slo", type=float, default=settings.ANALYZE_SLO_SECONDS, help="analyze deadline in seconds")
+    parser.add_argument("--degradation", choices=("local", "async"), default=settings.ANALYZE_DEGRADATION)
+    parser.add_argument("--queue", action="store_true", help="enqueue analyses for job workers (JOB_QUEUE_ENABLED)")
+    parser.add_argument("--workers", type=int, default=settings.JOB_WORKER_CONCURRENCY, help="job worker threads")
+    parser.add_argument("--no-admission", action="store_true", help="disable admission control on /api/analyze")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="analyze-bench-")
+    settings.GROQ_BASE_URL = start_fake_groq(FakeGroqConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+    ))
+    settings.GROQ_RPM_LIMIT = args.rpm
+    settings.GROQ_TPM_LIMIT = args.tpm
+    settings.LLM_SCHEDULER_DB = os.path.join(workdir, "scheduler.sqlite3")
+    settings.SECTION_CACHE_DB = os.path.join(workdir, "sections.sqlite3")
+    settings.ANALYZE_SLO_SECONDS = args.slo
+    settings.ANALYZE_DEGRADATION = args.degradation
+    settings.JOB_QUEUE_ENABLED = args.queue
+    settings.ADMISSION_ENABLED = not args.no_admission
+
+    _disable_network_services()
+    app, headers = _setup_app(workdir)
+    worker = Worker(concurrency=args.workers, poll_interval=0.05)
+    worker.start()
+    results, statuses, probes, elapsed = asyncio.run(run_load(app, headers, args.requests, args.concurrency))
+    latencies = [latency for latency, status_code in results]
+    served = [latency for latency, status_code in results if status_code != 503]
+    drain = _wait_for_queue(time.perf_counter() - elapsed)
+    worker.stop()
+    worker.join()
+
+    print(f"requests={args.requests} concurrency={args.concurrency} latency={args.latency} "
+          f"slo={args.slo}s degradation={args.degradation}")
+    print(f"status codes: {statuses}")
+    if drain is not None:
+        print(f"queue drained {drain:.1f}s after the first request")
+    within_slo = sum(1 for latency in latencies if latency <= args.slo)
+    print(f"within SLO: {within_slo}/{len(latencies)} ({100 * within_slo / max(1, len(latencies)):.1f}%)")
+    print(f"throughput: {args.requests / elapsed:.2f} req/s over {elapsed:.1f}s")
+    print(f"latency p50={_percentile(latencies, 50):.3f}s p95={_percentile(latencies, 95):.3f}s "
+          f"p99={_percentile(latencies, 99):.3f}s")
+    print(f"admitted latency p50={_percentile(served, 50):.3f}s p95={_percentile(served, 95):.3f}s "
+          f"p99={_percentile(served, 99):.3f}s (n={len(served)})")
+    print(f"/health during load p50={_percentile(probes, 50) * 1000:.1f}ms p95={_percentile(probes, 95) * 1000:.1f}ms "
+          f"max={max(probes, default=0) * 1000:.1f}ms")
+    if not args.no_admission:
+        print(f"admission: {admission_stats()}")
+    snapshot = metrics.snapshot("llm.")
+    counters = {**snapshot["counters"], **metrics.snapshot("deadline.")["counters"], **metrics.snapshot("jobs.")["counters"]}
+    for name, value in counters.items():
+        print(f"  {name}: {value}")
+    for name, histogram in snapshot["histograms"].items():
+        print(f"  {name}: count={histogram['count']} mean={histogram['mean']}s")
+    print("analyze stages (critical_path_seconds = end-to-end graph time):")
+    for name, histogram in metrics.snapshot("analyze.")["histograms"].items():
+        print(f"  {name}: mean={histogram['mean']}s p95={histogram['p95']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Compare the small and large model tiers on the scoring task.
+
+Uses the stored example resumes/job descriptions as the evaluation set and
+reports per-example latency, JSON validity and agreement with the large
+model (match score difference, skill/keyword set overlap).
+
+Usage (from backend/):
+    python -m benchmarks.compare_model_tiers [--small MODEL] [--large MODEL] [--json]
+"""
+import argparse
+import json
+
+from app.config import settings
+from app.sample_data.example_resumes import EXAMPLE_RESUMES
+from app.services.groq_analyzer import build_scoring_messages
+from app.services.model_router import compare_tiers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--small", default=settings.LLM_MODEL_SCORING or settings.GROQ_MODEL)
+    parser.add_argument("--large", default=settings.LLM_ESCALATION_MODEL or settings.GROQ_MODEL)
+    parser.add_argument("--json", action="store_true", help="print the raw report as JSON")
+    args = parser.parse_args()
+
+    report = compare_tiers(EXAMPLE_RESUMES, build_scoring_messages, args.small, args.large)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"small={report['small_model']}  large={report['large_model']}")
+    print(f"{'example':<22}{'small s':>9}{'large s':>9}{'score Δ':>9}{'skills':>8}{'keywords':>10}{'json':>6}")
+    for row in report["examples"]:
+        print(
+            f"{row['example']:<22}{row['small_latency']:>9.2f}{row['large_latency']:>9.2f}"
+            f"{row['score_diff']:>9.1f}{row['skills_agreement']:>8.2f}{row['keywords_agreement']:>10.2f}"
+            f"{'ok' if row['small_valid_json'] else 'bad':>6}"
+        )
+    print(
+        f"\nmean latency small={report['mean_small_latency']}s large={report['mean_large_latency']}s  "
+        f"mean score Δ={report['mean_score_diff']}  skills agreement={report['mean_skills_agreement']}  "
+        f"small valid JSON={report['small_valid_json_rate']:.0%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
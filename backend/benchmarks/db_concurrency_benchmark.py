@@ -0,0 +1,182 @@
+"""
+Compare the sync Session path with the async (asyncpg/aiosqlite) path
+under concurrent requests on a single worker.
+
+Both paths serve the same hot queries (analysis history with resume and
+job description, single analysis fetch) from one in-process FastAPI app.
+While the load runs, a pinger hits a DB-free endpoint every few
+milliseconds: its latency shows how long the event loop is blocked by
+database waits.
+
+Usage (from backend/):
+    python -m benchmarks.db_concurrency_benchmark [--requests 400] [--concurrency 50]
+        [--users 20] [--analyses-per-user 200] [--database-url postgresql://...]
+
+Without --database-url a throwaway SQLite file is used; point it at a
+PostgreSQL database (it creates and fills the tables) to measure asyncpg.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database.database import Base, async_database_url
+from app.database.models import Analysis, JobDescription, Resume, User
+from app.database.queries import get_user_analysis, list_analysis_history
+
+
+def _seed(session_factory, users: int, analyses_per_user: int):
+    with session_factory() as db:
+        for u in range(users):
+            user = User(email=f"bench{u}@example.com", username=f"bench{u}", hashed_password="x")
+            db.add(user)
+            db.flush()
+            for a in range(analyses_per_user):
+                resume = Resume(user_id=user.id, filename=f"cv{a}.pdf", file_path="x", extracted_text="Python " * 200)
+                job_desc = JobDescription(title=f"Role {a}", description="FastAPI " * 200)
+                db.add_all([resume, job_desc])
+                db.flush()
+                db.add(Analysis(user_id=user.id, resume_id=resume.id, job_description_id=job_desc.id,
+                                match_score=random.uniform(20, 95), summary="Summary " * 50,
+                                progress_status="completed", progress_percentage=100))
+            db.commit()
+        return [tuple(row) for row in db.query(Analysis.id, Analysis.user_id).all()]
+
+
+def _history_item(analysis: Analysis) -> dict:
+    return {
+        "id": analysis.id,
+        "match_score": analysis.match_score,
+        "resume_filename": analysis.resume.filename if analysis.resume else "Unknown",
+        "job_title": analysis.job_description.title or "Untitled Position",
+    }
+
+
+def build_app(sync_factory, async_factory) -> FastAPI:
+    app = FastAPI()
+
+    def get_sync_db():
+        db = sync_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_session():
+        async with async_factory() as db:
+            yield db
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    @app.get("/sync/history/{user_id}")
+    async def sync_history(user_id: int, db: Session = Depends(get_sync_db)):
+        # The pre-async route: blocking query plus lazy loads, all on the event loop
+        analyses = db.query(Analysis).filter(Analysis.user_id == user_id).order_by(Analysis.created_at.desc()).all()
+        return [_history_item(a) for a in analyses]
+
+    @app.get("/async/history/{user_id}")
+    async def async_history(user_id: int, db: AsyncSession = Depends(get_async_session)):
+        return [_history_item(a) for a in await list_analysis_history(db, user_id)]
+
+    @app.get("/sync/analysis/{user_id}/{analysis_id}")
+    async def sync_analysis(user_id: int, analysis_id: int, db: Session = Depends(get_sync_db)):
+        analysis = db.query(Analysis).filter(Analysis.id == analysis_id, Analysis.user_id == user_id).first()
+        return {"id": analysis.id, "match_score": analysis.match_score}
+
+    @app.get("/async/analysis/{user_id}/{analysis_id}")
+    async def async_analysis(user_id: int, analysis_id: int, db: AsyncSession = Depends(get_async_session)):
+        analysis = await get_user_analysis(db, analysis_id, user_id)
+        return {"id": analysis.id, "match_score": analysis.match_score}
+
+    return app
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] if ordered else 0.0
+
+
+async def run_mode(app, mode: str, analyses, total: int, concurrency: int):
+    latencies, pings = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=600) as client:
+        async def one(i):
+            analysis_id, user_id = analyses[i % len(analyses)]
+            # One history page for every four single-analysis fetches
+            path = (f"/{mode}/history/{user_id}" if i % 5 == 0
+                    else f"/{mode}/analysis/{user_id}/{analysis_id}")
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        async def pinger():
+            # Timed from when the ping was due, so time spent waiting for a
+            # blocked loop to run the pinger at all is included
+            while not done.is_set():
+                due = time.perf_counter() + 0.005
+                await asyncio.sleep(0.005)
+                await client.get("/ping")
+                pings.append(time.perf_counter() - due)
+
+        ping_task = asyncio.create_task(pinger())
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await ping_task
+    return latencies, pings, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async DB path under concurrency")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--analyses-per-user", type=int, default=200)
+    parser.add_argument("--database-url", default="")
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='db-bench-'), 'bench.db')}"
+    # Enough connections for every in-flight request: a sync checkout that has
+    # to wait for the pool would block the whole event loop until its timeout
+    pool = {"pool_size": args.concurrency, "max_overflow": 0}
+    sync_engine = create_engine(url, **pool)
+    # aiosqlite opens a connection per session (NullPool) and takes no pool sizing
+    async_engine = create_async_engine(async_database_url(url), **({} if url.startswith("sqlite") else pool))
+    Base.metadata.drop_all(bind=sync_engine)
+    Base.metadata.create_all(bind=sync_engine)
+    sync_factory = sessionmaker(bind=sync_engine, autoflush=False)
+    async_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    analyses = _seed(sync_factory, args.users, args.analyses_per_user)
+    app = build_app(sync_factory, async_factory)
+    print(f"database={url.split('@')[-1]} rows={len(analyses)} requests={args.requests} "
+          f"concurrency={args.concurrency}")
+
+    for mode in ("sync", "async"):
+        latencies, pings, elapsed = asyncio.run(run_mode(app, mode, analyses, args.requests, args.concurrency))
+        print(f"{mode:>5}: {args.requests / elapsed:7.1f} req/s  "
+              f"p50={_percentile(latencies, 50) * 1000:7.1f}ms p95={_percentile(latencies, 95) * 1000:7.1f}ms  "
+              f"event-loop ping p50={statistics.median(pings) * 1000:6.1f}ms "
+              f"p95={_percentile(pings, 95) * 1000:6.1f}ms max={max(pings) * 1000:6.1f}ms (n={len(pings)})")
+
+    Base.metadata.drop_all(bind=sync_engine)
+
+
+if __name__ == "__main__":
+    main()
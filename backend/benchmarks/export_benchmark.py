@@ -0,0 +1,116 @@
+"""
+History export: building the whole file in memory vs streaming batches.
+
+Seeds a SQLite database the way analytics_benchmark does and exports the
+heaviest user's history both ways: the old path, which loaded every row
+with .all() and wrote the complete CSV/JSON into one string before sending,
+and export_stream, which reads a server-side cursor in batches and encodes
+each batch as it arrives. Reports the time until the first 64 KiB could be
+sent, total time, peak Python memory and output size per format; the whole
+file can only start going out once it is complete.
+
+Usage (from backend/):
+    python -m benchmarks.export_benchmark [--analyses 20000] [--users 3]
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.services.history_export import ENCODERS, export_query, export_stream
+from benchmarks.analytics_benchmark import seed
+
+
+FIRST_BYTES = 64 * 1024
+
+
+def whole_file(url: str, user_id: int, format: str) -> bytes:
+    """The previous implementation: every row, then one string"""
+    engine = create_engine(url)
+    with Session(engine) as db:
+        analyses = db.execute(export_query(user_id)).all()
+        if format == "json":
+            data = [
+                {
+                    "id": a.id,
+                    "created_at": a.created_at.isoformat(),
+                    "job_description": a.job_description[:100] + "..." if len(a.job_description) > 100 else a.job_description,
+                    "match_score": a.match_score,
+                    "has_improvement": a.has_improvement,
+                    "summary": a.summary[:200] + "..." if a.summary and len(a.summary) > 200 else a.summary
+                }
+                for a in analyses
+            ]
+            body = json.dumps(data, indent=2)
+        else:
+            output = StringIO()
+            writer = csv.writer(output)
+            writer.writerow(["ID", "Date", "Match Score", "Improved", "Summary Preview"])
+            for a in analyses:
+                writer.writerow([
+                    a.id, a.created_at.strftime("%Y-%m-%d %H:%M"), a.match_score or "N/A",
+                    "Yes" if a.has_improvement else "No",
+                    (a.summary[:100] + "...") if a.summary and len(a.summary) > 100 else (a.summary or "")
+                ])
+            body = output.getvalue()
+    engine.dispose()
+    return body.encode("utf-8")
+
+
+async def streamed(url: str, user_id: int, format: str, gzip: bool = False):
+    """(seconds until 64 KiB were sent, total bytes) for export_stream, draining chunks like a socket would"""
+    engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    started, first, size = time.perf_counter(), None, 0
+    async for chunk in export_stream(user_id, ENCODERS[format](), gzip=gzip, session_factory=sessionmaker):
+        size += len(chunk)
+        if first is None and size >= FIRST_BYTES:
+            first = time.perf_counter() - started
+    await engine.dispose()
+    return first if first is not None else time.perf_counter() - started, size
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--analyses", type=int, default=20000, help="analyses held by the exported user")
+    parser.add_argument("--users", type=int, default=3, help="other users hold a tenth as many each")
+    args = parser.parse_args()
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='export-bench-'), 'bench.db')}"
+    seed(url, args.users, args.analyses)
+    print(f"seeded {args.analyses} analyses for the exported user")
+    print(f"{'export':<22} {'first 64KiB':>11} {'total':>10} {'peak memory':>12} {'size':>10}")
+
+    def report(name, first, elapsed, peak, size):
+        print(f"{name:<22} {first * 1000:9.1f}ms {elapsed * 1000:8.0f}ms {peak / 1024 / 1024:9.1f} MiB "
+              f"{size / 1024 / 1024:7.1f} MiB")
+
+    for format in ("csv", "json"):
+        body, elapsed, peak = measure(lambda: whole_file(url, 1, format))
+        report(f"{format} whole file", elapsed, elapsed, peak, len(body))
+    for format, gzip in (("csv", False), ("json", False), ("ndjson", False), ("ndjson", True), ("parquet", False)):
+        (first, size), elapsed, peak = measure(lambda: asyncio.run(streamed(url, 1, format, gzip)))
+        report(f"{format}{'.gz' if gzip else ''} streamed", first, elapsed, peak, size)
+
+
+if __name__ == "__main__":
+    main()
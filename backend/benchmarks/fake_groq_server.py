@@ -0,0 +1,217 @@
+"""
+Local stand-in for the Groq (OpenAI-compatible) chat-completions API.
+
+Returns schema-valid responses for every prompt the backend sends
+(scoring, summary, chunk, full improvement, per-section LaTeX and plain
+suggestions), with configurable latency, token throughput, streaming,
+and injected errors/429s. Point the backend at it with
+GROQ_BASE_URL=http://127.0.0.1:8090.
+
+Usage (from backend/):
+    python -m benchmarks.fake_groq_server [--port 8090] [--latency lognormal:0.4,0.5]
+        [--tokens-per-second 250] [--error-rate 0.01] [--rate-limit-rate 0.05]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+SKILLS = [
+    "Python", "FastAPI", "Django", "React", "TypeScript", "PostgreSQL", "Docker", "Kubernetes",
+    "AWS", "GCP", "Terraform", "Redis", "GraphQL", "CI/CD", "Machine Learning", "SQL",
+]
+KEYWORDS = ["microservices", "scalability", "REST APIs", "mentoring", "agile", "cloud", "testing", "leadership"]
+
+
+@dataclass
+class FakeGroqConfig:
+    """Latency is time to first token; generation then runs at tokens_per_second"""
+    latency: str = "lognormal:0.4,0.5"  # fixed:S | uniform:LOW,HIGH | lognormal:MEDIAN,SIGMA
+    tokens_per_second: float = 250.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 1.0
+    stream_chunk_tokens: int = 8
+    seed: int = 0
+
+
+def sample_latency(spec: str, rng: random.Random) -> float:
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return values[0]
+    if kind == "uniform":
+        return rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def _pick(rng: random.Random, items: List[str], low: int, high: int) -> List[str]:
+    return rng.sample(items, rng.randint(low, high))
+
+
+def build_content(messages: List[Dict]) -> str:
+    """Deterministic, schema-valid reply for the prompt (seeded by its text)"""
+    system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+    prompt = messages[-1].get("content", "") if messages else ""
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+
+    improvements = [
+        {"category": "Skills", "suggestion": f"Highlight hands-on {skill} work", "priority": priority}
+        for skill, priority in zip(_pick(rng, SKILLS, 2, 4), ("high", "medium", "low", "low"))
+    ]
+    if '"match_score"' in prompt:
+        matched = _pick(rng, SKILLS, 3, 7)
+        result = {
+            "match_score": rng.randint(35, 92),
+            "matched_skills": matched,
+            "missing_skills": [s for s in _pick(rng, SKILLS, 2, 5) if s not in matched],
+            "matched_keywords": _pick(rng, KEYWORDS, 2, 4),
+            "missing_keywords": _pick(rng, KEYWORDS, 1, 3),
+        }
+        if '"improvements"' in prompt:
+            result["improvements"] = improvements
+        return json.dumps(result, indent=2)
+    if '"summary"' in prompt:
+        return json.dumps({
+            "improvements": improvements,
+            "summary": "The candidate's backend experience lines up well with the role. "
+                       "The main gaps are cloud infrastructure and quantified impact.",
+        }, indent=2)
+    if '"experience"' in prompt and '"name"' in prompt:
+        return json.dumps({
+            "name": "Jane Smith",
+            "contact_info": r"555-123-4567 \quad jane@example.com",
+            "objective": "Backend engineer focused on reliable, well-tested APIs.",
+            "experience": r"\textbf{Senior Engineer, Acme} \hfill 2021--Present"
+                          "\n" r"\begin{itemize}\item Cut API latency by 40\%\end{itemize}",
+            "technical_skills": ", ".join(_pick(rng, SKILLS, 5, 8)),
+            "soft_skills": "Communication, Mentoring",
+            "projects": r"\textbf{Resume Tool} \begin{itemize}\item Built with FastAPI\end{itemize}",
+            "education": r"\textbf{BSc Computer Science} \hfill 2017 \\ State University",
+            "certifications": "",
+        }, indent=2)
+    if "LaTeX" in system:
+        if "NAME:" in prompt:
+            return "NAME: Jane Smith\nCONTACT: 555-123-4567 \\quad jane@example.com"
+        if "TECHNICAL:" in prompt:
+            return f"TECHNICAL: {', '.join(_pick(rng, SKILLS, 5, 8))}\nSOFT: Communication, Mentoring"
+        bullets = "\n".join(f"\\item Delivered {skill} work with measurable impact" for skill in _pick(rng, SKILLS, 2, 4))
+        return f"\\begin{{itemize}}\n{bullets}\n\\end{{itemize}}"
+    return "\n".join(f"{i + 1}. {item['suggestion']}." for i, item in enumerate(improvements))
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def create_app(config: FakeGroqConfig) -> FastAPI:
+    app = FastAPI(title="Fake Groq")
+    rng = random.Random(config.seed)
+    stats = {"requests": 0, "rate_limited": 0, "errors": 0}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+
+        roll = rng.random()
+        if roll < config.rate_limit_rate:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": str(config.retry_after)},
+                content={"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+            )
+        if roll < config.rate_limit_rate + config.error_rate:
+            stats["errors"] += 1
+            return JSONResponse(status_code=500, content={"error": {"message": "Injected failure", "type": "server_error"}})
+
+        messages = body.get("messages", [])
+        content = build_content(messages)
+        prompt_tokens = sum(_count_tokens(m.get("content", "")) for m in messages)
+        completion_tokens = min(_count_tokens(content), body.get("max_tokens") or 1 << 30)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "fake-model")
+
+        await asyncio.sleep(sample_latency(config.latency, rng))
+
+        if body.get("stream"):
+            async def events():
+                step = max(1, config.stream_chunk_tokens) * 4
+                for start in range(0, len(content), step):
+                    await asyncio.sleep(config.stream_chunk_tokens / config.tokens_per_second)
+                    delta = {"content": content[start:start + step]}
+                    if start == 0:
+                        delta["role"] = "assistant"
+                    chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                             "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                final = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                         "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                         "x_groq": {"usage": usage}}
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(completion_tokens / config.tokens_per_second)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local Groq-compatible stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default=FakeGroqConfig.latency)
+    parser.add_argument("--tokens-per-second", type=float, default=FakeGroqConfig.tokens_per_second)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = FakeGroqConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
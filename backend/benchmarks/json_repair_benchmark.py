@@ -0,0 +1,75 @@
+"""
+Benchmark the single-pass JSON repair against the previous multi-strategy
+parsing (json.loads -> regex field scrape -> control-character strip).
+
+Usage (from backend/):
+    python -m benchmarks.json_repair_benchmark [--iterations N]
+"""
+import argparse
+import json
+import re
+import time
+
+from benchmarks.llm_output_corpus import CORPUS
+from app.services.json_repair import LLMOutputError, parse_llm_json
+
+
+def legacy_parse(result_text: str) -> dict:
+    """The parsing chain ResumeEditor/GroqAnalyzer used before json_repair"""
+    json_start = result_text.find('{')
+    json_end = result_text.rfind('}') + 1
+    if json_start != -1 and json_end > json_start:
+        result_text = result_text[json_start:json_end]
+    try:
+        return json.loads(result_text, strict=False)
+    except json.JSONDecodeError:
+        pass
+    improved_data = {}
+    for field, value in re.findall(r'"(\w+)"\s*:\s*"((?:[^"\\]|\\.)*)\"', result_text, re.DOTALL):
+        improved_data[field] = value
+    if improved_data:
+        return improved_data
+    cleaned_text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', result_text)
+    return json.loads(cleaned_text, strict=False)
+
+
+def _succeeds(parse, text, expected_fields) -> bool:
+    try:
+        result = parse(text)
+    except (ValueError, LLMOutputError):
+        return False
+    return isinstance(result, dict) and all(result.get(field) not in (None, "", []) for field in expected_fields)
+
+
+def _time_per_parse(parse, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for _, text, _ in CORPUS:
+            try:
+                parse(text)
+            except ValueError:
+                pass
+    return (time.perf_counter() - started) / (iterations * len(CORPUS)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON repair benchmark")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'case':<26}{'legacy':>8}{'repair':>8}")
+    legacy_ok = repair_ok = 0
+    for name, text, fields in CORPUS:
+        legacy = _succeeds(legacy_parse, text, fields)
+        repaired = _succeeds(parse_llm_json, text, fields)
+        legacy_ok += legacy
+        repair_ok += repaired
+        print(f"{name:<26}{'ok' if legacy else 'FAIL':>8}{'ok' if repaired else 'FAIL':>8}")
+
+    print(f"\nrecovered: legacy {legacy_ok}/{len(CORPUS)}, repair {repair_ok}/{len(CORPUS)}")
+    print(f"mean time per response: legacy {_time_per_parse(legacy_parse, args.iterations):.1f}us, "
+          f"repair {_time_per_parse(parse_llm_json, args.iterations):.1f}us")
+
+
+if __name__ == "__main__":
+    main()
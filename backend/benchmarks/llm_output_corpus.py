@@ -0,0 +1,91 @@
+"""
+Corpus of malformed LLM outputs, modelled on failures seen from the
+analysis and improvement prompts: LaTeX backslashes left unescaped,
+trailing commas, prose and code fences around the object, raw newlines
+and quotes inside strings, and responses cut off at max_tokens.
+
+Each entry is (name, raw_response, fields_expected_after_repair).
+"""
+
+CORPUS = [
+    (
+        "valid_analysis",
+        '{"match_score": 78, "matched_skills": ["Python", "SQL"], "missing_skills": ["Kubernetes"], '
+        '"matched_keywords": ["backend"], "missing_keywords": ["microservices"]}',
+        ["match_score", "matched_skills", "missing_skills"],
+    ),
+    (
+        "prose_and_fence",
+        'Sure! Here is the analysis you asked for:\n```json\n{"match_score": 64, "matched_skills": ["React"], '
+        '"missing_skills": ["GraphQL"]}\n```\nLet me know if you need anything else.',
+        ["match_score", "matched_skills"],
+    ),
+    (
+        "trailing_commas",
+        '{"match_score": 55, "matched_skills": ["Java", "Spring",], "missing_skills": ["AWS",],}',
+        ["match_score", "matched_skills", "missing_skills"],
+    ),
+    (
+        "latex_backslashes",
+        r'{"name": "Jane Smith", "contact_info": "555-123-4567 \quad jane@example.com", '
+        r'"experience": "\textbf{Senior Engineer, Acme} \hfill 2021--Present\n\begin{itemize}\n'
+        r'\item Reduced API latency by 40\%\n\item Led migration to \textit{Kubernetes}\n\end{itemize}", '
+        r'"technical_skills": "Python, Go, C\#", "projects": "\textbf{Resume Tool}", "education": "\textbf{BSc}"}',
+        ["name", "experience", "technical_skills"],
+    ),
+    (
+        "latex_newline_commands",
+        r'{"experience": "\textbf{Engineer} \newline \noindent Built systems", "education": "\textbf{MSc} \\ State U"}',
+        ["experience", "education"],
+    ),
+    (
+        "raw_newlines_in_strings",
+        '{"summary": "The candidate is a strong fit.\n\nKey gaps are cloud experience and\nleadership.", '
+        '"improvements": [{"category": "Skills", "suggestion": "Add AWS", "priority": "high"}]}',
+        ["summary", "improvements"],
+    ),
+    (
+        "unescaped_quotes",
+        '{"summary": "The JD asks for "hands-on" Kubernetes work and the resume only says "familiar".", '
+        '"improvements": []}',
+        ["summary"],
+    ),
+    (
+        "truncated_in_string",
+        '{"match_score": 71, "matched_skills": ["Python", "Django"], "missing_skills": ["Terraform"], '
+        '"summary": "Strong backend experience with Python and Django. The main gap is infrastructure as co',
+        ["match_score", "matched_skills", "summary"],
+    ),
+    (
+        "truncated_after_key",
+        '{"match_score": 48, "matched_skills": ["Excel"], "missing_skills": ["SQL", "Tableau"], "matched_keyw',
+        ["match_score", "missing_skills"],
+    ),
+    (
+        "truncated_in_array",
+        '{"match_score": 83, "matched_skills": ["Python", "PyTorch", "Pand',
+        ["match_score", "matched_skills"],
+    ),
+    (
+        "truncated_nested",
+        '{"summary": "Good fit.", "improvements": [{"category": "Experience", "suggestion": "Quantify impact", '
+        '"priority": "high"}, {"category": "Skills", "sugg',
+        ["summary", "improvements"],
+    ),
+    (
+        "python_literals",
+        "{\"match_score\": 60, \"has_degree\": True, \"notes\": None, \"matched_skills\": [\"SQL\"]}",
+        ["match_score", "matched_skills"],
+    ),
+    (
+        "latex_truncated",
+        r'{"name": "John Doe", "experience": "\textbf{Data Scientist} \hfill 2019--2023\n\begin{itemize}\item Built '
+        r'churn models in \texttt{scikit-learn}\item Deployed',
+        ["name", "experience"],
+    ),
+    (
+        "score_as_string",
+        '{"match_score": "72%", "matched_skills": "Python, SQL, Docker", "missing_skills": []}',
+        ["match_score", "matched_skills"],
+    ),
+]
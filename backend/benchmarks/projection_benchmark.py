@@ -0,0 +1,183 @@
+"""
+Per-route database reads: full Analysis/Resume rows vs deferred columns and projections.
+
+Seeds a SQLite database with analyses carrying realistic payloads (~6 KB
+improved_latex, summary and JSON result lists, ~8 KB resume text and parsed
+data) and runs each route's database access two ways: as it was, loading
+every column of the entity (and of the lazily loaded resume), and the way
+the route does it now. For each endpoint it reports median latency and the
+bytes of the result rows, measured by replaying every statement the ORM
+issued on a raw sqlite3 cursor and summing the size of the returned values.
+
+Usage (from backend/):
+    python -m benchmarks.projection_benchmark [--analyses 2000] [--runs 200]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.orm import Session, joinedload, load_only, undefer, undefer_group
+
+from app.database.database import Base
+from app.database.models import Analysis, JobDescription, Resume, User
+
+
+LATEX = "\\section{Experience}\n" + "\\item Built and operated Python services on AWS. " * 120  # ~6 KB
+SUMMARY = "Strong backend fit with gaps in Kubernetes and frontend experience. " * 12  # ~800 B
+RESUME_TEXT = "Senior engineer. Python, FastAPI, PostgreSQL, Docker, AWS, React. " * 120  # ~8 KB
+SKILLS = ["Python", "FastAPI", "PostgreSQL", "Docker", "AWS", "React", "Kubernetes", "Redis"]
+
+
+def seed(url: str, analyses: int):
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    rng = random.Random(7)
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        user_id = conn.execute(insert(User).values(
+            email="user@example.com", username="user", hashed_password="x"
+        )).inserted_primary_key[0]
+        job_id = conn.execute(insert(JobDescription).values(title="Engineer", description=SUMMARY)).inserted_primary_key[0]
+        conn.execute(insert(Resume), [
+            {"user_id": user_id, "filename": f"cv{n}.pdf", "file_path": "cv.pdf", "storage_path": f"1/cv{n}.pdf",
+             "extracted_text": RESUME_TEXT, "parsed_data": {"raw_text": RESUME_TEXT, "skills": SKILLS}}
+            for n in range(analyses)
+        ])
+        conn.execute(insert(Analysis), [
+            {
+                "user_id": user_id, "resume_id": n + 1, "job_description_id": job_id,
+                "match_score": round(rng.uniform(10, 98), 1),
+                "matched_skills": rng.sample(SKILLS, 4), "missing_skills": rng.sample(SKILLS, 3),
+                "matched_keywords": rng.sample(SKILLS, 5), "missing_keywords": rng.sample(SKILLS, 2),
+                "improvements": [{"priority": "high", "suggestion": SUMMARY[:200]}] * 3,
+                "summary": SUMMARY, "improved_latex": LATEX, "latex_storage_path": f"1/{n}.tex",
+                "progress_status": "completed", "progress_percentage": 100,
+                "created_at": now - timedelta(minutes=n),
+            }
+            for n in range(analyses)
+        ])
+    engine.dispose()
+    return user_id
+
+
+def _owned(user_id, analysis_id):
+    return (Analysis.id == analysis_id, Analysis.user_id == user_id)
+
+
+def _full(db, user_id, analysis_id):
+    """Every route used to start like this"""
+    return db.query(Analysis).options(undefer("*")).filter(*_owned(user_id, analysis_id)).first()
+
+
+# endpoint -> (before, after); each takes (session, user_id, analysis_id) and reads what the route reads
+ENDPOINTS = {
+    "GET /api/download/latex": (
+        lambda db, u, a: _full(db, u, a).latex_storage_path,
+        lambda db, u, a: db.query(Analysis.latex_storage_path).filter(*_owned(u, a)).first().latex_storage_path,
+    ),
+    "GET /api/download/original": (
+        lambda db, u, a: db.get(Resume, _full(db, u, a).resume_id, options=[undefer("*")]).storage_path,
+        lambda db, u, a: db.query(Resume.storage_path).join(Analysis, Analysis.resume_id == Resume.id)
+        .filter(*_owned(u, a)).first().storage_path,
+    ),
+    "GET /api/editor/{id}": (
+        lambda db, u, a: _full(db, u, a).improved_latex,
+        lambda db, u, a: db.query(Analysis.id, Analysis.improved_latex, Analysis.created_at)
+        .filter(*_owned(u, a)).first().improved_latex,
+    ),
+    "POST /api/editor/{id}/compile": (
+        lambda db, u, a: bool(_full(db, u, a).improved_latex),
+        lambda db, u, a: db.query((func.length(Analysis.improved_latex) > 0).label("has_latex"))
+        .filter(*_owned(u, a)).first().has_latex,
+    ),
+    "versions ownership check": (
+        lambda db, u, a: _full(db, u, a) is not None,
+        lambda db, u, a: db.execute(select(Analysis.id).where(*_owned(u, a))).first() is not None,
+    ),
+    "GET /api/analyze/{id}/events": (
+        lambda db, u, a: _full(db, u, a).progress_status,
+        lambda db, u, a: db.query(Analysis).options(load_only(Analysis.progress_status, Analysis.progress_percentage))
+        .filter(*_owned(u, a)).first().progress_status,
+    ),
+    "GET /api/analyze/{id}": (
+        lambda db, u, a: _full(db, u, a).summary,
+        lambda db, u, a: db.query(Analysis).options(undefer_group("results"), undefer(Analysis.improved_latex))
+        .filter(*_owned(u, a)).first().summary,
+    ),
+    "GET /api/profile/history": (  # before: every row; after: a 50-row page
+        lambda db, u, a: [
+            (x.resume.filename, x.job_description.title)
+            for x in db.query(Analysis).options(undefer("*"), joinedload(Analysis.resume).undefer("*"),
+                                                joinedload(Analysis.job_description))
+            .filter(Analysis.user_id == u).order_by(Analysis.created_at.desc())
+        ],
+        # First page of the keyset-paginated listing: one joined projection
+        lambda db, u, a: db.execute(
+            select(Analysis.id, Analysis.match_score, Analysis.created_at, Resume.filename, JobDescription.title)
+            .outerjoin(Resume, Analysis.resume_id == Resume.id)
+            .outerjoin(JobDescription, Analysis.job_description_id == JobDescription.id)
+            .where(Analysis.user_id == u)
+            .order_by(Analysis.created_at.desc(), Analysis.id.desc())
+            .limit(50)
+        ).all(),
+    ),
+}
+
+
+def row_bytes(path: str, issued) -> int:
+    """Size of the values the statements return, replayed on a raw connection"""
+    conn = sqlite3.connect(path)
+    total = 0
+    for statement, parameters in issued:
+        for row in conn.execute(statement, parameters).fetchall():
+            total += sum(len(v) if isinstance(v, (str, bytes)) else 8 for v in row if v is not None)
+    conn.close()
+    return total
+
+
+def measure(engine, path, fn, user_id, analysis_ids, runs):
+    issued = []
+    capture = lambda conn, cursor, statement, parameters, *args: issued.append((statement, parameters))
+    timings = []
+    for run in range(runs):
+        analysis_id = analysis_ids[run % len(analysis_ids)]
+        if run == 0:
+            event.listen(engine, "before_cursor_execute", capture)
+        with Session(engine) as db:
+            started = time.perf_counter()
+            fn(db, user_id, analysis_id)
+            timings.append(time.perf_counter() - started)
+        if run == 0:
+            event.remove(engine, "before_cursor_execute", capture)
+    return statistics.median(timings), row_bytes(path, issued)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--analyses", type=int, default=2000, help="analyses (each with its own resume) to seed")
+    parser.add_argument("--runs", type=int, default=200, help="timed runs per endpoint (history: a tenth)")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="projection-bench-"), "bench.db")
+    user_id = seed(f"sqlite:///{path}", args.analyses)
+    engine = create_engine(f"sqlite:///{path}")
+    analysis_ids = random.Random(3).sample(range(1, args.analyses + 1), min(50, args.analyses))
+
+    print(f"{'endpoint':<30} {'before':>22} {'after':>22} {'bytes':>8}")
+    for name, (before, after) in ENDPOINTS.items():
+        runs = max(3, args.runs // 10) if "history" in name else args.runs
+        old_seconds, old_bytes = measure(engine, path, before, user_id, analysis_ids, runs)
+        new_seconds, new_bytes = measure(engine, path, after, user_id, analysis_ids, runs)
+        print(f"{name:<30} {old_seconds * 1000:8.2f}ms {old_bytes:>10}B {new_seconds * 1000:8.2f}ms {new_bytes:>10}B "
+              f"{old_bytes / max(new_bytes, 1):6.0f}x")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Per-worker in-memory limits vs the shared SQLite sliding window.
+
+Starts N worker processes that each check a burst of requests from the
+same users, the way N uvicorn/gunicorn workers see one client's traffic.
+With per-process memory (the old slowapi "memory://" store) every worker
+admits a full budget, so a user gets N times their limit; with the shared
+store the host admits exactly one budget. Also reports the cost of one
+check.
+
+Usage (from backend/):
+    python -m benchmarks.rate_limit_benchmark [--workers 4] [--users 20] [--requests 200]
+        [--limit 100]
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+from app.core.exceptions import RateLimitExceededError
+from app.core.rate_limiter import RateLimit, SlidingWindowLimiter
+
+
+def worker(path, users, requests, limit, results):
+    rate = RateLimit(limit=limit, period=60)
+    store = SlidingWindowLimiter(path) if path else SlidingWindowLimiter(":memory:")
+    allowed, latencies = 0, []
+    for n in range(requests):
+        user = n % users
+        started = time.perf_counter()
+        try:
+            store.hit([(f"general_api:user:{user}", rate, 1)])
+            allowed += 1
+        except RateLimitExceededError:
+            pass
+        latencies.append(time.perf_counter() - started)
+    results.put((allowed, latencies))
+
+
+def run(path, args):
+    results = multiprocessing.Queue()
+    per_worker = args.requests * args.users
+    procs = [
+        multiprocessing.Process(target=worker, args=(path, args.users, per_worker, args.limit, results))
+        for _ in range(args.workers)
+    ]
+    started = time.perf_counter()
+    for proc in procs:
+        proc.start()
+    collected = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    elapsed = time.perf_counter() - started
+    allowed = sum(a for a, _ in collected)
+    latencies = sorted(l for _, ls in collected for l in ls)
+    return allowed, latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="requests per user per worker")
+    parser.add_argument("--limit", type=float, default=100, help="requests per user per minute")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="rate-limit-bench-"), "limits.sqlite3")
+    budget = args.users * args.limit
+    print(f"workers={args.workers} users={args.users} limit={args.limit:.0f}/minute "
+          f"offered={args.workers * args.users * args.requests} host budget={budget:.0f}")
+    for name, store_path in (("per-worker", None), ("shared", path)):
+        allowed, latencies, elapsed = run(store_path, args)
+        print(f"{name:>10}: admitted={allowed} ({allowed / budget:.1f}x budget)  "
+              f"{len(latencies) / elapsed:8.0f} checks/s  p50={statistics.median(latencies) * 1e6:6.0f}us "
+              f"p99={latencies[int(0.99 * len(latencies)) - 1] * 1e6:6.0f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Startup cost: import profile of app.main and time to first served request.
+
+Imports app.main under `python -X importtime` and prints the slowest
+modules, then starts uvicorn in a subprocess and times how long it takes
+until /health answers, plus the latency of that first request. The server
+is started twice on one fresh SQLite file, so the second start shows the
+cost with the schema already in place, and once more with STARTUP_WARMUP.
+
+Usage (from backend/):
+    python -m benchmarks.startup_benchmark [--runs 3] [--top 12]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.analyze_pipeline_benchmark import _free_port
+
+
+def import_profile(env):
+    """(module, self_us, cumulative_us) for every import under app.main"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((module.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def time_to_first_request(env, path="/health", timeout=60.0):
+    """Seconds from spawning uvicorn until `path` answers, and that request's latency"""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        client = httpx.Client(timeout=timeout)
+        while time.perf_counter() - started < timeout:
+            request_started = time.perf_counter()
+            try:
+                if client.get(f"http://127.0.0.1:{port}{path}").status_code == 200:
+                    now = time.perf_counter()
+                    return now - started, now - request_started
+            except httpx.TransportError:
+                time.sleep(0.01)
+        raise TimeoutError(f"server did not answer {path} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="startup-bench-")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "RATE_LIMIT_DB": os.path.join(workdir, "rate_limits.sqlite3"),
+        "STARTUP_WARMUP": "false",
+    }
+    for key in ("GROQ_API_KEY", "SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY", "SUPABASE_ANON_KEY"):
+        env.setdefault(key, "x")
+
+    profiles = [import_profile(env) for _ in range(args.runs)]
+    totals = [next(cum for module, _, cum in rows if module.strip() == "app.main") for rows in profiles]
+    print(f"import app.main: median={statistics.median(totals) / 1000:.0f}ms over {args.runs} runs")
+    print("slowest imports (cumulative, last run):")
+    for module, self_us, cumulative_us in sorted(profiles[-1], key=lambda row: -row[2])[1:args.top + 1]:
+        print(f"  {cumulative_us / 1000:7.1f}ms  self {self_us / 1000:6.1f}ms  {module.strip()}")
+    heavy = ["groq", "supabase", "PyPDF2", "docx", "sentry_sdk"]
+    loaded = {module.strip() for module, _, _ in profiles[-1]}
+    print(f"heavy SDKs imported at startup: {[m for m in heavy if m in loaded] or 'none'}")
+
+    for name, overrides in (
+        ("fresh database", {}),
+        ("schema in place", {}),
+        ("with warm-up", {"STARTUP_WARMUP": "true"}),
+    ):
+        ready, first = time_to_first_request({**env, **overrides})
+        print(f"{name:>16}: first /health served after {ready * 1000:6.0f}ms (request itself {first * 1000:5.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
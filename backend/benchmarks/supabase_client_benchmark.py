@@ -0,0 +1,98 @@
+"""
+Per-request Supabase clients vs the shared client.
+
+Starts a small local stand-in for the Storage API's sign endpoint and
+issues signed-URL requests the way the download routes do: once building a
+new client per request (the old create_client-per-handler pattern) and once
+through the process-wide client, whose HTTP connections stay open.
+
+Usage (from backend/):
+    python -m benchmarks.supabase_client_benchmark [--requests 300] [--concurrency 10]
+        [--latency 0.005]
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI
+from supabase import create_client
+
+from app.config import settings
+from app.core import metrics
+from app.services import supabase_client
+from app.services.supabase_storage import SupabaseStorage
+from benchmarks.analyze_pipeline_benchmark import _free_port
+
+
+# Any JWT-shaped key passes supabase-py's validation; the stand-in ignores it
+FAKE_KEY = "header.payload.signature"
+
+
+def create_storage_app(latency: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/storage/v1/object/sign/{bucket}/{path:path}")
+    async def sign(bucket: str, path: str):
+        await asyncio.sleep(latency)
+        return {"signedURL": f"/object/sign/{bucket}/{path}?token=bench"}
+
+    return app
+
+
+def start_storage(latency: float) -> str:
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_storage_app(latency), host="127.0.0.1", port=port,
+                                           log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+async def run(make_storage, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            await make_storage().get_signed_url("resumes", f"{i}/cv.pdf")
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request vs shared Supabase client")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.005, help="stand-in server latency in seconds")
+    args = parser.parse_args()
+
+    url = start_storage(args.latency)
+    settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY = url, FAKE_KEY
+
+    modes = {
+        "per-request": lambda: SupabaseStorage(client=create_client(url, FAKE_KEY)),
+        "shared": SupabaseStorage,
+    }
+    print(f"requests={args.requests} concurrency={args.concurrency} server latency={args.latency * 1000:.0f}ms")
+    for name, make_storage in modes.items():
+        latencies, elapsed = asyncio.run(run(make_storage, args.requests, args.concurrency))
+        latencies.sort()
+        print(f"{name:>12}: {args.requests / elapsed:7.1f} req/s  p50={statistics.median(latencies) * 1000:6.1f}ms "
+              f"p95={latencies[int(0.95 * len(latencies)) - 1] * 1000:6.1f}ms")
+
+    timing = metrics.histogram("supabase.storage.signed_url.seconds")
+    print(f"supabase.storage.signed_url.seconds (both modes): n={timing.count} "
+          f"p50={timing.percentile(50) * 1000:.1f}ms p95={timing.percentile(95) * 1000:.1f}ms")
+    supabase_client.close_supabase_client()
+
+
+if __name__ == "__main__":
+    main()
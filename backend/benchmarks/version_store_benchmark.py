@@ -0,0 +1,160 @@
+"""
+Resume version storage: every version as plain LaTeX vs snapshots plus deltas.
+
+Simulates editing histories the way users produce them in the editor: each
+history starts from one of the sample LaTeX templates filled out to a few
+KB of experience bullets, then most saves change, add or drop a line or
+two, and now and then a whole section is rewritten. Every version goes
+through save_version. Reports the bytes the versions take as plain LaTeX,
+compressed one by one, and as stored, then the median time to read the
+newest version of a history cold (decoding its chain) and warm (from the
+cache), and the time and response size of listing a history's versions
+with all their content versus as content-free summaries.
+
+Usage (from backend/):
+    python -m benchmarks.version_store_benchmark [--histories 100] [--versions 30]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import zlib
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.local_cache import LocalCache
+from app.database.queries import list_version_summaries
+from app.database.database import Base
+from app.api.versions_routes import VersionSummary
+from app.database.models import Analysis, JobDescription, Resume, ResumeVersion, User
+from app.sample_data.latex_templates import LATEX_TEMPLATES
+from app.services import version_store
+
+
+VERBS = ["Built", "Led", "Designed", "Shipped", "Migrated", "Automated", "Scaled", "Reduced"]
+THINGS = ["the billing API", "CI pipelines", "a Kafka ingestion service", "the React dashboard",
+          "PostgreSQL schemas", "on-call tooling", "the search ranking model", "AWS infrastructure"]
+
+
+def bullet(rng: random.Random) -> str:
+    return (f"    \\item {rng.choice(VERBS)} {rng.choice(THINGS)}, cutting latency by {rng.randint(10, 80)}\\% "
+            f"for {rng.randint(2, 50)}k users\n")
+
+
+def history(rng: random.Random, versions: int) -> list:
+    template = rng.choice(list(LATEX_TEMPLATES.values()))["content"]
+    lines = template.splitlines(keepends=True)
+    end = next((n for n, line in enumerate(lines) if "\\end{document}" in line), len(lines))
+    lines[end:end] = ["\\section{Experience}\n", "\\begin{itemize}\n",
+                      *[bullet(rng) for _ in range(40)], "\\end{itemize}\n"]
+    texts = ["".join(lines)]
+    for _ in range(versions - 1):
+        roll = rng.random()
+        body = range(end + 2, end + 2 + 30)
+        if roll < 0.6:
+            lines[rng.choice(body)] = bullet(rng)
+        elif roll < 0.8:
+            lines.insert(rng.choice(body), bullet(rng))
+        elif roll < 0.95:
+            del lines[rng.choice(body)]
+        else:
+            # Rewrite the experience section
+            for n in body:
+                lines[n] = bullet(rng)
+        texts.append("".join(lines))
+    return texts
+
+
+async def run(url: str, histories: list):
+    engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with sessions() as db:
+        for analysis_id, texts in enumerate(histories, start=1):
+            for text in texts:
+                await version_store.save_version(db, analysis_id, text)
+        stored = sum(len(p) for p in (await db.execute(select(ResumeVersion.payload))).scalars())
+        newest = list((await db.execute(
+            select(ResumeVersion).where(ResumeVersion.version_number == len(histories[0]))
+        )).scalars())
+
+    timings = {}
+    for name in ("cold", "warm"):
+        if name == "cold":
+            version_store._cache = LocalCache(os.path.join(tempfile.mkdtemp(prefix="version-bench-"), "cache.sqlite3"))
+        samples = []
+        for version in newest:
+            async with sessions() as db:
+                started = time.perf_counter()
+                text = await version_store.read_version(db, version)
+                samples.append(time.perf_counter() - started)
+            assert text == histories[version.analysis_id - 1][-1]
+        timings[name] = statistics.median(samples)
+
+    # Listing one history: every version with its content (as before) vs summaries
+    listings = {}
+    for name in ("with content", "summaries"):
+        samples = []
+        for analysis_id in range(1, len(histories) + 1):
+            async with sessions() as db:
+                started = time.perf_counter()
+                if name == "summaries":
+                    body = [VersionSummary.model_validate(row).model_dump(mode="json")
+                            for row in await list_version_summaries(db, analysis_id)]
+                else:
+                    body = [{"id": v.id, "version_number": v.version_number, "latex_content": text,
+                             "description": v.description, "created_at": v.created_at.isoformat()}
+                            for v, text in await version_store.read_versions(db, analysis_id)]
+                size = len(json.dumps(body))
+                samples.append(time.perf_counter() - started)
+        listings[name] = (statistics.median(samples), size)
+    await engine.dispose()
+    return stored, timings, listings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--histories", type=int, default=100, help="analyses, each with its own editing history")
+    parser.add_argument("--versions", type=int, default=30, help="saved versions per history")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="version-bench-")
+    url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    version_store._cache = LocalCache(os.path.join(directory, "cache.sqlite3"))
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        user_id = conn.execute(insert(User).values(
+            email="user@example.com", username="user", hashed_password="x"
+        )).inserted_primary_key[0]
+        resume_id = conn.execute(insert(Resume).values(
+            user_id=user_id, filename="cv.pdf", file_path="cv.pdf"
+        )).inserted_primary_key[0]
+        job_id = conn.execute(insert(JobDescription).values(title="Engineer", description="Python")).inserted_primary_key[0]
+        conn.execute(insert(Analysis), [
+            {"user_id": user_id, "resume_id": resume_id, "job_description_id": job_id} for _ in range(args.histories)
+        ])
+    engine.dispose()
+
+    rng = random.Random(11)
+    histories = [history(rng, args.versions) for _ in range(args.histories)]
+    plain = sum(len(text.encode("utf-8")) for texts in histories for text in texts)
+    compressed = sum(len(zlib.compress(text.encode("utf-8"), 9)) for texts in histories for text in texts)
+    stored, timings, listings = asyncio.run(run(url, histories))
+
+    print(f"{args.histories} histories x {args.versions} versions, "
+          f"{plain / args.histories / args.versions / 1024:.1f} KiB per version")
+    print(f"{'plain LaTeX':<26} {plain / 1024:10.0f} KiB")
+    print(f"{'each version compressed':<26} {compressed / 1024:10.0f} KiB {plain / compressed:6.1f}x smaller")
+    print(f"{'snapshots + deltas':<26} {stored / 1024:10.0f} KiB {plain / stored:6.1f}x smaller")
+    print(f"read newest version: cold {timings['cold'] * 1000:.2f}ms, warm {timings['warm'] * 1000:.2f}ms (median)")
+    for name, (seconds, size) in listings.items():
+        print(f"list versions, {name:<13} {seconds * 1000:6.2f}ms {size / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,27 @@
 """
 Pytest configuration and fixtures for backend tests
 """
+import os
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 from app.main import app
-from app.database.database import Base, get_db
-from app.auth.auth import create_access_token
+from app.core import rate_limiter
+from app.core.local_cache import LocalCache
+from app.services import history_export, version_store
+from app.database.database import Base, get_async_db, get_db
+from app.auth.auth import create_access_token, create_user
+from app.database.models import Analysis, JobDescription, Resume
 
-# Test database setup
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Test database setup: a file, so the sync and async engines see the same data
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="resumecraft-tests-"), "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
@@ -22,6 +31,22 @@ engine = create_engine(
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# NullPool: TestClient runs each app in its own event loop, so connections are not reused
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_PATH}", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limits(tmp_path, monkeypatch):
+    """Give each test its own rate limit budgets"""
+    monkeypatch.setattr(rate_limiter, "_limiter", rate_limiter.SlidingWindowLimiter(str(tmp_path / "rate_limits.sqlite3")))
+
+
+@pytest.fixture(autouse=True)
+def fresh_version_cache(tmp_path, monkeypatch):
+    """Version ids repeat across test databases: give each test its own cache"""
+    monkeypatch.setattr(version_store, "_cache", LocalCache(str(tmp_path / "versions.sqlite3")))
+
 
 @pytest.fixture(scope="function")
 def db_session():
@@ -36,7 +61,7 @@ def db_session():
 
 
 @pytest.fixture(scope="function")
-def client(db_session):
+def client(db_session, monkeypatch):
     """Create a test client with database override"""
     def override_get_db():
         try:
@@ -44,7 +69,14 @@ def client(db_session):
         finally:
             pass
     
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Streamed exports open their own session rather than the request's
+    monkeypatch.setattr(history_export, "AsyncSessionLocal", TestingAsyncSessionLocal)
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -68,6 +100,39 @@ def auth_headers(test_user_data):
     return {"Authorization": f"Bearer {token}"}
 
 
+@pytest.fixture
+def user(db_session):
+    """A registered user in the test database"""
+    return create_user(db_session, email="user@example.com", username="user", password="Password123!")
+
+
+@pytest.fixture
+def headers(user):
+    """Authentication headers for `user`"""
+    token = create_access_token(data={"sub": str(user.id)})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def make_analysis(db_session, user):
+    """Factory for analyses of `user`, each with its own resume and job description
+
+    `resume` and `job_description` override fields of those rows; other
+    keyword arguments are Analysis fields.
+    """
+    def make(resume=None, job_description=None, **fields):
+        resume_row = Resume(**{"user_id": user.id, "filename": "cv.pdf", "file_path": "cv.pdf", **(resume or {})})
+        job_row = JobDescription(**{"title": "Engineer", "description": "Python", **(job_description or {})})
+        db_session.add_all([resume_row, job_row])
+        db_session.flush()
+        analysis = Analysis(**{"user_id": user.id, "resume_id": resume_row.id, "job_description_id": job_row.id,
+                               **fields})
+        db_session.add(analysis)
+        db_session.commit()
+        return analysis
+    return make
+
+
 @pytest.fixture
 def sample_resume_text():
     """Sample resume text for testing"""
@@ -0,0 +1,161 @@
+"""
+Tests for adaptive admission control
+"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.admission import AdaptiveLimiter
+from app.core.exceptions import ServerOverloadedError
+from app.middleware.admission import AdmissionMiddleware
+
+
+def _limiter(**overrides):
+    options = dict(target_latency=1.0, initial_limit=2, min_limit=1, max_limit=8, max_queue=2, max_queue_wait=1.0)
+    options.update(overrides)
+    return AdaptiveLimiter("test", **options)
+
+
+class TestAdaptiveLimiter:
+    """Test queueing, shedding and limit adaptation"""
+
+    async def test_queues_beyond_limit_and_hands_off_in_order(self):
+        limiter = _limiter()
+        await limiter.acquire()
+        await limiter.acquire()
+        order = []
+
+        async def waiter(n):
+            await limiter.acquire()
+            order.append(n)
+
+        tasks = [asyncio.create_task(waiter(n)) for n in (1, 2)]
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["queued"] == 2
+        limiter.release(0.1)
+        limiter.release(0.1)
+        await asyncio.gather(*tasks)
+        assert order == [1, 2]
+        assert limiter.stats()["in_flight"] == 2
+
+    async def test_sheds_when_queue_is_full(self):
+        limiter = _limiter(initial_limit=1, max_queue=1)
+        await limiter.acquire()
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        with pytest.raises(ServerOverloadedError) as exc:
+            await limiter.acquire()
+        assert exc.value.status_code == 503
+        assert exc.value.retry_after >= 1
+        limiter.release(0.1)
+        await queued
+
+    async def test_sheds_when_expected_wait_is_too_long(self):
+        limiter = _limiter(initial_limit=1, max_queue_wait=0.5)
+        limiter.latency = 2.0
+        await limiter.acquire()
+        with pytest.raises(ServerOverloadedError) as exc:
+            await limiter.acquire()
+        assert exc.value.retry_after == 2
+        assert limiter.stats()["queued"] == 0
+
+    async def test_timed_out_and_cancelled_waiters_do_not_leak_slots(self):
+        limiter = _limiter(initial_limit=1, max_queue_wait=0.05, target_latency=0.01)
+        await limiter.acquire()
+        with pytest.raises(ServerOverloadedError):
+            await limiter.acquire()
+        cancelled = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        limiter.release(0.01)
+        assert limiter.stats()["in_flight"] == 0
+        assert limiter.stats()["queued"] == 0
+
+    async def test_limit_grows_when_saturated_and_fast(self):
+        limiter = _limiter(initial_limit=2)
+        for _ in range(2):
+            await limiter.acquire()
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        limiter.release(0.1)
+        await queued
+        limiter.release(0.1)
+        assert limiter.limit == 3
+
+    async def test_limit_shrinks_when_slow_or_failing(self):
+        limiter = _limiter(initial_limit=4)
+        for _ in range(4):
+            await limiter.acquire()
+        limiter.release(5.0)
+        limiter.release(0.1, ok=False)
+        limiter.release(0.1)
+        limiter.release(0.1)
+        assert limiter.limit == 3
+        assert limiter.stats()["in_flight"] == 0
+
+    async def test_limit_does_not_grow_while_idle(self):
+        limiter = _limiter(initial_limit=2)
+        for _ in range(6):
+            await limiter.acquire()
+            limiter.release(0.1)
+        assert limiter.limit == 2
+
+
+@pytest.fixture
+def limited_app():
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.post("/expensive")
+    async def expensive():
+        await release.wait()
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    limiter = _limiter(initial_limit=1, max_queue=1, max_queue_wait=5.0)
+    app.add_middleware(AdmissionMiddleware, routes=[("POST", "/expensive", limiter)])
+    return app, limiter, release
+
+
+class TestAdmissionMiddleware:
+    """Test shedding through the middleware"""
+
+    async def test_sheds_expensive_but_serves_cheap(self, limited_app):
+        app, limiter, release = limited_app
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            running = asyncio.create_task(client.post("/expensive"))
+            queued = asyncio.create_task(client.post("/expensive"))
+            await asyncio.sleep(0.05)
+
+            shed = await client.post("/expensive")
+            assert shed.status_code == 503
+            assert int(shed.headers["retry-after"]) >= 1
+            assert shed.json()["type"] == "ServerOverloadedError"
+
+            health = await asyncio.wait_for(client.get("/health"), 1)
+            assert health.status_code == 200
+
+            release.set()
+            assert [r.status_code for r in await asyncio.gather(running, queued)] == [200, 200]
+        assert limiter.stats()["in_flight"] == 0
+        assert limiter.stats()["shed"] >= 1
+
+    async def test_disabled_middleware_passes_through(self):
+        app = FastAPI()
+
+        @app.post("/expensive")
+        async def expensive():
+            return {"ok": True}
+
+        limiter = _limiter(initial_limit=1)
+        app.add_middleware(AdmissionMiddleware, routes=[("POST", "/expensive", limiter)], enabled=False)
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            assert (await client.post("/expensive")).status_code == 200
+        assert limiter.stats()["latency_seconds"] is None
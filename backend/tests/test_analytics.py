@@ -0,0 +1,67 @@
+"""
+Tests for the SQL-aggregated analytics endpoint
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.auth.auth import create_user
+
+
+NOW = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0)
+
+
+@pytest.fixture
+def analyses(db_session, make_analysis):
+    rows = [
+        # (score, days ago, improved)
+        (20.0, 0, True),
+        (20.5, 0, False),
+        (40.0, 1, False),
+        (80.0, 1, True),
+        (95.0, 1, False),
+        (None, 1, False),
+        (60.0, 400, False),
+    ]
+    for score, days_ago, improved in rows:
+        make_analysis(match_score=score, improved_latex=r"\documentclass{article}" if improved else None,
+                      created_at=NOW - timedelta(days=days_ago))
+    # Another user's analysis never counts
+    other = create_user(db_session, email="other@example.com", username="other", password="Password123!")
+    make_analysis(user_id=other.id, match_score=10.0)
+    return rows
+
+
+class TestAnalyticsStats:
+    """Test GET /api/analytics/stats"""
+
+    def test_totals_and_distribution(self, client, headers, analyses):
+        body = client.get("/api/analytics/stats?period=all", headers=headers).json()
+        scores = [score for score, _, _ in analyses if score is not None]
+        assert body["stats"]["total_analyses"] == 7
+        assert body["stats"]["avg_match_score"] == round(sum(scores) / len(scores), 1)
+        assert body["stats"]["best_match_score"] == 95
+        assert body["stats"]["total_improved"] == 2
+        assert body["stats"]["improvement_rate"] == round(2 / 7, 2)
+        # Upper bounds are inclusive; unscored analyses are not bucketed
+        assert body["score_distribution"] == {"0-20": 1, "21-40": 2, "41-60": 1, "61-80": 1, "81-100": 1}
+
+    def test_daily_trends_within_period(self, client, headers, analyses):
+        body = client.get("/api/analytics/stats?period=week", headers=headers).json()
+        yesterday, today = (NOW - timedelta(days=1)).strftime("%Y-%m-%d"), NOW.strftime("%Y-%m-%d")
+        assert body["trends"] == [
+            {"date": yesterday, "count": 4, "avg_score": round((40 + 80 + 95) / 3, 1)},
+            {"date": today, "count": 2, "avg_score": 20.2},
+        ]
+
+    def test_fractional_best_score(self, client, headers, make_analysis):
+        make_analysis(match_score=49.3)
+        response = client.get("/api/analytics/stats?period=all", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["stats"]["best_match_score"] == 49
+
+    def test_new_user_gets_empty_analytics(self, client, headers):
+        body = client.get("/api/analytics/stats", headers=headers).json()
+        assert body["stats"]["total_analyses"] == 0
+        assert body["trends"] == []
+        assert sum(body["score_distribution"].values()) == 0
@@ -0,0 +1,83 @@
+"""
+Tests for map-reduce analysis of long resumes
+"""
+from app.config import settings
+from app.services.chunked_analysis import reduce_chunk_results, split_resume_chunks
+from app.services.groq_analyzer import GroqAnalyzer
+from app.services.model_router import TASK_SCORING, TASK_SUMMARY
+
+
+def _long_resume(roles=40):
+    lines = ["Jane Smith", "jane@example.com", "", "EXPERIENCE"]
+    for i in range(roles):
+        lines.append(f"Engineer {i} at Company {i} (20{i % 20:02d})")
+        lines.extend(f"- Delivered project {i}.{j} using Python and PostgreSQL" for j in range(5))
+    lines += ["", "EDUCATION", "BS Computer Science", "", "SKILLS", "Python, SQL, Docker"]
+    return "\n".join(lines)
+
+
+class TestChunking:
+    """Test section-based chunk splitting"""
+
+    def test_chunks_respect_size_and_keep_text(self):
+        text = _long_resume()
+        chunks = split_resume_chunks(text, max_chars=1500)
+        assert len(chunks) > 1
+        assert all(len(chunk) <= 1500 for chunk in chunks)
+        assert "".join(chunks).split() == text.split()
+
+    def test_short_resume_is_one_chunk(self, sample_resume_text):
+        assert len(split_resume_chunks(sample_resume_text, max_chars=6000)) == 1
+
+
+class TestReducer:
+    """Test the deterministic chunk reducer"""
+
+    def test_missing_terms_matched_elsewhere_are_dropped(self):
+        results = [
+            {"match_score": 40, "matched_skills": ["Python"], "missing_skills": ["Docker", "AWS"],
+             "matched_keywords": [], "missing_keywords": ["kubernetes"], "improvements": []},
+            {"match_score": 70, "matched_skills": ["docker"], "missing_skills": ["aws", "Python"],
+             "matched_keywords": ["Kubernetes"], "missing_keywords": [],
+             "improvements": [{"category": "x", "suggestion": "Add AWS", "priority": "low"},
+                              {"category": "y", "suggestion": "Quantify", "priority": "high"}]},
+        ]
+        merged = reduce_chunk_results(results)
+        assert merged["matched_skills"] == ["Python", "docker"]
+        assert merged["missing_skills"] == ["AWS"]
+        assert merged["missing_keywords"] == []
+        assert merged["improvements"][0]["priority"] == "high"
+        # 0.5 * best chunk score + 0.5 * coverage (3 of 4 requirements matched): 72.5, to the even whole number
+        assert merged["match_score"] == 72
+        assert isinstance(merged["match_score"], int)
+
+    def test_reducer_is_order_independent_for_terms(self):
+        a = {"matched_skills": ["Python"], "missing_skills": ["Go"]}
+        b = {"matched_skills": ["Go"], "missing_skills": ["Rust"]}
+        assert set(reduce_chunk_results([a, b])["missing_skills"]) == set(reduce_chunk_results([b, a])["missing_skills"])
+
+
+class FakeRouter:
+    def __init__(self):
+        self.tasks = []
+
+    def complete_json(self, task, messages, temperature, max_tokens, priority, parse):
+        self.tasks.append(task)
+        if task == TASK_SUMMARY:
+            return parse('{"summary": "Strong backend profile.", "improvements": []}')
+        return parse('{"match_score": 60, "matched_skills": ["Python"], "missing_skills": [],}')
+
+
+class TestChunkedAnalyzer:
+    """Test that long resumes take the map-reduce path"""
+
+    def test_long_resume_uses_chunks(self, monkeypatch, sample_jd_text):
+        monkeypatch.setattr(settings, "LLM_CHUNKED_ANALYSIS_THRESHOLD_CHARS", 2000)
+        monkeypatch.setattr(settings, "LLM_ANALYSIS_CHUNK_CHARS", 1500)
+        analyzer = GroqAnalyzer()
+        analyzer.router = FakeRouter()
+        result = analyzer.analyze_resume_jd_match(_long_resume(), sample_jd_text)
+        assert analyzer.router.tasks.count(TASK_SCORING) > 1
+        assert analyzer.router.tasks.count(TASK_SUMMARY) == 1
+        assert result["summary"] == "Strong backend profile."
+        assert result["matched_skills"] == ["Python"]
@@ -0,0 +1,107 @@
+"""
+Tests for request deadlines and graceful degradation
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.config import settings
+from app.core.exceptions import DeadlineExceededError
+from app.core.request_context import (
+    clamp_timeout,
+    deadline_scope,
+    remaining_time,
+    reserve_time,
+    run_cancellable,
+    within_deadline,
+)
+from app.services.groq_analyzer import GroqAnalyzer
+from app.services.model_router import TASK_SUMMARY
+
+
+class SlowSummaryRouter:
+    def __init__(self, summary_delay: float = 0.0):
+        self.summary_delay = summary_delay
+        self.tasks = []
+
+    def complete_json(self, task, messages, temperature, max_tokens, priority, parse):
+        self.tasks.append(task)
+        if task == TASK_SUMMARY:
+            time.sleep(self.summary_delay)
+            return parse('{"summary": "LLM summary.", "improvements": []}')
+        return parse('{"match_score": 72, "matched_skills": ["Python"], "missing_skills": ["Go"]}')
+
+
+class TestDeadline:
+    """Test the deadline context and its helpers"""
+
+    def test_no_deadline_leaves_timeouts_alone(self):
+        assert remaining_time() is None
+        assert clamp_timeout(30) == 30
+
+    def test_clamp_to_remaining_budget(self):
+        with deadline_scope(2):
+            assert clamp_timeout(30) <= 2
+            assert clamp_timeout(0.5) == 0.5
+        assert remaining_time() is None
+
+    def test_reserve_time_shortens_deadline(self):
+        with deadline_scope(5):
+            with reserve_time(2) as child:
+                assert child.remaining() <= 3
+            assert remaining_time() > 3
+
+    def test_optional_stage_is_skipped(self):
+        async def run():
+            async with deadline_scope(0.1):
+                return await within_deadline(asyncio.sleep(1, result="late"), "progress", optional=True)
+        assert asyncio.run(run()) is None
+
+    def test_required_stage_raises(self):
+        async def run():
+            async with deadline_scope(0.1):
+                await within_deadline(asyncio.sleep(1), "upload")
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(run())
+
+    def test_run_cancellable_stops_at_deadline(self):
+        async def run():
+            async with deadline_scope(0.2):
+                await run_cancellable(time.sleep, 2, stage="parse")
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(run())
+        assert time.monotonic() - started < 1.5
+
+
+class TestAnalyzerDegradation:
+    """Test that the analyzer trades quality for staying within budget"""
+
+    def test_short_budget_uses_local_scorer(self, monkeypatch, sample_resume_text, sample_jd_text):
+        monkeypatch.setattr(settings, "ANALYZE_LLM_ESTIMATE_SECONDS", 5.0)
+        analyzer = GroqAnalyzer()
+        analyzer.router = SlowSummaryRouter()
+        with deadline_scope(3):
+            result = analyzer.analyze_resume_jd_match(sample_resume_text, sample_jd_text)
+        assert result["is_fallback"] is True
+        assert analyzer.router.tasks == []
+
+    def test_slow_summary_is_replaced(self, monkeypatch, sample_resume_text, sample_jd_text):
+        monkeypatch.setattr(settings, "ANALYZE_LLM_ESTIMATE_SECONDS", 0.1)
+        analyzer = GroqAnalyzer()
+        analyzer.router = SlowSummaryRouter(summary_delay=3)
+        started = time.monotonic()
+        with deadline_scope(1.5):
+            result = analyzer.analyze_resume_jd_match(sample_resume_text, sample_jd_text)
+        assert time.monotonic() - started < 1.5
+        # LLM scores are kept; only the summary comes from the local scorer
+        assert result["match_score"] == 72
+        assert result["matched_skills"] == ["Python"]
+        assert result["summary"] != "LLM summary."
+
+    def test_no_deadline_runs_full_analysis(self, sample_resume_text, sample_jd_text):
+        analyzer = GroqAnalyzer()
+        analyzer.router = SlowSummaryRouter()
+        result = analyzer.analyze_resume_jd_match(sample_resume_text, sample_jd_text)
+        assert result["summary"] == "LLM summary."
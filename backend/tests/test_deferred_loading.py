@@ -0,0 +1,92 @@
+"""
+Tests for deferred large columns and the per-route projections
+"""
+import pytest
+from sqlalchemy import event, inspect
+
+from app.auth.auth import create_access_token, create_user
+from app.database.models import Analysis
+from app.main import app
+from app.services.supabase_storage import get_storage
+
+
+LATEX = r"\documentclass{article}" + "x" * 5000
+
+
+class FakeStorage:
+    async def get_signed_url(self, bucket, path, expires_in=3600):
+        return f"https://storage.example.com/{bucket}/{path}"
+
+
+@pytest.fixture
+def analysis(make_analysis, monkeypatch):
+    monkeypatch.setitem(app.dependency_overrides, get_storage, FakeStorage)
+    return make_analysis(
+        resume={"storage_path": "1/cv.pdf", "extracted_text": "Python " * 1000, "parsed_data": {"raw_text": "Python"}},
+        job_description={"description": "Python and FastAPI"},
+        match_score=64.0, matched_skills=["Python"], missing_skills=["Go"], matched_keywords=[], missing_keywords=[],
+        improvements=[], summary="Decent fit.", improved_latex=LATEX, latex_storage_path="1/improved.tex",
+        progress_status="completed", progress_percentage=100,
+    )
+
+
+@pytest.fixture
+def statements(db_session):
+    """SQL issued on the sync engine while the test runs"""
+    seen = []
+    engine = db_session.get_bind()
+    listener = lambda conn, cursor, statement, *args: seen.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    yield seen
+    event.remove(engine, "before_cursor_execute", listener)
+
+
+class TestDeferredColumns:
+    """Test that large columns stay out of plain entity loads"""
+
+    def test_entity_load_skips_large_columns(self, db_session, analysis):
+        db_session.expunge_all()
+        loaded = db_session.query(Analysis).one()
+        assert {"improved_latex", "summary", "matched_skills", "improvements"} <= inspect(loaded).unloaded
+        assert {"extracted_text", "parsed_data"} <= inspect(loaded.resume).unloaded
+        # Groups load together on first access
+        assert loaded.summary == "Decent fit."
+        assert "matched_skills" not in inspect(loaded).unloaded
+
+    def test_full_analysis_response_on_async_session(self, client, headers, analysis):
+        body = client.get(f"/api/analyze/{analysis.id}", headers=headers).json()
+        assert body["missing_skills"] == ["Go"]
+        assert body["summary"] == "Decent fit."
+        assert body["improved_latex"] == LATEX
+
+
+class TestRouteProjections:
+    """Test routes that read one or two fields of an analysis"""
+
+    def test_downloads_select_only_paths(self, client, headers, analysis, statements):
+        latex = client.get(f"/api/download/latex/{analysis.id}", headers=headers, follow_redirects=False)
+        original = client.get(f"/api/download/original/{analysis.id}", headers=headers, follow_redirects=False)
+
+        assert latex.headers["location"].endswith("/generated-resumes/1/improved.tex")
+        assert original.headers["location"].endswith("/resumes/1/cv.pdf")
+        analysis_reads = [s for s in statements if "FROM analyses" in s or "JOIN analyses" in s]
+        assert analysis_reads and not any("improved_latex" in s or "extracted_text" in s for s in analysis_reads)
+
+    def test_editor_reads_latex_and_compile_checks_presence(self, client, headers, analysis, db_session):
+        assert client.get(f"/api/editor/{analysis.id}", headers=headers).json()["latex_content"] == LATEX
+        assert client.post(f"/api/editor/{analysis.id}/compile", headers=headers).json()["success"] is False
+
+        analysis.improved_latex = None
+        db_session.commit()
+        assert client.post(f"/api/editor/{analysis.id}/compile", headers=headers).status_code == 404
+
+    def test_other_users_analysis_is_not_found(self, client, analysis, db_session):
+        other = create_user(db_session, email="nosy@example.com", username="nosy", password="Password123!")
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(other.id)})}"}
+        assert client.get(f"/api/download/pdf/{analysis.id}", headers=headers).status_code == 404
+        assert client.get(f"/api/versions/{analysis.id}", headers=headers).status_code == 404
+
+    def test_json_export_includes_job_description(self, client, headers, analysis):
+        rows = client.get("/api/analytics/export?format=json", headers=headers).json()
+        assert rows[0]["job_description"] == "Python and FastAPI"
+        assert rows[0]["has_improvement"] is True
@@ -0,0 +1,63 @@
+"""
+Tests for the local Groq stand-in used by the offline benchmarks
+"""
+import json
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.services.groq_analyzer import build_scoring_messages, build_summary_messages
+from app.services.json_repair import SCORING_SCHEMA, SUMMARY_SCHEMA, parse_llm_json
+from app.services.llm_client import LLMClient
+from benchmarks.fake_groq_server import FakeGroqConfig, build_content, create_app
+
+
+FAST = FakeGroqConfig(latency="fixed:0", tokens_per_second=1e9)
+
+
+class TestFakeResponses:
+    """Test that canned responses satisfy the backend's schemas"""
+
+    def test_analysis_prompts_get_schema_valid_json(self, sample_resume_text, sample_jd_text):
+        scoring = parse_llm_json(build_content(build_scoring_messages(sample_resume_text, sample_jd_text)), SCORING_SCHEMA)
+        summary = parse_llm_json(build_content(build_summary_messages(sample_resume_text, sample_jd_text)), SUMMARY_SCHEMA)
+        assert 0 <= scoring["match_score"] <= 100
+        assert summary["summary"]
+
+    def test_responses_are_deterministic_per_prompt(self, sample_resume_text, sample_jd_text):
+        messages = build_scoring_messages(sample_resume_text, sample_jd_text)
+        assert build_content(messages) == build_content(messages)
+
+
+class TestFakeServer:
+    """Test the chat-completions endpoint"""
+
+    def test_completion_reports_usage(self):
+        client = TestClient(create_app(FAST))
+        response = client.post("/openai/v1/chat/completions",
+                               json={"model": "m", "messages": [{"role": "user", "content": "hello"}]})
+        assert response.status_code == 200
+        assert response.json()["usage"]["total_tokens"] > 0
+
+    def test_rate_limit_injection(self):
+        config = FakeGroqConfig(latency="fixed:0", rate_limit_rate=1.0, retry_after=2)
+        response = TestClient(create_app(config)).post("/openai/v1/chat/completions", json={"messages": []})
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "2"
+
+    def test_streaming_reassembles_content(self):
+        messages = [{"role": "user", "content": "hello"}]
+        response = TestClient(create_app(FAST)).post("/openai/v1/chat/completions",
+                                                     json={"messages": messages, "stream": True})
+        chunks = [line[len("data: "):] for line in response.text.splitlines() if line.startswith("data: ")]
+        assert chunks[-1] == "[DONE]"
+        text = "".join(json.loads(c)["choices"][0]["delta"].get("content", "") for c in chunks[:-1])
+        assert text == build_content(messages)
+
+
+class TestBaseUrlSwitch:
+    """Test that the client can be pointed at the stand-in"""
+
+    def test_client_uses_configured_base_url(self, monkeypatch):
+        monkeypatch.setattr(settings, "GROQ_BASE_URL", "http://127.0.0.1:8090")
+        assert str(LLMClient().client.base_url).startswith("http://127.0.0.1:8090")
@@ -0,0 +1,78 @@
+"""
+Tests for the keyset-paginated analysis history
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+@pytest.fixture
+def add_analyses(make_analysis):
+    def add(count, created_at=None):
+        for n in range(count):
+            make_analysis(resume={"filename": f"cv{n}.pdf"}, job_description={"title": f"Role {n}"},
+                          match_score=50.0 + n, created_at=created_at or NOW - timedelta(minutes=n))
+    return add
+
+
+@pytest.fixture
+def statements():
+    """SQL issued on any engine (the routes use the async one) while the test runs"""
+    seen = []
+    listener = lambda conn, cursor, statement, *args: seen.append(statement)
+    event.listen(Engine, "before_cursor_execute", listener)
+    yield seen
+    event.remove(Engine, "before_cursor_execute", listener)
+
+
+class TestHistoryPagination:
+    """Test GET /api/profile/history paging"""
+
+    def test_pages_cover_every_analysis_once(self, client, headers, add_analyses):
+        add_analyses(7)
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            body = client.get("/api/profile/history", headers=headers, params=params).json()
+            seen += body["history"]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        assert [item["resume_filename"] for item in seen] == [f"cv{n}.pdf" for n in range(7)]
+        assert seen[0]["job_title"] == "Role 0"
+
+    def test_ties_on_created_at_are_split_by_id(self, client, headers, add_analyses):
+        add_analyses(5, created_at=NOW)
+        first = client.get("/api/profile/history", headers=headers, params={"limit": 2}).json()
+        rest = client.get("/api/profile/history", headers=headers,
+                          params={"limit": 10, "cursor": first["next_cursor"]}).json()
+        ids = [item["id"] for item in first["history"] + rest["history"]]
+        assert ids == sorted(ids, reverse=True) and len(set(ids)) == 5
+        assert rest["next_cursor"] is None
+
+    def test_invalid_cursor_is_rejected(self, client, headers):
+        response = client.get("/api/profile/history", headers=headers, params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+
+
+class TestHistoryQueryCount:
+    """Test that a page costs the same number of queries however many rows it holds"""
+
+    def test_one_query_for_the_page(self, client, headers, add_analyses, statements):
+        add_analyses(1)
+        statements.clear()
+        client.get("/api/profile/history", headers=headers)
+        one_row = len(statements)
+
+        add_analyses(20)
+        statements.clear()
+        body = client.get("/api/profile/history", headers=headers).json()
+
+        assert len(body["history"]) == 21
+        assert len(statements) == one_row
+        assert len([s for s in statements if "FROM analyses" in s]) == 1
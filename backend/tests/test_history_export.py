@@ -0,0 +1,111 @@
+"""
+Tests for the streaming analysis history export
+"""
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+from app.services import history_export
+
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+LONG_DESCRIPTION = "Build Python services. " * 20
+
+
+@pytest.fixture
+def analyses(make_analysis):
+    for n in range(5):
+        make_analysis(
+            job_description={"title": "Backend Engineer", "description": LONG_DESCRIPTION},
+            match_score=None if n == 4 else 60.0 + n, summary=f"Summary {n}",
+            improved_latex=r"\documentclass{article}" if n % 2 == 0 else None,
+            created_at=NOW - timedelta(hours=n),
+        )
+
+
+def export(client, headers, **params):
+    response = client.get("/api/analytics/export", headers=headers, params=params)
+    assert response.status_code == 200, response.text
+    return response
+
+
+class TestExportFormats:
+    """Test each export format"""
+
+    def test_csv(self, client, headers, analyses):
+        rows = list(csv.reader(io.StringIO(export(client, headers, format="csv").text)))
+        assert rows[0] == ["ID", "Date", "Match Score", "Improved", "Summary Preview", "Job Title"]
+        assert len(rows) == 6
+        assert rows[1][2:] == ["60.0", "Yes", "Summary 0", "Backend Engineer"]
+        assert rows[5][2] == "N/A"
+
+    def test_json_previews_the_job_description(self, client, headers, analyses):
+        records = export(client, headers, format="json").json()
+        assert len(records) == 5
+        assert records[0]["job_title"] == "Backend Engineer"
+        assert records[0]["job_description"] == LONG_DESCRIPTION[:100] + "..."
+        assert [r["has_improvement"] for r in records] == [True, False, True, False, True]
+
+    def test_empty_json_is_a_valid_array(self, client, headers):
+        assert export(client, headers, format="json").json() == []
+
+    def test_ndjson_carries_full_text(self, client, headers, analyses):
+        lines = export(client, headers, format="ndjson").text.splitlines()
+        records = [json.loads(line) for line in lines]
+        assert len(records) == 5
+        assert records[0]["job_description"] == LONG_DESCRIPTION
+        assert records[0]["created_at"] > records[1]["created_at"]
+
+    def test_parquet(self, client, headers, analyses):
+        pq = pytest.importorskip("pyarrow.parquet")
+        table = pq.read_table(io.BytesIO(export(client, headers, format="parquet").content))
+        assert table.num_rows == 5
+        assert table.column("job_title").to_pylist()[0] == "Backend Engineer"
+        assert table.column("match_score").to_pylist()[-1] is None
+
+    def test_gzip(self, client, headers, analyses):
+        plain = export(client, headers, format="ndjson").content
+        response = export(client, headers, format="ndjson", gzip=True)
+        assert response.headers["content-type"] == "application/gzip"
+        assert "analysis_history.ndjson.gz" in response.headers["content-disposition"]
+        assert gzip.decompress(response.content) == plain
+
+    def test_gzip_parquet_is_rejected(self, client, headers):
+        response = client.get("/api/analytics/export", headers=headers, params={"format": "parquet", "gzip": True})
+        assert response.status_code == 400
+
+
+class TestExportStreaming:
+    """Test that rows are read and encoded a batch at a time"""
+
+    def test_one_encode_per_batch(self, client, headers, analyses, monkeypatch):
+        batches = []
+
+        class CountingEncoder(history_export.NdjsonEncoder):
+            def encode(self, rows):
+                batches.append(len(rows))
+                return super().encode(rows)
+
+        monkeypatch.setattr(history_export, "EXPORT_BATCH_SIZE", 2)
+        monkeypatch.setitem(history_export.ENCODERS, "ndjson", CountingEncoder)
+        assert len(export(client, headers, format="ndjson").text.splitlines()) == 5
+        assert batches == [2, 2, 1]
+
+    def test_connection_is_returned(self, client, headers, analyses):
+        checked_out = []
+        checkout = lambda dbapi_conn, record, proxy: checked_out.append(record)
+        checkin = lambda dbapi_conn, record: checked_out.remove(record) if record in checked_out else None
+        event.listen(Pool, "checkout", checkout)
+        event.listen(Pool, "checkin", checkin)
+        try:
+            export(client, headers, format="ndjson")
+        finally:
+            event.remove(Pool, "checkout", checkout)
+            event.remove(Pool, "checkin", checkin)
+        assert checked_out == []
@@ -0,0 +1,161 @@
+"""
+Tests for the durable job queue and its worker
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.auth import create_access_token, create_user
+from app.config import settings
+from app.core.exceptions import AIServiceError, ResourceNotFoundError
+from app.database.models import Analysis
+from app.services import job_handlers, job_queue
+from app.worker import Worker
+
+
+@pytest.fixture
+def analysis(make_analysis, sample_resume_text, sample_jd_text):
+    return make_analysis(resume={"extracted_text": sample_resume_text}, job_description={"description": sample_jd_text},
+                         progress_status="queued", progress_percentage=10)
+
+
+@pytest.fixture
+def worker(db_session):
+    return Worker(session_factory=sessionmaker(bind=db_session.get_bind()), poll_interval=0)
+
+
+def _expire_lock(db_session, job):
+    job.locked_until = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db_session.commit()
+
+
+class TestQueue:
+    """Test claiming, retries, visibility timeout and dead-lettering"""
+
+    def test_claim_is_exclusive(self, db_session, user):
+        job = job_queue.enqueue(db_session, "analyze", user.id)
+        db_session.commit()
+        claimed = job_queue.claim(db_session, "w1")
+        assert claimed.id == job.id
+        assert claimed.status == job_queue.JOB_RUNNING
+        assert claimed.attempts == 1
+        assert job_queue.claim(db_session, "w2") is None
+
+    def test_claim_filters_by_kind(self, db_session, user):
+        job_queue.enqueue(db_session, "improve", user.id)
+        db_session.commit()
+        assert job_queue.claim(db_session, "w1", kinds=["analyze"]) is None
+        assert job_queue.claim(db_session, "w1", kinds=["improve"]) is not None
+
+    def test_failed_job_retries_after_backoff(self, db_session, user, monkeypatch):
+        monkeypatch.setattr(settings, "JOB_RETRY_BASE_DELAY", 60.0)
+        monkeypatch.setattr("app.services.job_queue.backoff_delay", lambda attempt, base, cap: base)
+        job_queue.enqueue(db_session, "analyze", user.id)
+        db_session.commit()
+        job = job_queue.claim(db_session, "w1")
+        assert job_queue.fail(db_session, job, "provider down") is True
+        assert job.status == job_queue.JOB_QUEUED
+        assert job_queue.claim(db_session, "w1") is None
+        job.run_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db_session.commit()
+        assert job_queue.claim(db_session, "w1").attempts == 2
+
+    def test_exhausted_job_is_dead_lettered(self, db_session, user):
+        job_queue.enqueue(db_session, "analyze", user.id, max_attempts=1)
+        db_session.commit()
+        job = job_queue.claim(db_session, "w1")
+        assert job_queue.fail(db_session, job, "provider down") is False
+        assert job.status == job_queue.JOB_DEAD
+        job_queue.retry_dead(db_session, job)
+        assert job_queue.claim(db_session, "w1").id == job.id
+
+    def test_expired_lock_is_reclaimed(self, db_session, user):
+        job_queue.enqueue(db_session, "analyze", user.id)
+        db_session.commit()
+        job = job_queue.claim(db_session, "crashed")
+        _expire_lock(db_session, job)
+        reclaimed = job_queue.claim(db_session, "w2")
+        assert reclaimed.locked_by == "w2"
+        assert reclaimed.attempts == 2
+        assert job_queue.heartbeat(db_session, job.id, "crashed") is False
+
+    def test_expired_final_attempt_is_reaped(self, db_session, user):
+        job_queue.enqueue(db_session, "analyze", user.id, max_attempts=1)
+        db_session.commit()
+        job = job_queue.claim(db_session, "crashed")
+        _expire_lock(db_session, job)
+        assert job_queue.claim(db_session, "w2") is None
+        db_session.refresh(job)
+        assert job.status == job_queue.JOB_DEAD
+
+
+class TestWorker:
+    """Test that the worker runs handlers and records outcomes"""
+
+    def test_successful_job(self, db_session, worker, analysis, monkeypatch):
+        def handler(db, job):
+            job_handlers.set_progress(db, db.get(Analysis, job.analysis_id), "completed", 100)
+        monkeypatch.setitem(job_handlers.HANDLERS, "analyze", handler)
+        job = job_queue.enqueue(db_session, "analyze", analysis.user_id, analysis_id=analysis.id)
+        db_session.commit()
+
+        assert worker.run_once() is True
+        db_session.refresh(job)
+        db_session.refresh(analysis)
+        assert job.status == job_queue.JOB_SUCCEEDED
+        assert analysis.progress_status == "completed"
+        assert worker.run_once() is False
+
+    def test_transient_error_is_retried(self, db_session, worker, analysis, monkeypatch):
+        def handler(db, job):
+            raise AIServiceError()
+        monkeypatch.setitem(job_handlers.HANDLERS, "analyze", handler)
+        job = job_queue.enqueue(db_session, "analyze", analysis.user_id, analysis_id=analysis.id)
+        db_session.commit()
+
+        worker.run_once()
+        db_session.refresh(job)
+        assert job.status == job_queue.JOB_QUEUED
+        assert "AIServiceError" in job.last_error
+
+    def test_permanent_error_dead_letters_and_fails_analysis(self, db_session, worker, analysis, monkeypatch):
+        def handler(db, job):
+            raise ResourceNotFoundError()
+        monkeypatch.setitem(job_handlers.HANDLERS, "analyze", handler)
+        job = job_queue.enqueue(db_session, "analyze", analysis.user_id, analysis_id=analysis.id)
+        db_session.commit()
+
+        worker.run_once()
+        db_session.refresh(job)
+        db_session.refresh(analysis)
+        assert job.status == job_queue.JOB_DEAD
+        assert analysis.progress_status == "failed"
+
+
+class TestJobRoutes:
+    """Test job status and retry endpoints"""
+
+    def test_status_and_retry(self, client, db_session, analysis):
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(analysis.user_id)})}"}
+        job = job_queue.enqueue(db_session, "analyze", analysis.user_id, analysis_id=analysis.id, max_attempts=1)
+        db_session.commit()
+
+        response = client.get(f"/api/jobs/{job.id}", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["status"] == "queued"
+        assert response.json()["progress_percentage"] == 10
+        assert client.post(f"/api/jobs/{job.id}/retry", headers=headers).status_code == 409
+
+        job_queue.fail(db_session, job_queue.claim(db_session, "w1"), "boom")
+        response = client.post(f"/api/jobs/{job.id}/retry", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["status"] == "queued"
+        assert response.json()["attempts"] == 0
+
+    def test_other_users_job_is_hidden(self, client, db_session, analysis):
+        other = create_user(db_session, email="other@example.com", username="other", password="Password123!")
+        job = job_queue.enqueue(db_session, "analyze", analysis.user_id, analysis_id=analysis.id)
+        db_session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(other.id)})}"}
+        assert client.get(f"/api/jobs/{job.id}", headers=headers).status_code == 404
@@ -0,0 +1,99 @@
+"""
+Tests for the tolerant LLM JSON parser
+"""
+import pytest
+
+from app.config import settings
+from app.services.groq_analyzer import GroqAnalyzer
+from app.services.model_router import ModelRouter
+from app.services.json_repair import (
+    LLMOutputError,
+    SCORING_SCHEMA,
+    parse_llm_json,
+    repair_json,
+    validate_schema,
+)
+
+
+class TestRepair:
+    """Test repair of common LLM output faults"""
+
+    def test_prose_and_code_fence(self):
+        text = 'Here you go:\n```json\n{"match_score": 80}\n```\nHope this helps!'
+        assert parse_llm_json(text) == {"match_score": 80}
+
+    def test_latex_backslashes_are_preserved(self):
+        text = r'{"experience": "\textbf{Engineer} \hfill 2020\n\begin{itemize}\item Cut cost 30\%\end{itemize}"}'
+        result = parse_llm_json(text)
+        assert result["experience"] == "\\textbf{Engineer} \\hfill 2020\n\\begin{itemize}\\item Cut cost 30\\%\\end{itemize}"
+
+    def test_latex_newline_command_is_not_a_newline(self):
+        assert parse_llm_json(r'{"a": "x \newline y"}')["a"] == "x \\newline y"
+
+    def test_valid_escapes_before_words_are_kept(self):
+        text = r'{"a": "Name\tSkills", "b": "Line\rBreak\fFeed\bBack"}'
+        assert parse_llm_json(text) == {"a": "Name\tSkills", "b": "Line\rBreak\fFeed\bBack"}
+
+    def test_trailing_commas(self):
+        assert parse_llm_json('{"a": [1, 2,], "b": 3,}') == {"a": [1, 2], "b": 3}
+
+    def test_raw_newlines_and_inner_quotes(self):
+        result = parse_llm_json('{"summary": "Needs "hands-on" work.\nOtherwise fine."}')
+        assert result["summary"] == 'Needs "hands-on" work.\nOtherwise fine.'
+
+    def test_truncated_string_is_closed(self):
+        assert parse_llm_json('{"score": 5, "summary": "Strong candid') == {"score": 5, "summary": "Strong candid"}
+
+    def test_truncated_member_is_dropped(self):
+        assert parse_llm_json('{"score": 5, "skills": ["Go"], "keywo') == {"score": 5, "skills": ["Go"]}
+        assert parse_llm_json('{"score": 5, "items": [{"a": 1}, {"b"') == {"score": 5, "items": [{"a": 1}, {}]}
+
+    def test_truncated_literal_is_dropped(self):
+        assert parse_llm_json('{"a": 1, "b": tr') == {"a": 1}
+
+    def test_python_literals(self):
+        assert parse_llm_json('{"a": True, "b": None}') == {"a": True, "b": None}
+
+    def test_no_object_raises(self):
+        with pytest.raises(LLMOutputError):
+            parse_llm_json("I cannot help with that.")
+
+    def test_repair_ignores_text_after_object(self):
+        assert repair_json('{"a": 1} and {"b": 2}') == '{"a":1}'
+
+
+class TestSchema:
+    """Test schema validation and coercion"""
+
+    def test_coerces_and_fills_defaults(self):
+        result = validate_schema({"match_score": "72%", "matched_skills": "Python, SQL"}, SCORING_SCHEMA)
+        assert result["match_score"] == 72.0
+        assert result["matched_skills"] == ["Python", "SQL"]
+        assert result["missing_keywords"] == []
+
+    def test_missing_required_field_raises(self):
+        with pytest.raises(LLMOutputError):
+            parse_llm_json('{"matched_skills": []}', SCORING_SCHEMA)
+
+    def test_non_numeric_score_raises(self):
+        with pytest.raises(LLMOutputError):
+            parse_llm_json('{"match_score": "high"}', SCORING_SCHEMA)
+
+
+class ScriptedLLM:
+    def __init__(self, text):
+        self.text = text
+
+    def complete(self, messages, temperature, max_tokens, task, priority, model, call=None):
+        return self.text
+
+
+class TestAnalyzerParsing:
+    """Test that unreadable analyses are never scored as 50"""
+
+    def test_unreadable_output_falls_back_to_local_scorer(self, monkeypatch, sample_resume_text, sample_jd_text):
+        monkeypatch.setattr(settings, "LLM_LOCAL_FALLBACK", True)
+        analyzer = GroqAnalyzer()
+        analyzer.router = ModelRouter(llm=ScriptedLLM("Sorry, I can't score this resume."))
+        result = analyzer.analyze_resume_jd_match(sample_resume_text, sample_jd_text)
+        assert result["is_fallback"] is True
@@ -0,0 +1,148 @@
+"""
+Tests for LLM retries, hedging and the circuit breaker
+"""
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from groq import APIConnectionError, BadRequestError
+
+from app.config import settings
+from app.core.exceptions import AIServiceError, CircuitOpenError
+from app.services.llm_client import LLMClient
+from app.services.llm_resilience import CircuitBreaker, backoff_delay
+from app.services.llm_scheduler import LLMScheduler
+from app.services.local_scorer import LocalScorer
+
+
+def _response(content="ok"):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(total_tokens=10),
+    )
+
+
+def _connection_error():
+    return APIConnectionError(request=httpx.Request("POST", "https://api.groq.com"))
+
+
+class FakeCompletions:
+    """Stand-in for client.chat.completions that replays scripted outcomes"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else _response()
+        if isinstance(outcome, Exception):
+            raise outcome
+        if callable(outcome):
+            return outcome()
+        return outcome
+
+
+@pytest.fixture
+def make_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 0.0)
+    monkeypatch.setattr(settings, "LLM_STREAM_RESPONSES", False)
+
+    def _make(outcomes, breaker=None):
+        client = LLMClient()
+        client.scheduler = LLMScheduler(
+            db_path=str(tmp_path / "scheduler.sqlite3"),
+            requests_per_minute=600,
+            tokens_per_minute=100000,
+            max_concurrency=8,
+        )
+        client.breaker = breaker or CircuitBreaker("test", failure_threshold=5, reset_timeout=30)
+        completions = FakeCompletions(outcomes)
+        client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        return client, completions
+    return _make
+
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+class TestRetries:
+    """Test retry behaviour of LLMClient"""
+
+    def test_retries_connection_errors(self, make_client):
+        client, completions = make_client([_connection_error(), _response("done")])
+        assert client.complete(MESSAGES, temperature=0, max_tokens=10, task="test") == "done"
+        assert completions.calls == 2
+
+    def test_gives_up_with_ai_service_error(self, make_client):
+        client, completions = make_client([_connection_error()] * 5)
+        with pytest.raises(AIServiceError):
+            client.complete(MESSAGES, temperature=0, max_tokens=10, task="test")
+        assert completions.calls == settings.LLM_MAX_RETRIES + 1
+
+    def test_does_not_retry_bad_requests(self, make_client):
+        request = httpx.Request("POST", "https://api.groq.com")
+        error = BadRequestError("bad", response=httpx.Response(400, request=request), body=None)
+        client, completions = make_client([error])
+        with pytest.raises(BadRequestError):
+            client.complete(MESSAGES, temperature=0, max_tokens=10, task="test")
+        assert completions.calls == 1
+
+    def test_backoff_is_bounded(self):
+        for attempt in range(10):
+            assert 0 <= backoff_delay(attempt, base=0.5, cap=4.0) <= 4.0
+
+
+class TestHedging:
+    """Test hedged duplicate requests"""
+
+    def test_hedge_wins_over_slow_primary(self, make_client, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_HEDGING_ENABLED", True)
+        monkeypatch.setattr("app.services.llm_client.hedge_delay", lambda task, min_samples: 0.05)
+
+        def slow():
+            time.sleep(0.5)
+            return _response("slow")
+
+        client, completions = make_client([slow, _response("fast")])
+        assert client.complete(MESSAGES, temperature=0, max_tokens=10, task="test") == "fast"
+        assert completions.calls == 2
+
+
+class TestCircuitBreaker:
+    """Test circuit breaker state transitions"""
+
+    def test_opens_after_threshold_and_fails_fast(self, make_client):
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+        client, completions = make_client([_connection_error()] * 10, breaker=breaker)
+        with pytest.raises(AIServiceError):
+            client.complete(MESSAGES, temperature=0, max_tokens=10, task="test")
+        calls = completions.calls
+        with pytest.raises(CircuitOpenError):
+            client.complete(MESSAGES, temperature=0, max_tokens=10, task="test")
+        assert completions.calls == calls
+
+    def test_half_open_trial_closes_breaker(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        time.sleep(0.06)
+        breaker.before_call()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()  # only one trial while half-open
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestLocalFallback:
+    """Test the local scorer used while the provider is unhealthy"""
+
+    def test_local_scorer_result_shape(self, sample_resume_text, sample_jd_text):
+        result = LocalScorer().analyze(sample_resume_text, sample_jd_text)
+        assert isinstance(result["match_score"], int)
+        assert 0 <= result["match_score"] <= 100
+        assert "Python" in result["matched_skills"]
+        assert "Kubernetes" in result["missing_skills"]
+        assert result["summary"]
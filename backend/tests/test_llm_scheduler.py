@@ -0,0 +1,101 @@
+"""
+Tests for the provider-wide LLM call scheduler
+"""
+import threading
+import time
+
+import pytest
+
+from app.core.exceptions import AIServiceError
+from app.services.llm_scheduler import (
+    LLMScheduler,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BACKGROUND,
+)
+
+
+@pytest.fixture
+def make_scheduler(tmp_path):
+    def _make(**overrides):
+        options = {
+            "db_path": str(tmp_path / "scheduler.sqlite3"),
+            "requests_per_minute": 60,
+            "tokens_per_minute": 10000,
+            "max_concurrency": 4,
+            "queue_timeout": 2.0,
+        }
+        options.update(overrides)
+        return LLMScheduler(**options)
+    return _make
+
+
+class TestBudgets:
+    """Test RPM/TPM token buckets"""
+
+    def test_admits_within_budget(self, make_scheduler):
+        scheduler = make_scheduler()
+        lease = scheduler.acquire(estimated_tokens=500)
+        assert lease.reserved_tokens == 500
+        assert scheduler.stats()["in_flight"] == 1
+        scheduler.release(lease)
+        assert scheduler.stats()["in_flight"] == 0
+
+    def test_times_out_when_requests_exhausted(self, make_scheduler):
+        scheduler = make_scheduler(requests_per_minute=1, queue_timeout=0.2)
+        scheduler.release(scheduler.acquire())
+        with pytest.raises(AIServiceError):
+            scheduler.acquire()
+
+    def test_refunds_unused_tokens(self, make_scheduler):
+        scheduler = make_scheduler()
+        lease = scheduler.acquire(estimated_tokens=4000)
+        lease.used_tokens = 1000
+        scheduler.release(lease)
+        assert scheduler.stats()["tokens_available"] >= 9000
+
+    def test_shared_between_instances(self, make_scheduler):
+        first = make_scheduler(requests_per_minute=1, queue_timeout=0.2)
+        second = make_scheduler(requests_per_minute=1, queue_timeout=0.2)
+        first.release(first.acquire())
+        with pytest.raises(AIServiceError):
+            second.acquire()
+
+
+class TestPriorityAndAIMD:
+    """Test priority ordering and adaptive concurrency"""
+
+    def test_interactive_admitted_before_background(self, make_scheduler):
+        scheduler = make_scheduler(max_concurrency=1)
+        holder = scheduler.acquire()
+        order = []
+
+        def worker(priority, name):
+            lease = scheduler.acquire(priority=priority)
+            order.append(name)
+            scheduler.release(lease)
+
+        background = threading.Thread(target=worker, args=(PRIORITY_BACKGROUND, "background"))
+        background.start()
+        time.sleep(0.1)
+        interactive = threading.Thread(target=worker, args=(PRIORITY_INTERACTIVE, "interactive"))
+        interactive.start()
+        time.sleep(0.1)
+
+        scheduler.release(holder)
+        background.join()
+        interactive.join()
+        assert order == ["interactive", "background"]
+
+    def test_rate_limit_halves_concurrency_and_blocks(self, make_scheduler):
+        scheduler = make_scheduler(max_concurrency=8)
+        scheduler.release(scheduler.acquire(), rate_limited=True, retry_after=1.0)
+        stats = scheduler.stats()
+        assert stats["concurrency_limit"] == 4
+        assert stats["blocked_for_seconds"] > 0
+
+    def test_success_increases_concurrency(self, make_scheduler):
+        scheduler = make_scheduler(max_concurrency=8)
+        scheduler.release(scheduler.acquire(), rate_limited=True, retry_after=0)
+        for _ in range(4):
+            scheduler.release(scheduler.acquire())
+        assert 4 < scheduler.stats()["concurrency_limit"] <= 5.5
@@ -0,0 +1,142 @@
+"""
+Tests for per-call LLM telemetry
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from groq import Groq
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.auth import create_access_token, create_user
+from app.config import settings
+from app.database.models import LLMCall
+from app.services.llm_client import LLMClient
+from app.services.llm_scheduler import LLMScheduler
+from app.services.llm_telemetry import LLMCallRecord, TelemetryWriter, summarize_calls
+from app.services.model_router import ModelRouter, TASK_SCORING
+from benchmarks.fake_groq_server import FakeGroqConfig, create_app
+
+
+@pytest.fixture
+def writer(db_session):
+    return TelemetryWriter(sessionmaker(bind=db_session.get_bind()), batch_size=2, flush_interval=3600)
+
+
+class ScriptedLLM:
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def complete(self, messages, temperature, max_tokens, task, priority, model, call=None):
+        call.prompt_tokens, call.completion_tokens = 100, 20
+        return self.responses.pop(0)
+
+
+class TestTelemetryWriter:
+    """Test buffered, batched writes"""
+
+    def test_flush_writes_all_batches(self, writer, db_session):
+        for _ in range(5):
+            writer.record(LLMCallRecord(task="scoring", model="m", latency_ms=120.0))
+        assert writer.flush() == 5
+        assert writer.pending() == 0
+        assert db_session.query(LLMCall).count() == 5
+
+    def test_full_buffer_drops_oldest(self, db_session):
+        writer = TelemetryWriter(sessionmaker(bind=db_session.get_bind()), batch_size=100,
+                                 flush_interval=3600, max_buffer=2)
+        for task in ("first", "second", "third"):
+            writer.record(LLMCallRecord(task=task))
+        writer.flush()
+        assert [row.task for row in db_session.query(LLMCall).order_by(LLMCall.id)] == ["second", "third"]
+
+    def test_disabled_writer_records_nothing(self, db_session):
+        writer = TelemetryWriter(sessionmaker(bind=db_session.get_bind()), enabled=False)
+        writer.record(LLMCallRecord(task="scoring"))
+        assert writer.pending() == 0
+
+
+class TestRouterTelemetry:
+    """Test that routed calls are recorded with their parse outcome"""
+
+    def test_escalation_records_both_calls(self, writer, db_session, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_MODEL_SCORING", "small-model")
+        router = ModelRouter(llm=ScriptedLLM(["not json", '{"match_score": 70}']), telemetry=writer)
+        router.complete_json(TASK_SCORING, [{"role": "user", "content": "x"}], temperature=0, max_tokens=10)
+        writer.flush()
+        rows = db_session.query(LLMCall).order_by(LLMCall.id).all()
+        assert [(r.model, r.parse_outcome) for r in rows] == [("small-model", "failed"),
+                                                              (router.escalation_model, "ok")]
+        assert rows[0].prompt_tokens == 100
+
+
+class TestStreamingClient:
+    """Test time to first token and token usage from a streamed completion"""
+
+    def test_streamed_call_fills_record(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_STREAM_RESPONSES", True)
+        fake = TestClient(create_app(FakeGroqConfig(latency="fixed:0.01", tokens_per_second=1e6)))
+        client = LLMClient()
+        client.client = Groq(api_key="x", base_url="http://testserver", http_client=fake, max_retries=0)
+        client.scheduler = LLMScheduler(str(tmp_path / "scheduler.sqlite3"), requests_per_minute=600,
+                                        tokens_per_minute=100000, max_concurrency=4)
+        call = LLMCallRecord(task="test")
+        text = client.complete([{"role": "user", "content": "hello"}], temperature=0, max_tokens=100,
+                               task="test", call=call)
+        assert text
+        assert call.ttft_ms >= 10
+        assert call.latency_ms >= call.ttft_ms
+        assert call.prompt_tokens > 0 and call.completion_tokens > 0
+
+
+class TestAggregates:
+    """Test aggregate queries and endpoints"""
+
+    def _seed(self, db_session):
+        now = datetime.now(timezone.utc)
+        rows = [LLMCall(created_at=now, task="scoring", model="small", latency_ms=float(ms), status="ok",
+                        prompt_tokens=100, completion_tokens=50, retries=0, cache_hit=False)
+                for ms in range(100, 1100, 100)]
+        rows.append(LLMCall(created_at=now, task="improvement", model="large", latency_ms=1.0, status="ok",
+                            cache_hit=True, retries=0))
+        rows.append(LLMCall(created_at=now, task="improvement", model="large", latency_ms=3000.0, status="error",
+                            error_type="AIServiceError", retries=2, cache_hit=False))
+        rows.append(LLMCall(created_at=now - timedelta(days=30), task="scoring", model="small",
+                            latency_ms=50.0, status="ok", cache_hit=False))
+        db_session.add_all(rows)
+        db_session.commit()
+
+    def test_summary_by_task(self, db_session):
+        self._seed(db_session)
+        summary = {row["task"]: row for row in summarize_calls(db_session, datetime.now(timezone.utc) - timedelta(days=1))}
+        assert summary["scoring"]["calls"] == 10
+        assert summary["scoring"]["prompt_tokens"] == 1000
+        assert summary["scoring"]["p95"] == 1000.0
+        assert summary["improvement"]["errors"] == 1
+        assert summary["improvement"]["cache_hits"] == 1
+        assert summary["improvement"]["p50"] == 3000.0  # cache hits excluded from latency
+
+    def test_endpoints(self, client, db_session, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "ops-secret")
+        headers = {"X-Metrics-Token": "ops-secret"}
+        self._seed(db_session)
+
+        response = client.get("/api/metrics/llm/calls?group_by=model", headers=headers)
+        assert response.status_code == 200
+        assert {group["model"] for group in response.json()["groups"]} == {"small", "large"}
+
+        response = client.get("/api/metrics/llm/calls/daily?days=7", headers=headers)
+        assert response.status_code == 200
+        assert sum(day["prompt_tokens"] for day in response.json()["days"]) == 1000
+
+    def test_endpoints_are_ops_only(self, client, db_session, monkeypatch):
+        user = create_user(db_session, email="m@example.com", username="metrics", password="Password123!")
+        user_headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+
+        # Off unless a token is configured
+        assert client.get("/api/metrics/llm/calls", headers=user_headers).status_code == 404
+
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "ops-secret")
+        assert client.get("/api/metrics/llm/calls", headers=user_headers).status_code == 403
+        assert client.get("/api/metrics/llm", headers={"X-Metrics-Token": "guess"}).status_code == 403
+        assert client.get("/api/metrics/llm", headers={"X-Metrics-Token": "ops-secret"}).status_code == 200
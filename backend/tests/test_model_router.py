@@ -0,0 +1,64 @@
+"""
+Tests for per-task model routing and escalation
+"""
+from app.config import settings
+from app.services.model_router import ModelRouter, TASK_SCORING, TASK_IMPROVEMENT, compare_tiers
+
+
+class FakeLLM:
+    """Records requested models and replays scripted responses"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.models = []
+
+    def complete(self, messages, temperature, max_tokens, task, priority, model, call=None):
+        self.models.append(model)
+        response = self.responses.pop(0)
+        return response(model) if callable(response) else response
+
+
+MESSAGES = [{"role": "user", "content": "score this"}]
+
+
+class TestModelRouting:
+    """Test task-to-model routing"""
+
+    def test_routes_task_to_configured_model(self, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_MODEL_SCORING", "small-model")
+        monkeypatch.setattr(settings, "LLM_MODEL_IMPROVEMENT", "")
+        router = ModelRouter(llm=FakeLLM([]))
+        assert router.model_for(TASK_SCORING) == "small-model"
+        assert router.model_for(TASK_IMPROVEMENT) == settings.GROQ_MODEL
+
+    def test_escalates_on_invalid_json(self, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_MODEL_SCORING", "small-model")
+        llm = FakeLLM(["not json at all", '{"match_score": 70}'])
+        router = ModelRouter(llm=llm)
+        result = router.complete_json(TASK_SCORING, MESSAGES, temperature=0, max_tokens=10)
+        assert result == {"match_score": 70}
+        assert llm.models == ["small-model", router.escalation_model]
+
+    def test_no_escalation_when_valid(self, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_MODEL_SCORING", "small-model")
+        llm = FakeLLM(['Here you go: {"match_score": 55}'])
+        router = ModelRouter(llm=llm)
+        assert router.complete_json(TASK_SCORING, MESSAGES, temperature=0, max_tokens=10) == {"match_score": 55}
+        assert llm.models == ["small-model"]
+
+
+class TestTierComparison:
+    """Test tier latency/agreement comparison"""
+
+    def test_reports_agreement(self):
+        def answer(model):
+            skills = '["Python", "SQL"]' if model == "large" else '["python"]'
+            return '{"match_score": %d, "matched_skills": %s}' % (80 if model == "large" else 70, skills)
+
+        llm = FakeLLM([answer, answer])
+        examples = {"one": {"resume_text": "r", "job_description": "j"}}
+        report = compare_tiers(examples, lambda r, j: MESSAGES, "small", "large", router=ModelRouter(llm=llm))
+        row = report["examples"][0]
+        assert row["score_diff"] == 10
+        assert row["skills_agreement"] == 0.5
+        assert report["small_valid_json_rate"] == 1.0
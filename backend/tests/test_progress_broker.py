@@ -0,0 +1,178 @@
+"""
+Tests for the progress broker and the server-sent events endpoint
+"""
+import asyncio
+import json
+import threading
+
+import pytest
+
+from app.auth.auth import create_access_token, create_user
+from app.database.models import Analysis, JobDescription, Resume
+from app.services import progress_broker
+from app.services.progress_broker import PostgresProgressRelay, ProgressBroker, ProgressEvent
+from app.services.job_handlers import set_progress
+from app.services.realtime_service import RealtimeService
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = ProgressBroker()
+    monkeypatch.setattr(progress_broker, "_broker", broker)
+    return broker
+
+
+async def _collect(broker, analysis_id, keepalive=None):
+    return [event async for event in broker.subscribe(analysis_id, keepalive=keepalive)]
+
+
+class TestProgressBroker:
+    """Test fan-out, coalescing and cleanup"""
+
+    async def test_subscriber_gets_steps_until_terminal(self, broker):
+        task = asyncio.create_task(_collect(broker, 1))
+        await asyncio.sleep(0.01)
+        broker.publish(1, "analyzing", 30)
+        await asyncio.sleep(0.01)
+        broker.publish(2, "analyzing", 50)  # another analysis
+        broker.publish(1, "completed", 100, {"match_score": 70.0})
+        events = await asyncio.wait_for(task, 1)
+        assert [(e.status, e.percentage) for e in events] == [("analyzing", 30), ("completed", 100)]
+        assert events[-1].data == {"match_score": 70.0}
+        assert broker.subscriber_count(1) == 0
+
+    async def test_late_subscriber_starts_from_latest(self, broker):
+        broker.publish(1, "analyzing", 30)
+        broker.publish(1, "completed", 100)
+        events = await asyncio.wait_for(_collect(broker, 1), 1)
+        assert [e.status for e in events] == ["completed"]
+
+    async def test_slow_subscriber_skips_to_newest(self, broker):
+        events = []
+
+        async def slow():
+            async for event in broker.subscribe(1):
+                events.append(event)
+                await asyncio.sleep(0.05)
+
+        task = asyncio.create_task(slow())
+        await asyncio.sleep(0.01)
+        for percentage in (10, 20, 30, 40):
+            broker.publish(1, "analyzing", percentage)
+        broker.publish(1, "completed", 100)
+        await asyncio.wait_for(task, 1)
+        assert events[-1].status == "completed"
+        assert len(events) < 5
+
+    async def test_publish_from_worker_thread(self, broker):
+        task = asyncio.create_task(_collect(broker, 1))
+        await asyncio.sleep(0.01)
+        thread = threading.Thread(target=broker.publish, args=(1, "completed", 100))
+        thread.start()
+        thread.join()
+        assert (await asyncio.wait_for(task, 1))[0].status == "completed"
+
+    async def test_keepalive_when_idle(self, broker):
+        stream = broker.subscribe(1, keepalive=0.01)
+        assert await stream.__anext__() is None
+        await stream.aclose()
+        assert broker.subscriber_count(1) == 0
+
+    def test_latest_is_bounded(self):
+        broker = ProgressBroker(max_tracked=2)
+        for analysis_id in (1, 2, 3):
+            broker.publish(analysis_id, "analyzing", 10)
+        assert broker.latest(1) is None
+        assert broker.latest(3).percentage == 10
+
+    async def test_realtime_service_publishes(self, broker):
+        await RealtimeService().update_analysis_progress(5, "improving", 50)
+        assert broker.latest(5).status == "improving"
+
+
+class TestJobProgress:
+    """Test that job handlers publish steps without committing them"""
+
+    def test_intermediate_steps_are_not_persisted(self, broker, owned_analysis, db_session):
+        analysis, _ = owned_analysis
+        set_progress(db_session, analysis, "analyzing", 30)
+        assert broker.latest(analysis.id).percentage == 30
+        db_session.rollback()
+        assert analysis.progress_status == "queued"
+
+        set_progress(db_session, analysis, "failed", 0, persist=True)
+        db_session.rollback()
+        assert analysis.progress_status == "failed"
+
+
+class TestPostgresRelay:
+    """Test handling of NOTIFY payloads"""
+
+    def test_other_process_events_are_delivered(self, broker):
+        relay = PostgresProgressRelay(broker, "postgresql://unused")
+        payload = {"origin": "other", **ProgressEvent(7, "analyzing", 30).to_dict()}
+        relay.handle(json.dumps(payload))
+        assert broker.latest(7).percentage == 30
+
+    def test_own_events_are_ignored(self, broker):
+        relay = PostgresProgressRelay(broker, "postgresql://unused")
+        relay.handle(json.dumps({"origin": broker.origin, **ProgressEvent(7, "analyzing", 30).to_dict()}))
+        relay.handle("not json")
+        assert broker.latest(7) is None
+
+
+@pytest.fixture
+def owned_analysis(db_session):
+    user = create_user(db_session, email="sse@example.com", username="sse", password="Password123!")
+    resume = Resume(user_id=user.id, filename="cv.pdf", file_path="cv.pdf", extracted_text="Python")
+    job_desc = JobDescription(title="Engineer", description="Python")
+    db_session.add_all([resume, job_desc])
+    db_session.flush()
+    analysis = Analysis(user_id=user.id, resume_id=resume.id, job_description_id=job_desc.id,
+                        progress_status="queued", progress_percentage=0)
+    db_session.add(analysis)
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+    return analysis, headers
+
+
+def _events(lines):
+    return [json.loads(line[len("data: "):]) for line in lines if line.startswith("data: ")]
+
+
+class TestProgressEndpoint:
+    """Test GET /api/analyze/{id}/events"""
+
+    def test_streams_until_completed(self, client, broker, owned_analysis):
+        analysis, headers = owned_analysis
+        broker.publish(analysis.id, "analyzing", 30)
+        # TestClient returns once the stream ends, so completion is published from another thread
+        timer = threading.Timer(0.3, broker.publish, args=(analysis.id, "completed", 100, {"match_score": 80.0}))
+        timer.start()
+        response = client.get(f"/api/analyze/{analysis.id}/events", headers=headers)
+        timer.join()
+        assert response.headers["content-type"].startswith("text/event-stream")
+        received = _events(response.text.splitlines())
+        assert [(e["status"], e["percentage"]) for e in received] == [("analyzing", 30), ("completed", 100)]
+        assert received[-1]["data"] == {"match_score": 80.0}
+
+    def test_unpublished_analysis_starts_from_the_row(self, client, broker, owned_analysis):
+        analysis, headers = owned_analysis
+        timer = threading.Timer(0.3, broker.publish, args=(analysis.id, "failed", 0))
+        timer.start()
+        response = client.get(f"/api/analyze/{analysis.id}/events", headers=headers)
+        timer.join()
+        assert [e["status"] for e in _events(response.text.splitlines())] == ["queued", "failed"]
+
+    def test_finished_analysis_sends_one_event(self, client, broker, owned_analysis, db_session):
+        analysis, headers = owned_analysis
+        analysis.progress_status, analysis.progress_percentage = "completed", 100
+        db_session.commit()
+        response = client.get(f"/api/analyze/{analysis.id}/events", headers=headers)
+        assert [e["status"] for e in _events(response.text.splitlines())] == ["completed"]
+
+    def test_other_users_analysis_is_hidden(self, client, broker, owned_analysis, db_session):
+        analysis, _ = owned_analysis
+        other = create_user(db_session, email="other@example.com", username="other", password="Password123!")
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(other.id)})}"}
+        assert client.get(f"/api/analyze/{analysis.id}/events", headers=headers).status_code == 404
@@ -0,0 +1,154 @@
+"""
+Tests for the shared sliding-window rate limiter
+"""
+import multiprocessing
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.auth.auth import create_access_token
+from app.core.exceptions import RateLimitExceededError
+from app.core.rate_limiter import RateLimit, SlidingWindowLimiter
+from app.middleware import rate_limit
+from app.middleware.rate_limit import RateLimitMiddleware
+
+
+MINUTE = RateLimit(limit=10, period=60)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SlidingWindowLimiter(str(tmp_path / "limits.sqlite3"))
+
+
+def _hit_many(path, count, results):
+    store = SlidingWindowLimiter(path)
+    allowed = 0
+    for _ in range(count):
+        try:
+            store.hit([("shared", MINUTE, 1)])
+            allowed += 1
+        except RateLimitExceededError:
+            pass
+    results.put(allowed)
+
+
+class TestRateLimit:
+    """Test limit spec parsing"""
+
+    def test_parse(self):
+        assert RateLimit.parse("10/hour") == RateLimit(10, 3600)
+        assert RateLimit.parse("5/15minutes") == RateLimit(5, 900)
+        assert RateLimit.parse("100/minute") == RateLimit(100, 60)
+        with pytest.raises(ValueError):
+            RateLimit.parse("ten per hour")
+
+
+class TestSlidingWindowLimiter:
+    """Test window accounting, atomicity and eviction"""
+
+    def test_denies_over_limit_with_retry_after(self, store):
+        for _ in range(10):
+            store.hit([("user:1", MINUTE, 1)], now=30.0)
+        with pytest.raises(RateLimitExceededError) as exc:
+            store.hit([("user:1", MINUTE, 1)], now=30.0)
+        assert exc.value.status_code == 429
+        assert 30 <= exc.value.retry_after <= 60
+        store.hit([("user:2", MINUTE, 1)], now=30.0)
+
+    def test_previous_window_decays(self, store):
+        for _ in range(10):
+            store.hit([("user:1", MINUTE, 1)], now=59.0)
+        # Half way through the next window the previous one still counts for 5
+        for _ in range(5):
+            store.hit([("user:1", MINUTE, 1)], now=90.0)
+        with pytest.raises(RateLimitExceededError):
+            store.hit([("user:1", MINUTE, 1)], now=90.0)
+
+    def test_cost_weights(self, store):
+        store.hit([("user:1", MINUTE, 8)], now=0.0)
+        with pytest.raises(RateLimitExceededError):
+            store.hit([("user:1", MINUTE, 3)], now=0.0)
+        store.hit([("user:1", MINUTE, 2)], now=0.0)
+
+    def test_all_or_nothing(self, store):
+        tight = RateLimit(limit=1, period=60)
+        store.hit([("named:user:1", tight, 1)], now=0.0)
+        with pytest.raises(RateLimitExceededError):
+            store.hit([("general:user:1", MINUTE, 5), ("named:user:1", tight, 1)], now=0.0)
+        # The general budget was not charged for the rejected request
+        store.hit([("general:user:1", MINUTE, 10)], now=0.0)
+
+    def test_shared_across_processes(self, store):
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_hit_many, args=(store.path, 8, results)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+        assert sum(results.get(timeout=5) for _ in workers) == 10
+
+    def test_eviction_bounds_rows(self, tmp_path):
+        store = SlidingWindowLimiter(str(tmp_path / "limits.sqlite3"), max_rows=50)
+        for n in range(200):
+            store.hit([(f"user:{n}", MINUTE, 1)], now=float(n))
+        store.evict(now=200.0)
+        assert store.row_count() <= 50
+        store.evict(now=10_000.0)
+        assert store.row_count() == 0
+
+
+@pytest.fixture
+def limited_app(store, monkeypatch):
+    monkeypatch.setitem(rate_limit.RATE_LIMITS, "general_api", "25/minute")
+    app = FastAPI()
+
+    @app.post("/api/analyze")
+    async def analyze():
+        return {"ok": True}
+
+    @app.get("/api/profile")
+    async def profile():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, limiter=store)
+    return app
+
+
+def _bearer(user_id):
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': str(user_id)})}"}
+
+
+class TestRateLimitMiddleware:
+    """Test keying and cost weights through the middleware"""
+
+    async def test_analysis_costs_more_than_a_get(self, limited_app):
+        async with httpx.AsyncClient(app=limited_app, base_url="http://test") as client:
+            assert (await client.post("/api/analyze", headers=_bearer(1))).status_code == 200
+            assert (await client.post("/api/analyze", headers=_bearer(1))).status_code == 200
+            for _ in range(5):
+                assert (await client.get("/api/profile", headers=_bearer(1))).status_code == 200
+            limited = await client.get("/api/profile", headers=_bearer(1))
+            assert limited.status_code == 429
+            assert int(limited.headers["retry-after"]) >= 1
+            assert limited.json()["type"] == "RateLimitExceededError"
+
+    async def test_keyed_by_user_not_address(self, limited_app):
+        async with httpx.AsyncClient(app=limited_app, base_url="http://test") as client:
+            for _ in range(2):
+                await client.post("/api/analyze", headers=_bearer(1))
+            await client.post("/api/analyze", headers=_bearer(1))
+            assert (await client.post("/api/analyze", headers=_bearer(1))).status_code == 429
+            assert (await client.post("/api/analyze", headers=_bearer(2))).status_code == 200
+            # An anonymous caller from the same address has its own budget
+            assert (await client.get("/api/profile")).status_code == 200
+
+    def test_register_limit_on_app(self, client):
+        statuses = [
+            client.post("/api/auth/register", json={
+                "email": f"user{n}@example.com", "username": f"user{n}", "password": "Password123!"
+            }).status_code
+            for n in range(4)
+        ]
+        assert statuses == [201, 201, 201, 429]
@@ -0,0 +1,104 @@
+"""
+Tests for cancelling in-flight work when the client disconnects
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.config import settings
+from app.core.exceptions import RequestCancelledError
+from app.core.request_context import (
+    CancelToken,
+    _current_token,
+    cancel_on_disconnect,
+    current_token,
+    interruptible_sleep,
+    run_cancellable,
+    submit_in_context,
+)
+from app.services.latex_service import LaTeXService
+from app.services.llm_client import LLMClient
+
+
+@pytest.fixture
+def token():
+    token = CancelToken()
+    reset = _current_token.set(token)
+    yield token
+    _current_token.reset(reset)
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after: float):
+        self.disconnect_at = time.monotonic() + disconnect_after
+
+    async def is_disconnected(self):
+        return time.monotonic() >= self.disconnect_at
+
+
+class TestCancelToken:
+    """Test the token and its context propagation"""
+
+    def test_callbacks_run_once_on_cancel(self):
+        token, calls = CancelToken(), []
+        token.on_cancel(lambda: calls.append(1))
+        token.cancel()
+        token.cancel()
+        assert calls == [1]
+
+    def test_interruptible_sleep_wakes_on_cancel(self, token):
+        threading.Timer(0.1, token.cancel).start()
+        started = time.monotonic()
+        with pytest.raises(RequestCancelledError):
+            interruptible_sleep(5)
+        assert time.monotonic() - started < 1
+
+    def test_submit_in_context_carries_token(self, token):
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            assert submit_in_context(pool, current_token).result() is token
+            assert pool.submit(current_token).result() is None
+
+
+class TestDisconnect:
+    """Test disconnect detection and abandoning threadpool work"""
+
+    async def test_disconnect_cancels_running_work(self, monkeypatch):
+        monkeypatch.setattr(settings, "DISCONNECT_POLL_SECONDS", 0.05)
+        started = time.monotonic()
+        with pytest.raises(RequestCancelledError):
+            async with cancel_on_disconnect(FakeRequest(disconnect_after=0.1), "test") as token:
+                await run_cancellable(interruptible_sleep, 5)
+        assert token.cancelled
+        assert time.monotonic() - started < 1
+
+    async def test_completed_work_returns_normally(self, monkeypatch):
+        monkeypatch.setattr(settings, "DISCONNECT_POLL_SECONDS", 0.05)
+        async with cancel_on_disconnect(FakeRequest(disconnect_after=60), "test"):
+            assert await run_cancellable(lambda: 42) == 42
+
+
+class TestCancelledWork:
+    """Test that LLM calls and LaTeX compilation stop on cancellation"""
+
+    def test_cancelled_request_never_reaches_provider(self, token):
+        class Completions:
+            calls = 0
+
+            def create(self, **kwargs):
+                Completions.calls += 1
+
+        client = LLMClient()
+        client.client.chat.completions = Completions()
+        token.cancel()
+        with pytest.raises(RequestCancelledError):
+            client.complete([{"role": "user", "content": "hi"}], temperature=0, max_tokens=10)
+        assert Completions.calls == 0
+
+    def test_latex_subprocess_is_killed(self, token):
+        threading.Timer(0.2, token.cancel).start()
+        started = time.monotonic()
+        with pytest.raises(RequestCancelledError):
+            LaTeXService()._run_cancellable(["sleep", "10"], timeout=30)
+        assert time.monotonic() - started < 2
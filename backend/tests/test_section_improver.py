@@ -0,0 +1,80 @@
+"""
+Tests for section-parallel resume improvement
+"""
+import pytest
+
+from app.core.local_cache import LocalCache
+from app.services.section_improver import SectionImprover, SECTIONS
+
+
+RESUME = """Jane Smith
+jane@example.com | 555-123-4567
+
+EXPERIENCE
+Backend Engineer at Acme 2020-2023
+Built APIs in Python
+
+SKILLS
+Python, SQL
+
+EDUCATION
+BS Computer Science, State University
+"""
+
+
+class FakeRouter:
+    """Answers each section prompt and records which sections were generated"""
+
+    def __init__(self, fail_sections=()):
+        self.calls = []
+        self.fail_sections = set(fail_sections)
+
+    def model_for(self, task):
+        return "test-model"
+
+    def record_cache_hit(self, task, latency_ms):
+        pass
+
+    def complete(self, task, messages, temperature, max_tokens, priority):
+        prompt = messages[-1]["content"]
+        section = next(name for name, spec in SECTIONS.items()
+                       if f"Rewrite the {spec['title']} section" in prompt)
+        self.calls.append(section)
+        if section in self.fail_sections:
+            raise ValueError("bad output")
+        if section == "header":
+            return "NAME: Jane Smith\nCONTACT: jane@example.com"
+        if section == "skills":
+            return "TECHNICAL: Python, SQL, Docker\nSOFT: Communication"
+        return f"```latex\n{section} content\n```"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LocalCache(str(tmp_path / "sections.sqlite3"))
+
+
+class TestSectionImprover:
+    """Test per-section generation, caching and isolation"""
+
+    def test_assembles_all_template_fields(self, cache):
+        router = FakeRouter()
+        data = SectionImprover(router=router, cache=cache).improve(RESUME, "JD", ["Docker"], ["microservices"])
+        assert data["name"] == "Jane Smith"
+        assert data["technical_skills"] == "Python, SQL, Docker"
+        assert data["experience"] == "experience content"
+        assert sorted(router.calls) == sorted(SECTIONS)
+
+    def test_gap_change_only_redoes_affected_sections(self, cache):
+        SectionImprover(router=FakeRouter(), cache=cache).improve(RESUME, "JD", ["Docker"], ["microservices"])
+
+        router = FakeRouter()
+        SectionImprover(router=router, cache=cache).improve(RESUME, "JD", ["Docker"], ["microservices", "kafka"])
+        # keyword-only change touches objective and experience, not skills/projects/education
+        assert sorted(router.calls) == ["experience", "objective"]
+
+    def test_failed_section_keeps_original_text(self, cache):
+        router = FakeRouter(fail_sections={"education"})
+        data = SectionImprover(router=router, cache=cache).improve(RESUME, "JD", [], [])
+        assert "State University" in data["education"]
+        assert data["experience"] == "experience content"
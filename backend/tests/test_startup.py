@@ -0,0 +1,60 @@
+"""
+Tests for application startup: lazy imports, schema creation and warm-up
+"""
+import os
+import subprocess
+import sys
+
+from sqlalchemy import create_engine
+
+from app.database import database
+from app.database.database import Base, init_db
+from app.startup import warm_up
+
+
+class TestLazyImports:
+    """Test that heavy SDKs are imported on first use, not at startup"""
+
+    def test_app_import_skips_heavy_sdks(self):
+        heavy = ["groq", "supabase", "PyPDF2", "docx", "sentry_sdk"]
+        result = subprocess.run(
+            [sys.executable, "-c", f"import sys, app.main; print([m for m in {heavy!r} if m in sys.modules])"],
+            cwd=os.path.dirname(os.path.dirname(__file__)),
+            env={**os.environ, "SENTRY_DSN": ""},
+            capture_output=True, text=True, check=True,
+        )
+        assert result.stdout.strip().splitlines()[-1] == "[]"
+
+    def test_parser_imports_backend_on_use(self, tmp_path):
+        from docx import Document
+        from app.services.resume_parser import ResumeParser
+
+        path = tmp_path / "cv.docx"
+        document = Document()
+        document.add_paragraph("Python developer")
+        document.save(path)
+        assert ResumeParser().extract_text(str(path)) == "Python developer"
+
+
+class TestInitDb:
+    """Test that create_all only runs when tables are missing"""
+
+    def test_skips_create_all_when_schema_exists(self, tmp_path, monkeypatch):
+        engine = create_engine(f"sqlite:///{tmp_path / 'init.db'}")
+        monkeypatch.setattr(database, "engine", engine)
+        calls = []
+        create_all = Base.metadata.create_all
+        monkeypatch.setattr(Base.metadata, "create_all", lambda **kw: calls.append(1) or create_all(**kw))
+
+        init_db()
+        init_db()
+        assert calls == [1]
+
+
+class TestWarmUp:
+    """Test the optional startup warm-up"""
+
+    async def test_times_every_step(self):
+        timings = await warm_up()
+        assert set(timings) == {"parser", "llm_client", "supabase", "db_pool", "async_db_pool"}
+        assert all(seconds >= 0 for seconds in timings.values())
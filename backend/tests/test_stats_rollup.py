@@ -0,0 +1,137 @@
+"""
+Tests for the incrementally maintained per-user daily stats rollup
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.auth.auth import create_user
+from app.database.models import Analysis, UserDailyStats
+from app.database.stats_rollup import rebuild
+
+
+NOW = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0)
+LATEX = r"\documentclass{article}"
+
+
+@pytest.fixture
+def add_analysis(make_analysis):
+    def add(score=None, days_ago=0, improved=False):
+        return make_analysis(match_score=score, improved_latex=LATEX if improved else None,
+                             created_at=NOW - timedelta(days=days_ago))
+    return add
+
+
+def rollup(db_session):
+    """Every rollup row as {(user_id, day): {column: value}}"""
+    db_session.expire_all()
+    columns = [c.name for c in UserDailyStats.__table__.columns if c.name not in ("user_id", "day")]
+    return {
+        (row.user_id, row.day): {name: getattr(row, name) for name in columns}
+        for row in db_session.execute(select(UserDailyStats)).scalars()
+    }
+
+
+def assert_matches_rebuild(db_session):
+    incremental = rollup(db_session)
+    rebuild(db_session)
+    assert rollup(db_session) == {key: row for key, row in incremental.items() if row["analyses"]}
+
+
+class TestIncrementalRollup:
+    """Test that ORM writes keep the rollup equal to a full recomputation"""
+
+    def test_new_analyses(self, db_session, user, add_analysis):
+        add_analysis(20.0)
+        add_analysis(95.0, improved=True)
+        add_analysis(None)
+        add_analysis(60.0, days_ago=3)
+
+        row = rollup(db_session)[(user.id, NOW.date())]
+        assert row["analyses"] == 3
+        assert row["scored"] == 2
+        assert row["score_sum"] == 115.0
+        assert row["score_max"] == 95.0
+        assert row["improved"] == 1
+        assert (row["score_0_20"], row["score_81_100"]) == (1, 1)
+        assert_matches_rebuild(db_session)
+
+    def test_score_set_after_analysis(self, db_session, user, add_analysis):
+        # The analyze pipeline creates the row first and fills the score in later
+        analysis = add_analysis(None)
+        analysis.match_score = 72.0
+        db_session.commit()
+
+        row = rollup(db_session)[(user.id, NOW.date())]
+        assert (row["scored"], row["score_sum"], row["score_max"], row["score_61_80"]) == (1, 72.0, 72.0, 1)
+        assert_matches_rebuild(db_session)
+
+    def test_rescore_moves_bucket_and_lowers_max(self, db_session, user, add_analysis):
+        add_analysis(50.0)
+        analysis = add_analysis(90.0)
+        analysis.match_score = 30.0
+        db_session.commit()
+
+        row = rollup(db_session)[(user.id, NOW.date())]
+        assert (row["score_sum"], row["score_max"]) == (80.0, 50.0)
+        assert (row["score_21_40"], row["score_81_100"]) == (1, 0)
+        assert_matches_rebuild(db_session)
+
+    def test_improved_latex_edits(self, db_session, user, add_analysis):
+        analysis = add_analysis(85.0)
+        analysis.improved_latex = LATEX
+        db_session.commit()
+        # Editor saves replace the LaTeX without changing the count
+        analysis.improved_latex = LATEX + "%"
+        db_session.commit()
+
+        row = rollup(db_session)[(user.id, NOW.date())]
+        assert (row["improved"], row["scored"], row["score_max"]) == (1, 1, 85.0)
+        assert_matches_rebuild(db_session)
+
+    def test_delete_recomputes_max(self, db_session, user, add_analysis):
+        add_analysis(40.0)
+        best = add_analysis(88.0, improved=True)
+        db_session.delete(best)
+        db_session.commit()
+
+        row = rollup(db_session)[(user.id, NOW.date())]
+        assert (row["analyses"], row["improved"], row["score_max"], row["score_81_100"]) == (1, 0, 40.0, 0)
+        assert_matches_rebuild(db_session)
+
+    def test_rolled_back_flush_leaves_no_pending_changes(self, db_session, user, add_analysis):
+        analysis = add_analysis(50.0)
+        analysis.match_score = 70.0
+        db_session.add(Analysis(user_id=user.id, resume_id=None, job_description_id=None, match_score=10.0,
+                                created_at=NOW))
+        with pytest.raises(IntegrityError):
+            db_session.commit()
+        db_session.rollback()
+        analysis.improved_latex = LATEX
+        db_session.commit()
+
+        row = rollup(db_session)[(user.id, NOW.date())]
+        assert (row["analyses"], row["score_sum"], row["improved"]) == (1, 50.0, 1)
+        assert_matches_rebuild(db_session)
+
+
+class TestRebuild:
+    """Test the rebuild used for backfills"""
+
+    def test_rebuilds_one_user(self, db_session, user, add_analysis):
+        add_analysis(30.0)
+        add_analysis(70.0, days_ago=1, improved=True)
+        other = create_user(db_session, email="other@example.com", username="other", password="Password123!")
+        db_session.query(UserDailyStats).delete()
+        db_session.add(UserDailyStats(user_id=other.id, day=NOW.date(), analyses=1))
+        db_session.commit()
+
+        rebuilt = rebuild(db_session, user_id=user.id)
+
+        rows = rollup(db_session)
+        assert rebuilt == 2
+        assert rows[(user.id, (NOW - timedelta(days=1)).date())]["improved"] == 1
+        # Other users' rows are left as they were
+        assert rows[(other.id, NOW.date())]["analyses"] == 1
@@ -0,0 +1,110 @@
+"""
+Tests for the shared Supabase client and the storage dependency
+"""
+import pytest
+
+from app.auth.auth import create_access_token, create_user
+from app.config import settings
+from app.core import metrics
+from app.database.models import Analysis, JobDescription, Resume
+from app.main import app
+from app.services import supabase_client
+from app.services.supabase_client import close_supabase_client, get_supabase_client, timed_call
+from app.services.supabase_storage import SupabaseStorage, get_storage
+
+
+@pytest.fixture
+def fresh_client(monkeypatch):
+    monkeypatch.setattr(settings, "SUPABASE_URL", "http://localhost:54321")
+    monkeypatch.setattr(settings, "SUPABASE_SERVICE_ROLE_KEY", "header.payload.signature")
+    monkeypatch.setattr(supabase_client, "_client", None)
+    yield
+    close_supabase_client()
+
+
+class FakeBucket:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def create_signed_url(self, path, expires_in):
+        self.calls.append(path)
+        return {"signedURL": f"https://storage.example/{path}?token=abc"}
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+        self.storage = self
+
+    def from_(self, bucket):
+        return FakeBucket(self.calls)
+
+
+class TestSharedClient:
+    """Test the process-wide client"""
+
+    def test_client_is_created_once(self, fresh_client):
+        client = get_supabase_client()
+        assert get_supabase_client() is client
+        assert SupabaseStorage().client is client
+
+    def test_close_releases_sessions(self, fresh_client):
+        client = get_supabase_client()
+        close_supabase_client()
+        assert client.postgrest.session.is_closed
+        assert client.storage.session.is_closed
+        assert get_supabase_client() is not client
+
+    def test_construction_does_not_need_configuration(self, monkeypatch):
+        monkeypatch.setattr(supabase_client, "_client", None)
+        monkeypatch.setattr(settings, "SUPABASE_SERVICE_ROLE_KEY", "not-a-jwt")
+        storage = get_storage()  # resolved on first call, so injecting it never fails
+        with pytest.raises(Exception):
+            storage.client
+
+
+class TestTimedCall:
+    """Test per-call timing"""
+
+    async def test_records_latency_and_errors(self):
+        histogram = metrics.histogram("supabase.test_op.seconds")
+        errors = metrics.counter("supabase.test_op.errors")
+        before_count, before_errors = histogram.count, errors.value
+        assert await timed_call("test_op", lambda x: x * 2, 21) == 42
+
+        def boom():
+            raise RuntimeError("down")
+
+        with pytest.raises(RuntimeError):
+            await timed_call("test_op", boom)
+        assert histogram.count == before_count + 2
+        assert errors.value == before_errors + 1
+
+    def test_metrics_endpoint(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "ops-secret")
+        headers = {"X-Metrics-Token": "ops-secret"}
+        metrics.histogram("supabase.storage.upload.seconds").observe(0.05)
+        body = client.get("/api/metrics/supabase", headers=headers).json()
+        assert body["histograms"]["supabase.storage.upload.seconds"]["count"] >= 1
+
+
+class TestStorageDependency:
+    """Test routes using the injected storage"""
+
+    def test_download_uses_injected_storage(self, client, db_session, monkeypatch):
+        fake = FakeClient()
+        monkeypatch.setitem(app.dependency_overrides, get_storage, lambda: SupabaseStorage(client=fake))
+        user = create_user(db_session, email="dl@example.com", username="dl", password="Password123!")
+        resume = Resume(user_id=user.id, filename="cv.pdf", file_path="cv.pdf", storage_path=f"{user.id}/cv.pdf")
+        job_desc = JobDescription(title="Engineer", description="Python")
+        db_session.add_all([resume, job_desc])
+        db_session.flush()
+        analysis = Analysis(user_id=user.id, resume_id=resume.id, job_description_id=job_desc.id)
+        db_session.add(analysis)
+        db_session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+
+        response = client.get(f"/api/download/original/{analysis.id}", headers=headers, follow_redirects=False)
+        assert response.status_code == 307
+        assert response.headers["location"].startswith(f"https://storage.example/{user.id}/cv.pdf")
+        assert fake.calls == [f"{user.id}/cv.pdf"]
@@ -0,0 +1,162 @@
+"""
+Tests for the async stage graph and the analyze pipeline built on it
+"""
+import asyncio
+import io
+import time
+
+import pytest
+
+from app.api import analysis_routes
+from app.auth.auth import create_access_token, create_user
+from app.core.exceptions import AIServiceError
+from app.core.task_graph import TaskGraph
+from app.database.models import Analysis, JobDescription, Resume
+from app.main import app
+from app.services.realtime_service import get_realtime_service
+from app.services.supabase_storage import get_storage
+
+
+def _sleeper(seconds, result=None):
+    async def stage(*inputs):
+        await asyncio.sleep(seconds)
+        return result if result is not None else inputs
+    return stage
+
+
+class TestTaskGraph:
+    """Test scheduling, compensation and timing"""
+
+    async def test_independent_stages_overlap(self):
+        graph = TaskGraph("test")
+        graph.add("a", _sleeper(0.2, "a"))
+        graph.add("b", _sleeper(0.2, "b"))
+        graph.add("c", _sleeper(0, None), after=["a", "b"])
+        started = time.monotonic()
+        results = await graph.run()
+        assert time.monotonic() - started < 0.35
+        assert results["c"] == ("a", "b")
+
+    async def test_critical_path_follows_slowest_dependency(self):
+        graph = TaskGraph("test")
+        graph.add("fast", _sleeper(0.01, 1))
+        graph.add("slow", _sleeper(0.15, 2))
+        graph.add("next", _sleeper(0.01, 3), after=["fast"])
+        graph.add("end", _sleeper(0, 4), after=["next", "slow"])
+        await graph.run()
+        assert graph.critical_path() == ["slow", "end"]
+        assert 'critical;dur=' in graph.server_timing()
+        assert graph.timings()["end"]["start"] >= graph.timings()["slow"]["end"]
+
+    async def test_failure_cancels_and_undoes(self):
+        undone, cancelled = [], []
+
+        async def slow():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append("slow")
+                raise
+
+        async def boom(_):
+            raise AIServiceError("provider down")
+
+        graph = TaskGraph("test")
+        graph.add("first", _sleeper(0, "one"), undo=lambda result: undone.append(("first", result)))
+        graph.add("second", _sleeper(0.01, "two"), after=["first"], undo=lambda result: undone.append(("second", result)))
+        graph.add("slow", slow, undo=lambda result: undone.append("slow"))
+        graph.add("boom", boom, after=["second"])
+        started = time.monotonic()
+        with pytest.raises(AIServiceError):
+            await graph.run()
+        assert time.monotonic() - started < 1
+        assert cancelled == ["slow"]
+        assert undone == [("second", "two"), ("first", "one")]
+
+    def test_unknown_dependency_is_rejected(self):
+        with pytest.raises(ValueError):
+            TaskGraph("test").add("b", _sleeper(0), after=["a"])
+
+
+class FakeStorage:
+    uploads, deletes = [], []
+
+    async def upload_resume(self, file_path, file_content, user_id):
+        await asyncio.sleep(0.1)
+        self.uploads.append(file_path)
+        return f"{user_id}/{file_path}"
+
+    async def delete_file(self, bucket, path):
+        self.deletes.append(path)
+
+
+class FakeRealtime:
+    async def update_analysis_progress(self, analysis_id, status, percentage):
+        return None
+
+    async def broadcast_completion(self, analysis_id, data):
+        return None
+
+
+class FakeParser:
+    def parse_resume(self, path):
+        return {"raw_text": "Python developer with FastAPI experience"}
+
+
+class FakeAnalyzer:
+    fail = False
+
+    def analyze_resume_jd_match(self, resume_text, jd_text):
+        time.sleep(0.1)
+        if self.fail:
+            # After the upload and row commits, so their undo steps run
+            time.sleep(0.2)
+            raise AIServiceError("provider down")
+        return {"match_score": 70.0, "matched_skills": ["Python"], "missing_skills": [], "matched_keywords": [],
+                "missing_keywords": [], "improvements": [], "summary": "Good fit."}
+
+
+@pytest.fixture
+def pipeline(monkeypatch, client, db_session):
+    FakeStorage.uploads, FakeStorage.deletes = [], []
+    FakeAnalyzer.fail = False
+    monkeypatch.setitem(app.dependency_overrides, get_storage, FakeStorage)
+    monkeypatch.setitem(app.dependency_overrides, get_realtime_service, FakeRealtime)
+    monkeypatch.setattr(analysis_routes, "ResumeParser", FakeParser)
+    monkeypatch.setattr(analysis_routes, "GroqAnalyzer", FakeAnalyzer)
+    user = create_user(db_session, email="graph@example.com", username="graph", password="Password123!")
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+
+    def post():
+        return client.post(
+            "/api/analyze",
+            headers=headers,
+            files={"resume_file": ("resume.pdf", io.BytesIO(b"%PDF-1.4 fake"), "application/pdf")},
+            data={"jd_text": "Python backend engineer"},
+        )
+    return post
+
+
+class TestAnalyzePipeline:
+    """Test the analyze endpoint's stage graph"""
+
+    def test_stages_overlap_and_report_timing(self, pipeline, db_session):
+        started = time.monotonic()
+        response = pipeline()
+        assert response.status_code == 201
+        # Upload (0.1s) and the LLM call (0.1s) run concurrently
+        assert time.monotonic() - started < 0.5
+        assert response.json()["match_score"] == 70.0
+        assert "critical;dur=" in response.headers["server-timing"]
+        resume = db_session.query(Resume).one()
+        assert resume.storage_path == f"{resume.user_id}/{FakeStorage.uploads[0]}"
+
+    def test_failed_branch_rolls_everything_back(self, pipeline, db_session):
+        FakeAnalyzer.fail = True
+        response = pipeline()
+        assert response.status_code == 503
+        assert db_session.query(Analysis).count() == 0
+        assert db_session.query(Resume).count() == 0
+        assert db_session.query(JobDescription).count() == 0
+        assert len(FakeStorage.deletes) == 1
+        assert FakeStorage.deletes[0].endswith(FakeStorage.uploads[0])
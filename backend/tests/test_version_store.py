@@ -0,0 +1,273 @@
+"""
+Tests for delta-compressed resume versions
+"""
+import asyncio
+import hashlib
+import zlib
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.core.local_cache import LocalCache
+from app.database.models import ResumeVersion
+from app.services import version_store
+from app.services.version_store import apply_delta, encode, make_delta, recompress
+
+
+BASE = "\\documentclass{article}\n\\begin{document}\n" + "".join(
+    f"\\item Shipped feature {n} for the platform team\n" for n in range(40)
+) + "\\end{document}\n"
+
+
+def edit(text, line, replacement):
+    lines = text.splitlines(keepends=True)
+    lines[line] = replacement + "\n"
+    return "".join(lines)
+
+
+@pytest.fixture
+def analysis(make_analysis):
+    return make_analysis(match_score=60.0)
+
+
+@pytest.fixture
+def texts():
+    """Twelve versions, each editing one line of the one before"""
+    versions = [BASE]
+    for n in range(1, 12):
+        versions.append(edit(versions[-1], 2 + n, f"\\item Led project {n} end to end"))
+    return versions
+
+
+@pytest.fixture
+def statements():
+    """SQL issued on any engine while the test runs"""
+    seen = []
+    listener = lambda conn, cursor, statement, *args: seen.append(statement)
+    event.listen(Engine, "before_cursor_execute", listener)
+    yield seen
+    event.remove(Engine, "before_cursor_execute", listener)
+
+
+def cold_cache(tmp_path):
+    version_store._cache = LocalCache(str(tmp_path / "cold.sqlite3"))
+
+
+def content(client, headers, analysis, version, etag=None):
+    return client.get(f"/api/versions/{analysis.id}/{version['id']}/content",
+                      headers={**headers, **({"If-None-Match": etag} if etag else {})})
+
+
+def stored(db_session, analysis):
+    db_session.expire_all()
+    return db_session.execute(
+        select(ResumeVersion.version_number, ResumeVersion.encoding)
+        .where(ResumeVersion.analysis_id == analysis.id)
+        .order_by(ResumeVersion.version_number)
+    ).all()
+
+
+class TestDeltaEncoding:
+    """Test line deltas and the snapshot policy"""
+
+    @pytest.mark.parametrize("old,new", [
+        (BASE, edit(BASE, 5, "changed")),
+        (BASE, BASE.replace("feature 3", "feature three") + "extra\n"),
+        ("", BASE),
+        (BASE, ""),
+        ("no newline", "no newline\nat the end"),
+    ])
+    def test_round_trip(self, old, new):
+        assert apply_delta(old, make_delta(old, new)) == new
+
+    def test_small_edit_is_a_delta(self):
+        encoding, payload = encode(edit(BASE, 5, "changed"), BASE, 0)
+        assert encoding == version_store.ENCODING_DELTA
+        assert len(payload) < len(zlib.compress(BASE.encode(), 9)) / 4
+
+    def test_first_version_and_interval_are_snapshots(self):
+        assert encode(BASE, None, 0)[0] == version_store.ENCODING_SNAPSHOT
+        changed = edit(BASE, 5, "changed")
+        assert encode(changed, BASE, settings.VERSION_SNAPSHOT_INTERVAL - 2)[0] == version_store.ENCODING_DELTA
+        assert encode(changed, BASE, settings.VERSION_SNAPSHOT_INTERVAL - 1)[0] == version_store.ENCODING_SNAPSHOT
+
+    def test_rewrite_is_a_snapshot(self):
+        rewrite = "".join(f"\\entry{{{n * 7919 % 1000}}} unrelated text\n" for n in range(40))
+        assert encode(rewrite, BASE, 0)[0] == version_store.ENCODING_SNAPSHOT
+
+
+class TestVersionRoutes:
+    """Test the version API over the store"""
+
+    def create(self, client, headers, analysis, texts):
+        return [
+            client.post(f"/api/versions/{analysis.id}", headers=headers, json={"latex_content": text}).json()
+            for text in texts
+        ]
+
+    def test_versions_read_back(self, client, headers, analysis, texts, db_session, tmp_path):
+        created = self.create(client, headers, analysis, texts)
+        assert [v["latex_content"] for v in created] == texts
+
+        # Snapshots at 1 and at each interval, deltas between
+        interval = settings.VERSION_SNAPSHOT_INTERVAL
+        assert [encoding for _, encoding in stored(db_session, analysis)] == [
+            "snapshot" if n % interval == 0 else "delta" for n in range(len(texts))
+        ]
+
+        cold_cache(tmp_path)  # decode from the chain
+        for version, text in zip(created, texts):
+            body = client.get(f"/api/versions/{analysis.id}/{version['id']}", headers=headers).json()
+            assert body["latex_content"] == text
+
+    def test_delete_inside_a_chain(self, client, headers, analysis, texts, tmp_path):
+        created = self.create(client, headers, analysis, texts[:5])
+        for index in (2, 0):  # a delta, then the snapshot it all hangs from
+            assert client.delete(f"/api/versions/{analysis.id}/{created[index]['id']}", headers=headers).status_code == 204
+
+        cold_cache(tmp_path)
+        listed = client.get(f"/api/versions/{analysis.id}", headers=headers).json()
+        assert [content(client, headers, analysis, v).text for v in listed] == [texts[1], texts[3], texts[4]]
+        # Stats now compare against the version that precedes each one
+        assert [(v["lines_added"], v["lines_removed"]) for v in listed] == [(len(BASE.splitlines()), 0), (2, 2), (1, 1)]
+
+    def test_numbers_stay_unique_after_delete(self, client, headers, analysis, texts):
+        created = self.create(client, headers, analysis, texts[:3])
+        client.delete(f"/api/versions/{analysis.id}/{created[0]['id']}", headers=headers)
+        latest = self.create(client, headers, analysis, texts[3:4])[0]
+        assert latest["version_number"] == 4
+
+    def test_reads_hit_the_cache(self, client, headers, analysis, texts, monkeypatch):
+        created = self.create(client, headers, analysis, texts[:4])
+        calls = []
+        monkeypatch.setattr(version_store, "decode_chain", lambda rows: calls.append(rows))
+        body = client.get(f"/api/versions/{analysis.id}/{created[3]['id']}", headers=headers).json()
+        assert body["latex_content"] == texts[3] and calls == []
+
+    def test_diff(self, client, headers, analysis, texts):
+        created = self.create(client, headers, analysis, texts[:3])
+        response = client.get(f"/api/versions/{analysis.id}/diff", headers=headers, params={
+            "from_version_id": created[0]["id"], "to_version_id": created[2]["id"]
+        })
+        body = response.json()
+        assert (body["from_version"], body["to_version"]) == (1, 3)
+        assert (body["lines_added"], body["lines_removed"]) == (2, 2)
+        assert "+\\item Led project 2 end to end" in body["diff"]
+
+        missing = client.get(f"/api/versions/{analysis.id}/diff", headers=headers,
+                             params={"from_version_id": created[0]["id"], "to_version_id": 999})
+        assert missing.status_code == 404
+
+
+class TestVersionListing:
+    """Test the content-free listing and the ETagged content and diff endpoints"""
+
+    def test_listing_reads_no_content(self, client, headers, analysis, texts, statements):
+        for text in texts[:3]:
+            client.post(f"/api/versions/{analysis.id}", headers=headers, json={"latex_content": text})
+        statements.clear()
+        listed = client.get(f"/api/versions/{analysis.id}", headers=headers).json()
+
+        assert "latex_content" not in listed[0]
+        assert [(v["lines_added"], v["lines_removed"]) for v in listed] == [(len(BASE.splitlines()), 0), (1, 1), (1, 1)]
+        assert [v["size"] for v in listed] == [len(text.encode()) for text in texts[:3]]
+        assert [v["content_hash"] for v in listed] == [hashlib.sha256(text.encode()).hexdigest() for text in texts[:3]]
+        reads = [s for s in statements if "FROM resume_versions" in s]
+        assert len(reads) == 1 and "payload" not in reads[0] and "latex_content" not in reads[0]
+
+    def test_content_etag(self, client, headers, analysis, texts, monkeypatch):
+        version = client.post(f"/api/versions/{analysis.id}", headers=headers, json={"latex_content": texts[0]}).json()
+        response = content(client, headers, analysis, version)
+        assert response.text == texts[0]
+        assert response.headers["etag"] == f'"{hashlib.sha256(texts[0].encode()).hexdigest()}"'
+
+        # A match is answered from the stored hash, without reading the content
+        monkeypatch.setattr(version_store, "get_version_cache", None)
+        again = content(client, headers, analysis, version, etag=response.headers["etag"])
+        assert again.status_code == 304 and again.content == b""
+
+    def test_diff_etag(self, client, headers, analysis, texts):
+        created = [
+            client.post(f"/api/versions/{analysis.id}", headers=headers, json={"latex_content": text}).json()
+            for text in texts[:2]
+        ]
+        params = {"from_version_id": created[0]["id"], "to_version_id": created[1]["id"]}
+        response = client.get(f"/api/versions/{analysis.id}/diff", headers=headers, params=params)
+        etag = response.headers["etag"]
+        again = client.get(f"/api/versions/{analysis.id}/diff", headers={**headers, "If-None-Match": etag}, params=params)
+        assert again.status_code == 304
+
+        params = {"from_version_id": created[1]["id"], "to_version_id": created[0]["id"]}
+        reverse = client.get(f"/api/versions/{analysis.id}/diff", headers={**headers, "If-None-Match": etag}, params=params)
+        assert reverse.status_code == 200 and reverse.headers["etag"] != etag
+
+
+class TestConcurrentSaves:
+    """Test that saves racing on the same analysis both get a number"""
+
+    async def test_racing_saves_get_consecutive_numbers(self, analysis, texts, db_session, monkeypatch, tmp_path):
+        db_session.add(ResumeVersion(analysis_id=analysis.id, version_number=1, latex_content=texts[0]))
+        db_session.commit()
+
+        # Hold both saves after they have read the same latest version
+        arrived, both = [], asyncio.Event()
+        chain_length = version_store._chain_length
+
+        async def racing_chain_length(*args):
+            result = await chain_length(*args)
+            if len(arrived) < 2:
+                arrived.append(True)
+                if len(arrived) == 2:
+                    both.set()
+                await both.wait()
+            return result
+
+        monkeypatch.setattr(version_store, "_chain_length", racing_chain_length)
+        engine = create_async_engine(str(db_session.get_bind().url).replace("sqlite://", "sqlite+aiosqlite://"))
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+        async def save(text):
+            async with sessions() as db:
+                version, _ = await version_store.save_version(db, analysis.id, text)
+                return version.version_number
+
+        numbers = await asyncio.gather(save(texts[1]), save(texts[2]))
+        assert sorted(numbers) == [2, 3]
+
+        # Each is encoded against the version that really precedes it
+        cold_cache(tmp_path)
+        async with sessions() as db:
+            decoded = dict((version.version_number, text) for version, text in await version_store.read_versions(db, analysis.id))
+        await engine.dispose()
+        assert decoded == {1: texts[0], numbers[0]: texts[1], numbers[1]: texts[2]}
+
+
+class TestRecompress:
+    """Test re-encoding versions stored before the store"""
+
+    async def test_legacy_rows_are_reencoded(self, analysis, texts, db_session):
+        db_session.add_all([
+            ResumeVersion(analysis_id=analysis.id, version_number=n + 1, latex_content=text)
+            for n, text in enumerate(texts)
+        ])
+        db_session.commit()
+
+        engine = create_async_engine(str(db_session.get_bind().url).replace("sqlite://", "sqlite+aiosqlite://"))
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        async with sessions() as db:
+            count, plain, size = await recompress(db)
+        assert count == len(texts) and size < plain / 5
+
+        assert "text" not in {encoding for _, encoding in stored(db_session, analysis)}
+        stats = db_session.execute(
+            select(ResumeVersion.lines_added, ResumeVersion.lines_removed)
+            .where(ResumeVersion.analysis_id == analysis.id)
+            .order_by(ResumeVersion.version_number)
+        ).all()
+        assert stats[1:] == [(1, 1)] * (len(texts) - 1)
+        async with sessions() as db:
+            assert [text for _, text in await version_store.read_versions(db, analysis.id)] == texts
+        await engine.dispose()
@@ -4,18 +4,26 @@ import { useState, useEffect } from 'react';
 import { useAuth } from '@/app/context/AuthContext';
 import { useRouter } from 'next/navigation';
 import axios from 'axios';
+import { fetchAllHistory } from '@/lib/history';
 import { ArrowLeft, GitCompare } from 'lucide-react';
 import Link from 'next/link';
 import ComparisonView from '@/components/comparison/ComparisonView';
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
-interface Version {
+interface VersionSummary {
     id: number;
     version_number: number;
-    latex_content: string;
     description: string | null;
     created_at: string;
+    size: number | null;
+    lines_added: number | null;
+    lines_removed: number | null;
+    content_hash: string | null;
+}
+
+interface Version extends VersionSummary {
+    latex_content: string;
 }
 
 export default function ComparePage() {
@@ -23,10 +31,10 @@ export default function ComparePage() {
     const router = useRouter();
     const [analyses, setAnalyses] = useState<any[]>([]);
     const [selectedAnalysis, setSelectedAnalysis] = useState<string>('');
-    const [versions, setVersions] = useState<Version[]>([]);
+    const [versions, setVersions] = useState<VersionSummary[]>([]);
     const [version1, setVersion1] = useState<string>('');
     const [version2, setVersion2] = useState<string>('');
-    const [isComparing, setIsComparing] = useState(false);
+    const [compared, setCompared] = useState<[Version, Version] | null>(null);
     const [isLoading, setIsLoading] = useState(true);
 
     useEffect(() => {
@@ -43,10 +51,8 @@ export default function ComparePage() {
 
     const fetchAnalyses = async () => {
         try {
-            const response = await axios.get(`${API_URL}/api/profile/history`, {
-                headers: { Authorization: `Bearer ${token}` }
-            });
-            setAnalyses(response.data.history);
+            // The picker lists every analysis, not just the first page
+            setAnalyses(await fetchAllHistory(token!));
         } catch (error) {
             console.error('Error fetching analyses:', error);
         } finally {
@@ -66,19 +72,31 @@ export default function ComparePage() {
         }
     };
 
-    const handleCompare = () => {
-        if (version1 && version2 && version1 !== version2) {
-            setIsComparing(true);
+    // The list has no content: fetch the two versions being compared
+    const fetchContent = async (version: VersionSummary): Promise<Version> => {
+        const response = await axios.get(`${API_URL}/api/versions/${selectedAnalysis}/${version.id}/content`, {
+            headers: { Authorization: `Bearer ${token}` },
+            responseType: 'text'
+        });
+        return { ...version, latex_content: response.data };
+    };
+
+    const handleCompare = async () => {
+        const selected1 = getVersionById(version1);
+        const selected2 = getVersionById(version2);
+        if (selected1 && selected2 && version1 !== version2) {
+            try {
+                setCompared(await Promise.all([fetchContent(selected1), fetchContent(selected2)]) as [Version, Version]);
+            } catch (error) {
+                console.error('Error fetching version content:', error);
+            }
         }
     };
 
-    const getVersionById = (id: string): Version | undefined => {
+    const getVersionById = (id: string): VersionSummary | undefined => {
         return versions.find(v => v.id.toString() === id);
     };
 
-    const selectedVersion1 = version1 ? getVersionById(version1) : undefined;
-    const selectedVersion2 = version2 ? getVersionById(version2) : undefined;
-
     if (isLoading) {
         return (
             <div className="min-h-screen flex items-center justify-center">
@@ -190,11 +208,11 @@ export default function ComparePage() {
             </div>
 
             {/* Comparison Modal */}
-            {isComparing && selectedVersion1 && selectedVersion2 && (
+            {compared && (
                 <ComparisonView
-                    version1={selectedVersion1}
-                    version2={selectedVersion2}
-                    onClose={() => setIsComparing(false)}
+                    version1={compared[0]}
+                    version2={compared[1]}
+                    onClose={() => setCompared(null)}
                 />
             )}
         </div>
@@ -30,9 +30,10 @@ export default function DashboardPage() {
     const fetchRecentAnalyses = async () => {
         try {
             const response = await axios.get(`${API_URL}/api/profile/history`, {
-                headers: { Authorization: `Bearer ${token}` }
+                headers: { Authorization: `Bearer ${token}` },
+                params: { limit: 5 }
             });
-            setRecentAnalyses(response.data.history.slice(0, 5));
+            setRecentAnalyses(response.data.history);
         } catch (error) {
             console.error('Error fetching analyses:', error);
         } finally {
@@ -4,6 +4,7 @@ import { useEffect, useState } from 'react';
 import { useAuth } from '@/app/context/AuthContext';
 import Link from 'next/link';
 import axios from 'axios';
+import { fetchAllHistory } from '@/lib/history';
 import { TrendingUp, Calendar, FileText, Search, Download } from 'lucide-react';
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
@@ -36,11 +37,11 @@ export default function HistoryPage() {
 
     const fetchHistory = async () => {
         try {
-            const response = await axios.get(`${API_URL}/api/profile/history`, {
-                headers: { Authorization: `Bearer ${token}` }
+            // Every page, so search covers the whole history; rows show as pages arrive
+            await fetchAllHistory(token!, (rows) => {
+                setAnalyses(rows as any);
+                setIsLoading(false);
             });
-            setAnalyses(response.data.history);
-            setFilteredAnalyses(response.data.history);
         } catch (error) {
             console.error('Error fetching history:', error);
         } finally {
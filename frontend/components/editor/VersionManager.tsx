@@ -9,9 +9,12 @@ const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 interface Version {
     id: number;
     version_number: number;
-    latex_content: string;
     description: string | null;
     created_at: string;
+    size: number | null;
+    lines_added: number | null;
+    lines_removed: number | null;
+    content_hash: string | null;
 }
 
 interface VersionManagerProps {
@@ -127,6 +130,9 @@ export default function VersionManager({
                                     <p className="text-xs text-gray-500 dark:text-gray-400 mt-1">
                                         {new Date(version.created_at).toLocaleDateString()} at{' '}
                                         {new Date(version.created_at).toLocaleTimeString()}
+                                        {version.lines_added !== null && version.lines_removed !== null && (
+                                            <> · +{version.lines_added} −{version.lines_removed}</>
+                                        )}
                                     </p>
                                 </div>
                             </div>
@@ -0,0 +1,33 @@
+/**
+ * Analysis history client
+ * GET /api/profile/history is keyset-paginated: follow next_cursor for more
+ */
+import axios from 'axios';
+
+const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+
+const PAGE_SIZE = 100;
+
+/**
+ * Load every page of the history, newest first
+ * onPage receives the rows loaded so far after each page, so the first
+ * page can be shown while the rest arrive
+ */
+export async function fetchAllHistory(token: string, onPage?: (rows: any[]) => void): Promise<any[]> {
+    const rows: any[] = [];
+    let cursor: string | null = null;
+    do {
+        const params: Record<string, string | number> = { limit: PAGE_SIZE };
+        if (cursor) {
+            params.cursor = cursor;
+        }
+        const response = await axios.get(`${API_URL}/api/profile/history`, {
+            headers: { Authorization: `Bearer ${token}` },
+            params
+        });
+        rows.push(...response.data.history);
+        onPage?.([...rows]);
+        cursor = response.data.next_cursor;
+    } while (cursor);
+    return rows;
+}